@@ -2,16 +2,87 @@
 import os
 from pathlib import Path
 from pydantic import BaseModel
-from dotenv import load_dotenv
 
-ROOT_ENV = Path(__file__).resolve().parents[3] / ".env"
-load_dotenv(dotenv_path=ROOT_ENV, override=True)
+ROOT_DIR = Path(__file__).resolve().parents[3]
+ROOT_ENV = ROOT_DIR / ".env"
+if ROOT_ENV.is_file():  # containers get their env from the orchestrator; skip the import there
+    from dotenv import load_dotenv
+
+    load_dotenv(dotenv_path=ROOT_ENV, override=True)
 
 class Settings(BaseModel):
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_CHAT_MODEL: str = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")  # any OpenAI-compatible endpoint; empty = api.openai.com
+    KG_EXTRACTOR_MODE: str = os.getenv("KG_EXTRACTOR_MODE", "mock").lower()  # "llm" to use the model
+    LLM_EXTRACT_WORKERS: int = int(os.getenv("LLM_EXTRACT_WORKERS", "4"))
+    LLM_EXTRACT_BATCH_SIZE: int = int(os.getenv("LLM_EXTRACT_BATCH_SIZE", "8"))
+    LLM_EXTRACT_WINDOW_MS: int = int(os.getenv("LLM_EXTRACT_WINDOW_MS", "20"))
+    LLM_EXTRACT_QUEUE_SIZE: int = int(os.getenv("LLM_EXTRACT_QUEUE_SIZE", "1000"))
+    LLM_EXTRACT_TIMEOUT: float = float(os.getenv("LLM_EXTRACT_TIMEOUT", "8"))
+    LLM_EXTRACT_BREAKER_FAILURES: int = int(os.getenv("LLM_EXTRACT_BREAKER_FAILURES", "5"))
+    LLM_EXTRACT_BREAKER_COOLDOWN: float = float(os.getenv("LLM_EXTRACT_BREAKER_COOLDOWN", "30"))
+    NL2CYPHER_CACHE_SIZE: int = int(os.getenv("NL2CYPHER_CACHE_SIZE", "1024"))
+    NL2CYPHER_CACHE_TTL: float = float(os.getenv("NL2CYPHER_CACHE_TTL", "86400"))
+    NL2CYPHER_CACHE_PATH: str = os.getenv("NL2CYPHER_CACHE_PATH", "")  # SQLite file; empty = memory only
+    GRAPH_BACKEND: str = os.getenv("GRAPH_BACKEND", "neo4j").lower()  # neo4j | memory
+    GRAPH_SNAPSHOT_PATH: str = os.getenv("GRAPH_SNAPSHOT_PATH", "")  # memory backend; empty = no persistence
     NEO4J_URI: str = os.getenv("NEO4J_URI", "")
     NEO4J_USER: str = os.getenv("NEO4J_USER", "neo4j")
     NEO4J_PASSWORD: str = os.getenv("NEO4J_PASSWORD", "")
+    NEO4J_MAX_POOL_SIZE: int = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))  # connections per server
+    NEO4J_ACQUISITION_TIMEOUT: float = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60"))  # wait for a free connection
+    NEO4J_MAX_TX_RETRY_TIME: float = float(os.getenv("NEO4J_MAX_TX_RETRY_TIME", "30"))  # managed-transaction retries
+    NEO4J_FETCH_SIZE: int = int(os.getenv("NEO4J_FETCH_SIZE", "1000"))  # records per pull; -1 = all
+    NEO4J_WARM_CONNECTIONS: int = int(os.getenv("NEO4J_WARM_CONNECTIONS", "4"))  # opened in the background at startup
+    NEO4J_WARM_TIMEOUT: float = float(os.getenv("NEO4J_WARM_TIMEOUT", "30"))
+    READYZ_TIMEOUT: float = float(os.getenv("READYZ_TIMEOUT", "2"))  # per dependency check
+    READYZ_CHECK_OPENAI: bool = os.getenv("READYZ_CHECK_OPENAI", "0") not in ("0", "false", "False")
+    READYZ_OPENAI_TTL: float = float(os.getenv("READYZ_OPENAI_TTL", "30"))  # seconds an OpenAI check result is reused
+    GRAPH_RUN_CACHE_ENABLED: bool = os.getenv("GRAPH_RUN_CACHE_ENABLED", "1") not in ("0", "false", "False")
+    GRAPH_RUN_CACHE_MAX_BYTES: int = int(os.getenv("GRAPH_RUN_CACHE_MAX_BYTES", str(64 << 20)))
+    GRAPH_RUN_MAX_ROWS: int = int(os.getenv("GRAPH_RUN_MAX_ROWS", "100000"))
+    QUERY_TIMEOUT: float = float(os.getenv("QUERY_TIMEOUT", "10"))  # seconds; 0 = server default
+    QUERY_GUARD_LIMIT: int = int(os.getenv("QUERY_GUARD_LIMIT", "1000"))  # LIMIT added to LLM reads
+    QUERY_GUARD_EXPLAIN: bool = os.getenv("QUERY_GUARD_EXPLAIN", "0") not in ("0", "false", "False")
+    QUERY_GUARD_MAX_EST_ROWS: int = int(os.getenv("QUERY_GUARD_MAX_EST_ROWS", "1000000"))
+    QUERY_GUARD_PLAN_CACHE_SIZE: int = int(os.getenv("QUERY_GUARD_PLAN_CACHE_SIZE", "1024"))
+    GRAPH_RUN_FETCH_SIZE: int = int(os.getenv("GRAPH_RUN_FETCH_SIZE", "1000"))
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+    INGEST_WRITERS: int = int(os.getenv("INGEST_WRITERS", "4"))  # concurrent write sessions for large upserts; 1 = one transaction
+    INGEST_PARALLEL_MIN: int = int(os.getenv("INGEST_PARALLEL_MIN", "2000"))  # entities/triples before a payload is split
+    INGEST_WRITE_RETRIES: int = int(os.getenv("INGEST_WRITE_RETRIES", "5"))  # per batch, after the driver's own retries
+    INGEST_RETRY_BACKOFF: float = float(os.getenv("INGEST_RETRY_BACKOFF", "0.1"))  # seconds, doubled per attempt
+    WRITE_BEHIND_ENABLED: bool = os.getenv("WRITE_BEHIND_ENABLED", "1") not in ("0", "false", "False")
+    WRITE_BEHIND_WINDOW_MS: int = int(os.getenv("WRITE_BEHIND_WINDOW_MS", "50"))
+    WRITE_BEHIND_MAX_BATCH: int = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "500"))
+    WRITE_BEHIND_QUEUE_SIZE: int = int(os.getenv("WRITE_BEHIND_QUEUE_SIZE", "10000"))
+    WRITE_BEHIND_OVERFLOW: str = os.getenv("WRITE_BEHIND_OVERFLOW", "block")
+    CHANGE_CACHE_ENABLED: bool = os.getenv("CHANGE_CACHE_ENABLED", "1") not in ("0", "false", "False")
+    CHANGE_CACHE_SIZE: int = int(os.getenv("CHANGE_CACHE_SIZE", "200000"))  # entities + triples
+    CHANGE_CACHE_TTL: float = float(os.getenv("CHANGE_CACHE_TTL", "600"))  # bounds staleness from outside writers
+    CHANGE_CACHE_WARM: bool = os.getenv("CHANGE_CACHE_WARM", "0") not in ("0", "false", "False")  # load from graph at startup
+    PROVENANCE_MAX_SOURCES: int = int(os.getenv("PROVENANCE_MAX_SOURCES", "5"))  # source ids kept per relationship
+    GRAPH_VIEW_MAX_NODES: int = int(os.getenv("GRAPH_VIEW_MAX_NODES", "10000"))  # expansion cap per graph_view neighborhood
+    GRAPH_VIEW_CACHE_SIZE: int = int(os.getenv("GRAPH_VIEW_CACHE_SIZE", "64"))  # expanded neighborhoods kept for paging; 0 = expand every page
+    GRAPH_STATS_ENABLED: bool = os.getenv("GRAPH_STATS_ENABLED", "1") not in ("0", "false", "False")
+    GRAPH_STATS_PATH: str = os.getenv("GRAPH_STATS_PATH", str(ROOT_DIR / "data" / "graph_stats.json"))  # empty = not saved
+    GRAPH_STATS_TOP_N: int = int(os.getenv("GRAPH_STATS_TOP_N", "20"))
+    GRAPH_STATS_HUB_SLOTS: int = int(os.getenv("GRAPH_STATS_HUB_SLOTS", "10000"))  # degree counters for non-Person nodes
+    GRAPH_STATS_SAVE_INTERVAL: float = float(os.getenv("GRAPH_STATS_SAVE_INTERVAL", "60"))
+    GRAPH_STATS_RECONCILE_INTERVAL: float = float(os.getenv("GRAPH_STATS_RECONCILE_INTERVAL", "0"))  # full scans; 0 = only on demand
+    SCHEMA_RECONCILE: str = os.getenv("SCHEMA_RECONCILE", "check")  # at startup: off | check | apply
+    SCHEMA_FULLTEXT_NAMES: bool = os.getenv("SCHEMA_FULLTEXT_NAMES", "0") not in ("0", "false", "False")
+    SCHEMA_REL_INDEXES: str = os.getenv("SCHEMA_REL_INDEXES", "")  # e.g. "*.created_at,LIVES_IN.mentions"
+    SCHEMA_WAIT_TIMEOUT: float = float(os.getenv("SCHEMA_WAIT_TIMEOUT", "300"))  # for new indexes to come online
+    CHAT_BATCH_MAX_ITEMS: int = int(os.getenv("CHAT_BATCH_MAX_ITEMS", "1000"))
+    CHAT_BATCH_CONCURRENCY: int = int(os.getenv("CHAT_BATCH_CONCURRENCY", "32"))  # items extracted/answered at once
+    ENTITY_LINK_ENABLED: bool = os.getenv("ENTITY_LINK_ENABLED", "1") not in ("0", "false", "False")
+    ENTITY_LINK_MIN_SCORE: float = float(os.getenv("ENTITY_LINK_MIN_SCORE", "0.5"))  # trigram Dice similarity
+    ENTITY_LINK_TOP_K: int = int(os.getenv("ENTITY_LINK_TOP_K", "3"))  # candidates per mention
+    GAZETTEER_SEED_PATH: str = os.getenv("GAZETTEER_SEED_PATH", str(ROOT_DIR / "data" / "seeds" / "gazetteer.jsonl"))
+    GAZETTEER_LOAD_GRAPH: bool = os.getenv("GAZETTEER_LOAD_GRAPH", "1") not in ("0", "false", "False")
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "False")
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "1000"))  # 0 = no slow-query log
 
 settings = Settings()
@@ -0,0 +1,204 @@
+"""
+Skip graph writes that would not change anything.
+
+The chat path re-sends ``user:<id>`` and the matched places/orgs with every
+message, and each of those becomes a MERGE + ``SET +=`` that takes locks and
+writes transaction log for data the graph already holds. This cache keeps a
+64-bit content hash per entity id (label, name, props) and per triple
+(subj, pred, obj -> props) of what this process last wrote or read from the
+graph; ``upsert`` drops incoming items whose hash matches before building
+any Cypher.
+
+Only matches are trusted, so a cold, evicted or expired entry just means the
+item is written again, which MERGE makes harmless. An entry is recorded only
+after its transaction commits, and for triples only when the label group
+wrote one relationship per row (otherwise an endpoint was missing and
+nothing is known about the rows). Write queries through ``/graph/run`` clear
+the cache; writes that bypass this process (bulk loads, other workers) are
+bounded by CHANGE_CACHE_TTL.
+"""
+from __future__ import annotations
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from app.core.config import settings
+from app.models.graph import Entity, NodeLabel, Triple
+from app.services import metrics
+from app.services.neo4j_async import READ_ACCESS, Statement, astream_cypher
+
+Key = Union[str, Tuple[str, str, str]]  # entity id | (subj, pred, obj)
+
+
+def _props_hash(props: Dict[str, Any]) -> str:
+    return json.dumps(props, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def entity_digest(label: str, name: Optional[str], props: Dict[str, Any]) -> int:
+    return hash((label, name, _props_hash(props)))
+
+
+def triple_digest(props: Dict[str, Any]) -> int:
+    return hash(_props_hash(props))
+
+
+def stored_triple_props(props: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A stored relationship's props as the triple that would leave it
+    unchanged: the upsert keeps ``sources``/``mentions`` instead of
+    ``source``, and re-sending any listed source is a no-op, so the newest
+    one stands in for them.
+    """
+    out = {k: v for k, v in props.items() if k not in ("sources", "mentions")}
+    if props.get("sources"):
+        out["source"] = props["sources"][-1]
+    return out
+
+
+class ChangeCache:
+    def __init__(self, max_entries: int = 200_000, ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Key, Tuple[int, float]]" = OrderedDict()  # digest, expiry
+        self.stats: Dict[str, int] = {
+            "entities_skipped": 0, "entities_written": 0,
+            "triples_skipped": 0, "triples_written": 0,
+            "evictions": 0, "expired": 0, "invalidations": 0, "warmed": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _matches(self, key: Key, digest: int, now: float) -> bool:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if entry[1] <= now:
+            del self._entries[key]
+            self.stats["expired"] += 1
+            return False
+        self._entries.move_to_end(key)
+        return entry[0] == digest
+
+    def _store(self, items: Iterable[Tuple[Key, int]]) -> None:
+        expires = time.monotonic() + self.ttl
+        entries = self._entries
+        for key, digest in items:
+            entries[key] = (digest, expires)
+            entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _count(self, kind: str, skipped: int, written: int) -> None:
+        self.stats[f"{kind}_skipped"] += skipped
+        self.stats[f"{kind}_written"] += written
+        if metrics.enabled():
+            metrics.UPSERT_ITEMS.inc(kind, "skipped", value=skipped)
+            metrics.UPSERT_ITEMS.inc(kind, "written", value=written)
+
+    # -- filtering -----------------------------------------------------------
+
+    def changed_entities(self, entities: Sequence[Entity]) -> List[Entity]:
+        """The entities whose write could change the graph."""
+        if not settings.CHANGE_CACHE_ENABLED:
+            return list(entities)
+        now = time.monotonic()
+        out = [e for e in entities
+               if not self._matches(e.id, entity_digest(e.label.value, e.name, e.props), now)]
+        self._count("entities", len(entities) - len(out), len(out))
+        return out
+
+    def changed_triples(self, triples: Sequence[Triple]) -> List[Triple]:
+        """The triples whose write could change the graph."""
+        if not settings.CHANGE_CACHE_ENABLED:
+            return list(triples)
+        now = time.monotonic()
+        out = [t for t in triples
+               if not self._matches((t.subj, t.pred.value, t.obj), triple_digest(t.props), now)]
+        self._count("triples", len(triples) - len(out), len(out))
+        return out
+
+    # -- recording committed writes ----------------------------------------
+
+    def entities_written(self, entities: Iterable[Entity]) -> None:
+        if settings.CHANGE_CACHE_ENABLED:
+            self._store((e.id, entity_digest(e.label.value, e.name, e.props)) for e in entities)
+
+    def triples_written(self, statements: Sequence[Statement],
+                        results: Sequence[List[Dict[str, Any]]]) -> None:
+        """Record the rows of ``upsert.triple_statements`` groups that wrote every row."""
+        if not settings.CHANGE_CACHE_ENABLED:
+            return
+        for (_, params), rows in zip(statements, results):
+            group = params["rels"]
+            if not rows or rows[0].get("n") != len(group):
+                continue  # some endpoint did not MATCH; those rows wrote nothing
+            self._store(((r["subj"], r["pred"], r["obj"]), triple_digest(r["props"])) for r in group)
+
+    def clear(self) -> None:
+        if self._entries:
+            self.stats["invalidations"] += 1
+        self._entries.clear()
+
+    # -- warm-up -------------------------------------------------------------
+
+    async def warm(self, limit: Optional[int] = None) -> int:
+        """
+        Load hashes of up to ``limit`` (default: the cache size) existing
+        nodes, then relationships, so the first re-sends after a restart are
+        skipped too. Node props exclude ``id`` and ``name``, which the upsert
+        stores outside ``props``; relationship props go through
+        ``stored_triple_props`` so they hash like the compacted triple that
+        ``changed_triples`` sees.
+        """
+        limit = self.max_entries if limit is None else limit
+        labels = [l.value for l in NodeLabel]
+        n = 0
+        nodes = """
+        MATCH (n) WHERE (n:Person OR n:Place OR n:Org OR n:Goal) AND n.id IS NOT NULL
+        RETURN n.id AS id, [l IN labels(n) WHERE l IN $labels][0] AS label,
+               n.name AS name, properties(n) AS props
+        LIMIT $limit
+        """
+        batch: List[Tuple[Key, int]] = []
+        async for row in astream_cypher(nodes, {"labels": labels, "limit": limit},
+                                        name="change_cache_warm", access_mode=READ_ACCESS):
+            props = {k: v for k, v in row["props"].items() if k not in ("id", "name")}
+            batch.append((row["id"], entity_digest(row["label"], row["name"], props)))
+        self._store(batch)
+        n += len(batch)
+        if n < limit:
+            rels = """
+            MATCH (s)-[r]->(o) WHERE s.id IS NOT NULL AND o.id IS NOT NULL
+            RETURN s.id AS subj, type(r) AS pred, o.id AS obj, properties(r) AS props
+            LIMIT $limit
+            """
+            batch = []
+            async for row in astream_cypher(rels, {"limit": limit - n},
+                                            name="change_cache_warm", access_mode=READ_ACCESS):
+                digest = triple_digest(stored_triple_props(row["props"]))
+                batch.append(((row["subj"], row["pred"], row["obj"]), digest))
+            self._store(batch)
+            n += len(batch)
+        self.stats["warmed"] += n
+        return n
+
+    def snapshot(self) -> Dict[str, Any]:
+        seen = {k: self.stats[f"{k}_skipped"] + self.stats[f"{k}_written"] for k in ("entities", "triples")}
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "enabled": settings.CHANGE_CACHE_ENABLED,
+            "entity_skip_rate": round(self.stats["entities_skipped"] / seen["entities"], 4)
+            if seen["entities"] else 0.0,
+            "triple_skip_rate": round(self.stats["triples_skipped"] / seen["triples"], 4)
+            if seen["triples"] else 0.0,
+        }
+
+
+change_cache = ChangeCache(max_entries=settings.CHANGE_CACHE_SIZE, ttl=settings.CHANGE_CACHE_TTL)
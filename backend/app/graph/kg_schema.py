@@ -6,7 +6,7 @@ Lightweight, centralized schema helpers for the knowledge graph.
 """
 from __future__ import annotations
 
-from typing import Iterable, List
+from typing import Any, Dict, Iterable, List, Tuple, Union
 
 from pydantic import ValidationError
 
@@ -16,6 +16,17 @@ from app.models.graph import Entity, IngestRequest, NodeLabel, RelType, Triple
 CANON_LABELS: set[str] = {l.value for l in NodeLabel}
 CANON_RELS: set[str] = {r.value for r in RelType}
 
+# (source label, target label, symmetric) per relationship type, as documented
+# in docs/kg-schema.md. Symmetric types are matched without direction.
+REL_ENDPOINTS: Dict[RelType, Tuple[NodeLabel, NodeLabel, bool]] = {
+    RelType.LIVES_IN: (NodeLabel.PERSON, NodeLabel.PLACE, False),
+    RelType.WORKS_AT: (NodeLabel.PERSON, NodeLabel.ORG, False),
+    RelType.FRIEND_OF: (NodeLabel.PERSON, NodeLabel.PERSON, True),
+    RelType.SIBLING_OF: (NodeLabel.PERSON, NodeLabel.PERSON, True),
+    RelType.MET_WITH: (NodeLabel.PERSON, NodeLabel.PERSON, False),
+    RelType.HAS_GOAL: (NodeLabel.PERSON, NodeLabel.GOAL, False),
+}
+
 
 def normalize_entity(e: Entity) -> Entity:
     """
@@ -23,12 +34,14 @@ def normalize_entity(e: Entity) -> Entity:
     - strip whitespace,
     - keep canonical label values (already enforced by Pydantic Enum),
     - ensure props exists (handled by default_factory).
+
+    The copy is shallow: ``props`` is shared with the input, which is never
+    reused after normalization.
     """
-    e = e.copy(deep=True)
-    e.id = e.id.strip()
-    if e.name:
-        e.name = e.name.strip()
-    return e
+    return e.model_copy(update={
+        "id": e.id.strip(),
+        "name": e.name.strip() if e.name else e.name,
+    })
 
 
 def normalize_triple(t: Triple) -> Triple:
@@ -37,10 +50,27 @@ def normalize_triple(t: Triple) -> Triple:
     - strip subj/obj ids,
     - keep canonical relationship names (already enforced by Pydantic Enum).
     """
-    t = t.copy(deep=True)
-    t.subj = t.subj.strip()
-    t.obj = t.obj.strip()
-    return t
+    return t.model_copy(update={"subj": t.subj.strip(), "obj": t.obj.strip()})
+
+
+def validate_item(obj: Dict[str, Any]) -> Union[Entity, Triple]:
+    """
+    Validate and normalize one NDJSON ingest line.
+
+    Lines that carry a ``subj`` key are triples, everything else is an entity.
+
+    Raises:
+        ValueError / ValidationError if the line is not valid.
+    """
+    if not isinstance(obj, dict):
+        raise ValueError("line must be a JSON object")
+    if "subj" in obj:
+        t = normalize_triple(Triple.model_validate(obj))
+        ensure_ids_exist((t.subj, t.obj))
+        return t
+    e = normalize_entity(Entity.model_validate(obj))
+    ensure_ids_exist((e.id,))
+    return e
 
 
 def validate_ingest(payload: IngestRequest) -> IngestRequest:
@@ -0,0 +1,99 @@
+"""
+Resolve node ids to their label before writing relationships.
+
+Neo4j can only use the per-label ``id`` uniqueness constraints when a MATCH
+names the label, so ``upsert_triples`` needs to know each endpoint's label up
+front. Sources, in order of trust:
+
+1. entities that arrive in the same payload,
+2. a bounded id -> label cache fed by every entity upsert,
+3. the ``user:`` / ``person:`` / ``place:`` / ``org:`` / ``goal:`` id prefixes
+   used by ``kg_extractor`` and the extraction prompt,
+4. one index-backed lookup per label for whatever is still unknown.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.graph.kg_schema import CANON_LABELS
+from app.models.graph import NodeLabel
+from app.services.neo4j_async import arun_read
+
+ID_PREFIX_LABELS: Dict[str, str] = {
+    "user": NodeLabel.PERSON.value,
+    "person": NodeLabel.PERSON.value,
+    "place": NodeLabel.PLACE.value,
+    "org": NodeLabel.ORG.value,
+    "goal": NodeLabel.GOAL.value,
+}
+
+CACHE_SIZE = 100_000
+
+_cache: "OrderedDict[str, str]" = OrderedDict()
+
+
+def label_from_prefix(node_id: str) -> Optional[str]:
+    """Return the label implied by an id like ``place:karachi``, if any."""
+    prefix, sep, _ = node_id.partition(":")
+    return ID_PREFIX_LABELS.get(prefix.lower()) if sep else None
+
+
+def remember(pairs: Iterable[Tuple[str, str]]) -> None:
+    """Record (id, label) pairs in the LRU cache."""
+    for node_id, label in pairs:
+        _cache[node_id] = label
+        _cache.move_to_end(node_id)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def cached(node_id: str) -> Optional[str]:
+    label = _cache.get(node_id)
+    if label is not None:
+        _cache.move_to_end(node_id)
+    return label
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
+
+def _lookup_query() -> str:
+    # One UNION branch per canonical label; each branch is an index seek.
+    branches = "\n      UNION\n".join(
+        f"      WITH id MATCH (n:`{label}` {{id:id}}) RETURN n"
+        for label in sorted(CANON_LABELS)
+    )
+    return f"""
+    UNWIND $ids AS id
+    CALL {{
+{branches}
+    }}
+    RETURN id, labels(n) AS labels
+    """
+
+
+async def resolve_labels(ids: Iterable[str],
+                         known: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Map each id to a canonical label. Ids that exist nowhere are left out,
+    which matches the old behaviour of silently skipping unmatched endpoints.
+    """
+    known = known or {}
+    resolved: Dict[str, str] = {}
+    missing = []
+    for node_id in set(ids):
+        label = known.get(node_id) or cached(node_id) or label_from_prefix(node_id)
+        if label:
+            resolved[node_id] = label
+        else:
+            missing.append(node_id)
+
+    if missing:
+        for row in await arun_read(_lookup_query(), {"ids": missing}, name="label_lookup"):
+            label = next((l for l in row["labels"] if l in CANON_LABELS), None)
+            if label:
+                resolved[row["id"]] = label
+        remember((i, resolved[i]) for i in missing if i in resolved)
+    return resolved
@@ -0,0 +1,329 @@
+"""
+Bulk loader behind ``scripts/load_graph.py``.
+
+Inputs, in the order they are applied:
+
+1. ``.cypher`` files: statements split on ``;``. Schema statements
+   (CREATE/DROP CONSTRAINT|INDEX) run on their own; the rest are grouped
+   into write transactions of ``cypher_batch`` statements.
+2. Entities from ``.csv`` / ``.jsonl`` / ``.ndjson`` files, written with
+   ``upsert_entities`` in UNWIND batches of ``batch_size``. Every label has
+   its own writer task, and at most ``workers`` of them write at once, so
+   labels load in parallel while one label never races itself.
+3. Triples from the same files, written with ``upsert_triples`` only after
+   every entity batch has committed, so their endpoints exist.
+
+CSV columns ``id,label,name`` (entities) or ``subj,pred,obj`` (triples) are
+the fields; a ``props`` column holds a JSON object and any other non-empty
+column becomes a property. JSON lines use the ``/kg/ingest/stream`` shape.
+
+Progress is checkpointed after every committed batch as "rows of this
+(phase, file, label) done". A rerun skips those rows and continues; the
+writes are MERGEs, so a batch that committed right before an interruption
+is harmless to replay. Changing a file (size or mtime) resets its progress.
+"""
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from app.graph.kg_schema import validate_item
+from app.graph.loaders.upsert import upsert_entities, upsert_triples
+from app.models.graph import Entity, Triple
+from app.services.neo4j_async import arun_cypher, arun_write_tx
+
+DATA_SUFFIXES = {".csv", ".jsonl", ".ndjson"}
+CYPHER_SUFFIXES = {".cypher", ".cql"}
+MAX_REPORTED_FAILURES = 100
+
+_SCHEMA = re.compile(r"^\s*(?:CREATE|DROP)\s+(?:OR\s+REPLACE\s+)?(?:\w+\s+)?(?:CONSTRAINT|INDEX)\b",
+                     re.IGNORECASE)
+_ENTITY_FIELDS = {"id", "label", "name", "props"}
+_TRIPLE_FIELDS = {"subj", "pred", "obj", "props"}
+
+
+def cypher_statements(path: Union[str, Path]) -> Iterator[str]:
+    """
+    Yield individual Cypher statements.
+    - Joins multi-line statements.
+    - Splits on trailing ';' (Browser style).
+    - Skips empty lines and comments starting with // or #.
+    """
+    buf: List[str] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for raw in f:
+            line = raw.strip()
+            if not line or line.startswith("//") or line.startswith("#"):
+                continue
+            buf.append(line)
+            if line.endswith(";"):
+                stmt = " ".join(buf).rstrip(";").strip()
+                if stmt:
+                    yield stmt
+                buf = []
+    # last statement (no semicolon at EOF)
+    if buf:
+        stmt = " ".join(buf).rstrip(";").strip()
+        if stmt:
+            yield stmt
+
+
+def _csv_item(row: Dict[str, str]) -> Dict[str, Any]:
+    fields = _TRIPLE_FIELDS if "subj" in row else _ENTITY_FIELDS
+    item: Dict[str, Any] = {k: v for k, v in row.items() if k in fields and k != "props" and v}
+    props = json.loads(row["props"]) if row.get("props") else {}
+    props.update({k: v for k, v in row.items() if k not in fields and k and v not in ("", None)})
+    item["props"] = props
+    return item
+
+
+def read_items(path: Union[str, Path]) -> Iterator[Tuple[int, Union[str, Dict[str, str]]]]:
+    """Yield (line number, raw JSON line or CSV row) from a data file."""
+    path = Path(path)
+    with path.open("r", encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for lineno, line in enumerate(f, start=1):
+                if line.strip():
+                    yield lineno, line
+
+
+def parse_item(raw: Union[str, Dict[str, str]]) -> Union[Entity, Triple]:
+    """Validate one JSON line or CSV row (raises ValueError)."""
+    return validate_item(json.loads(raw) if isinstance(raw, str) else _csv_item(raw))
+
+
+def _fingerprint(path: Path) -> str:
+    st = path.stat()
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+class Checkpoint:
+    """Rows done per (phase, file, label), persisted as JSON with atomic replaces."""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path else None
+        self.done: Dict[str, int] = {}
+        self.files: Dict[str, str] = {}
+        if self.path is not None and self.path.exists():
+            data = json.loads(self.path.read_text())
+            self.done = data.get("done", {})
+            self.files = data.get("files", {})
+
+    def track(self, path: Path) -> None:
+        """Forget progress on ``path`` if it changed since the checkpoint."""
+        name, fp = str(path), _fingerprint(path)
+        if self.files.get(name) != fp:
+            self.done = {k: v for k, v in self.done.items() if k.split("|")[1] != name}
+            self.files[name] = fp
+
+    def get(self, key: str) -> int:
+        return self.done.get(key, 0)
+
+    def advance(self, key: str, n: int) -> None:
+        self.done[key] = self.done.get(key, 0) + n
+        self.save()
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"files": self.files, "done": self.done}))
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        self.done, self.files = {}, {}
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
+
+
+def _key(phase: str, path: Path, label: str = "") -> str:
+    return f"{phase}|{path}|{label}"
+
+
+@dataclass
+class LoadReport:
+    statements: int = 0
+    entities: int = 0
+    triples: int = 0
+    batches: int = 0
+    skipped: int = 0  # rows already done according to the checkpoint
+    failed: int = 0
+    failures: List[Dict[str, Any]] = field(default_factory=list)
+    seconds: Dict[str, float] = field(default_factory=dict)
+
+    def fail(self, path: Path, lineno: int, error: str) -> None:
+        self.failed += 1
+        if len(self.failures) < MAX_REPORTED_FAILURES:
+            self.failures.append({"file": str(path), "line": lineno, "error": error[:300]})
+
+    def rate(self, phase: str, rows: int) -> float:
+        secs = self.seconds.get(phase, 0.0)
+        return rows / secs if secs else 0.0
+
+
+Progress = Callable[[str, LoadReport], None]
+
+
+class BulkLoader:
+    def __init__(self, batch_size: int = 1000, workers: int = 4, cypher_batch: int = 50,
+                 checkpoint: Optional[Checkpoint] = None, progress: Optional[Progress] = None):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.cypher_batch = cypher_batch
+        self.checkpoint = checkpoint or Checkpoint()
+        self.progress = progress
+        self.report = LoadReport()
+
+    def _tick(self, phase: str) -> None:
+        if self.progress is not None:
+            self.progress(phase, self.report)
+
+    async def load(self, paths: Sequence[Union[str, Path]]) -> LoadReport:
+        files = [Path(p) for p in paths]
+        for p in files:
+            if p.suffix.lower() not in DATA_SUFFIXES | CYPHER_SUFFIXES:
+                raise ValueError(f"unsupported input {p} (expected .cypher, .csv, .jsonl or .ndjson)")
+            self.checkpoint.track(p)
+        data = [p for p in files if p.suffix.lower() in DATA_SUFFIXES]
+
+        for phase, run in (("cypher", self._cypher), ("entities", self._entities),
+                           ("triples", self._triples)):
+            t0 = time.perf_counter()
+            if phase == "cypher":
+                for p in files:
+                    if p.suffix.lower() in CYPHER_SUFFIXES:
+                        await run(p)
+            else:
+                await run(data)
+            self.report.seconds[phase] = time.perf_counter() - t0
+        return self.report
+
+    async def _cypher(self, path: Path) -> None:
+        key = _key("cypher", path)
+        done = self.checkpoint.get(key)
+        group: List[str] = []
+
+        async def flush() -> None:
+            if group:
+                await arun_write_tx([(s, {}) for s in group], name="bulk_cypher")
+                self.report.statements += len(group)
+                self.report.batches += 1
+                self.checkpoint.advance(key, len(group))
+                group.clear()
+                self._tick("cypher")
+
+        for i, stmt in enumerate(cypher_statements(path)):
+            if i < done:
+                self.report.skipped += 1
+                continue
+            if _SCHEMA.match(stmt):
+                await flush()
+                await arun_cypher(stmt, name="bulk_schema")  # schema changes need their own transaction
+                self.report.statements += 1
+                self.checkpoint.advance(key, 1)
+                continue
+            group.append(stmt)
+            if len(group) >= self.cypher_batch:
+                await flush()
+        await flush()
+
+    def _items(self, path: Path, kind: type) -> Iterator[Any]:
+        for lineno, raw in read_items(path):
+            try:
+                item = parse_item(raw)
+            except ValueError as exc:  # JSON errors and ValidationError
+                if kind is Entity:  # the entity pass sees every row; report it there only
+                    self.report.fail(path, lineno, str(exc))
+                continue
+            if isinstance(item, kind):
+                yield item
+
+    async def _entities(self, files: List[Path]) -> None:
+        Job = Optional[Tuple[str, List[Entity]]]
+        writers: Dict[str, Tuple["asyncio.Queue[Job]", asyncio.Task]] = {}
+        gate = asyncio.Semaphore(self.workers)
+
+        async def writer(q: "asyncio.Queue[Job]") -> None:
+            while True:
+                job = await q.get()
+                if job is None:
+                    return
+                key, batch = job
+                async with gate:
+                    await upsert_entities(batch, index_names=False)
+                self.report.entities += len(batch)
+                self.report.batches += 1
+                self.checkpoint.advance(key, len(batch))
+                self._tick("entities")
+
+        async def submit(label: str, job: Job) -> None:
+            if label not in writers:
+                q: "asyncio.Queue[Job]" = asyncio.Queue(maxsize=2)  # backpressure on the reader
+                writers[label] = (q, asyncio.create_task(writer(q)))
+            q, task = writers[label]
+            put = asyncio.ensure_future(q.put(job))
+            await asyncio.wait({put, task}, return_when=asyncio.FIRST_COMPLETED)
+            if not put.done():  # the writer died: stop reading, raise its error
+                put.cancel()
+                task.result()
+
+        try:
+            for path in files:
+                pending: Dict[str, List[Entity]] = {}
+                seen: Dict[str, int] = {}
+                for ent in self._items(path, Entity):
+                    label = ent.label.value
+                    key = _key("entities", path, label)
+                    seen[label] = seen.get(label, 0) + 1
+                    if seen[label] <= self.checkpoint.get(key):
+                        self.report.skipped += 1
+                        continue
+                    batch = pending.setdefault(label, [])
+                    batch.append(ent)
+                    if len(batch) >= self.batch_size:
+                        await submit(label, (key, pending.pop(label)))
+                for label, batch in pending.items():
+                    await submit(label, (_key("entities", path, label), batch))
+            for label in list(writers):
+                await submit(label, None)
+            await asyncio.gather(*(task for _, task in writers.values()))
+        finally:
+            for _, task in writers.values():
+                task.cancel()
+
+    async def _triples(self, files: List[Path]) -> None:
+        for path in files:
+            key = _key("triples", path)
+            done = self.checkpoint.get(key)
+            batch: List[Triple] = []
+            n = 0
+
+            async def flush() -> None:
+                await upsert_triples(batch)
+                self.report.triples += len(batch)
+                self.report.batches += 1
+                self.checkpoint.advance(key, len(batch))
+                batch.clear()
+                self._tick("triples")
+
+            for t in self._items(path, Triple):
+                n += 1
+                if n <= done:
+                    self.report.skipped += 1
+                    continue
+                batch.append(t)
+                if len(batch) >= self.batch_size:
+                    await flush()
+            if batch:
+                await flush()
@@ -0,0 +1,210 @@
+"""
+Parallel writer for large upserts.
+
+One ``upsert_entities``/``upsert_triples`` call is one transaction on one
+session, which Neo4j runs on one core however big the payload is. This
+module splits a large payload across INGEST_WRITERS concurrent sessions
+without letting two of them lock the same node:
+
+- Entities are partitioned by a hash of their id, one writer per
+  partition; ids never repeat across partitions, so writers never meet.
+- Every triple locks its two endpoints (and its ``Source`` node, when it
+  carries a message). Nodes are hashed into 2 x writers partitions, and a
+  node that alone appears in more than its share of the triples (the
+  ``place:karachi`` every user lives in) gets a partition of its own.
+  Triples are grouped by the set of partitions they touch and cut into
+  batches of INGEST_BATCH_SIZE. A writer takes the largest batch whose
+  partitions no running batch holds, so batches sharing a hot node run one
+  after another while disjoint ones run side by side, and no two running
+  transactions wait on each other's locks.
+
+Each batch goes through the ordinary ``upsert`` entry points (change cache,
+provenance, graph stats and the gazetteer's background indexing still apply). The managed
+transaction already replays transient errors; a batch that still fails with
+a retryable error (deadlock, leader switch, lost connection) is retried up
+to INGEST_WRITE_RETRIES times with exponential backoff and jitter. The
+first error that is not retryable stops the remaining batches and is raised
+once the running ones finish. The payload is therefore not one transaction
+any more: after a failure some batches are written and others not, and
+sending it again is safe because every write is a MERGE.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import zlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.graph import provenance
+from app.graph.loaders import upsert
+from app.models.graph import Entity, Triple
+from app.services import metrics
+
+PARTITIONS_PER_WRITER = 2
+_SITE = "parallel_write"
+
+
+@dataclass
+class WriteReport:
+    items: int = 0
+    batches: int = 0
+    retries: int = 0
+    partitions: int = 0
+    hot_nodes: int = 0  # nodes given a partition of their own
+    max_running: int = 0  # most batches written at once
+
+
+def _part(node_id: str, partitions: int) -> int:
+    return zlib.crc32(node_id.encode("utf-8")) % partitions
+
+
+def _retryable(exc: BaseException) -> bool:
+    # neo4j 5: Neo4jError / DriverError answer this themselves
+    # (TransientError incl. DeadlockDetected, SessionExpired, ServiceUnavailable).
+    check = getattr(exc, "is_retryable", None)
+    return bool(callable(check) and check())
+
+
+async def _with_retry(write: Callable[[], Awaitable[None]], report: WriteReport) -> None:
+    retries = settings.INGEST_WRITE_RETRIES
+    for attempt in range(retries + 1):
+        try:
+            return await write()
+        except Exception as e:
+            if attempt == retries or not _retryable(e):
+                raise
+            report.retries += 1
+            metrics.observe_retries(_SITE, 1)
+            delay = settings.INGEST_RETRY_BACKOFF * 2 ** attempt
+            await asyncio.sleep(delay * (0.5 + random.random() / 2))
+
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+async def upsert_entities(entities: Iterable[Entity], workers: Optional[int] = None,
+                          batch_size: Optional[int] = None) -> WriteReport:
+    """Write ``entities`` with ``workers`` sessions, partitioned by id."""
+    ents = list(entities)
+    workers = max(1, workers or settings.INGEST_WRITERS)
+    size = batch_size or settings.INGEST_BATCH_SIZE
+    parts: List[List[Entity]] = [[] for _ in range(workers)]
+    for e in ents:
+        parts[_part(e.id, workers)].append(e)
+    report = WriteReport(items=len(ents), partitions=workers)
+    failed: List[BaseException] = []
+    running = 0
+
+    async def writer(part: List[Entity]) -> None:
+        nonlocal running
+        for batch in _chunks(part, size):
+            if failed:
+                return
+            running += 1
+            report.max_running = max(report.max_running, running)
+            try:
+                await _with_retry(lambda: upsert.upsert_entities(batch), report)
+                report.batches += 1
+            except BaseException as e:
+                failed.append(e)
+                raise
+            finally:
+                running -= 1
+
+    await _gather([writer(p) for p in parts if p])
+    return report
+
+
+def _touched(t: Triple) -> Tuple[str, ...]:
+    """The nodes writing ``t`` locks: its endpoints and its Source, if any."""
+    source = t.props.get("source")
+    text = t.props.get("text")
+    if source is None and isinstance(text, str) and text:
+        source = provenance.source_key(text)
+    return (t.subj, t.obj) if source is None else (t.subj, t.obj, source)
+
+
+def plan_triples(triples: List[Triple], partitions: int,
+                 batch_size: int) -> Tuple[List[Tuple[FrozenSet[int], List[Triple]]], int]:
+    """
+    Batches of triples with the partitions each one locks, largest first,
+    and the number of hot nodes that were given partitions of their own.
+    """
+    touched = [_touched(t) for t in triples]
+    share = max(batch_size, len(triples) // partitions)
+    counts = Counter(n for nodes in touched for n in set(nodes))
+    hot = {n: partitions + i for i, (n, c) in enumerate(counts.most_common()) if c > share}
+    groups: Dict[FrozenSet[int], List[Triple]] = defaultdict(list)
+    for t, nodes in zip(triples, touched):
+        key = frozenset(hot[n] if n in hot else _part(n, partitions) for n in nodes)
+        groups[key].append(t)
+    batches = [(key, batch) for key, rows in groups.items() for batch in _chunks(rows, batch_size)]
+    batches.sort(key=lambda b: len(b[1]), reverse=True)
+    return batches, len(hot)
+
+
+async def upsert_triples(triples: Iterable[Triple], entities: Optional[Iterable[Entity]] = None,
+                         workers: Optional[int] = None,
+                         batch_size: Optional[int] = None) -> WriteReport:
+    """
+    Write ``triples`` with ``workers`` sessions; no two running batches
+    touch the same node. ``entities`` helps resolve endpoint labels.
+    """
+    rows = list(triples)
+    workers = max(1, workers or settings.INGEST_WRITERS)
+    partitions = workers * PARTITIONS_PER_WRITER
+    pending, hot = plan_triples(rows, partitions, batch_size or settings.INGEST_BATCH_SIZE)
+    report = WriteReport(items=len(rows), partitions=partitions + hot, hot_nodes=hot)
+    by_id = {e.id: e for e in entities or ()}
+    busy: set = set()
+    ready = asyncio.Condition()
+    failed: List[BaseException] = []
+
+    async def take() -> Optional[Tuple[FrozenSet[int], List[Triple]]]:
+        async with ready:
+            while pending and not failed:
+                for i, (key, batch) in enumerate(pending):
+                    if busy.isdisjoint(key):
+                        busy.update(key)
+                        return pending.pop(i)
+                await ready.wait()
+            return None
+
+    running = 0
+
+    async def writer() -> None:
+        nonlocal running
+        while True:
+            job = await take()
+            if job is None:
+                return
+            key, batch = job
+            ents = list({n: by_id[n] for t in batch for n in (t.subj, t.obj) if n in by_id}.values())
+            running += 1
+            report.max_running = max(report.max_running, running)
+            try:
+                await _with_retry(lambda: upsert.upsert_triples(batch, ents), report)
+                report.batches += 1
+            except BaseException as e:
+                failed.append(e)
+                raise
+            finally:
+                running -= 1
+                async with ready:
+                    busy.difference_update(key)
+                    ready.notify_all()
+
+    await _gather([writer() for _ in range(min(workers, len(pending)))])
+    return report
+
+
+async def _gather(tasks: List[Awaitable[None]]) -> None:
+    """Run the writers; the first error is raised after all of them stop."""
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for r in results:
+        if isinstance(r, BaseException):
+            raise r
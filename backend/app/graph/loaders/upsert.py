@@ -2,23 +2,63 @@
 Helpers that write validated data into Neo4j.
 
 We keep these functions small and side-effect free (besides the DB call),
-so it's easy to test and reason about the Cypher used.
+so it's easy to test and reason about the Cypher used. The ``upsert_*``
+entry points first drop items ``change_cache`` knows to be unchanged, and
+send nothing at all when no item is left. Message text on triples is moved
+to ``Source`` nodes first (see ``app.graph.provenance``). The statements
+return which rows they created, which ``graph_stats`` counts after commit.
 """
 from __future__ import annotations
 
-from typing import Iterable, List
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from app.graph import labels, provenance
+from app.graph.change_cache import change_cache
+from app.graph.kg_schema import CANON_LABELS, CANON_RELS
+from app.graph.stats import graph_stats
+from app.core.config import settings
 from app.models.graph import Entity, Triple
-from app.services.neo4j_client import run_cypher
+from app.services.gazetteer import gazetteer
+from app.services.metrics import stage
+from app.services.neo4j_async import Statement, arun_write_tx
+from app.services.result_cache import bump_write_generation
 
 
-def upsert_entities(entities: Iterable[Entity]) -> None:
+async def _write(statements: List[Statement], name: str) -> List[List[dict]]:
+    """Run the statements in one write transaction and invalidate cached reads."""
+    try:
+        return await arun_write_tx(statements, name=name)
+    finally:
+        bump_write_generation()
+
+
+def record_created(statements: List[Statement], results: List[List[dict]]) -> None:
+    """Feed the nodes / relationships the entity and triple statements created to ``graph_stats``."""
+    nodes: Dict[str, str] = {}
+    rels = set()
+    for (_, params), rows in zip(statements, results):
+        created = rows[0].get("created") if rows else None
+        if not created:
+            continue
+        if "ents" in params:
+            label = {e["id"]: e["label"] for e in params["ents"]}
+            nodes.update((i, label[i]) for i in created)
+        elif "rels" in params:
+            pred = params["rels"][0]["pred"]
+            rels.update((s, pred, o) for s, o in created)  # a row repeated in the batch shows twice
+    graph_stats.record(nodes.items(), rels)
+
+
+def entity_statements(entities: Iterable[Entity]) -> List[Statement]:
     """
-    Create or update nodes by id.
+    Build the statement that creates or updates nodes by id.
 
     Cypher notes:
       - MERGE on {id} ensures we never duplicate nodes.
       - We set/merge the 'name' and any extra props from 'props'.
+      - ``created`` lists the ids that did not exist (apoc.merge.node only
+        says so through its onCreate props, hence the transient marker).
     """
     ents: List[dict] = [
         {"id": e.id, "label": e.label.value, "name": e.name, "props": e.props}
@@ -26,28 +66,101 @@ def upsert_entities(entities: Iterable[Entity]) -> None:
     ]
 
     if not ents:
-        return
+        return []
 
     query = """
     UNWIND $ents AS e
     CALL {
       WITH e
-      CALL apoc.merge.node([e.label], {id:e.id}, {}, {}) YIELD node
-      WITH node, e
+      CALL apoc.merge.node([e.label], {id:e.id}, {_created:true}, {}) YIELD node
+      WITH node, e, node._created IS NOT NULL AS created
+      REMOVE node._created
       SET node += e.props
       SET node.name = coalesce(e.name, node.name)
-      RETURN count(*) AS _
+      RETURN created
     }
-    RETURN 1 AS ok
+    RETURN collect(CASE WHEN created THEN e.id END) AS created
+    """
+    return [(query, {"ents": ents})]
+
+
+async def upsert_entities(entities: Iterable[Entity], index_names: bool = True) -> None:
+    """
+    Create or update nodes by id in one managed write transaction.
+    Names are indexed by the gazetteer in the background;
+    ``index_names=False`` skips that (bulk loads).
+    """
+    ents = list(entities)
+    fresh = change_cache.changed_entities(ents)
+    statements = entity_statements(fresh)
+    if statements:
+        with stage("upsert_entities"):
+            results = await _write(statements, "upsert_entities")
+        change_cache.entities_written(fresh)
+        record_created(statements, results)
+    labels.remember((e.id, e.label.value) for e in ents)
+    if index_names:
+        gazetteer.add_entities_later(ents)
+
+
+def source_statements(sources: Iterable[Dict[str, Any]]) -> List[Statement]:
+    """
+    Build the statement that creates the ``Source`` nodes triples refer to.
+    A source is immutable (its id is the hash of its text), so existing ones
+    are left alone.
+    """
+    rows = list(sources)
+    if not rows:
+        return []
+    query = f"""
+    UNWIND $sources AS src
+    MERGE (n:`{provenance.SOURCE_LABEL}` {{id:src.id}})
+    ON CREATE SET n.text = src.text, n.message_id = src.message_id
+    RETURN count(n) AS n
+    """
+    return [(query, {"sources": rows})]
+
+
+def triple_query(subj_label: str, pred: str, obj_label: str) -> str:
+    """
+    Label-scoped MERGE for one (subject label, predicate, object label) group.
+
+    Labels and the relationship type cannot be parameters, so they are
+    checked against the canonical enums before being interpolated. A row
+    whose props carry ``source`` records a mention instead of storing it
+    (``provenance``). ``created`` lists the [subj, obj] pairs that were new.
+    """
+    if subj_label not in CANON_LABELS or obj_label not in CANON_LABELS:
+        raise ValueError(f"unknown label in ({subj_label}, {obj_label})")
+    if pred not in CANON_RELS:
+        raise ValueError(f"unknown relationship type {pred!r}")
+    return f"""
+    UNWIND $rels AS r
+    MATCH (s:`{subj_label}` {{id:r.subj}})
+    MATCH (o:`{obj_label}` {{id:r.obj}})
+    MERGE (s)-[rel:`{pred}`]->(o)
+    ON CREATE SET rel._created = true
+    WITH r, rel, rel._created IS NOT NULL AS created
+    REMOVE rel._created
+    SET rel += apoc.map.removeKey(r.props, 'source')
+    FOREACH (_ IN CASE WHEN r.props.source IS NULL OR r.props.source IN coalesce(rel.sources, [])
+                       THEN [] ELSE [1] END |
+      SET rel.sources = (coalesce(rel.sources, []) + r.props.source)[-$max_sources..],
+          rel.mentions = coalesce(rel.mentions, 0) + 1)
+    RETURN count(rel) AS n, collect(CASE WHEN created THEN [r.subj, r.obj] END) AS created
     """
-    run_cypher(query, {"ents": ents})
 
 
-def upsert_triples(triples: Iterable[Triple]) -> None:
+async def triple_statements(triples: Iterable[Triple],
+                            entities: Optional[Iterable[Entity]] = None) -> List[Statement]:
     """
-    Create or update relationships between existing/just-created nodes.
+    Build the statements that create or update relationships between
+    existing/just-created nodes.
 
-    For each triple, we MERGE the relationship and attach edge properties.
+    Endpoints are resolved to their labels first (see ``app.graph.labels``),
+    passing the payload's ``entities`` helps skip the lookup. Rows are then
+    grouped by (subject label, predicate, object label) and each group is
+    written with one UNWIND that seeks both endpoints through the id index.
     """
     rels: List[dict] = [
         {
@@ -60,14 +173,60 @@ def upsert_triples(triples: Iterable[Triple]) -> None:
     ]
 
     if not rels:
-        return
+        return []
 
-    query = """
-    UNWIND $rels AS r
-    MATCH (s {id:r.subj})
-    MATCH (o {id:r.obj})
-    CALL apoc.merge.relationship(s, r.pred, {}, r.props, o) YIELD rel
-    SET rel += r.props
-    RETURN 1 AS ok
+    known = {e.id: e.label.value for e in entities or ()}
+    resolved = await labels.resolve_labels(
+        [r["subj"] for r in rels] + [r["obj"] for r in rels], known
+    )
+
+    groups: Dict[Tuple[str, str, str], List[dict]] = defaultdict(list)
+    for r in rels:
+        s_label = resolved.get(r["subj"])
+        o_label = resolved.get(r["obj"])
+        if s_label and o_label:  # unknown endpoints would not MATCH anyway
+            groups[(s_label, r["pred"], o_label)].append(r)
+
+    return [
+        (triple_query(s_label, pred, o_label),
+         {"rels": rows, "max_sources": settings.PROVENANCE_MAX_SOURCES})
+        for (s_label, pred, o_label), rows in groups.items()
+    ]
+
+
+async def upsert_triples(triples: Iterable[Triple],
+                         entities: Optional[Iterable[Entity]] = None) -> None:
     """
-    run_cypher(query, {"rels": rels})
+    Create or update relationships and the Source nodes they refer to; all
+    label groups share one transaction.
+    """
+    with stage("upsert_triples"):
+        compacted, sources = provenance.compact(triples)
+        fresh = change_cache.changed_triples(compacted)
+        src_statements = source_statements(provenance.referenced(sources, fresh))
+        rel_statements = await triple_statements(fresh, entities)
+        if rel_statements:
+            results = await _write(src_statements + rel_statements, "upsert_triples")
+            change_cache.triples_written(rel_statements, results[len(src_statements):])
+            record_created(rel_statements, results[len(src_statements):])
+
+
+async def upsert_delta(entities: Iterable[Entity], triples: Iterable[Triple]) -> None:
+    """Write entities and then triples in a single managed write transaction."""
+    ents = list(entities)
+    with stage("upsert_delta"):
+        fresh = change_cache.changed_entities(ents)
+        compacted, sources = provenance.compact(triples)
+        fresh_rels = change_cache.changed_triples(compacted)
+        node_statements = entity_statements(fresh) + source_statements(
+            provenance.referenced(sources, fresh_rels))
+        # all of ``ents`` still help resolve endpoint labels, written or not
+        rel_statements = await triple_statements(fresh_rels, ents)
+        statements = node_statements + rel_statements
+        if statements:
+            results = await _write(statements, "upsert_delta")
+            change_cache.entities_written(fresh)
+            change_cache.triples_written(rel_statements, results[len(node_statements):])
+            record_created(statements, results)
+    labels.remember((e.id, e.label.value) for e in ents)
+    gazetteer.add_entities_later(ents)
@@ -0,0 +1,90 @@
+"""
+Message provenance as content-addressed ``Source`` nodes.
+
+Extractors attach the message to every triple they emit (``text`` and
+``source_id`` props). Written as-is, a message that yields five triples is
+stored five times and re-sent with every ``graph_view`` page. ``compact``
+turns those props into a reference instead: the text becomes one
+``(:Source {id, text, message_id})`` node keyed by its hash, so the same text
+is stored once however many triples, users or messages repeat it, and the
+triple carries ``source`` (the id, 20 bytes) instead.
+
+The upserts do not store ``source`` itself on the relationship; they
+maintain ``sources``, the last PROVENANCE_MAX_SOURCES distinct source ids
+(newest last), and ``mentions``, how many distinct sources stated it (a
+source that has rolled off ``sources`` counts again if repeated). Sources
+are kept once written, so a restated fact gains history rather than
+overwriting it.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.graph import Triple
+
+SOURCE_LABEL = "Source"
+LEGACY_PROPS = ("text", "source_id")  # what extractors put on each triple
+
+
+def source_key(text: str) -> str:
+    return "src:" + hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def source_row(text: str, message_id: Optional[str]) -> Dict[str, Any]:
+    return {"id": source_key(text), "text": text, "message_id": message_id}
+
+
+def compact_props(props: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """``props`` with ``text``/``source_id`` replaced by ``source``, plus the Source row."""
+    text = props.get("text")
+    if not isinstance(text, str) or not text:
+        return props, None
+    src = source_row(text, props.get("source_id"))
+    out = {k: v for k, v in props.items() if k not in LEGACY_PROPS}
+    out["source"] = src["id"]
+    return out, src
+
+
+def compact(triples: Iterable[Triple]) -> Tuple[List[Triple], Dict[str, Dict[str, Any]]]:
+    """
+    The triples with message props replaced by source references, and the
+    Source rows they reference by id (first message id wins).
+    """
+    out: List[Triple] = []
+    sources: Dict[str, Dict[str, Any]] = {}
+    for t in triples:
+        props, src = compact_props(t.props)
+        if src is None:
+            out.append(t)
+            continue
+        sources.setdefault(src["id"], src)
+        out.append(t.model_copy(update={"props": props}))
+    return out, sources
+
+
+def referenced(sources: Dict[str, Dict[str, Any]], triples: Iterable[Triple]) -> List[Dict[str, Any]]:
+    """The Source rows some of ``triples`` point at."""
+    keys = {t.props.get("source") for t in triples}
+    return [src for key, src in sources.items() if key in keys]
+
+
+def add_mention(props: Dict[str, Any], source: Optional[str]) -> None:
+    """Apply one mention to stored relationship ``props`` (the Cypher in ``upsert``, in Python)."""
+    if not source:
+        return
+    seen: List[str] = list(props.get("sources") or ())
+    if source in seen:
+        return
+    props["sources"] = (seen + [source])[-settings.PROVENANCE_MAX_SOURCES:]
+    props["mentions"] = props.get("mentions", 0) + 1
+
+
+def source_ids(edges: Iterable[Dict[str, Any]]) -> List[str]:
+    """Distinct source ids referenced by ``graph_view`` edges (with props), in order."""
+    ids: Dict[str, None] = {}
+    for edge in edges:
+        for key in (edge.get("props") or {}).get("sources") or ():
+            ids.setdefault(key)
+    return list(ids)
@@ -0,0 +1,216 @@
+"""
+Bring the Neo4j constraints and indexes in line with the model enums.
+
+``required()`` derives what the app's queries rely on from ``NodeLabel``
+(plus the provenance ``Source`` label) and ``RelType``:
+
+- a uniqueness constraint on ``id`` per label, which is also the index every
+  ``MERGE``/``MATCH {id:...}`` of the upserts and lookups seeks through;
+- a range index on ``name`` per label (lookups by name);
+- with SCHEMA_FULLTEXT_NAMES, one fulltext index over every label's ``name``;
+- the relationship-property range indexes listed in SCHEMA_REL_INDEXES
+  (``TYPE.prop`` or ``*.prop``, comma separated).
+
+``reconcile`` compares them with ``SHOW CONSTRAINTS`` / ``SHOW INDEXES`` by
+definition (labels, properties, kind; names may differ), creates the missing
+ones with ``IF NOT EXISTS`` and waits until the new indexes are ONLINE. It
+never drops anything: constraints and indexes on labels the model does not
+have are reported as ``extra``. A label whose ``id`` has no index at all is
+logged as a performance warning, since its MERGEs scan every node of the
+label.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.graph.provenance import SOURCE_LABEL
+from app.models.graph import NodeLabel, RelType
+from app.services.neo4j_async import arun_read, arun_write
+
+log = logging.getLogger(__name__)
+
+UNIQUE_TYPES = {"UNIQUENESS", "NODE_PROPERTY_UNIQUENESS", "NODE_KEY"}
+FULLTEXT_NAME = "entity_name_fulltext"
+
+
+@dataclass(frozen=True)
+class SchemaItem:
+    kind: str                 # "unique" | "range" | "fulltext"
+    entity: str               # "NODE" | "RELATIONSHIP"
+    labels: Tuple[str, ...]   # labels or relationship types
+    properties: Tuple[str, ...]
+    name: str
+
+    def cypher(self) -> str:
+        if self.kind == "unique":
+            (label,), (prop,) = self.labels, self.properties
+            return (f"CREATE CONSTRAINT {self.name} IF NOT EXISTS "
+                    f"FOR (n:`{label}`) REQUIRE n.`{prop}` IS UNIQUE")
+        if self.kind == "fulltext":
+            labels = "|".join(f"`{l}`" for l in self.labels)
+            props = ", ".join(f"n.`{p}`" for p in self.properties)
+            return f"CREATE FULLTEXT INDEX {self.name} IF NOT EXISTS FOR (n:{labels}) ON EACH [{props}]"
+        (label,) = self.labels
+        props = ", ".join(f"x.`{p}`" for p in self.properties)
+        pattern = f"(x:`{label}`)" if self.entity == "NODE" else f"()-[x:`{label}`]-()"
+        return f"CREATE INDEX {self.name} IF NOT EXISTS FOR {pattern} ON ({props})"
+
+
+@dataclass
+class SchemaReport:
+    present: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)     # before this run
+    created: List[str] = field(default_factory=list)
+    failed: List[Dict[str, str]] = field(default_factory=list)
+    extra: List[str] = field(default_factory=list)       # on labels/types the model lacks
+    unindexed: List[str] = field(default_factory=list)   # labels whose id has no index
+    waited_s: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+def _labels() -> List[str]:
+    return [l.value for l in NodeLabel] + [SOURCE_LABEL]
+
+
+def _rel_indexes(spec: str) -> List[Tuple[str, str]]:
+    pairs = []
+    for item in filter(None, (s.strip() for s in spec.split(","))):
+        rel, _, prop = item.partition(".")
+        if not prop:
+            raise ValueError(f"SCHEMA_REL_INDEXES entry {item!r} is not TYPE.prop")
+        types = [r.value for r in RelType] if rel == "*" else [RelType(rel).value]
+        pairs += [(t, prop) for t in types]
+    return pairs
+
+
+def required(fulltext: Optional[bool] = None, rel_indexes: Optional[str] = None) -> List[SchemaItem]:
+    """What the model needs, from the enums and the SCHEMA_* settings."""
+    fulltext = settings.SCHEMA_FULLTEXT_NAMES if fulltext is None else fulltext
+    spec = settings.SCHEMA_REL_INDEXES if rel_indexes is None else rel_indexes
+    items: List[SchemaItem] = []
+    for label in _labels():
+        slug = label.lower()
+        items.append(SchemaItem("unique", "NODE", (label,), ("id",), f"{slug}_id"))
+        if label != SOURCE_LABEL:
+            items.append(SchemaItem("range", "NODE", (label,), ("name",), f"{slug}_name"))
+    if fulltext:
+        items.append(SchemaItem("fulltext", "NODE", tuple(l.value for l in NodeLabel), ("name",),
+                                FULLTEXT_NAME))
+    for rel, prop in _rel_indexes(spec):
+        items.append(SchemaItem("range", "RELATIONSHIP", (rel,), (prop,),
+                                f"{rel.lower()}_{prop.lower()}"))
+    return items
+
+
+def _matches(item: SchemaItem, constraints: Sequence[Dict[str, Any]],
+             indexes: Sequence[Dict[str, Any]]) -> Optional[str]:
+    """Name of the existing constraint/index that provides ``item``, if any."""
+    if item.kind == "unique":
+        for c in constraints:
+            if (c["type"] in UNIQUE_TYPES and tuple(c["labelsOrTypes"] or ()) == item.labels
+                    and tuple(c["properties"] or ()) == item.properties):
+                return c["name"]
+        return None
+    want = "FULLTEXT" if item.kind == "fulltext" else "RANGE"
+    for ix in indexes:
+        same_labels = (sorted(ix["labelsOrTypes"] or ()) == sorted(item.labels)
+                       if item.kind == "fulltext" else tuple(ix["labelsOrTypes"] or ()) == item.labels)
+        if (ix["type"] == want and ix["entityType"] == item.entity and same_labels
+                and tuple(ix["properties"] or ()) == item.properties):
+            return ix["name"]
+    return None
+
+
+async def current() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    constraints = await arun_read(
+        "SHOW CONSTRAINTS YIELD name, type, labelsOrTypes, properties", name="schema_show")
+    indexes = await arun_read(
+        "SHOW INDEXES YIELD name, type, entityType, labelsOrTypes, properties, state",
+        name="schema_show")
+    return constraints, indexes
+
+
+def _unindexed(constraints, indexes) -> List[str]:
+    indexed = {tuple(ix["labelsOrTypes"] or ())[:1] for ix in indexes
+               if ix["entityType"] == "NODE" and ix["type"] == "RANGE"
+               and tuple(ix["properties"] or ())[:1] == ("id",)}
+    indexed |= {tuple(c["labelsOrTypes"] or ())[:1] for c in constraints
+                if tuple(c["properties"] or ())[:1] == ("id",)}
+    return [l for l in _labels() if (l,) not in indexed]
+
+
+async def wait_online(names: Sequence[str], timeout: float) -> float:
+    """Poll ``SHOW INDEXES`` until ``names`` are ONLINE; returns seconds waited."""
+    t0 = time.monotonic()
+    pending = set(names)
+    while pending:
+        rows = await arun_read("SHOW INDEXES YIELD name, state, populationPercent "
+                               "WHERE name IN $names RETURN name, state, populationPercent",
+                               {"names": sorted(pending)}, name="schema_show")
+        for r in rows:
+            if r["state"] == "FAILED":
+                raise RuntimeError(f"index {r['name']} FAILED to populate")
+            if r["state"] == "ONLINE":
+                pending.discard(r["name"])
+        if not pending:
+            break
+        if time.monotonic() - t0 > timeout:
+            raise TimeoutError(f"indexes not online after {timeout:g}s: {sorted(pending)}")
+        await asyncio.sleep(0.5)
+    return time.monotonic() - t0
+
+
+async def reconcile(apply: bool = True, wait: bool = True, timeout: Optional[float] = None,
+                    items: Optional[List[SchemaItem]] = None) -> SchemaReport:
+    """
+    Diff ``items`` (default ``required()``) against the database and, with
+    ``apply``, create what is missing; ``wait`` blocks until the created
+    indexes (and constraint-backing indexes) are online.
+    """
+    items = required() if items is None else items
+    report = SchemaReport()
+    constraints, indexes = await current()
+    known = set(_labels()) | {r.value for r in RelType}
+    for entry in [*constraints, *indexes]:
+        labels = entry["labelsOrTypes"] or ()
+        if labels and not set(labels) <= known and entry["name"] not in report.extra:
+            report.extra.append(entry["name"])
+
+    taken = {e["name"] for e in [*constraints, *indexes]}
+    missing = []
+    for item in items:
+        name = _matches(item, constraints, indexes)
+        if name is not None:
+            report.present.append(name)
+            continue
+        report.missing.append(item.name)
+        if item.name in taken:  # IF NOT EXISTS would silently keep the other definition
+            report.failed.append({"name": item.name, "error": "name used by a different definition"})
+        else:
+            missing.append(item)
+
+    if apply:
+        for item in missing:
+            try:
+                await arun_write(item.cypher(), name="schema_apply")
+                report.created.append(item.name)
+            except Exception as e:  # e.g. duplicate ids block a uniqueness constraint
+                report.failed.append({"name": item.name, "error": str(e)[:300]})
+        if wait and report.created:
+            report.waited_s = await wait_online(
+                report.created, settings.SCHEMA_WAIT_TIMEOUT if timeout is None else timeout)
+        if report.created:
+            constraints, indexes = await current()
+
+    report.unindexed = _unindexed(constraints, indexes)
+    for label in report.unindexed:
+        log.warning("no index on :%s(id): its MERGEs and id lookups scan every %s node "
+                    "(run scripts/reconcile_schema.py)", label, label)
+    return report
@@ -0,0 +1,291 @@
+"""
+Graph statistics kept as counters instead of COUNT scans.
+
+``/kg/stats`` reports nodes per ``NodeLabel``, relationships per
+``RelType``, the degree of any user (``Person``) and the GRAPH_STATS_TOP_N
+highest-degree nodes, all read from counters in O(1) of the graph size. The
+upserts call
+``record`` after their transaction commits with the nodes and relationships
+it *created* (their statements report that per row, ``MERGE`` onto existing
+ones counts nothing), so the counters move with every write.
+
+Only writes through this process are seen. ``/graph/run`` writes (which may
+delete) mark the counters stale, bulk loads run elsewhere never reach them;
+``reconcile`` (``POST /kg/stats/reconcile``) rebuilds everything from the
+store with one full scan. ``run`` loads the saved counters at startup,
+saves them to GRAPH_STATS_PATH when changed and, only with
+GRAPH_STATS_RECONCILE_INTERVAL set, scans the graph: at startup when nothing
+was saved, then that often or on its next tick once stale. Without it the
+counters start stale from zero until reconciled on demand. Writes committed
+while a reconcile scans may be counted twice or not at all until the next
+one.
+
+Exact degrees are kept for ``Person`` nodes only (one int per user). Other
+nodes (places, orgs, one goal per user) are counted in GRAPH_STATS_HUB_SLOTS
+slots with the Space-Saving scheme: a node without a slot takes the smallest
+one and starts from its count, so memory is fixed, every node with more than
+1/slots of the edges keeps its slot, and a count is exact unless a slot was
+taken over, else an upper bound (``floor`` says by how much at most).
+Degrees only grow between reconciles, so the top-N table is maintained
+incrementally from these: a node outside it enters by passing its smallest
+entry.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.graph.labels import label_from_prefix
+from app.models.graph import NodeLabel, RelType
+
+if TYPE_CHECKING:
+    from app.graph.store.base import GraphStore
+
+log = logging.getLogger(__name__)
+
+PERSON = NodeLabel.PERSON.value
+
+
+class GraphStats:
+    def __init__(self, top_n: int = 20, path: Optional[str] = None, hub_slots: int = 10_000):
+        self.top_n = top_n
+        self.hub_slots = max(hub_slots, 4 * top_n)
+        self.path = Path(path) if path else None
+        self._reset()
+        self.stale = True  # nothing known until loaded or reconciled
+        self.reconciled_at: Optional[float] = None
+        self.updated_at: Optional[float] = None
+        self._version = 0  # bumped by every change; ``save`` skips unchanged state
+        self._saved_version = 0
+        self._lock = asyncio.Lock()  # one reconcile at a time
+
+    def _reset(self) -> None:
+        self.nodes: Dict[str, int] = {l.value: 0 for l in NodeLabel}
+        self.rels: Dict[str, int] = {r.value: 0 for r in RelType}
+        self.degree: Dict[str, int] = {}  # Person id -> degree
+        self._hubs: Dict[str, int] = {}  # other nodes, at most ``hub_slots``
+        self._hub_heap: List[Tuple[int, str]] = []  # (count, id), stale entries popped lazily
+        self._hub_floor = 0  # no node without a slot has a higher degree
+        self._top: Dict[str, int] = {}
+        self._top_min: Optional[str] = None  # id of the smallest entry of ``_top``
+
+    # -- incremental ---------------------------------------------------------
+
+    def _is_person(self, node_id: str) -> bool:
+        return node_id in self.degree or label_from_prefix(node_id) == PERSON
+
+    def _bump_hub(self, node_id: str) -> int:
+        hubs, heap = self._hubs, self._hub_heap
+        d = hubs.get(node_id)
+        if d is None:
+            if len(hubs) >= self.hub_slots:  # take over the smallest slot
+                while True:
+                    count, victim = heapq.heappop(heap)
+                    if hubs.get(victim) == count:
+                        break
+                del hubs[victim]
+                self._hub_floor = max(self._hub_floor, count)
+            d = self._hub_floor
+        d += 1
+        hubs[node_id] = d
+        heapq.heappush(heap, (d, node_id))
+        if len(heap) > 4 * self.hub_slots:
+            self._rebuild_hub_heap()
+        return d
+
+    def _rebuild_hub_heap(self) -> None:
+        self._hub_heap = [(d, i) for i, d in self._hubs.items()]
+        heapq.heapify(self._hub_heap)
+
+    def _bump_degree(self, node_id: str) -> None:
+        top = self._top
+        if self._is_person(node_id):
+            d = self.degree.get(node_id, 0) + 1
+            self.degree[node_id] = d
+        else:
+            d = self._bump_hub(node_id)
+        if node_id in top:
+            top[node_id] = d
+            if node_id == self._top_min:
+                self._top_min = min(top, key=top.__getitem__)
+        elif len(top) < self.top_n:
+            top[node_id] = d
+            if self._top_min is None or d < top[self._top_min]:
+                self._top_min = node_id
+        elif self._top_min is not None and d > top[self._top_min]:
+            del top[self._top_min]
+            top[node_id] = d
+            self._top_min = min(top, key=top.__getitem__)
+
+    def record(self, nodes: Iterable[Tuple[str, str]] = (),
+               rels: Iterable[Tuple[str, str, str]] = ()) -> None:
+        """Count created nodes (id, label) and relationships (subj, pred, obj)."""
+        if not settings.GRAPH_STATS_ENABLED:
+            return
+        changed = False
+        for node_id, label in nodes:
+            if label in self.nodes:
+                self.nodes[label] += 1
+                if label == PERSON:
+                    self.degree.setdefault(node_id, 0)
+                changed = True
+        for subj, pred, obj in rels:
+            if pred in self.rels:
+                self.rels[pred] += 1
+                self._bump_degree(subj)
+                self._bump_degree(obj)
+                changed = True
+        if changed:
+            self._version += 1
+            self.updated_at = time.time()
+
+    def mark_stale(self) -> None:
+        """Writes happened that ``record`` could not see (``/graph/run``)."""
+        self.stale = True
+
+    # -- reads -----------------------------------------------------------------
+
+    def snapshot(self, node_id: Optional[str] = None) -> Dict[str, Any]:
+        top = sorted(self._top.items(), key=lambda kv: (-kv[1], kv[0]))
+        out: Dict[str, Any] = {
+            "nodes": {"total": sum(self.nodes.values()), **self.nodes},
+            "relationships": {"total": sum(self.rels.values()), **self.rels},
+            "top_degree": [{"id": i, "degree": d} for i, d in top],
+            "floor": self._hub_floor,
+            "stale": self.stale,
+            "updated_at": self.updated_at,
+            "reconciled_at": self.reconciled_at,
+        }
+        if node_id is not None:
+            out["node"] = {"id": node_id, "degree": self.degree.get(node_id, self._hubs.get(node_id))}
+        return out
+
+    # -- rebuild ---------------------------------------------------------------
+
+    async def reconcile(self, store: "GraphStore") -> Dict[str, Any]:
+        """Recount everything from ``store``; returns the new snapshot."""
+        async with self._lock:
+            started = time.time()
+            self.stale = False  # writes that land during the scan mark it stale again
+            nodes = {l.value: 0 for l in NodeLabel}
+            degree: Dict[str, int] = {}
+            hubs: List[Tuple[int, str]] = []  # the hub_slots largest other nodes
+            floor = 0
+            async for node_id, label, d in store.iter_degrees():
+                if label not in nodes:
+                    continue
+                nodes[label] += 1
+                if label == PERSON:
+                    degree[node_id] = d
+                elif len(hubs) < self.hub_slots:
+                    heapq.heappush(hubs, (d, node_id))
+                else:
+                    floor = max(floor, heapq.heappushpop(hubs, (d, node_id))[0])
+            rels = {r.value: 0 for r in RelType}
+            rels.update({k: v for k, v in (await store.rel_counts()).items() if k in rels})
+            self.nodes, self.rels, self.degree = nodes, rels, degree
+            self._hubs, self._hub_floor = {i: d for d, i in hubs}, floor
+            self._rebuild_hub_heap()
+            self._rank()
+            self.reconciled_at = self.updated_at = time.time()
+            self._version += 1
+            log.info("graph stats reconciled in %.1fs: %d nodes, %d relationships",
+                     time.time() - started, sum(nodes.values()), sum(rels.values()))
+            return self.snapshot()
+
+    def _rank(self) -> None:
+        """Rebuild the top-N table from the degree counters."""
+        top = heapq.nlargest(self.top_n, [*self.degree.items(), *self._hubs.items()],
+                             key=lambda kv: kv[1])
+        self._top = dict(top)
+        self._top_min = min(self._top, key=self._top.__getitem__) if self._top else None
+
+    # -- persistence -----------------------------------------------------------
+
+    def _state(self) -> Dict[str, Any]:
+        return {"nodes": dict(self.nodes), "rels": dict(self.rels), "degree": dict(self.degree),
+                "hubs": dict(self._hubs), "hub_floor": self._hub_floor,
+                "updated_at": self.updated_at, "reconciled_at": self.reconciled_at}
+
+    async def save(self) -> bool:
+        """Write the counters to ``path`` if they changed since the last save."""
+        if self.path is None or self._version == self._saved_version:
+            return False
+        version, state = self._version, self._state()
+        await asyncio.to_thread(_write_json, self.path, state)
+        self._saved_version = version
+        return True
+
+    def load(self) -> bool:
+        """Restore saved counters; they are not stale unless marked so since."""
+        if self.path is None or not self.path.is_file():
+            return False
+        try:
+            state = json.loads(self.path.read_text())
+        except (OSError, ValueError) as e:
+            log.warning("ignoring unreadable graph stats at %s: %r", self.path, e)
+            return False
+        self._reset()
+        self.nodes.update({k: v for k, v in state["nodes"].items() if k in self.nodes})
+        self.rels.update({k: v for k, v in state["rels"].items() if k in self.rels})
+        self.degree = state["degree"]
+        if "hubs" in state:
+            self._hubs, self._hub_floor = state["hubs"], state["hub_floor"]
+        else:  # saved before degrees were split: every node's degree
+            ranked = sorted(self.degree.items(), key=lambda kv: kv[1], reverse=True)
+            others = [(i, d) for i, d in ranked if label_from_prefix(i) != PERSON]
+            self.degree = {i: d for i, d in ranked if label_from_prefix(i) == PERSON}
+            self._hubs = dict(others[:self.hub_slots])
+            self._hub_floor = others[self.hub_slots][1] if len(others) > self.hub_slots else 0
+        self._rebuild_hub_heap()
+        self._rank()
+        self.updated_at, self.reconciled_at = state.get("updated_at"), state.get("reconciled_at")
+        self.stale = False
+        self._saved_version = self._version
+        return True
+
+    async def run(self, store: "GraphStore") -> None:
+        """
+        Background loop: load the counters (with GRAPH_STATS_RECONCILE_INTERVAL
+        set, build them if none were saved), then every
+        GRAPH_STATS_SAVE_INTERVAL save them, reconciling first if stale or
+        due. A local store is always recounted at start, a walk over its
+        arrays rather than a database scan; its data may not be the graph the
+        saved counters describe.
+        """
+        interval = settings.GRAPH_STATS_RECONCILE_INTERVAL
+        if store.local or (not self.load() and interval > 0):
+            await self._try_reconcile(store)
+        while True:
+            await asyncio.sleep(settings.GRAPH_STATS_SAVE_INTERVAL)
+            due = time.time() - (self.reconciled_at or 0) >= interval
+            if interval > 0 and (self.stale or due):
+                await self._try_reconcile(store)
+            try:
+                await self.save()
+            except OSError as e:
+                log.warning("could not save graph stats to %s: %r", self.path, e)
+
+    async def _try_reconcile(self, store: "GraphStore") -> None:
+        try:
+            await self.reconcile(store)
+        except Exception as e:  # store unreachable; counters stay stale, retried next tick
+            self.stale = True
+            log.warning("graph stats reconcile failed: %r", e)
+
+
+def _write_json(path: Path, state: Dict[str, Any]) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(state, separators=(",", ":")))
+    os.replace(tmp, path)
+
+
+graph_stats = GraphStats(top_n=settings.GRAPH_STATS_TOP_N, path=settings.GRAPH_STATS_PATH or None,
+                         hub_slots=settings.GRAPH_STATS_HUB_SLOTS)
@@ -0,0 +1,38 @@
+"""
+Graph storage backends behind one interface.
+
+``get_store()`` returns the process-wide store picked by GRAPH_BACKEND:
+``neo4j`` (default) or ``memory``, the embedded engine, which loads
+GRAPH_SNAPSHOT_PATH at startup and writes it back at shutdown.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from app.core.config import settings
+from app.graph.store.base import GraphStore, Page  # noqa: F401
+from app.graph.store.memory_store import MemoryStore
+from app.graph.store.neo4j_store import Neo4jStore
+
+_store: Optional[GraphStore] = None
+
+
+def make_store(backend: str) -> GraphStore:
+    if backend == "neo4j":
+        return Neo4jStore()
+    if backend == "memory":
+        return MemoryStore(settings.GRAPH_SNAPSHOT_PATH or None)
+    raise ValueError(f"unknown GRAPH_BACKEND {backend!r} (expected 'neo4j' or 'memory')")
+
+
+def get_store() -> GraphStore:
+    global _store
+    if _store is None:
+        _store = make_store(settings.GRAPH_BACKEND)
+    return _store
+
+
+def set_store(store: Optional[GraphStore]) -> None:
+    """Swap the process-wide store (benchmarks, embedding); None resets it."""
+    global _store
+    _store = store
@@ -0,0 +1,96 @@
+"""
+The ``GraphStore`` interface every backend implements.
+
+It covers what the API needs besides free-form Cypher: upserting validated
+entities and triples, the ``/kg/graph_view`` neighborhood page, the one-hop
+lookups behind the QA template fast path, lookups by id (nodes and message
+sources), and scans of all names (gazetteer) and degrees (``/kg/stats``). Backends without a Cypher engine set
+``supports_cypher = False``; ``/graph/run`` and the LLM QA path then refuse.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.models.graph import Entity, RelType, Triple
+
+Page = Dict[str, Any]  # {"nodes": [...], "edges": [...], "next_cursor": str | None}
+
+
+class GraphStore(ABC):
+    name: str = ""
+    supports_cypher: bool = False
+    local: bool = False  # data lives in this process, so full scans are cheap
+
+    async def start(self) -> None:
+        """Connect / load state; called once at app startup."""
+
+    async def close(self) -> None:
+        """Release connections / persist state; called at shutdown."""
+
+    async def warm_up(self) -> None:
+        """Slow preparation (connection pools); runs in the background after ``start``."""
+
+    async def ping(self) -> bool:
+        """Whether the store can serve queries right now (``/readyz``)."""
+        return True
+
+    @abstractmethod
+    async def upsert_entities(self, entities: Iterable[Entity]) -> None:
+        """Create or update nodes by id (name coalesced, props merged)."""
+
+    @abstractmethod
+    async def upsert_triples(self, triples: Iterable[Triple],
+                             entities: Optional[Iterable[Entity]] = None) -> None:
+        """Create or update relationships; triples with a missing endpoint are skipped."""
+
+    async def upsert_delta(self, entities: Iterable[Entity], triples: Iterable[Triple]) -> None:
+        """Entities, then triples; backends may do both in one transaction."""
+        ents = list(entities)
+        await self.upsert_entities(ents)
+        await self.upsert_triples(triples, ents)
+
+    @abstractmethod
+    async def neighborhood(self, node_id: str, depth: int = 1, limit: int = 200,
+                           cursor: Optional[str] = None,
+                           rel_types: Sequence[str] = (), node_labels: Sequence[str] = (),
+                           include_props: bool = False) -> Page:
+        """
+        One page of the undirected neighborhood of the Person ``node_id`` up
+        to ``depth`` hops (any other id gets an empty page): edges reference
+        nodes by id, nodes carry id/label/title (and ``props`` with
+        ``include_props``). ``rel_types`` limits the traversed
+        relationship types, ``node_labels`` the labels expanded into. Pass
+        ``next_cursor`` back as ``cursor`` for the next page. The expansion
+        stops after GRAPH_VIEW_MAX_NODES nodes; Neo4jStore keeps it between
+        pages, MemoryStore walks its arrays again.
+        """
+
+    @abstractmethod
+    async def related(self, ids: Sequence[str], rel: RelType, direction: str,
+                      limit: int) -> List[Dict[str, Any]]:
+        """
+        Distinct ``{"id", "name"}`` one hop from ``ids`` over ``rel`` with the
+        endpoint labels of ``kg_schema.REL_ENDPOINTS``: targets for direction
+        "out", subjects for "in". Symmetric types match either direction.
+        """
+
+    @abstractmethod
+    async def get_nodes(self, ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """``{"id", "label", "name", "props"}`` of the ids that exist, in input order."""
+
+    @abstractmethod
+    async def get_sources(self, ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """``{"text", "message_id"}`` of the ``provenance`` Source nodes that exist, by id."""
+
+    @abstractmethod
+    def iter_entities(self) -> AsyncIterator[Tuple[str, str, Optional[str]]]:
+        """Every node as (id, label, name)."""
+
+    @abstractmethod
+    def iter_degrees(self) -> AsyncIterator[Tuple[str, str, int]]:
+        """Every node as (id, label, number of relationships)."""
+
+    @abstractmethod
+    async def rel_counts(self) -> Dict[str, int]:
+        """Number of relationships per ``RelType`` value."""
@@ -0,0 +1,478 @@
+"""
+Embedded in-process ``GraphStore`` for laptops, CI and small tenants.
+
+Storage is a handful of flat arrays instead of per-node Python objects:
+
+- node ids are interned to dense ints (``_index`` dict + ``ids`` list);
+  labels are one byte per node, names a list, props a sparse dict;
+- edges are parallel arrays ``src``/``dst``/``rel`` with two singly linked
+  adjacency lists threaded through them (``head_out``/``next_out`` per
+  subject, ``head_in``/``next_in`` per object), the record layout Neo4j's
+  own store uses;
+- provenance (``app.graph.provenance``) lives beside the edges, not in
+  ``edge_props``: source ids are interned to ints, ``mentions`` and
+  ``last_source`` are per-edge arrays, and only edges restated by several
+  messages get an ``older_sources`` array. An edge costs 29 bytes (25 in
+  these arrays, 4 in ``by_rel``), a node 9 bytes plus its id/name and its
+  ``by_label`` entry;
+- ``by_label`` and ``by_rel`` are per-label node and per-type edge indexes;
+- ``sources`` holds the message texts edges refer to.
+
+Nodes are keyed by id alone (ids are globally unique by the ``label:slug``
+convention); MERGE of an edge walks the subject's outgoing list, which is
+short for the Person-centred graphs this app builds.
+
+``snapshot``/``load`` write and read the arrays as raw bytes behind a small
+JSON header, so a million-edge graph loads in well under a second.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from app.core.config import settings
+from app.graph import provenance
+from app.graph.kg_schema import REL_ENDPOINTS
+from app.graph.stats import graph_stats
+from app.graph.store.base import GraphStore, Page
+from app.models.graph import Entity, NodeLabel, RelType, Triple
+from app.services.gazetteer import gazetteer
+from app.services.metrics import stage
+
+MAGIC = b"KGMEM1\n"
+LABELS: List[str] = [l.value for l in NodeLabel]
+RELS: List[str] = [r.value for r in RelType]
+_LABEL_CODE = {l: i for i, l in enumerate(LABELS)}
+_REL_CODE = {r: i for i, r in enumerate(RELS)}
+_ARRAYS = ("node_label", "head_out", "head_in", "src", "dst", "rel", "next_out", "next_in",
+           "mentions", "last_source")
+_NONE = -1
+
+
+class MemoryStore(GraphStore):
+    name = "memory"
+    supports_cypher = False
+    local = True
+
+    def __init__(self, snapshot_path: Optional[Union[str, Path]] = None, index_names: bool = True):
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.index_names = index_names  # queue upserted names for the gazetteer, like upsert.py
+        self._clear()
+
+    def _clear(self) -> None:
+        self._index: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.names: List[Optional[str]] = []
+        self.node_label = array("B")
+        self.node_props: Dict[int, Dict[str, Any]] = {}
+        self.head_out = array("i")
+        self.head_in = array("i")
+        self.src = array("I")
+        self.dst = array("I")
+        self.rel = array("B")
+        self.next_out = array("i")
+        self.next_in = array("i")
+        self.edge_props: Dict[int, Dict[str, Any]] = {}  # without sources/mentions
+        self.mentions = array("I")
+        self.last_source = array("i")  # newest source code per edge
+        self.older_sources: Dict[int, array] = {}  # edge -> older source codes, oldest first
+        self.source_ids: List[str] = []
+        self._source_index: Dict[str, int] = {}
+        self.by_label: List[array] = [array("I") for _ in LABELS]
+        self.by_rel: List[array] = [array("I") for _ in RELS]
+        self.sources: Dict[str, Dict[str, Any]] = {}  # source id -> {"text", "message_id"}
+
+    # -- lifecycle ---------------------------------------------------------
+
+    async def start(self) -> None:
+        if self.snapshot_path is not None and self.snapshot_path.is_file():
+            self.load(self.snapshot_path)
+
+    async def close(self) -> None:
+        if self.snapshot_path is not None:
+            self.snapshot(self.snapshot_path)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.src)
+
+    # -- primitives --------------------------------------------------------
+
+    def _node(self, node_id: str, label: str, name: Optional[str],
+              props: Optional[Dict[str, Any]]) -> int:
+        n = self._index.get(node_id)
+        if n is None:
+            n = len(self.ids)
+            self._index[node_id] = n
+            self.ids.append(node_id)
+            self.names.append(name)
+            code = _LABEL_CODE[label]
+            self.node_label.append(code)
+            self.by_label[code].append(n)
+            self.head_out.append(_NONE)
+            self.head_in.append(_NONE)
+        elif name:
+            self.names[n] = name
+        if props:
+            self.node_props.setdefault(n, {}).update(props)
+        return n
+
+    def _find_edge(self, s: int, o: int, r: int) -> int:
+        e = self.head_out[s]
+        while e != _NONE:
+            if self.dst[e] == o and self.rel[e] == r:
+                return e
+            e = self.next_out[e]
+        return _NONE
+
+    def _edge(self, s: int, o: int, r: int, props: Optional[Dict[str, Any]]) -> int:
+        e = self._find_edge(s, o, r)
+        if e == _NONE:
+            e = len(self.src)
+            self.src.append(s)
+            self.dst.append(o)
+            self.rel.append(r)
+            self.next_out.append(self.head_out[s])
+            self.next_in.append(self.head_in[o])
+            self.head_out[s] = e
+            self.head_in[o] = e
+            self.by_rel[r].append(e)
+            self.mentions.append(0)
+            self.last_source.append(_NONE)
+        if props:
+            self.edge_props.setdefault(e, {}).update(props)
+        return e
+
+    def _cite(self, e: int, source: str) -> None:
+        """``provenance.add_mention`` on the side arrays."""
+        c = self._source_index.get(source)
+        if c is None:
+            c = self._source_index[source] = len(self.source_ids)
+            self.source_ids.append(source)
+        last = self.last_source[e]
+        older = self.older_sources.get(e)
+        if c == last or (older is not None and c in older):
+            return
+        if last != _NONE:
+            if older is None:
+                older = self.older_sources[e] = array("I")
+            older.append(last)
+            del older[:max(0, len(older) - (settings.PROVENANCE_MAX_SOURCES - 1))]
+            if not older:
+                del self.older_sources[e]
+        self.last_source[e] = c
+        self.mentions[e] += 1
+
+    def _cited(self, e: int) -> List[str]:
+        """The ``sources`` list of edge ``e``, newest last."""
+        last = self.last_source[e]
+        if last == _NONE:
+            return []
+        return [self.source_ids[c] for c in self.older_sources.get(e, ())] + [self.source_ids[last]]
+
+    def _rel_props(self, e: int) -> Dict[str, Any]:
+        props = dict(self.edge_props.get(e, {}))
+        if self.mentions[e]:
+            props["sources"] = self._cited(e)
+            props["mentions"] = self.mentions[e]
+        return props
+
+    def _out(self, n: int) -> Iterable[int]:
+        e = self.head_out[n]
+        while e != _NONE:
+            yield e
+            e = self.next_out[e]
+
+    def _in(self, n: int) -> Iterable[int]:
+        e = self.head_in[n]
+        while e != _NONE:
+            yield e
+            e = self.next_in[e]
+
+    # -- GraphStore ----------------------------------------------------------
+
+    async def upsert_entities(self, entities: Iterable[Entity]) -> None:
+        ents = list(entities)
+        created = []
+        with stage("upsert_entities"):
+            for e in ents:
+                if e.id not in self._index:
+                    created.append((e.id, e.label.value))
+                self._node(e.id, e.label.value, e.name, e.props)
+        graph_stats.record(created)
+        if self.index_names:
+            gazetteer.add_entities_later(ents)
+
+    async def upsert_triples(self, triples: Iterable[Triple],
+                             entities: Optional[Iterable[Entity]] = None) -> None:
+        created = []
+        with stage("upsert_triples"):
+            index = self._index
+            compacted, sources = provenance.compact(triples)
+            for t in compacted:
+                s, o = index.get(t.subj), index.get(t.obj)
+                if s is None or o is None:  # like MATCH: missing endpoints write nothing
+                    continue
+                source = t.props.get("source")
+                props = {k: v for k, v in t.props.items() if k != "source"} if source else t.props
+                edges = len(self.src)
+                e = self._edge(s, o, _REL_CODE[t.pred.value], props)
+                if e >= edges:
+                    created.append((t.subj, t.pred.value, t.obj))
+                if source:
+                    if source in sources and source not in self.sources:
+                        self.sources[source] = {"text": sources[source]["text"],
+                                                "message_id": sources[source]["message_id"]}
+                    self._cite(e, source)
+        graph_stats.record(rels=created)
+
+    def compact_provenance(self) -> int:
+        """
+        Migrate edges written before ``provenance``: move their ``text`` to
+        Source entries and keep a reference. Returns the edges changed.
+        """
+        changed = 0
+        for e, props in list(self.edge_props.items()):
+            compacted, src = provenance.compact_props(props)
+            if src is None:
+                continue
+            self.sources.setdefault(src["id"], {"text": src["text"], "message_id": src["message_id"]})
+            del compacted["source"]
+            self._cite(e, src["id"])
+            if compacted:
+                self.edge_props[e] = compacted
+            else:
+                del self.edge_props[e]
+            changed += 1
+        return changed
+
+    def prune_sources(self) -> int:
+        """Drop sources no edge lists in ``sources`` any more; returns how many."""
+        codes = set(self.last_source)
+        for older in self.older_sources.values():
+            codes.update(older)
+        cited = {self.source_ids[c] for c in codes if c != _NONE}
+        stale = [key for key in self.sources if key not in cited]
+        for key in stale:
+            del self.sources[key]
+        return len(stale)
+
+    def _node_dict(self, n: int, include_props: bool) -> Dict[str, Any]:
+        node = {"id": self.ids[n], "label": LABELS[self.node_label[n]],
+                "title": self.names[n] or self.ids[n]}
+        if include_props:
+            node["props"] = self._props(n)
+        return node
+
+    def _props(self, n: int) -> Dict[str, Any]:
+        props = {**self.node_props.get(n, {}), "id": self.ids[n]}
+        if self.names[n] is not None:
+            props["name"] = self.names[n]
+        return props
+
+    async def neighborhood(self, node_id: str, depth: int = 1, limit: int = 200,
+                           cursor: Optional[str] = None,
+                           rel_types: Sequence[str] = (), node_labels: Sequence[str] = (),
+                           include_props: bool = False) -> Page:
+        start = self._index.get(node_id)
+        if start is None or self.node_label[start] != _LABEL_CODE[NodeLabel.PERSON.value]:
+            return {"nodes": [], "edges": [], "next_cursor": None}  # like MATCH (a:Person {id:$uid})
+        rels: Optional[Set[int]] = {_REL_CODE[r] for r in rel_types} or None
+        labels: Optional[Set[int]] = {_LABEL_CODE[l] for l in node_labels} or None
+
+        # BFS over both directions; the label filter applies to expanded nodes only.
+        # Stops at GRAPH_VIEW_MAX_NODES nodes like apoc's ``limit``.
+        cap = settings.GRAPH_VIEW_MAX_NODES
+        visited: Set[int] = {start}
+        frontier = [start]
+        for _ in range(depth):
+            nxt = []
+            for n in frontier:
+                for e in self._out(n):
+                    m = self.dst[e]
+                    if m not in visited and len(visited) < cap and (rels is None or self.rel[e] in rels) \
+                            and (labels is None or self.node_label[m] in labels):
+                        visited.add(m)
+                        nxt.append(m)
+                for e in self._in(n):
+                    m = self.src[e]
+                    if m not in visited and len(visited) < cap and (rels is None or self.rel[e] in rels) \
+                            and (labels is None or self.node_label[m] in labels):
+                        visited.add(m)
+                        nxt.append(m)
+            if len(visited) >= cap:
+                break
+            frontier = nxt
+
+        # Every relationship among the visited nodes (apoc.path.subgraphAll semantics),
+        # keyset-paginated on the edge number.
+        after = int(cursor) if cursor and cursor.isdigit() else _NONE
+        edges = sorted(
+            e for n in visited for e in self._out(n)
+            if e > after and self.dst[e] in visited and (rels is None or self.rel[e] in rels)
+        )
+        page = edges[:limit]
+        nodes: Dict[int, None] = {}
+        out_edges = []
+        for e in page:
+            s, o = self.src[e], self.dst[e]
+            nodes.setdefault(s)
+            nodes.setdefault(o)
+            edge = {"from": self.ids[s], "to": self.ids[o], "label": RELS[self.rel[e]]}
+            if include_props:
+                edge["props"] = self._rel_props(e)
+            out_edges.append(edge)
+        return {
+            "nodes": [self._node_dict(n, include_props) for n in nodes],
+            "edges": out_edges,
+            "next_cursor": str(page[-1]) if len(edges) > limit else None,
+        }
+
+    async def related(self, ids: Sequence[str], rel: RelType, direction: str,
+                      limit: int) -> List[Dict[str, Any]]:
+        src_label, dst_label, symmetric = REL_ENDPOINTS[rel]
+        r = _REL_CODE[rel.value]
+        if direction == "out":
+            slot, want = _LABEL_CODE[src_label.value], _LABEL_CODE[dst_label.value]
+        else:
+            slot, want = _LABEL_CODE[dst_label.value], _LABEL_CODE[src_label.value]
+        forward = direction == "out"
+        out: Dict[int, None] = {}
+        for node_id in ids:
+            n = self._index.get(node_id)
+            if n is None or self.node_label[n] != slot:
+                continue
+            hops = [(self._out(n), self.dst), (self._in(n), self.src)]
+            if not symmetric:
+                hops = hops[:1] if forward else hops[1:]
+            for edges, other in hops:
+                for e in edges:
+                    m = other[e]
+                    if self.rel[e] == r and self.node_label[m] == want:
+                        out.setdefault(m)
+                        if len(out) >= limit:
+                            break
+        return [{"id": self.ids[m], "name": self.names[m]} for m in list(out)[:limit]]
+
+    async def get_nodes(self, ids: Sequence[str]) -> List[Dict[str, Any]]:
+        rows = []
+        for node_id in ids:
+            n = self._index.get(node_id)
+            if n is not None:
+                rows.append({"id": node_id, "label": LABELS[self.node_label[n]],
+                             "name": self.names[n], "props": self._props(n)})
+        return rows
+
+    async def get_sources(self, ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        return {i: dict(self.sources[i]) for i in ids if i in self.sources}
+
+    async def iter_entities(self) -> AsyncIterator[Tuple[str, str, Optional[str]]]:
+        for n, node_id in enumerate(self.ids):
+            yield node_id, LABELS[self.node_label[n]], self.names[n]
+
+    async def iter_degrees(self) -> AsyncIterator[Tuple[str, str, int]]:
+        degree = [0] * len(self.ids)
+        for s in self.src:
+            degree[s] += 1
+        for o in self.dst:
+            degree[o] += 1
+        for n, node_id in enumerate(self.ids):
+            yield node_id, LABELS[self.node_label[n]], degree[n]
+
+    async def rel_counts(self) -> Dict[str, int]:
+        return {r: len(self.by_rel[i]) for i, r in enumerate(RELS)}
+
+    # -- persistence ---------------------------------------------------------
+
+    def snapshot(self, path: Union[str, Path]) -> int:
+        """Write the graph to ``path`` (atomically); returns the file size."""
+        path = Path(path)
+        blobs: List[Tuple[str, bytes]] = [
+            ("ids", "\0".join(self.ids).encode()),
+            ("names", "\0".join(n or "" for n in self.names).encode()),
+            ("node_props", json.dumps({str(k): v for k, v in self.node_props.items()},
+                                      default=str).encode()),
+            ("edge_props", json.dumps({str(k): v for k, v in self.edge_props.items()},
+                                      default=str).encode()),
+            ("sources", json.dumps(self.sources).encode()),
+            ("source_ids", "\0".join(self.source_ids).encode()),
+            ("older_sources", json.dumps({str(k): v.tolist()
+                                          for k, v in self.older_sources.items()}).encode()),
+        ]
+        blobs += [(name, getattr(self, name).tobytes()) for name in _ARRAYS]
+        blobs += [(f"by_label.{i}", a.tobytes()) for i, a in enumerate(self.by_label)]
+        blobs += [(f"by_rel.{i}", a.tobytes()) for i, a in enumerate(self.by_rel)]
+        header = json.dumps({
+            "labels": LABELS, "rels": RELS, "byteorder": sys.byteorder,
+            "nodes": len(self.ids), "edges": len(self.src),
+            "sections": [[name, len(b)] for name, b in blobs],
+        }).encode()
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with tmp.open("wb") as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for _, b in blobs:
+                f.write(b)
+        os.replace(tmp, path)
+        return path.stat().st_size
+
+    def load(self, path: Union[str, Path]) -> None:
+        """Replace the graph with the snapshot at ``path``."""
+        with Path(path).open("rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a graph snapshot")
+            header = json.loads(f.read(int.from_bytes(f.read(8), "little")))
+            if header["labels"] != LABELS or header["rels"] != RELS:
+                raise ValueError(f"{path} was written for a different label/relationship schema")
+            sections = {name: f.read(size) for name, size in header["sections"]}
+
+        swap = header["byteorder"] != sys.byteorder
+        self._clear()
+
+        def fill(a: array, raw: bytes) -> array:
+            a.frombytes(raw)
+            if swap:
+                a.byteswap()
+            return a
+
+        for name in _ARRAYS:
+            if name in sections:  # mentions/last_source are absent before the side arrays
+                fill(getattr(self, name), sections[name])
+        for i in range(len(LABELS)):
+            fill(self.by_label[i], sections[f"by_label.{i}"])
+        for i in range(len(RELS)):
+            fill(self.by_rel[i], sections[f"by_rel.{i}"])
+        self.ids = sections["ids"].decode().split("\0") if header["nodes"] else []
+        names = sections["names"].decode().split("\0") if header["nodes"] else []
+        self.names = [n or None for n in names]
+        self._index = {node_id: n for n, node_id in enumerate(self.ids)}
+        self.node_props = {int(k): v for k, v in json.loads(sections["node_props"]).items()}
+        self.edge_props = {int(k): v for k, v in json.loads(sections["edge_props"]).items()}
+        self.sources = json.loads(sections.get("sources", b"{}"))  # absent before provenance
+        if "source_ids" in sections:
+            raw = sections["source_ids"].decode()
+            self.source_ids = raw.split("\0") if raw else []
+            self._source_index = {s: c for c, s in enumerate(self.source_ids)}
+            self.older_sources = {int(k): array("I", v)
+                                  for k, v in json.loads(sections["older_sources"]).items()}
+        else:
+            self._split_provenance(header["edges"])
+
+    def _split_provenance(self, edges: int) -> None:
+        """Move ``sources``/``mentions`` of an older snapshot out of ``edge_props``."""
+        self.mentions = array("I", bytes(4 * edges))
+        self.last_source = array("i", [_NONE]) * edges
+        for e, props in list(self.edge_props.items()):
+            for source in props.pop("sources", None) or ():
+                self._cite(e, source)
+            self.mentions[e] = props.pop("mentions", self.mentions[e])
+            if not props:
+                del self.edge_props[e]
@@ -0,0 +1,230 @@
+"""
+``GraphStore`` on Neo4j: the upsert loaders, plus the Cypher that used to
+live in the ``graph_view`` router and the gazetteer.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.graph import provenance
+from app.graph.kg_schema import CANON_LABELS, CANON_RELS
+from app.graph.loaders import parallel, upsert
+from app.graph.store.base import GraphStore, Page
+from app.core.config import settings
+from app.graph.change_cache import change_cache
+from app.models.graph import Entity, NodeLabel, RelType, Triple
+from app.services import intents, query_guard
+from app.services.neo4j_async import (
+    READ_ACCESS, aping, arun_read, astream_cypher, close_async_driver, init_async_driver,
+    warm_up_async_driver,
+)
+from app.services.result_cache import write_generation
+
+# One index seek on the start node, then apoc's BFS expansion, which visits
+# each node once and returns the distinct relationships of the neighborhood.
+# The expansion stops after GRAPH_VIEW_MAX_NODES nodes (``limit``, in BFS
+# order); relationships between nodes beyond the cap are not listed.
+#
+# A neighborhood is expanded once and paged many times: ``_EXPAND`` returns
+# only its relationship ids, which ``NeighborhoodCache`` keeps sorted per
+# (user, depth, filters), and each page seeks its slice by elementId in
+# ``_PAGE``. Pagination is keyset on that id; nodes are the deduplicated
+# endpoints of the edges on the current page.
+_EXPAND = """
+MATCH (a:Person {id:$uid})
+CALL apoc.path.subgraphAll(a, {
+  maxLevel: $depth, relationshipFilter: $rel_filter, labelFilter: $label_filter,
+  limit: $max_nodes
+}) YIELD relationships
+RETURN [r IN relationships | elementId(r)] AS rels
+"""
+
+_PAGE = """
+UNWIND $rids AS rid
+MATCH ()-[r]->() WHERE elementId(r) = rid
+WITH collect(r) AS rels
+WITH rels, apoc.coll.toSet(apoc.coll.flatten([r IN rels | [startNode(r), endNode(r)]])) AS ns
+RETURN
+  [n IN ns | {{id: coalesce(n.id, elementId(n)), label: labels(n)[0],
+              title: coalesce(n.name, n.id, elementId(n)){node_props}}}] AS nodes,
+  [r IN rels | {{from: coalesce(startNode(r).id, elementId(startNode(r))),
+                to: coalesce(endNode(r).id, elementId(endNode(r))),
+                label: type(r){edge_props}}}] AS edges
+"""
+
+ExpansionKey = Tuple[str, int, str, str, int]  # uid, depth, rel filter, label filter, max nodes
+
+
+class NeighborhoodCache:
+    """
+    The sorted relationship ids of recently paged neighborhoods. Entries
+    remember the write generation they were read at (``result_cache``) and
+    are dropped once it moves, so a write through this process means the
+    next page expands again; writes from other processes are not seen until
+    then, as with the result cache.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[ExpansionKey, Tuple[int, List[str]]]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    def get(self, key: ExpansionKey) -> Optional[List[str]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != write_generation():
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def put(self, key: ExpansionKey, rids: List[str], generation: int) -> None:
+        """Keep ``rids`` if no write happened since ``generation`` was read."""
+        if self.max_entries <= 0 or generation != write_generation():
+            return
+        self._entries[key] = (generation, rids)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _by_id_query() -> str:
+    # One UNION branch per canonical label; each branch is an index seek.
+    branches = "\n      UNION\n".join(
+        f"      WITH id MATCH (n:`{label}` {{id:id}}) RETURN n"
+        for label in sorted(CANON_LABELS)
+    )
+    return f"""
+    UNWIND $ids AS id
+    CALL {{
+{branches}
+    }}
+    RETURN id, [l IN labels(n) WHERE l IN $labels][0] AS label, n.name AS name,
+           properties(n) AS props
+    """
+
+
+def _parallel(items: Sequence[Any]) -> bool:
+    """Large payloads go through several sessions (``loaders.parallel``)."""
+    return settings.INGEST_WRITERS > 1 and len(items) >= settings.INGEST_PARALLEL_MIN
+
+
+class Neo4jStore(GraphStore):
+    name = "neo4j"
+    supports_cypher = True
+
+    def __init__(self) -> None:
+        self.expansions = NeighborhoodCache(settings.GRAPH_VIEW_CACHE_SIZE)
+
+    async def start(self) -> None:
+        await init_async_driver()
+
+    async def close(self) -> None:
+        await close_async_driver()
+
+    async def warm_up(self) -> None:
+        await warm_up_async_driver(settings.NEO4J_WARM_CONNECTIONS, settings.NEO4J_WARM_TIMEOUT)
+        if settings.CHANGE_CACHE_ENABLED and settings.CHANGE_CACHE_WARM:
+            await change_cache.warm()
+
+    async def ping(self) -> bool:
+        return await aping()
+
+    async def upsert_entities(self, entities: Iterable[Entity]) -> None:
+        ents = list(entities)
+        if _parallel(ents):
+            await parallel.upsert_entities(ents)
+        else:
+            await upsert.upsert_entities(ents)
+
+    async def upsert_triples(self, triples: Iterable[Triple],
+                             entities: Optional[Iterable[Entity]] = None) -> None:
+        rows = list(triples)
+        if _parallel(rows):
+            await parallel.upsert_triples(rows, entities)
+        else:
+            await upsert.upsert_triples(rows, entities)
+
+    async def upsert_delta(self, entities: Iterable[Entity], triples: Iterable[Triple]) -> None:
+        await upsert.upsert_delta(entities, triples)  # one transaction
+
+    async def neighborhood(self, node_id: str, depth: int = 1, limit: int = 200,
+                           cursor: Optional[str] = None,
+                           rel_types: Sequence[str] = (), node_labels: Sequence[str] = (),
+                           include_props: bool = False) -> Page:
+        key = (node_id, depth, "|".join(rel_types), "|".join(f"+{l}" for l in node_labels),
+               settings.GRAPH_VIEW_MAX_NODES)
+        rids = self.expansions.get(key)
+        if rids is None:
+            generation = write_generation()
+            rows = await arun_read(_EXPAND, {
+                "uid": node_id, "depth": depth, "rel_filter": key[2], "label_filter": key[3],
+                "max_nodes": key[4],
+            }, name="graph_view_expand")
+            rids = sorted(rows[0]["rels"]) if rows else []  # no rows: unknown node
+            self.expansions.put(key, rids, generation)
+        start = bisect_right(rids, cursor) if cursor is not None else 0
+        page = rids[start:start + limit]
+        if not page:
+            return {"nodes": [], "edges": [], "next_cursor": None}
+        q = _PAGE.format(
+            node_props=", props: properties(n)" if include_props else "",
+            edge_props=", props: properties(r)" if include_props else "",
+        )
+        row = (await arun_read(q, {"rids": page}, name="graph_view"))[0]
+        return {"nodes": row["nodes"], "edges": row["edges"],
+                "next_cursor": page[-1] if start + limit < len(rids) else None}
+
+    async def related(self, ids: Sequence[str], rel: RelType, direction: str,
+                      limit: int) -> List[Dict[str, Any]]:
+        _, cypher = intents.template(rel, direction)
+        return await arun_read(cypher, {"ids": list(ids), "limit": limit},
+                                 timeout=query_guard.timeout(),
+                                 name=f"qa_template:{rel.value}_{direction}")
+
+    async def get_nodes(self, ids: Sequence[str]) -> List[Dict[str, Any]]:
+        rows = await arun_read(_by_id_query(), {"ids": list(ids),
+                                                  "labels": [l.value for l in NodeLabel]},
+                                 name="get_nodes")
+        found = {r["id"]: r for r in rows}
+        return [found[i] for i in ids if i in found]
+
+    async def get_sources(self, ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        rows = await arun_read(f"""
+        UNWIND $ids AS id
+        MATCH (s:`{provenance.SOURCE_LABEL}` {{id:id}})
+        RETURN s.id AS id, s.text AS text, s.message_id AS message_id
+        """, {"ids": list(ids)}, name="get_sources")
+        return {r["id"]: {"text": r["text"], "message_id": r["message_id"]} for r in rows}
+
+    async def iter_entities(self) -> AsyncIterator[Tuple[str, str, Optional[str]]]:
+        query = """
+        MATCH (n)
+        WHERE (n:Person OR n:Place OR n:Org OR n:Goal) AND n.id IS NOT NULL
+        RETURN n.id AS id, n.name AS name,
+               [l IN labels(n) WHERE l IN $labels][0] AS label
+        """
+        async for row in astream_cypher(query, {"labels": [l.value for l in NodeLabel]},
+                                        name="gazetteer_load", access_mode=READ_ACCESS):
+            yield row["id"], row["label"], row.get("name")
+
+    async def iter_degrees(self) -> AsyncIterator[Tuple[str, str, int]]:
+        query = """
+        MATCH (n)
+        WHERE (n:Person OR n:Place OR n:Org OR n:Goal) AND n.id IS NOT NULL
+        RETURN n.id AS id, [l IN labels(n) WHERE l IN $labels][0] AS label,
+               COUNT { (n)--() } AS degree
+        """
+        async for row in astream_cypher(query, {"labels": [l.value for l in NodeLabel]},
+                                        name="stats_degrees", access_mode=READ_ACCESS):
+            yield row["id"], row["label"], row["degree"]
+
+    async def rel_counts(self) -> Dict[str, int]:
+        # one branch per type; a typed count with no other pattern is a count-store lookup
+        query = "\nUNION ALL\n".join(
+            f"MATCH ()-[r:`{t}`]->() RETURN '{t}' AS type, count(r) AS n" for t in sorted(CANON_RELS)
+        )
+        rows = await arun_read(query, name="stats_rel_counts")
+        return {r["type"]: r["n"] for r in rows}
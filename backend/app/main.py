@@ -1,25 +1,96 @@
 # app/main.py
-from fastapi import FastAPI
-from .routers import chat, graph, kg
-from app.services.neo4j_client import init_driver, close_driver
+import asyncio
+import logging
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from .routers import chat, graph, graph_view, kg
+from app.core.config import settings
+from app.graph import schema_reconciler
+from app.graph.stats import graph_stats
+from app.graph.store import get_store
+from app.services import health, metrics
+from app.services.gazetteer import warm_up
+from app.services.llm_extraction import extraction_engine
+from app.services.write_behind import write_queue
 from starlette.responses import RedirectResponse
 
 app = FastAPI(title="LLM-KG API")
+log = logging.getLogger(__name__)
+_background = set()
+
+def _in_background(coro):
+    task = asyncio.create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+async def _warm_store():
+    try:
+        await get_store().warm_up()
+    except Exception as e:  # not fatal: connections then open on first use, /readyz reports it
+        log.warning("graph store warm-up failed: %r", e)
+        return
+    if get_store().supports_cypher and settings.SCHEMA_RECONCILE in ("check", "apply"):
+        await _reconcile_schema(apply=settings.SCHEMA_RECONCILE == "apply")
+
+async def _reconcile_schema(apply: bool):
+    try:
+        report = await schema_reconciler.reconcile(apply=apply)
+    except Exception as e:
+        log.warning("schema reconcile failed: %r", e)
+        return
+    if report.missing or report.failed:
+        log.warning("schema: missing %s, created %s, failed %s", report.missing, report.created,
+                    report.failed)
 
-# ensure Neo4j is ready
+# start the graph store (Neo4j driver or embedded snapshot) without touching the
+# network; connecting, pool warm-up and the gazetteer's graph names happen in the
+# background so a slow or unreachable database can't hold up boot
 @app.on_event("startup")
-def _on_startup():
-    init_driver()
+async def _on_startup():
+    await get_store().start()
+    write_queue.start()
+    if settings.KG_EXTRACTOR_MODE == "llm":
+        extraction_engine.start()
+    _in_background(_warm_store())
+    _in_background(warm_up(settings.GAZETTEER_SEED_PATH, settings.GAZETTEER_LOAD_GRAPH))
+    if settings.GRAPH_STATS_ENABLED:
+        _in_background(graph_stats.run(get_store()))  # load or rebuild, then save / reconcile periodically
 
 @app.on_event("shutdown")
-def _on_shutdown():
-    close_driver()
+async def _on_shutdown():
+    for task in _background:
+        task.cancel()
+    await extraction_engine.stop()
+    await write_queue.stop()  # flush pending KG deltas before the store goes away
+    if settings.GRAPH_STATS_ENABLED:
+        await graph_stats.save()
+    await get_store().close()
 
 # include routers
 app.include_router(graph.router)
 app.include_router(kg.router)
+app.include_router(graph_view.router)
 app.include_router(chat.router)
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Stage, Cypher and OpenAI timings in the Prometheus text format."""
+    if not metrics.enabled():
+        raise HTTPException(status_code=404, detail="metrics are disabled (METRICS_ENABLED=0)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/healthz", include_in_schema=False)
+def healthz():
+    """Liveness: the process is up and serving."""
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Readiness: the graph store (and OpenAI, if READYZ_CHECK_OPENAI) answers; 503 otherwise."""
+    body = await health.readiness()
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
 # handy root redirect
 @app.get("/", include_in_schema=False)
 def root():
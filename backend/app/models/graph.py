@@ -74,4 +74,6 @@ class CypherRunResponse(BaseModel):
     """
     Minimal response wrapper for /graph/run.
     """
+    rows: List[Dict[str, Any]] = Field(default_factory=list)
     value: Optional[Any] = None
+    truncated: bool = False  # True when GRAPH_RUN_MAX_ROWS cut the result short
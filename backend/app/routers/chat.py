@@ -1,47 +1,157 @@
 # app/routers/chat.py
-from fastapi import APIRouter
-from pydantic import BaseModel
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
 from uuid import uuid4
 
+from app.core.config import settings
 from app.models.graph import IngestRequest
-from app.services.kg_extractor import extract_kg
-from app.graph.loaders.upsert import upsert_entities, upsert_triples
-from app.services.qa_orchestrator import answer_question
+from app.services.kg_extractor import aextract_kg
+from app.services.llm_extraction import extraction_engine
+from app.services.metrics import stage
+from app.services.nl2cypher import cache_stats
+from app.services.qa_orchestrator import answer_question, qa_stats
+from app.services.write_behind import merge_deltas, submit_delta
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 class Ask(BaseModel):
     text: str
     user_id: str = "demo-user"
+    read_your_writes: bool = False  # wait for the KG delta to be committed before answering
+
+class AskBatch(BaseModel):
+    items: List[Ask] = Field(..., min_length=1)
+    read_your_writes: bool = False  # answer only after the batch's merged delta is committed
+
+def _result(ans: Dict[str, Any], kg_delta: IngestRequest, source_id: str) -> Dict[str, Any]:
+    return {
+        "answer": ans.get("answer", ""),
+        "cypher_used": ans.get("cypher", ""),
+        "graph_results": ans.get("graph_results", []),
+        "qa_path": ans.get("path", ""),
+        "kg_delta": kg_delta.model_dump(),
+        "source_id": source_id,
+    }
+
+def _validated(kg_delta_dict: Optional[Dict[str, Any]]) -> IngestRequest:
+    """The extractor's mapping as an IngestRequest; an empty one if it doesn't validate."""
+    try:
+        return IngestRequest(**(kg_delta_dict or {"entities": [], "triples": []}))
+    except Exception:
+        return IngestRequest(entities=[], triples=[])
 
 @router.post("/ask")
-def ask(payload: Ask):
+async def ask(payload: Ask):
     source_id = f"msg:{uuid4()}"
 
     # Always produce a mapping (no blocking). If extractor fails we keep it empty.
-    kg_delta_dict = extract_kg(payload.user_id, payload.text, source_id=source_id) or {"entities": [], "triples": []}
+    with stage("extract_kg"):
+        kg_delta_dict = await aextract_kg(payload.user_id, payload.text, source_id=source_id) or {"entities": [], "triples": []}
 
     # Validate against our Pydantic schema; if it fails, use an empty delta
-    try:
-        kg_delta = IngestRequest(**kg_delta_dict)
-    except Exception:
-        kg_delta = IngestRequest(entities=[], triples=[])
+    with stage("validate"):
+        kg_delta = _validated(kg_delta_dict)
 
-    # Upsert with best-effort; failures shouldn't block response
-    try:
-        if kg_delta.entities:
-            upsert_entities([e.model_dump() for e in kg_delta.entities])  # loader expects dicts
-        if kg_delta.triples:
-            upsert_triples([t.model_dump() for t in kg_delta.triples])
-    except Exception:
-        pass  # don’t fail the request for demo
+    # Queue the upsert (write-behind); failures shouldn't block response
+    with stage("submit_delta"):
+        try:
+            await submit_delta(kg_delta.entities, kg_delta.triples, wait=payload.read_your_writes)
+        except Exception:
+            pass  # don’t fail the request for demo
 
-    ans = answer_question(payload.text)
+    with stage("answer_question"):
+        ans = await answer_question(payload.text, payload.user_id)
 
+    return _result(ans, kg_delta, source_id)
+
+@router.post("/ask_batch")
+async def ask_batch(payload: AskBatch):
+    """
+    ``/chat/ask`` for many messages (history replay, chat-log import), run as
+    three stages instead of once per message:
+
+    1. extraction of every item, CHAT_BATCH_CONCURRENCY at a time (the LLM
+       extractor micro-batches what arrives together);
+    2. one upsert of all deltas merged and deduplicated, through the
+       write-behind queue (waited for with ``read_your_writes`` on the batch
+       or any item);
+    3. answering, CHAT_BATCH_CONCURRENCY at a time.
+
+    ``results`` are in input order, shaped like ``/chat/ask`` responses.
+    A failing item gets an ``error`` and an empty answer without affecting
+    the others; a failed upsert is reported once under ``upsert``.
+    """
+    items = payload.items
+    if len(items) > settings.CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413,
+                            detail=f"at most {settings.CHAT_BATCH_MAX_ITEMS} items per batch")
+    gate = asyncio.Semaphore(max(1, settings.CHAT_BATCH_CONCURRENCY))
+    source_ids = [f"msg:{uuid4()}" for _ in items]
+    errors: List[Optional[str]] = [None] * len(items)
+
+    async def extract(i: int, item: Ask) -> IngestRequest:
+        async with gate:
+            try:
+                return _validated(await aextract_kg(item.user_id, item.text, source_id=source_ids[i]))
+            except Exception as e:
+                errors[i] = f"extract: {type(e).__name__}: {e}"
+                return IngestRequest(entities=[], triples=[])
+
+    t0 = time.perf_counter()
+    with stage("batch_extract"):
+        deltas = await asyncio.gather(*(extract(i, item) for i, item in enumerate(items)))
+    t1 = time.perf_counter()
+
+    with stage("batch_submit_delta"):
+        entities, triples = merge_deltas((d.entities, d.triples) for d in deltas)
+        wait = payload.read_your_writes or any(item.read_your_writes for item in items)
+        upsert: Dict[str, Any] = {"entities": len(entities), "triples": len(triples), "error": None}
+        try:
+            await submit_delta(entities, triples, wait=wait)
+        except Exception as e:
+            upsert["error"] = f"{type(e).__name__}: {e}"
+    t2 = time.perf_counter()
+
+    async def answer(i: int, item: Ask) -> Dict[str, Any]:
+        async with gate:
+            try:
+                return await answer_question(item.text, item.user_id)
+            except Exception as e:
+                errors[i] = errors[i] or f"answer: {type(e).__name__}: {e}"
+                return {}
+
+    with stage("batch_answer"):
+        answers = await asyncio.gather(*(answer(i, item) for i, item in enumerate(items)))
+    t3 = time.perf_counter()
+
+    results = []
+    for ans, delta, source_id, error in zip(answers, deltas, source_ids, errors):
+        result = _result(ans, delta, source_id)
+        if error:
+            result["error"] = error
+        results.append(result)
+    timings = {"extract": t1 - t0, "submit_delta": t2 - t1, "answer": t3 - t2}
     return {
-        "answer": ans.get("answer", ""),
-        "cypher_used": ans.get("cypher", ""),
-        "graph_results": ans.get("graph_results", []),
-        "kg_delta": kg_delta.model_dump(),
-        "source_id": source_id,
+        "results": results,
+        "upsert": upsert,
+        "timings_ms": {k: round(v * 1000, 1) for k, v in timings.items()},
     }
+
+@router.get("/nl2cypher/stats")
+def nl2cypher_stats():
+    """Hit/miss/eviction counters of the NL->Cypher translation cache."""
+    return cache_stats()
+
+@router.get("/qa/stats")
+def qa_path_stats():
+    """Template fast-path hit ratio and latency per answering path."""
+    return qa_stats()
+
+@router.get("/extract/stats")
+def extract_stats():
+    """Queue, batching, timeout and circuit-breaker counters of the LLM extractor."""
+    return extraction_engine.snapshot()
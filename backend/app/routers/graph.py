@@ -1,15 +1,152 @@
-from fastapi import APIRouter
+from contextlib import contextmanager
+from typing import AsyncIterator, Iterator, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from neo4j import READ_ACCESS, WRITE_ACCESS
+from neo4j.exceptions import Neo4jError
+from app.core.config import settings
+from app.graph.change_cache import change_cache
+from app.graph.stats import graph_stats
+from app.graph.store import get_store
 from app.models.graph import CypherRunRequest, CypherRunResponse
-from app.services.neo4j_client import run_cypher
+from app.services import query_guard, result_formats
+from app.services.result_cache import (
+    bump_write_generation, graph_run_cache, make_key, write_generation,
+)
+from app.utils.cypher_sanitize import is_read_only
 
 router = APIRouter(prefix="/graph", tags=["graph"])
 
+def _after_write() -> None:
+    """Invalidate cached reads, the upserts' change cache and the graph stats: the write may have changed anything."""
+    bump_write_generation()
+    change_cache.clear()
+    graph_stats.mark_stale()
+
+async def _bump_after(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Pass a stream through and invalidate caches once it is done."""
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        _after_write()
+
+@contextmanager
+def _timeout_as_504() -> Iterator[None]:
+    try:
+        yield
+    except Neo4jError as e:
+        if "TimedOut" in (e.code or ""):
+            raise HTTPException(status_code=504, detail="query exceeded QUERY_TIMEOUT") from e
+        raise
+
 @router.post("/run", response_model=CypherRunResponse)
-def run(payload: CypherRunRequest) -> CypherRunResponse:
-    rows = run_cypher(payload.query, payload.params or {})
+async def run(payload: CypherRunRequest, response: Response,
+              format: str = Query("json", pattern="^(json|ndjson|columnar|arrow)$"),
+              fetch_size: Optional[int] = Query(None, ge=1, le=100_000),
+              cache_control: Optional[str] = Header(None)):
+    """
+    Run a Cypher statement.
+
+    ``format``:
+      - ``json`` (default): ``{"rows": [...], "value": ..., "truncated": ...}``.
+        Read-only statements are served from the result cache; send
+        ``Cache-Control: no-cache`` to force a fresh read (the result is still
+        cached) or ``no-store`` to bypass the cache entirely. The ``X-Cache``
+        response header says HIT, MISS or BYPASS.
+      - ``ndjson``: rows streamed one per line as the driver yields them.
+      - ``columnar``: ``{"columns": [...], "data": [[...], ...]}``.
+      - ``arrow``: Arrow IPC stream (requires pyarrow on the server).
+
+    Every format stops after GRAPH_RUN_MAX_ROWS rows. ``fetch_size`` sets
+    how many records the driver pulls per round trip.
+
+    Statements pass ``query_guard.prepare`` first: reads get a LIMIT just
+    above GRAPH_RUN_MAX_ROWS, plans over the EXPLAIN estimate are refused
+    with 400, and the transaction runs under QUERY_TIMEOUT (504 when hit).
+    Backends without Cypher (GRAPH_BACKEND=memory) answer 501.
+    """
+    if not get_store().supports_cypher:
+        raise HTTPException(status_code=501,
+                            detail=f"/graph/run needs Cypher; the {get_store().name} backend has none")
+    params = payload.params or {}
+    max_rows = settings.GRAPH_RUN_MAX_ROWS
+    fetch_size = fetch_size or settings.GRAPH_RUN_FETCH_SIZE
+    try:
+        query = await query_guard.prepare(payload.query, params, read_only=False,
+                                          limit=max_rows + 1)
+    except query_guard.QueryRejected as e:
+        raise HTTPException(status_code=400, detail=e.reason)
+    timeout = query_guard.timeout()
+    read_only = is_read_only(query)
+    mode = READ_ACCESS if read_only else WRITE_ACCESS  # reads go to cluster readers
+
+    if format in ("ndjson", "arrow"):
+        if format == "arrow" and result_formats.pa is None:
+            raise HTTPException(status_code=406, detail="pyarrow is not installed on the server")
+        if format == "ndjson":
+            chunks = result_formats.ndjson_chunks(query, params, max_rows, fetch_size, timeout, mode)
+            media_type = "application/x-ndjson"
+        else:
+            chunks = result_formats.arrow_chunks(query, params, max_rows, fetch_size=fetch_size,
+                                                 timeout=timeout, access_mode=mode)
+            media_type = "application/vnd.apache.arrow.stream"
+        if not read_only:
+            chunks = _bump_after(chunks)
+        return StreamingResponse(chunks, media_type=media_type, headers={"X-Cache": "BYPASS"})
+
+    if format == "columnar":
+        try:
+            with _timeout_as_504():
+                body = await result_formats.collect_columns(query, params, max_rows,
+                                                            fetch_size, timeout, mode)
+        finally:
+            if not read_only:
+                _after_write()
+        return JSONResponse(body, headers={"X-Cache": "BYPASS"})
+
+    directives = {d.strip().lower() for d in (cache_control or "").split(",")}
+    truncated = False
+    with _timeout_as_504():
+        if not read_only:
+            try:
+                rows, truncated = await result_formats.collect_rows(
+                    query, params, max_rows, fetch_size, timeout, mode)
+            finally:
+                _after_write()
+            response.headers["X-Cache"] = "BYPASS"
+        elif not settings.GRAPH_RUN_CACHE_ENABLED or "no-store" in directives:
+            graph_run_cache.stats["bypass"] += 1
+            rows, truncated = await result_formats.collect_rows(
+                query, params, max_rows, fetch_size, timeout, mode)
+            response.headers["X-Cache"] = "BYPASS"
+        else:
+            key = make_key(query, params)
+            rows = None if "no-cache" in directives else graph_run_cache.get(key)
+            if rows is not None:
+                response.headers["X-Cache"] = "HIT"
+            else:
+                generation = write_generation()
+                rows, truncated = await result_formats.collect_rows(
+                    query, params, max_rows, fetch_size, timeout, mode)
+                if not truncated:
+                    graph_run_cache.put(key, rows, generation)
+                response.headers["X-Cache"] = "MISS"
+
     scalar = None
     if rows:
         first = rows[0]
         if isinstance(first, dict) and len(first) == 1:
             scalar = next(iter(first.values()))
-    return CypherRunResponse(rows=rows, value=scalar)
+    return CypherRunResponse(rows=rows, value=scalar, truncated=truncated)
+
+@router.get("/cache/stats")
+def cache_stats() -> dict:
+    """Hit rate, size and invalidation counters of the /graph/run result cache."""
+    return graph_run_cache.snapshot()
+
+@router.get("/guard/stats")
+def guard_stats() -> dict:
+    """EXPLAIN plan-cache counters and the query guard settings in effect."""
+    return query_guard.guard_stats()
@@ -1,41 +1,47 @@
 # app/routers/graph_view.py
+from typing import List, Optional
+
 from fastapi import APIRouter, Query
-from app.services.neo4j_client import run_cypher
+from app.models.graph import NodeLabel, RelType
+from app.graph import provenance
+from app.graph.store import get_store
 
 router = APIRouter(prefix="/kg", tags=["kg"])  # <-- THIS must exist
 
 @router.get("/graph_view")
-def graph_view(user_id: str = Query(...)):
-    uid = f"user:{user_id}"
-    q = """
-    MATCH (a {id:$uid})-[r]->(b) RETURN a,r,b
-    UNION
-    MATCH (a)-[r]->(b {id:$uid}) RETURN a,r,b
+async def graph_view(
+    user_id: str = Query(...),
+    depth: int = Query(1, ge=1, le=3, description="Hops from the user node."),
+    limit: int = Query(200, ge=1, le=5000, description="Edges per page."),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page."),
+    rel_types: Optional[List[RelType]] = Query(None, description="Only follow these relationship types."),
+    node_labels: Optional[List[NodeLabel]] = Query(None, description="Only expand into nodes with these labels."),
+    include_props: bool = Query(False, description="Ship node/edge properties too."),
+    expand_sources: bool = Query(False, description="Also ship the message texts edges cite "
+                                                    "(implies include_props)."),
+):
     """
-    rows = run_cypher(q, {"uid": uid})
-
-    nodes_by_id = {}
-    def put_node(node):
-        nid = node["properties"].get("id") or node["element_id"]
-        nodes_by_id[nid] = {
-            "id": nid,
-            "label": "/".join(node["labels"]),
-            "title": node["properties"].get("name", nid),
-            "props": node["properties"],
-        }
+    Paginated neighborhood of ``user:<user_id>`` (undirected, up to 3 hops).
 
-    edges = []
-    elid_to_pid = {}
-    for row in rows:
-        a = row["a"]; b = row["b"]; r = row["r"]
-        put_node(a); put_node(b)
-        elid_to_pid[a["element_id"]] = a["properties"].get("id") or a["element_id"]
-        elid_to_pid[b["element_id"]] = b["properties"].get("id") or b["element_id"]
-        edges.append({
-            "from": elid_to_pid.get(r["start_element_id"], r["start_element_id"]),
-            "to":   elid_to_pid.get(r["end_element_id"],   r["end_element_id"]),
-            "label": r["type"],
-            "props": r["properties"],
-        })
+    Edges reference nodes by id; nodes carry id/label/title and, with
+    ``include_props``, their properties. Pass ``next_cursor`` back as
+    ``cursor`` to get the next page. The neighborhood is expanded once, up to
+    GRAPH_VIEW_MAX_NODES nodes nearest the user, and later pages read their
+    slice of it until the next write; edges among nodes past that cap are
+    left out.
 
-    return {"nodes": list(nodes_by_id.values()), "edges": edges}
+    Edge props cite messages by Source id (``source``, ``sources``); with
+    ``expand_sources`` the page also has ``sources``, mapping each id cited
+    on the page to ``{"text", "message_id"}``.
+    """
+    store = get_store()
+    page = await store.neighborhood(
+        f"user:{user_id}", depth=depth, limit=limit, cursor=cursor,
+        rel_types=[t.value for t in rel_types or ()],
+        node_labels=[l.value for l in node_labels or ()],
+        include_props=include_props or expand_sources,
+    )
+    if expand_sources:
+        ids = provenance.source_ids(page["edges"])
+        page["sources"] = await store.get_sources(ids) if ids else {}
+    return page
@@ -1,31 +1,196 @@
 """Knowledge-graph ingest endpoints (manual inserts)."""
 from __future__ import annotations
 
-from fastapi import APIRouter
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from app.graph.kg_schema import validate_ingest
-from app.models.graph import IngestRequest
-from app.graph.loaders.upsert import upsert_entities, upsert_triples
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.graph.change_cache import change_cache
+from app.graph.kg_schema import validate_ingest, validate_item
+from app.graph.stats import graph_stats
+from app.models.graph import Entity, IngestRequest, Triple
+from app.graph.store import get_store
+from app.services.entity_linker import entity_linker
+from app.services.metrics import stage
 
 router = APIRouter(prefix="/kg", tags=["kg"])
 
+MAX_LINE_BYTES = 1 << 20       # a single NDJSON line may not exceed 1 MiB
+MAX_REPORTED_FAILURES = 100    # keep the report bounded for huge uploads
+
 
 @router.post("/ingest", summary="Upsert entities and triples into the graph")
-def ingest(body: IngestRequest) -> dict:
+async def ingest(body: IngestRequest) -> dict:
     """
     Upsert nodes (entities) and relationships (triples).
 
     The payload is validated/normalized by our schema before writing.
+    From INGEST_PARALLEL_MIN items on, Neo4j writes are split across
+    INGEST_WRITERS sessions (``app.graph.loaders.parallel``) and are no
+    longer one transaction.
     """
-    normalized = validate_ingest(body)
+    with stage("validate"):
+        normalized = validate_ingest(body)
 
+    store = get_store()
     if normalized.entities:
-        upsert_entities(normalized.entities)
+        await store.upsert_entities(normalized.entities)
     if normalized.triples:
-        upsert_triples(normalized.triples)
+        await store.upsert_triples(normalized.triples, normalized.entities)
 
     return {
         "status": "ok",
         "entities": len(normalized.entities),
         "triples": len(normalized.triples),
     }
+
+
+async def _ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Split a byte stream into (line number, line) pairs, holding at most one
+    partial line in memory. Lines longer than MAX_LINE_BYTES come out as None.
+    """
+    buf = bytearray()
+    lineno = 0
+    too_long = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            nl = chunk.find(b"\n", start)
+            if not too_long:
+                buf += chunk[start:] if nl < 0 else chunk[start:nl]
+                if len(buf) > MAX_LINE_BYTES:
+                    too_long = True
+                    buf.clear()
+            if nl < 0:
+                break
+            lineno += 1
+            yield lineno, None if too_long else bytes(buf)
+            buf.clear()
+            too_long = False
+            start = nl + 1
+    if buf or too_long:
+        yield lineno + 1, None if too_long else bytes(buf)
+
+
+@router.post("/ingest/stream", summary="Stream NDJSON entities and triples into the graph")
+async def ingest_stream(
+    request: Request,
+    batch_size: int = Query(settings.INGEST_BATCH_SIZE, ge=1, le=10_000),
+) -> JSONResponse:
+    """
+    Bulk upsert from an NDJSON body: one entity or triple per line (triples
+    are the lines with ``subj``/``pred``/``obj``).
+
+    Lines are validated as they arrive and written in batches of
+    ``batch_size`` through managed write transactions. The body is not read
+    while a batch is being written, so a fast uploader is throttled by TCP
+    flow control and memory stays flat regardless of upload size. Entities
+    of a batch are written before its triples, so send nodes ahead of the
+    edges that reference them.
+
+    The response reports counts and the first MAX_REPORTED_FAILURES invalid
+    lines; a database error stops the upload and returns 502 with the
+    progress made so far.
+    """
+    report: Dict[str, Any] = {
+        "status": "ok", "lines": 0, "entities": 0, "triples": 0,
+        "batches": 0, "failed": 0, "failures": [],
+    }
+    ents: List[Entity] = []
+    triples: List[Triple] = []
+
+    def fail(lineno: int, error: str) -> None:
+        report["failed"] += 1
+        if len(report["failures"]) < MAX_REPORTED_FAILURES:
+            report["failures"].append({"line": lineno, "error": error[:300]})
+
+    async def flush(lineno: int) -> bool:
+        try:
+            if ents:
+                await get_store().upsert_entities(ents)
+            if triples:
+                await get_store().upsert_triples(triples, ents)
+        except Exception as exc:
+            report["status"] = "error"
+            report["error"] = f"batch ending at line {lineno}: {exc}"
+            return False
+        report["entities"] += len(ents)
+        report["triples"] += len(triples)
+        report["batches"] += 1
+        ents.clear()
+        triples.clear()
+        return True
+
+    async for lineno, raw in _ndjson_lines(request.stream()):
+        report["lines"] = lineno
+        if raw is None:
+            fail(lineno, f"line exceeds {MAX_LINE_BYTES} bytes")
+            continue
+        if not raw.strip():
+            continue
+        try:
+            item = validate_item(json.loads(raw))
+        except ValueError as exc:  # covers JSONDecodeError and ValidationError
+            fail(lineno, str(exc))
+            continue
+        (triples if isinstance(item, Triple) else ents).append(item)
+        if len(ents) + len(triples) >= batch_size and not await flush(lineno):
+            return JSONResponse(report, status_code=502)
+
+    if (ents or triples) and not await flush(report["lines"]):
+        return JSONResponse(report, status_code=502)
+    return JSONResponse(report)
+
+
+@router.get("/change_cache/stats")
+def change_cache_stats() -> dict:
+    """Entities / triples the upserts skipped as unchanged vs wrote, and cache occupancy."""
+    return change_cache.snapshot()
+
+
+def _stats_enabled() -> None:
+    if not settings.GRAPH_STATS_ENABLED:
+        raise HTTPException(status_code=404, detail="graph stats are disabled (GRAPH_STATS_ENABLED=0)")
+
+
+@router.get("/stats", summary="Node / relationship counts and degrees from maintained counters")
+def stats(user_id: Optional[str] = Query(None, description="Also report the degree of user:<user_id>."),
+          node_id: Optional[str] = Query(None, description="Also report the degree of this node id.")) -> dict:
+    """
+    Nodes per label, relationships per type, the GRAPH_STATS_TOP_N
+    highest-degree nodes and optionally one node's degree (``null`` if the
+    counters do not track it; they track users and the top-N nodes). Served
+    from counters the upserts maintain, so the cost does not grow with the
+    graph. ``stale`` is true after writes
+    the counters could not follow (``/graph/run``) until the next reconcile.
+    """
+    _stats_enabled()
+    return graph_stats.snapshot(node_id or (f"user:{user_id}" if user_id else None))
+
+
+@router.post("/stats/reconcile", summary="Rebuild the graph stats from the database")
+async def stats_reconcile() -> dict:
+    """Recount every node, relationship and degree now (a full scan) and return the result."""
+    _stats_enabled()
+    return await graph_stats.reconcile(get_store())
+
+
+@router.get("/link", summary="Resolve the entity mentions in a question to graph ids")
+def link(q: str = Query(..., description="Question or name to link."),
+         min_score: Optional[float] = Query(None, ge=0.0, le=1.0,
+                                            description="Trigram similarity cut-off (default ENTITY_LINK_MIN_SCORE)."),
+         k: Optional[int] = Query(None, ge=1, le=50, description="Candidates per mention (default ENTITY_LINK_TOP_K).")) -> dict:
+    """
+    The candidates ``nl2cypher`` and the intent templates get for ``q``:
+    non-overlapping mentions, each with its best-scoring entities.
+    """
+    if not settings.ENTITY_LINK_ENABLED:
+        raise HTTPException(status_code=404, detail="entity linking is disabled (ENTITY_LINK_ENABLED=0)")
+    links = entity_linker.link(q, k=k, min_score=min_score)
+    return {"links": [{"mention": l.mention, "candidates": [c._asdict() for c in l.candidates]}
+                      for l in links],
+            "index": entity_linker.stats}
@@ -0,0 +1,213 @@
+# app/services/entity_linker.py
+"""
+Fuzzy entity linking: question mentions to graph ids.
+
+The gazetteer only finds names spelled exactly as stored, and the LLM left
+to itself guesses names and writes unindexed ``name =``/``CONTAINS``
+predicates. This index resolves the mentions in a question ("where does
+aashr work") to candidate ids (``user:aashir``) first, so ``nl2cypher`` can
+hand them to the model and ``intents`` to its templates, and the final
+Cypher seeks through the ``id`` constraint.
+
+Every entity is indexed once, under its name (or its id slug when it has
+none): the character trigrams of `` name `` (lowercase word tokens, padded
+so word starts and ends count), each with its offset. The postings of a
+(trigram, offset) key are an ``array('I')`` of entry numbers; ids, names and
+labels live in parallel lists with interned strings. A renamed entity gets a
+new entry and the old one is skipped from then on.
+
+Similarity is the Dice coefficient of the trigram sets, ``2c / (|q| + |e|)``
+(kinder than Jaccard to one dropped letter in a short name). A search looks
+up each query trigram at its offset and the SHIFT offsets either side, takes
+the PROBES rarest of those, counts their postings (at most SCAN_BUDGET) and
+scores exactly, most shared first, the entries found in two or more, at most
+VERIFY of them. One typo changes at most four query trigrams and shifts the
+later ones by one, so a misspelt name's entry is always among them; the work
+follows the rarest trigrams of the mention, not the number of names, and the
+offsets keep a common trigram's postings short. Entries that share little
+with the mention at the same place (reordered words) are not found.
+"""
+from __future__ import annotations
+
+import re
+import sys
+from array import array
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from app.core.config import settings
+from app.models.graph import NodeLabel
+
+_TOKEN = re.compile(r"\w+")
+_LABELS: List[str] = [l.value for l in NodeLabel]
+_LABEL_NO: Dict[str, int] = {l: i for i, l in enumerate(_LABELS)}
+
+MAX_MENTION_WORDS = 3
+SHIFT = 1           # offsets a query trigram may have moved by
+PROBES = 6          # rarest query trigrams whose postings are counted
+SCAN_BUDGET = 20000  # postings counted per search
+VERIFY = 32         # candidates scored exactly per search
+# Never part of a mention: function words and the vocabulary of the questions themselves.
+_QUESTION_WORDS = frozenset(
+    "a an and are as at be but by for from i in is it me my of on or our so the to up we with "
+    "you your will may who whom what where which when why how do does did am was were has have "
+    "can could list show tell all any many most same other than that this these those "
+    "live lives living stay stays based work works working company org employer "
+    "friend friends sibling siblings brother brothers sister sisters meet met goal goals".split()
+)
+
+
+class Candidate(NamedTuple):
+    id: str
+    label: str
+    name: str
+    score: float
+
+
+class Link(NamedTuple):
+    mention: str
+    start: int  # token span in ``tokenize(question)``
+    end: int
+    candidates: List[Candidate]
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _key(name: str) -> str:
+    return " ".join(tokenize(name.replace("_", " ")))
+
+
+def _grams(key: str) -> Set[str]:
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class EntityLinker:
+    def __init__(self) -> None:
+        self._ids: List[str] = []
+        self._names: List[str] = []
+        self._labels = bytearray()
+        self._sizes = array("H")  # distinct trigrams per entry
+        self._postings: Dict[str, array] = {}  # trigram + chr(offset) -> entries
+        self._entry: Dict[str, int] = {}  # id -> live entry
+
+    def __len__(self) -> int:
+        return len(self._entry)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"entities": len(self._entry), "entries": len(self._ids),
+                "keys": len(self._postings),
+                "postings": sum(len(p) for p in self._postings.values())}
+
+    def add(self, node_id: str, label: str, name: Optional[str] = None) -> None:
+        """Index (or re-index, if its name changed) one entity."""
+        label_no = _LABEL_NO.get(label)
+        if label_no is None:
+            return
+        display = name or node_id.partition(":")[2] or node_id
+        key = _key(display)
+        if not key:
+            return
+        old = self._entry.get(node_id)
+        if old is not None and self._names[old] == display and self._labels[old] == label_no:
+            return
+        n = len(self._ids)
+        self._ids.append(sys.intern(node_id))
+        self._names.append(sys.intern(display))
+        self._labels.append(label_no)
+        self._sizes.append(min(len(_grams(key)), 0xFFFF))
+        postings = self._postings
+        padded = f" {key} "
+        for pos in range(len(padded) - 2):
+            at = padded[pos:pos + 3] + chr(pos)
+            plist = postings.get(at)
+            if plist is None:
+                plist = postings[sys.intern(at)] = array("I")
+            plist.append(n)
+        self._entry[self._ids[n]] = n
+
+    def search(self, mention: str, label: Optional[str] = None, k: int = 3,
+               min_score: Optional[float] = None) -> List[Candidate]:
+        """The ``k`` best entities for ``mention`` scoring at least ``min_score``."""
+        t = settings.ENTITY_LINK_MIN_SCORE if min_score is None else min_score
+        key = _key(mention)
+        if not key or not self._ids:
+            return []
+        label_no = _LABEL_NO.get(label, -1) if label else None
+        if label_no == -1:
+            return []
+        grams = _grams(key)
+        nq = len(grams)
+        postings = self._postings
+        padded = f" {key} "
+        probes = []
+        for pos in range(len(padded) - 2):
+            gram = padded[pos:pos + 3]
+            near = [plist for off in range(max(0, pos - SHIFT), pos + SHIFT + 1)
+                    for plist in (postings.get(gram + chr(off)),) if plist]
+            probes.append((sum(map(len, near)), near))
+        probes.sort(key=itemgetter(0))
+        counts: Counter = Counter()
+        used = scanned = 0
+        for size, near in probes[:PROBES]:
+            if used and scanned + size > SCAN_BUDGET:
+                break
+            for plist in near:
+                counts.update(plist[-SCAN_BUDGET:])
+            scanned += size
+            used += 1
+        floor = 2 if used >= 3 else 1
+        sizes, labels, ids, names, entry = self._sizes, self._labels, self._ids, self._names, self._entry
+        found: List[Candidate] = []
+        cut, checked = t, 0
+        for i, c in sorted(counts.items(), key=itemgetter(1), reverse=True):
+            if c < floor or checked >= VERIFY:
+                break
+            size = sizes[i]
+            if (label_no is not None and labels[i] != label_no
+                    or 2 * min(c + nq - used, size) / (nq + size) < cut):  # cannot make the top k
+                continue
+            checked += 1
+            score = 2 * len(grams & _grams(_key(names[i]))) / (nq + size)
+            if score >= t and entry.get(ids[i]) == i:
+                found.append(Candidate(ids[i], _LABELS[labels[i]], names[i], round(score, 3)))
+                if len(found) >= k:
+                    found.sort(key=lambda cand: (-cand.score, cand.id))
+                    del found[k:]
+                    cut = max(t, found[-1].score)
+        found.sort(key=lambda cand: (-cand.score, cand.id))
+        return found[:k]
+
+    def link(self, question: str, k: Optional[int] = None,
+             min_score: Optional[float] = None) -> List[Link]:
+        """
+        Mentions in ``question`` with their candidates (best first):
+        leftmost-longest spans of up to MAX_MENTION_WORDS words without
+        question vocabulary that have a candidate, like ``gazetteer.find``.
+        """
+        k = settings.ENTITY_LINK_TOP_K if k is None else k
+        tokens = tokenize(question)
+        content = [len(tok) > 1 and tok not in _QUESTION_WORDS for tok in tokens]
+        links: List[Link] = []
+        start = 0
+        while start < len(tokens):
+            end = start
+            while end < len(tokens) and end - start < MAX_MENTION_WORDS and content[end]:
+                end += 1
+            for stop in range(end, start, -1):
+                mention = " ".join(tokens[start:stop])
+                candidates = self.search(mention, k=k, min_score=min_score)
+                if candidates:
+                    links.append(Link(mention, start, stop, candidates))
+                    start = stop
+                    break
+            else:
+                start += 1
+        return links
+
+
+entity_linker = EntityLinker()
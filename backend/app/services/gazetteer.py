@@ -0,0 +1,201 @@
+# app/services/gazetteer.py
+"""
+Offline entity gazetteer for the heuristic extractor.
+
+Every known ``Person``/``Place``/``Org``/``Goal`` name (and the slug of its
+id, so ``place:san_francisco`` also matches "san francisco") is indexed as
+a sequence of lowercase word tokens. The index is a token trie flattened into
+one dict: every proper prefix of a phrase is a key that maps to ``None``, and
+every complete phrase maps to its ``{label: id}`` entries. Scanning a message
+is one pass over its tokens with a leftmost-longest match, so matches always
+fall on word boundaries and cost does not depend on how many names exist.
+
+Unlike a classic Aho–Corasick automaton there are no failure links to
+recompute, so ``add`` is incremental. The upserts hand their entities to
+``add_entities_later``, which indexes them in a background task,
+INDEX_SLICE per event-loop turn, so a write request does not wait on the
+indexing; new names become visible a few loop turns after the write.
+
+Graph entities (not the seed file) are also passed on to
+``entity_linker``, the fuzzy index question answering resolves names with.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.graph import Entity, NodeLabel
+from app.services.entity_linker import entity_linker
+
+log = logging.getLogger(__name__)
+
+MAX_PHRASE_WORDS = 6
+INDEX_SLICE = 256  # queued entities indexed per event-loop turn
+# Single-word names that are also everyday words would fire on almost every message.
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from i in is it me my of on or our so the to "
+    "up we with you your will may".split()
+)
+
+_TOKEN = re.compile(r"\w+")
+
+Hit = Tuple[int, int, str, Dict[str, str]]  # (start token, end token, phrase, {label: id})
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _slug_phrase(node_id: str) -> str:
+    _, sep, slug = node_id.partition(":")
+    return " ".join(tokenize(slug.replace("_", " "))) if sep else ""
+
+
+class Gazetteer:
+    def __init__(self) -> None:
+        self._index: Dict[str, Optional[Dict[str, str]]] = {}
+        self._names: Dict[str, str] = {}  # id -> display name
+        self.phrases = 0
+        self._pending: Dict[str, Entity] = {}  # queued by add_entities_later, latest wins
+        self._drain: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return self.phrases
+
+    def _add_phrase(self, phrase: str, label: str, node_id: str) -> None:
+        tokens = phrase.split()
+        if not tokens or len(tokens) > MAX_PHRASE_WORDS:
+            return
+        if len(tokens) == 1 and (tokens[0] in STOPWORDS or len(tokens[0]) < 2):
+            return
+        key = ""
+        for tok in tokens[:-1]:
+            key = f"{key} {tok}" if key else tok
+            self._index.setdefault(key, None)
+        entries = self._index.get(phrase)
+        if entries is None:
+            entries = self._index[phrase] = {}
+            self.phrases += 1
+        entries[label] = node_id
+
+    def add(self, node_id: str, label: str, name: Optional[str] = None) -> None:
+        """Index one entity under its name and its id slug."""
+        if name:
+            self._names[node_id] = name
+            self._add_phrase(" ".join(tokenize(name)), label, node_id)
+        self._add_phrase(_slug_phrase(node_id), label, node_id)
+
+    def add_entities(self, entities: Iterable[Entity]) -> None:
+        link = settings.ENTITY_LINK_ENABLED
+        for e in entities:
+            self.add(e.id, e.label.value, e.name)
+            if link:
+                entity_linker.add(e.id, e.label.value, e.name)
+
+    def add_entities_later(self, entities: Iterable[Entity]) -> None:
+        """``add_entities`` in a background task; indexes now if no loop is running."""
+        for e in entities:
+            self._pending[e.id] = e
+        if not self._pending or (self._drain is not None and not self._drain.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pending, self._pending = self._pending, {}
+            self.add_entities(pending.values())
+            return
+        self._drain = loop.create_task(self._index_pending())
+
+    async def _index_pending(self) -> None:
+        while self._pending:
+            pending, self._pending = list(self._pending.values()), {}
+            for i in range(0, len(pending), INDEX_SLICE):
+                try:
+                    self.add_entities(pending[i:i + INDEX_SLICE])
+                except Exception as e:  # keep indexing the rest
+                    log.warning("gazetteer: indexing failed: %r", e)
+                await asyncio.sleep(0)
+
+    async def flush(self) -> None:
+        """Wait until every queued entity is indexed."""
+        while self._drain is not None and not self._drain.done():
+            await asyncio.shield(self._drain)
+
+    def name_of(self, node_id: str) -> Optional[str]:
+        return self._names.get(node_id)
+
+    def find(self, text: str) -> List[Hit]:
+        """Leftmost-longest, non-overlapping matches in ``text``."""
+        tokens = tokenize(text)
+        index = self._index
+        hits: List[Hit] = []
+        i, n = 0, len(tokens)
+        while i < n:
+            key = tokens[i]
+            best: Optional[Hit] = None
+            j = i + 1
+            while key in index:
+                entries = index[key]
+                if entries:
+                    best = (i, j, key, entries)
+                if j >= n or j - i >= MAX_PHRASE_WORDS:
+                    break
+                key = f"{key} {tokens[j]}"
+                j += 1
+            if best is None:
+                i += 1
+            else:
+                hits.append(best)
+                i = best[1]
+        return hits
+
+    def load_seed(self, path: Path) -> int:
+        """Load ``{"id", "label", "name"}`` JSON lines; returns entities read."""
+        count = 0
+        with path.open(encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                row = json.loads(line)
+                self.add(row["id"], NodeLabel(row["label"]).value, row.get("name"))
+                count += 1
+        return count
+
+    async def load_from_graph(self) -> int:
+        """Stream every canonical node's id and name from the graph store into the index."""
+        from app.graph.store import get_store  # the stores' upserts feed this module
+
+        count = 0
+        link = settings.ENTITY_LINK_ENABLED
+        async for node_id, label, name in get_store().iter_entities():
+            self.add(node_id, label, name)
+            if link:
+                entity_linker.add(node_id, label, name)
+            count += 1
+        return count
+
+
+gazetteer = Gazetteer()
+
+
+async def warm_up(seed_path: Optional[str] = None, load_graph: bool = True) -> None:
+    """Load the seed file and then the graph's names; failures are logged, not raised."""
+    if seed_path and Path(seed_path).is_file():
+        try:
+            n = gazetteer.load_seed(Path(seed_path))
+            log.info("gazetteer: %d seed entities from %s", n, seed_path)
+        except (OSError, ValueError, KeyError) as e:
+            log.warning("gazetteer: could not read seed file %s: %s", seed_path, e)
+    if not load_graph:
+        return
+    try:
+        n = await gazetteer.load_from_graph()
+        log.info("gazetteer: %d entities from the graph, %d phrases", n, len(gazetteer))
+    except Exception as e:  # the extractor still works from the seed file
+        log.warning("gazetteer: graph load failed: %s", e)
@@ -0,0 +1,64 @@
+"""
+Liveness and readiness checks behind ``/healthz`` and ``/readyz``.
+
+Liveness only says the event loop is answering. Readiness asks the graph
+store for a round trip and, with READYZ_CHECK_OPENAI, lists the OpenAI
+models; each check is bounded by READYZ_TIMEOUT. The OpenAI result is
+reused for READYZ_OPENAI_TTL seconds so frequent probes don't turn into a
+steady stream of API calls.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.graph.store import get_store
+
+_openai_checked: Optional[Tuple[float, Dict[str, Any]]] = None  # (monotonic time, result)
+
+
+async def _timed(check) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    try:
+        ok = await asyncio.wait_for(check(), settings.READYZ_TIMEOUT)
+        result: Dict[str, Any] = {"ok": bool(ok)}
+    except asyncio.TimeoutError:
+        result = {"ok": False, "error": f"timed out after {settings.READYZ_TIMEOUT:g}s"}
+    except Exception as e:
+        result = {"ok": False, "error": type(e).__name__}
+    result["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return result
+
+
+async def _graph() -> bool:
+    return await get_store().ping()
+
+
+async def _openai() -> bool:
+    from app.services.nl2cypher import async_client
+
+    await async_client().with_options(max_retries=0).models.list()
+    return True
+
+
+async def _openai_cached() -> Dict[str, Any]:
+    global _openai_checked
+    now = time.monotonic()
+    if _openai_checked is not None and now - _openai_checked[0] < settings.READYZ_OPENAI_TTL:
+        return _openai_checked[1]
+    result = await _timed(_openai)
+    _openai_checked = (now, result)
+    return result
+
+
+async def readiness() -> Dict[str, Any]:
+    """``{"ready": bool, "checks": {name: {"ok", "ms", ["error"]}}}``; checks run concurrently."""
+    names = ["graph"]
+    checks = [_timed(_graph)]
+    if settings.READYZ_CHECK_OPENAI:
+        names.append("openai")
+        checks.append(_openai_cached())
+    results = dict(zip(names, await asyncio.gather(*checks)))
+    return {"ready": all(r["ok"] for r in results.values()), "checks": results}
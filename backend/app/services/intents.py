@@ -0,0 +1,161 @@
+# app/services/intents.py
+"""
+Local intent matcher for common question shapes.
+
+Each relationship type in ``RelType`` gets a few English phrasings; together
+with its endpoint labels from ``kg_schema.REL_ENDPOINTS`` they compile into
+regexes and parameterized, index-backed Cypher templates. A question like
+"where does Sara work?" becomes the WORKS_AT template with the ``Sara`` slot
+resolved to candidate ids, so no LLM round trip is needed. Slots resolve by
+the id-prefix convention and, for misspelled or differently slugged names,
+through ``entity_linker``.
+
+Relationship types without phrasings simply have no fast path.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.graph.kg_schema import REL_ENDPOINTS
+from app.graph.labels import ID_PREFIX_LABELS
+from app.core.config import settings
+from app.models.graph import NodeLabel, RelType
+from app.services.entity_linker import entity_linker
+
+# Direction of a phrasing: "out" names the subject and asks for targets,
+# "in" names the target and asks for subjects.
+_PHRASES: Dict[RelType, List[Tuple[str, str]]] = {
+    RelType.LIVES_IN: [
+        ("out", r"where (?:do|does) (?P<slot>.+?) (?:live|stay)"),
+        ("out", r"where (?:am|is|are) (?P<slot>.+?) (?:living|based|staying)"),
+        ("in", r"who (?:lives?|stays?) in (?P<slot>.+)"),
+    ],
+    RelType.WORKS_AT: [
+        ("out", r"where (?:do|does) (?P<slot>.+?) work"),
+        ("out", r"(?:what|which) (?:company|org|organi[sz]ation|employer) (?:do|does) (?P<slot>.+?) work (?:at|for)"),
+        ("out", r"who (?:do|does) (?P<slot>.+?) work for"),
+        ("in", r"who works? (?:at|for) (?P<slot>.+)"),
+    ],
+    RelType.FRIEND_OF: [
+        ("out", r"who (?:are|is) (?P<slot>.+?) friends?(?: with)?"),
+        ("out", r"(?:list|show) (?P<slot>.+?) friends"),
+    ],
+    RelType.SIBLING_OF: [
+        ("out", r"who (?:are|is) (?P<slot>.+?) (?:siblings?|brothers?|sisters?)"),
+    ],
+    RelType.MET_WITH: [
+        ("out", r"who (?:did|have|has) (?P<slot>.+?) (?:meet|met)(?: with)?"),
+        ("in", r"who (?:met|has met|have met)(?: with)? (?P<slot>.+)"),
+    ],
+    RelType.HAS_GOAL: [
+        ("out", r"what (?:are|is) (?P<slot>.+?) goals?"),
+    ],
+}
+
+_SELF = {"i", "me", "my", "myself", "mine"}
+_QUESTION_START = re.compile(
+    r"^(?:who|whom|what|where|which|when|how|do|does|did|is|are|am|can|could|list|show|tell)\b"
+)
+_POSSESSIVE = re.compile(r"'s?$")
+# Slots that are really sub-questions ("the same city as sara") are left to the LLM.
+_COMPOUND_SLOT = re.compile(
+    r"\b(?:same|as|of|and|or|any|all|many|most|other|than|who|which|that|where)\b"
+)
+MAX_SLOT_WORDS = 4
+
+_PREFIXES_BY_LABEL: Dict[str, List[str]] = {}
+for _prefix, _label in ID_PREFIX_LABELS.items():
+    _PREFIXES_BY_LABEL.setdefault(_label, []).append(_prefix)
+
+
+@dataclass(frozen=True)
+class Intent:
+    rel: RelType
+    direction: str
+    slot_label: NodeLabel
+    pattern: "re.Pattern[str]"
+    cypher: str
+
+
+@dataclass(frozen=True)
+class Match:
+    intent: Intent
+    ids: List[str]
+    slot: str
+
+
+def template(rel: RelType, direction: str) -> Tuple[NodeLabel, str]:
+    """(slot label, index-backed one-hop Cypher) for ``rel`` in ``direction``."""
+    src, dst, symmetric = REL_ENDPOINTS[rel]
+    arrow = "-" if symmetric else "->"
+    if direction == "out":
+        slot_label, where, ret = src, "s.id IN $ids", "o"
+    else:
+        slot_label, where, ret = dst, "o.id IN $ids", "s"
+    cypher = (
+        f"MATCH (s:`{src.value}`)-[:`{rel.value}`]{arrow}(o:`{dst.value}`) "
+        f"WHERE {where} "
+        f"RETURN DISTINCT {ret}.id AS id, {ret}.name AS name LIMIT $limit"
+    )
+    return slot_label, cypher
+
+
+def _compile() -> List[Intent]:
+    intents = []
+    for rel in RelType:
+        if rel not in REL_ENDPOINTS:
+            continue
+        for direction, phrase in _PHRASES.get(rel, ()):
+            slot_label, cypher = template(rel, direction)
+            intents.append(Intent(rel, direction, slot_label,
+                                  re.compile(rf"^{phrase}$"), cypher))
+    return intents
+
+
+INTENTS: List[Intent] = _compile()
+
+
+def normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower()).rstrip(" ?!.")
+
+
+def looks_like_question(text: str) -> bool:
+    t = text.strip()
+    return t.endswith("?") or bool(_QUESTION_START.match(normalize(t)))
+
+
+def slot_ids(slot: str, label: NodeLabel, user_id: Optional[str]) -> List[str]:
+    """
+    Resolve a slot to candidate ids: pronouns map to the speaker, names map
+    to the id-prefix convention (``place:san_francisco``) for the slot's label,
+    followed by the entity linker's matches of that label.
+    """
+    slot = _POSSESSIVE.sub("", slot.strip())
+    slot = re.sub(r"^(?:the|a|an) ", "", slot)
+    if len(slot.split()) > MAX_SLOT_WORDS or _COMPOUND_SLOT.search(slot):
+        return []
+    if slot in _SELF:
+        return [f"user:{user_id}"] if user_id else []
+    slug = re.sub(r"[^\w]+", "_", slot).strip("_")
+    if not slug:
+        return []
+    ids = [f"{prefix}:{slug}" for prefix in _PREFIXES_BY_LABEL.get(label.value, ())]
+    if settings.ENTITY_LINK_ENABLED:
+        ids += [c.id for c in entity_linker.search(slot, label.value, k=settings.ENTITY_LINK_TOP_K)
+                if c.id not in ids]
+    return ids
+
+
+def match(question: str, user_id: Optional[str] = None) -> Optional[Match]:
+    """Return the first intent whose phrasing matches, with its slot resolved."""
+    q = normalize(question)
+    for intent in INTENTS:
+        m = intent.pattern.match(q)
+        if m is None:
+            continue
+        ids = slot_ids(m.group("slot"), intent.slot_label, user_id)
+        if ids:
+            return Match(intent, ids, m.group("slot"))
+    return None
@@ -1,75 +1,132 @@
 # app/services/kg_extractor.py
 from __future__ import annotations
-import os
-from typing import Any, Dict, List
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from app.core.config import settings
 from app.models.graph import NodeLabel, RelType
+from app.services.gazetteer import gazetteer, tokenize
+from app.services.llm_extraction import batch_messages, extraction_engine, split_results
+from app.services.metrics import openai_timer
 
-# Use mock extractor unless explicitly told to use LLM
-MODE = os.getenv("KG_EXTRACTOR_MODE", "mock").lower()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+log = logging.getLogger(__name__)
+
+_client = None  # sync OpenAI client, created on first use
+
+
+# Relationship from the speaker to a gazetteer hit, by the hit's label.
+LABEL_RELS: Dict[str, RelType] = {
+    NodeLabel.PLACE.value: RelType.LIVES_IN,
+    NodeLabel.ORG.value: RelType.WORKS_AT,
+    NodeLabel.GOAL.value: RelType.HAS_GOAL,
+}
+# People need a cue word; the first cue found in the message wins.
+PERSON_CUES: List[Tuple[RelType, frozenset]] = [
+    (RelType.SIBLING_OF, frozenset({"sister", "sisters", "brother", "brothers", "sibling", "siblings"})),
+    (RelType.FRIEND_OF, frozenset({"friend", "friends", "buddy", "pal"})),
+    (RelType.MET_WITH, frozenset({"met", "meet", "meeting", "saw", "visited"})),
+]
+LABEL_PREFERENCE = [NodeLabel.PLACE.value, NodeLabel.ORG.value,
+                    NodeLabel.GOAL.value, NodeLabel.PERSON.value]
+
+
+def _person_rel(tokens: Iterable[str]) -> Optional[RelType]:
+    words = set(tokens)
+    for rel, cues in PERSON_CUES:
+        if words & cues:
+            return rel
+    return None
 
 
 def _heuristic_extract(user_id: str, text: str, source_id: str) -> Dict[str, Any]:
     """
-    Very small rule-based extractor so requests never hang.
-    It recognizes 'Karachi' and 'Ragioneer' in the text.
+    Rule-based extractor so requests never hang.
+    Names known to the gazetteer (graph entities plus the seed file) are
+    linked to the speaker according to their label.
     """
-    t = text.lower()
+    me = f"user:{user_id}"
     ents: List[Dict[str, Any]] = []
     triples: List[Dict[str, Any]] = []
 
-    user_ent = {"id": f"user:{user_id}", "label": NodeLabel.PERSON.value, "name": user_id, "props": {}}
+    user_ent = {"id": me, "label": NodeLabel.PERSON.value, "name": user_id, "props": {}}
     ents.append(user_ent)
 
-    if "karachi" in t:
-        ents.append({"id": "place:karachi", "label": NodeLabel.PLACE.value, "name": "Karachi", "props": {}})
-        triples.append({
-            "subj": f"user:{user_id}",
-            "pred": RelType.LIVES_IN.value,
-            "obj": "place:karachi",
-            "props": {"text": text, "source_id": source_id}
-        })
-
-    if "ragioneer" in t:
-        ents.append({"id": "org:ragioneer", "label": NodeLabel.ORG.value, "name": "Ragioneer", "props": {}})
+    person_rel: Optional[RelType] = None
+    seen = {me}
+    for _, _, phrase, entries in gazetteer.find(text):
+        label = next(l for l in LABEL_PREFERENCE if l in entries)
+        node_id = entries[label]
+        if node_id in seen:
+            continue
+        if label == NodeLabel.PERSON.value:
+            person_rel = person_rel or _person_rel(tokenize(text))
+            rel = person_rel
+        else:
+            rel = LABEL_RELS[label]
+        if rel is None:
+            continue
+        seen.add(node_id)
+        name = gazetteer.name_of(node_id) or phrase.title()
+        ents.append({"id": node_id, "label": label, "name": name, "props": {}})
         triples.append({
-            "subj": f"user:{user_id}",
-            "pred": RelType.WORKS_AT.value,
-            "obj": "org:ragioneer",
+            "subj": me,
+            "pred": rel.value,
+            "obj": node_id,
             "props": {"text": text, "source_id": source_id}
         })
 
     return {"entities": ents, "triples": triples}
 
 
+def _llm_enabled() -> bool:
+    # Use mock extractor unless explicitly told to use LLM
+    return settings.KG_EXTRACTOR_MODE == "llm" and bool(settings.OPENAI_API_KEY)
+
+
 def extract_kg(user_id: str, text: str, source_id: str) -> Dict[str, Any]:
     """
     Returns a dict shaped like IngestRequest (entities, triples).
     - If KG_EXTRACTOR_MODE != 'llm' or OPENAI_API_KEY missing -> heuristic mock
-    - If 'llm', call the model but fall back to heuristic if anything takes too long.
+    - If 'llm', one blocking completion bounded by LLM_EXTRACT_TIMEOUT (the
+      HTTP request itself times out, nothing keeps running) with heuristic
+      fallback. Async callers should use ``aextract_kg``.
     """
-    if MODE != "llm" or not OPENAI_API_KEY:
+    global _client
+    if not _llm_enabled():
         return _heuristic_extract(user_id, text, source_id)
-
-    # --- If you later want the LLM path, leave this stub with a hard timeout ---
     try:
-        import threading
-
-        result: Dict[str, Any] = {}
-
-        def do_call():
-            # TODO: replace with your real LLM logic
-            # Keep a quick, deterministic fallback for local dev
-            nonlocal result
-            result = _heuristic_extract(user_id, text, source_id)
-
-        t = threading.Thread(target=do_call, daemon=True)
-        t.start()
-        t.join(timeout=8.0)   # don’t block forever
-        if t.is_alive():
-            # timeout -> fallback
-            return _heuristic_extract(user_id, text, source_id)
-        return result
-    except Exception:
-        return _heuristic_extract(user_id, text, source_id)
+        if _client is None:
+            from openai import OpenAI
+
+            _client = OpenAI(api_key=settings.OPENAI_API_KEY,
+                             base_url=settings.OPENAI_BASE_URL or None, max_retries=0)
+        with openai_timer("extract") as t:
+            resp = _client.chat.completions.create(
+                model=settings.OPENAI_CHAT_MODEL,
+                messages=batch_messages([{"index": 0, "user_id": user_id, "text": text}]),
+                response_format={"type": "json_object"},
+                temperature=0,
+                timeout=settings.LLM_EXTRACT_TIMEOUT,
+            )
+            if t is not None:
+                t.usage = getattr(resp, "usage", None)
+        result = split_results(resp.choices[0].message.content or "",
+                               {0: (user_id, text, source_id)}).get(0)
+        if result is not None:
+            return result
+    except Exception as e:
+        log.warning("LLM extraction failed, using heuristic: %r", e)
+    return _heuristic_extract(user_id, text, source_id)
+
+
+async def aextract_kg(user_id: str, text: str, source_id: str) -> Dict[str, Any]:
+    """
+    Async ``extract_kg``. In LLM mode the message goes through the shared
+    extraction engine (worker pool, micro-batching, circuit breaker); any
+    miss falls back to the heuristic extractor.
+    """
+    if _llm_enabled():
+        result = await extraction_engine.extract(user_id, text, source_id)
+        if result is not None:
+            return result
+    return _heuristic_extract(user_id, text, source_id)
@@ -0,0 +1,347 @@
+# app/services/llm_extraction.py
+"""
+LLM extraction engine behind ``kg_extractor.aextract_kg``.
+
+- A fixed pool of worker tasks pulls from one bounded queue; when the queue
+  is full the message is rejected right away instead of piling up.
+- Each worker packs whatever arrived within ``window_ms`` (up to
+  ``max_batch`` messages) into ONE JSON-mode completion and splits the
+  ``results`` array back per message by ``index``.
+- Callers wait at most ``timeout`` seconds. A caller that gives up cancels
+  its job; a queued job is then skipped, and an in-flight completion whose
+  callers have all given up is cancelled (closing the HTTP request).
+- A circuit breaker opens after ``failures`` consecutive failed completions
+  and rejects work for ``cooldown`` seconds, then lets one probe through.
+
+``extract`` returns ``None`` whenever it has no usable result; the caller
+falls back to the heuristic extractor.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.models.graph import Entity, NodeLabel, Triple
+from app.services.metrics import openai_timer
+
+log = logging.getLogger(__name__)
+
+EXTRACTION_PROMPT = """
+You extract a knowledge-graph delta from chat messages.
+
+Node labels: Person, Place, Org, Goal.
+Relationships: LIVES_IN(Person -> Place), WORKS_AT(Person -> Org),
+SIBLING_OF(Person <-> Person), FRIEND_OF(Person <-> Person),
+HAS_GOAL(Person -> Goal), MET_WITH(Person -> Person).
+
+Ids: the speaker is "user:<user_id>"; other nodes use "person:", "place:",
+"org:" or "goal:" followed by the lowercased name with spaces as "_"
+(e.g. "place:san_francisco").
+
+The input is {"messages": [{"index", "user_id", "text"}, ...]}. Answer with
+ONE JSON object and nothing else:
+{"results": [{"index": <int>,
+              "entities": [{"id", "label", "name"}],
+              "triples": [{"subj", "pred", "obj"}]}]}
+Give one result per input message, with the same index. Use empty lists
+when a message states no facts.
+"""
+
+Result = Optional[Dict[str, Any]]
+
+
+@dataclass
+class _Job:
+    index: int
+    user_id: str
+    text: str
+    source_id: str
+    future: "asyncio.Future[Result]"
+
+
+def batch_messages(jobs: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Chat messages for one batch of ``{"index", "user_id", "text"}`` items."""
+    return [
+        {"role": "system", "content": EXTRACTION_PROMPT},
+        {"role": "user", "content": json.dumps({"messages": jobs}, ensure_ascii=False)},
+    ]
+
+
+def parse_result(item: Dict[str, Any], user_id: str, text: str, source_id: str) -> Dict[str, Any]:
+    """
+    Turn one ``results`` item into an IngestRequest-shaped dict. Entities and
+    triples that do not validate are dropped one by one; the speaker node is
+    always present and triples carry the message text and source id.
+    """
+    me = f"user:{user_id}"
+    ents: Dict[str, Dict[str, Any]] = {
+        me: {"id": me, "label": NodeLabel.PERSON.value, "name": user_id, "props": {}},
+    }
+    for raw in item.get("entities") or []:
+        try:
+            e = Entity.model_validate(raw)
+        except ValidationError:
+            continue
+        if e.id != me:
+            ents[e.id] = e.model_dump(mode="json")
+
+    triples: List[Dict[str, Any]] = []
+    for raw in item.get("triples") or []:
+        if not isinstance(raw, dict):
+            continue
+        try:
+            t = Triple.model_validate({**raw, "props": {"text": text, "source_id": source_id}})
+        except ValidationError:
+            continue
+        triples.append(t.model_dump(mode="json"))
+    return {"entities": list(ents.values()), "triples": triples}
+
+
+def split_results(content: str,
+                  messages: Dict[int, Tuple[str, str, str]]) -> Dict[int, Dict[str, Any]]:
+    """
+    Map batch index -> parsed result, given index -> (user_id, text, source_id).
+    Raises ValueError if the reply is not usable JSON.
+    """
+    data = json.loads(content)
+    items = data.get("results") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        raise ValueError("completion has no 'results' list")
+    out: Dict[int, Dict[str, Any]] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index = item.get("index")
+        if index in messages and index not in out:
+            out[index] = parse_result(item, *messages[index])
+    return out
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one probe) -> closed."""
+
+    def __init__(self, failures: int = 5, cooldown: float = 30.0):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._consecutive = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.cooldown:
+            return "open"
+        return "half-open"
+
+    def rejecting(self) -> bool:
+        """True while no new work should be queued."""
+        state = self.state
+        return state == "open" or (state == "half-open" and self._probing)
+
+    def acquire(self) -> bool:
+        """Ask to send one completion; in half-open only the first caller gets through."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._consecutive = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._consecutive += 1
+        if self._probing or self._consecutive >= self.failures:
+            if self._opened_at is None or self._probing:
+                self.opened += 1
+            self._opened_at = time.monotonic()
+            self._probing = False
+
+
+class ExtractionEngine:
+    def __init__(self, client_factory: Callable[[], Any], model: str,
+                 workers: int = 4, max_batch: int = 8, window_ms: int = 20,
+                 maxsize: int = 1000, timeout: float = 8.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        self._client_factory = client_factory
+        self._client: Any = None
+        self.model = model
+        self.workers = workers
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._queue: "asyncio.Queue[_Job]" = asyncio.Queue(maxsize=maxsize)
+        self._tasks: List[asyncio.Task] = []
+        self._next_index = 0
+        self.stats: Dict[str, int] = {
+            "submitted": 0, "completed": 0, "rejected": 0, "short_circuited": 0,
+            "timed_out": 0, "cancelled_calls": 0, "batches": 0, "failed_batches": 0,
+            "missing_results": 0,
+        }
+
+    def start(self) -> None:
+        """Start the worker pool (idempotent)."""
+        self._tasks = [t for t in self._tasks if not t.done()]
+        if self._tasks:
+            return
+        if self._client is None:
+            self._client = self._client_factory()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued callers get ``None`` (heuristic fallback)."""
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            if not job.future.done():
+                job.future.set_result(None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "queued": self._queue.qsize(), "workers": len(self._tasks),
+                "breaker": self.breaker.state, "breaker_opened": self.breaker.opened}
+
+    async def extract(self, user_id: str, text: str, source_id: str,
+                      timeout: Optional[float] = None) -> Result:
+        if self.breaker.rejecting():
+            self.stats["short_circuited"] += 1
+            return None
+        self.start()
+        self._next_index += 1
+        fut: "asyncio.Future[Result]" = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(_Job(self._next_index, user_id, text, source_id, fut))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            return None
+        self.stats["submitted"] += 1
+        try:
+            # wait_for cancels ``fut`` on timeout, which the workers observe
+            return await asyncio.wait_for(fut, self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += 1
+            return None
+
+    async def _collect(self) -> List[_Job]:
+        loop = asyncio.get_running_loop()
+        batch: List[_Job] = []
+        while not batch:
+            job = await self._queue.get()
+            if not job.future.done():
+                batch.append(job)
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            if self._queue.empty():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    job = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                job = self._queue.get_nowait()
+            if not job.future.done():
+                batch.append(job)
+        return batch
+
+    async def _complete(self, batch: List[_Job]) -> Dict[int, Dict[str, Any]]:
+        items = [{"index": j.index, "user_id": j.user_id, "text": j.text} for j in batch]
+        with openai_timer("extract") as t:
+            resp = await self._client.chat.completions.create(
+                model=self.model,
+                messages=batch_messages(items),
+                response_format={"type": "json_object"},
+                temperature=0,
+            )
+            if t is not None:
+                t.usage = getattr(resp, "usage", None)
+        return split_results(resp.choices[0].message.content or "",
+                             {j.index: (j.user_id, j.text, j.source_id) for j in batch})
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            if not self.breaker.acquire():
+                self.stats["short_circuited"] += len(batch)
+                for job in batch:
+                    if not job.future.done():
+                        job.future.set_result(None)
+                continue
+
+            call = loop.create_task(self._complete(batch))
+            abandoned = False
+
+            def _abandon(_: asyncio.Future, call: asyncio.Task = call) -> None:
+                nonlocal abandoned
+                if all(j.future.cancelled() for j in batch) and not call.done():
+                    abandoned = True
+                    call.cancel()
+
+            for job in batch:
+                job.future.add_done_callback(_abandon)
+
+            self.stats["batches"] += 1
+            results: Dict[int, Dict[str, Any]] = {}
+            try:
+                results = await asyncio.wait_for(call, self.timeout)
+                self.breaker.record_success()
+            except asyncio.CancelledError:
+                if not abandoned:
+                    raise  # the worker itself is being stopped
+                # every caller timed out: as far as they can tell, upstream failed
+                self.stats["cancelled_calls"] += 1
+                self.breaker.record_failure()
+            except Exception as exc:  # timeout, HTTP/API error or unusable JSON
+                self.stats["failed_batches"] += 1
+                self.breaker.record_failure()
+                log.warning("LLM extraction batch of %d failed: %r", len(batch), exc)
+
+            for job in batch:
+                if job.future.done():
+                    continue
+                result = results.get(job.index)
+                if result is None:
+                    self.stats["missing_results"] += 1
+                else:
+                    self.stats["completed"] += 1
+                job.future.set_result(result)
+
+
+def _async_client() -> Any:
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY,
+                       base_url=settings.OPENAI_BASE_URL or None, max_retries=0)
+
+
+extraction_engine = ExtractionEngine(
+    _async_client,
+    model=settings.OPENAI_CHAT_MODEL,
+    workers=settings.LLM_EXTRACT_WORKERS,
+    max_batch=settings.LLM_EXTRACT_BATCH_SIZE,
+    window_ms=settings.LLM_EXTRACT_WINDOW_MS,
+    maxsize=settings.LLM_EXTRACT_QUEUE_SIZE,
+    timeout=settings.LLM_EXTRACT_TIMEOUT,
+    breaker=CircuitBreaker(settings.LLM_EXTRACT_BREAKER_FAILURES,
+                           settings.LLM_EXTRACT_BREAKER_COOLDOWN),
+)
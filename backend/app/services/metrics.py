@@ -0,0 +1,309 @@
+# app/services/metrics.py
+"""
+In-process metrics with a Prometheus text exposition (``GET /metrics``).
+
+- ``stage(name)`` times a pipeline stage (``/chat/ask`` extraction,
+  validation, upserts, answering) into ``kg_stage_seconds{stage}``;
+- ``query_timer(site, query)`` records each named Cypher call site: client
+  wall time, the server's ``result_available_after`` /
+  ``result_consumed_after``, and logs statements slower than SLOW_QUERY_MS;
+- ``openai_timer(site)`` records completion latency, outcome and token usage;
+- ``session_in_use(mode)`` tracks open driver sessions (each holds a pooled
+  connection) against the configured pool size, and ``observe_retries``
+  counts managed transactions the driver replayed.
+
+With METRICS_ENABLED off and SLOW_QUERY_MS at 0, ``stage`` hands back a
+shared no-op context manager (``query_timer`` too, binding None), so call
+sites skip ``perf_counter`` and summary fetching entirely.
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_lock = threading.Lock()  # the sync client records from worker threads
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, value: float = 1.0) -> None:
+        with _lock:
+            self._values[labels] = self._values.get(labels, 0.0) + value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, v in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_num(v)}"
+
+
+class Gauge:
+    """Current value per label set, plus the highest value seen (``<name>_peak``)."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], List[float]] = {}  # [current, peak]
+
+    def add(self, value: float, *labels: str) -> None:
+        with _lock:
+            v = self._values.setdefault(labels, [0.0, 0.0])
+            v[0] += value
+            v[1] = max(v[1], v[0])
+
+    def set(self, value: float, *labels: str) -> None:
+        with _lock:
+            v = self._values.setdefault(labels, [0.0, 0.0])
+            v[0], v[1] = value, max(v[1], value)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, (v, _) in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_num(v)}"
+        yield f"# HELP {self.name}_peak Highest {self.name} since start."
+        yield f"# TYPE {self.name}_peak gauge"
+        for labels, (_, peak) in sorted(self._values.items()):
+            yield f"{self.name}_peak{_labels(self.labelnames, labels)} {_num(peak)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # per label set: [count per bucket (last = +Inf), sum]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else _num(bound)
+                bucket = _labels(self.labelnames, labels, 'le="%s"' % le)
+                yield f"{self.name}_bucket{bucket} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total!r}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+STAGE_SECONDS = Histogram("kg_stage_seconds", "Wall time of request pipeline stages.", ["stage"])
+CYPHER_SECONDS = Histogram("kg_cypher_seconds", "Client-side wall time per Cypher call site.", ["site"])
+CYPHER_SERVER_SECONDS = Histogram(
+    "kg_cypher_server_seconds",
+    "Server-reported result_available_after / result_consumed_after per call site.",
+    ["site", "phase"])
+CYPHER_ERRORS = Counter("kg_cypher_errors_total", "Cypher calls that raised, per call site.", ["site"])
+SLOW_QUERIES = Counter("kg_cypher_slow_total", "Cypher calls slower than SLOW_QUERY_MS.", ["site"])
+OPENAI_SECONDS = Histogram("kg_openai_seconds", "OpenAI completion latency.", ["site", "outcome"])
+OPENAI_TOKENS = Counter("kg_openai_tokens_total", "OpenAI token usage.", ["site", "kind"])
+CYPHER_RETRIES = Counter(
+    "kg_cypher_retries_total",
+    "Managed transactions replayed by the driver after transient errors, per call site.", ["site"])
+NEO4J_SESSIONS = Gauge(
+    "kg_neo4j_sessions_in_use",
+    "Open driver sessions per access mode; each holds a pooled connection while it runs.", ["mode"])
+NEO4J_POOL_SIZE = Gauge("kg_neo4j_pool_max_size", "NEO4J_MAX_POOL_SIZE of the running driver.")
+UPSERT_ITEMS = Counter(
+    "kg_upsert_items_total",
+    "Entities / triples offered to the upserts, by whether the change cache skipped them.",
+    ["kind", "outcome"])
+
+REGISTRY = [STAGE_SECONDS, CYPHER_SECONDS, CYPHER_SERVER_SECONDS, CYPHER_ERRORS, SLOW_QUERIES,
+            CYPHER_RETRIES, NEO4J_SESSIONS, NEO4J_POOL_SIZE, UPSERT_ITEMS, OPENAI_SECONDS,
+            OPENAI_TOKENS]
+
+
+def enabled() -> bool:
+    return settings.METRICS_ENABLED
+
+
+def timing() -> bool:
+    """True if Cypher calls should be timed (metrics or the slow-query log are on)."""
+    return settings.METRICS_ENABLED or settings.SLOW_QUERY_MS > 0
+
+
+class _Stage:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "_Stage":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        STAGE_SECONDS.observe(time.perf_counter() - self.t0, self.name)
+
+
+_NOOP = nullcontext()
+
+
+def stage(name: str):
+    """``with stage("extract_kg"): ...`` records the block's wall time."""
+    return _Stage(name) if settings.METRICS_ENABLED else _NOOP
+
+
+def _ms(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def observe_query(site: str, query: str, seconds: float, available_ms: Optional[float] = None,
+                  consumed_ms: Optional[float] = None, error: bool = False) -> None:
+    """Record one Cypher call (server timings in ms, as the driver reports them)."""
+    site = site or "unnamed"
+    if settings.METRICS_ENABLED:
+        CYPHER_SECONDS.observe(seconds, site)
+        if available_ms is not None:
+            CYPHER_SERVER_SECONDS.observe(available_ms / 1000, site, "available")
+        if consumed_ms is not None:
+            CYPHER_SERVER_SECONDS.observe(consumed_ms / 1000, site, "consumed")
+        if error:
+            CYPHER_ERRORS.inc(site)
+    if settings.SLOW_QUERY_MS > 0 and seconds * 1000 >= settings.SLOW_QUERY_MS:
+        SLOW_QUERIES.inc(site)
+        log.warning("slow query site=%s %.0f ms (server: available %s ms, consumed %s ms): %s",
+                    site, seconds * 1000, available_ms, consumed_ms, " ".join(query.split())[:500])
+
+
+class QueryTimer:
+    """
+    Context manager around one driver call; ``add(summary)`` folds in the
+    server timings of each result (summed for multi-statement transactions).
+    Exceptions count as errors; cancellation and early generator close don't.
+    """
+
+    __slots__ = ("site", "query", "t0", "available", "consumed")
+
+    def __init__(self, site: str, query: str):
+        self.site, self.query = site, query
+        self.available: Optional[float] = None
+        self.consumed: Optional[float] = None
+
+    def add(self, summary: Any) -> None:
+        a = _ms(getattr(summary, "result_available_after", None))
+        c = _ms(getattr(summary, "result_consumed_after", None))
+        if a is not None:
+            self.available = (self.available or 0.0) + a
+        if c is not None:
+            self.consumed = (self.consumed or 0.0) + c
+
+    def __enter__(self) -> "QueryTimer":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        observe_query(self.site, self.query, time.perf_counter() - self.t0, self.available,
+                      self.consumed, error=exc_type is not None and issubclass(exc_type, Exception))
+
+
+def query_timer(site: str, query: str):
+    """``with query_timer(...) as t:``; ``t`` is None when timing is off."""
+    return QueryTimer(site, query) if timing() else _NOOP
+
+
+class _Session:
+    __slots__ = ("mode",)
+
+    def __init__(self, mode: str):
+        self.mode = mode
+
+    def __enter__(self) -> None:
+        NEO4J_SESSIONS.add(1, self.mode)
+
+    def __exit__(self, *exc: Any) -> None:
+        NEO4J_SESSIONS.add(-1, self.mode)
+
+
+def session_in_use(mode: str):
+    """``with session_in_use("READ"):`` around a driver session."""
+    return _Session(mode) if settings.METRICS_ENABLED else _NOOP
+
+
+def observe_retries(site: str, retries: int) -> None:
+    if retries > 0 and settings.METRICS_ENABLED:
+        CYPHER_RETRIES.inc(site or "unnamed", value=retries)
+
+
+def pool_configured(max_size: int) -> None:
+    NEO4J_POOL_SIZE.set(max_size)
+
+
+def observe_openai(site: str, seconds: float, usage: Any = None, outcome: str = "ok") -> None:
+    """Record one completion; ``usage`` is the response's ``usage`` object."""
+    if not settings.METRICS_ENABLED:
+        return
+    OPENAI_SECONDS.observe(seconds, site, outcome)
+    for kind in ("prompt_tokens", "completion_tokens"):
+        n = getattr(usage, kind, None)
+        if isinstance(n, int):
+            OPENAI_TOKENS.inc(site, kind.split("_")[0], value=n)
+
+
+class OpenAITimer:
+    """Context manager around one completion; set ``usage`` from the response."""
+
+    __slots__ = ("site", "t0", "usage")
+
+    def __init__(self, site: str):
+        self.site = site
+        self.usage: Any = None
+
+    def __enter__(self) -> "OpenAITimer":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        outcome = ("ok" if exc_type is None else
+                   "error" if issubclass(exc_type, Exception) else "cancelled")
+        observe_openai(self.site, time.perf_counter() - self.t0, self.usage, outcome)
+
+
+def openai_timer(site: str):
+    """``with openai_timer("nl2cypher") as t:``; ``t`` is None when metrics are off."""
+    return OpenAITimer(site) if settings.METRICS_ENABLED else _NOOP
+
+
+def render() -> str:
+    """Prometheus text exposition format (version 0.0.4) of every metric."""
+    with _lock:
+        lines = [line for metric in REGISTRY for line in metric.render()]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,248 @@
+# app/services/neo4j_async.py
+"""
+Async twin of ``app.services.neo4j_client``.
+
+The request handlers use this module so a slow Neo4j round trip only parks a
+coroutine instead of pinning one of Starlette's threadpool workers. The sync
+client stays as-is for scripts.
+
+Reads go through ``arun_read`` (``execute_read``, routed to cluster readers)
+and writes through ``arun_write`` / ``arun_write_tx`` (``execute_write``, the
+leader); the driver retries both on transient errors. ``arun_cypher`` is
+auto-commit and never retried, for schema statements and other work that
+can't run in a managed transaction. ``astream_cypher`` is auto-commit too,
+since rows already yielded can't be replayed, but routes by ``access_mode``;
+reads that are buffered anyway use ``arun_read(max_rows=...)`` instead.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from neo4j import READ_ACCESS, WRITE_ACCESS, AsyncDriver, AsyncGraphDatabase, Query, unit_of_work
+
+from app.core.config import settings
+from app.services import metrics
+from app.services.metrics import query_timer
+from app.services.neo4j_client import driver_options
+
+_driver: Optional[AsyncDriver] = None  # module-level singleton
+
+Statement = Tuple[str, Dict[str, Any]]
+
+
+def _query(query: str, timeout: Optional[float]) -> Any:
+    """Attach a server-side transaction timeout (seconds) when one is given."""
+    return Query(query, timeout=timeout) if timeout else query
+
+
+async def init_async_driver() -> AsyncDriver:
+    """
+    Create the async Neo4j driver once (idempotent). Uses the same settings
+    as the sync client: NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD. No network
+    I/O happens here; connections open on first use or in
+    ``warm_up_async_driver``.
+    """
+    global _driver
+    if _driver is None:
+        if not settings.NEO4J_URI or not settings.NEO4J_USER or not settings.NEO4J_PASSWORD:
+            raise RuntimeError("Neo4j settings missing: check NEO4J_URI/USER/PASSWORD")
+        _driver = AsyncGraphDatabase.driver(
+            settings.NEO4J_URI,
+            auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+            **driver_options(),
+        )
+        metrics.pool_configured(settings.NEO4J_MAX_POOL_SIZE)
+    return _driver
+
+
+async def warm_up_async_driver(connections: int = 1, timeout: float = 30.0) -> None:
+    """
+    Check connectivity and open ``connections`` pooled connections up front,
+    so the first requests after a cold start skip the TCP/TLS/Bolt handshake.
+    Each connection is held in an open read transaction until all of them
+    are open; otherwise the pool would hand the same one back every time.
+    """
+    drv = await _get_driver()
+    db = getattr(settings, "NEO4J_DATABASE", None) or None
+    await asyncio.wait_for(drv.verify_connectivity(), timeout)
+    if connections <= 1:
+        return
+    barrier = asyncio.Barrier(connections)
+
+    async def work(tx) -> None:
+        await (await tx.run("RETURN 1 AS ok")).consume()
+        await barrier.wait()
+
+    async def hold() -> None:
+        try:
+            async with drv.session(database=db, default_access_mode=READ_ACCESS) as s:
+                await s.execute_read(work)
+        except BaseException:
+            await barrier.abort()  # release the others instead of leaving them parked
+            raise
+
+    await asyncio.wait_for(asyncio.gather(*(hold() for _ in range(connections))), timeout)
+
+
+async def close_async_driver() -> None:
+    """Close and clear the global async driver."""
+    global _driver
+    if _driver is not None:
+        await _driver.close()
+        _driver = None
+
+
+async def _get_driver() -> AsyncDriver:
+    """Internal accessor that ensures the driver exists."""
+    return _driver or await init_async_driver()
+
+
+async def arun_cypher(query: str, params: Optional[Dict[str, Any]] = None,
+                      database: Optional[str] = None,
+                      timeout: Optional[float] = None,
+                      name: str = "") -> List[Dict[str, Any]]:
+    """
+    Async version of ``run_cypher``: run a query in an auto-commit
+    transaction and return a list of dict rows. Uses settings.NEO4J_DATABASE
+    if database is not provided. ``timeout`` is enforced by the server, which
+    aborts the transaction. ``name`` labels the call site in metrics and the
+    slow-query log.
+    """
+    drv = await _get_driver()
+    db = database or getattr(settings, "NEO4J_DATABASE", None) or None
+    with query_timer(name, query) as t, metrics.session_in_use(WRITE_ACCESS):
+        async with drv.session(database=db) as s:
+            res = await s.run(_query(query, timeout), parameters=(params or {}))
+            rows = [r.data() async for r in res]
+            if t is not None:
+                t.add(await res.consume())
+    return rows
+
+
+async def astream_cypher(query: str, params: Optional[Dict[str, Any]] = None,
+                         database: Optional[str] = None,
+                         fetch_size: Optional[int] = None,
+                         timeout: Optional[float] = None,
+                         name: str = "",
+                         access_mode: str = WRITE_ACCESS) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield dict rows lazily. The driver pulls ``fetch_size`` records per round
+    trip, so memory is bounded by one batch instead of the whole result.
+    Pass ``access_mode=READ_ACCESS`` for reads so clusters serve them from a
+    reader. Close the generator (``contextlib.aclosing``) when stopping early
+    so the session is released.
+    """
+    drv = await _get_driver()
+    db = database or getattr(settings, "NEO4J_DATABASE", None) or None
+    session_kwargs: Dict[str, Any] = {"database": db, "default_access_mode": access_mode}
+    if fetch_size:
+        session_kwargs["fetch_size"] = fetch_size
+    with query_timer(name, query) as t, metrics.session_in_use(access_mode):
+        async with drv.session(**session_kwargs) as s:
+            res = await s.run(_query(query, timeout), parameters=(params or {}))
+            async for r in res:
+                yield r.data()
+            if t is not None:
+                t.add(await res.consume())
+
+
+async def _execute(mode: str, statements: Sequence[Statement], database: Optional[str],
+                   timeout: Optional[float], name: str, max_rows: Optional[int] = None,
+                   fetch_size: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+    """
+    Run ``statements`` in one managed transaction (``execute_read`` or
+    ``execute_write`` by ``mode``) and return the rows of each, at most
+    ``max_rows`` per statement (the rest are discarded). Replays are
+    counted in ``kg_cypher_retries_total``; server timings sum over attempts.
+    """
+    drv = await _get_driver()
+    db = database or getattr(settings, "NEO4J_DATABASE", None) or None
+    session_kwargs: Dict[str, Any] = {"database": db, "default_access_mode": mode}
+    if fetch_size:
+        session_kwargs["fetch_size"] = fetch_size
+    attempts = 0
+    with query_timer(name, statements[0][0] if statements else "") as t:
+        async def work(tx) -> List[List[Dict[str, Any]]]:
+            nonlocal attempts
+            attempts += 1
+            out = []
+            for query, params in statements:
+                res = await tx.run(query, params)
+                rows = []
+                async for r in res:
+                    if max_rows is not None and len(rows) >= max_rows:
+                        break
+                    rows.append(r.data())
+                out.append(rows)
+                summary = await res.consume()  # also discards rows past ``max_rows``
+                if t is not None:
+                    t.add(summary)
+            return out
+
+        if timeout:  # managed transactions take their timeout here, not from Query
+            work = unit_of_work(timeout=timeout)(work)
+        try:
+            with metrics.session_in_use(mode):
+                async with drv.session(**session_kwargs) as s:
+                    if mode == READ_ACCESS:
+                        return await s.execute_read(work)
+                    return await s.execute_write(work)
+        finally:
+            metrics.observe_retries(name, attempts - 1)
+
+
+async def arun_read(query: str, params: Optional[Dict[str, Any]] = None,
+                    database: Optional[str] = None,
+                    timeout: Optional[float] = None,
+                    name: str = "",
+                    max_rows: Optional[int] = None,
+                    fetch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Run a read in a managed transaction on a reader and return its rows
+    (the first ``max_rows`` of them, if given); transient errors are
+    retried. Other arguments as for ``arun_cypher`` / ``astream_cypher``.
+    """
+    return (await _execute(READ_ACCESS, [(query, params or {})], database, timeout, name,
+                           max_rows, fetch_size))[0]
+
+
+async def arun_write(query: str, params: Optional[Dict[str, Any]] = None,
+                     database: Optional[str] = None,
+                     timeout: Optional[float] = None,
+                     name: str = "") -> List[Dict[str, Any]]:
+    """``arun_read`` for a write: managed, on the leader, safe-to-replay statements only."""
+    return (await _execute(WRITE_ACCESS, [(query, params or {})], database, timeout, name))[0]
+
+
+async def arun_write_tx(statements: Sequence[Statement],
+                        database: Optional[str] = None,
+                        name: str = "") -> List[List[Dict[str, Any]]]:
+    """
+    Run several statements in one managed write transaction and return the
+    rows of each. ``execute_write`` retries the whole unit of work on
+    transient errors, so the statements must be safe to replay (MERGE is).
+    Metrics see the transaction as one call with summed server timings.
+    """
+    return await _execute(WRITE_ACCESS, statements, database, None, name)
+
+
+async def aexplain(query: str, params: Optional[Dict[str, Any]] = None,
+                   database: Optional[str] = None) -> Dict[str, Any]:
+    """Plan of ``EXPLAIN <query>`` (nothing is executed)."""
+    drv = await _get_driver()
+    db = database or getattr(settings, "NEO4J_DATABASE", None) or None
+    with query_timer("explain", query):
+        async with drv.session(database=db) as s:
+            res = await s.run(f"EXPLAIN {query}", parameters=(params or {}))
+            summary = await res.consume()
+    return summary.plan or {}
+
+
+async def aping() -> bool:
+    """Lightweight async connectivity check."""
+    try:
+        rows = await arun_read("RETURN 1 AS ok", name="ping")
+        return bool(rows[0]["ok"] == 1)
+    except Exception:
+        return False
@@ -1,13 +1,39 @@
 # app/services/neo4j_client.py
+"""
+Sync Neo4j client for scripts.
+
+- ``run_read`` / ``run_write``: managed transactions (``execute_read`` /
+  ``execute_write``) routed to readers / the leader; the driver retries
+  transient errors (leader switches, deadlocks) for up to
+  NEO4J_MAX_TX_RETRY_TIME, so the work must be safe to replay.
+- ``run_cypher``: auto-commit, write-routed and never retried; for
+  statements that can't run in a managed transaction (schema changes,
+  ``CALL {} IN TRANSACTIONS``).
+
+Pool sizing, acquisition timeout and fetch size come from Settings via
+``driver_options``, shared with the async twin.
+"""
 from __future__ import annotations
 
 from typing import Optional, Dict, Any, List
-from neo4j import GraphDatabase, Driver
+from neo4j import GraphDatabase, Driver, READ_ACCESS, WRITE_ACCESS, unit_of_work
 from app.core.config import settings
+from app.services import metrics
+from app.services.metrics import query_timer
 
 _driver: Optional[Driver] = None  # module-level singleton
 
 
+def driver_options() -> Dict[str, Any]:
+    """Pool and retry settings passed to both drivers."""
+    return {
+        "max_connection_pool_size": settings.NEO4J_MAX_POOL_SIZE,
+        "connection_acquisition_timeout": settings.NEO4J_ACQUISITION_TIMEOUT,
+        "max_transaction_retry_time": settings.NEO4J_MAX_TX_RETRY_TIME,
+        "fetch_size": settings.NEO4J_FETCH_SIZE,
+    }
+
+
 def init_driver() -> Driver:
     """
     Create the Neo4j driver once (idempotent). Uses env from settings:
@@ -20,7 +46,9 @@ def init_driver() -> Driver:
         _driver = GraphDatabase.driver(
             settings.NEO4J_URI,
             auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+            **driver_options(),
         )
+        metrics.pool_configured(settings.NEO4J_MAX_POOL_SIZE)
         # Optional: fail fast if unreachable
         _driver.verify_connectivity()
     return _driver
@@ -40,22 +68,71 @@ def _get_driver() -> Driver:
 
 
 def run_cypher(query: str, params: Optional[Dict[str, Any]] = None,
-               database: Optional[str] = None) -> List[Dict[str, Any]]:
+               database: Optional[str] = None, name: str = "") -> List[Dict[str, Any]]:
     """
-    Run a Cypher query and return a list of dict rows.
-    Uses settings.NEO4J_DATABASE if database is not provided.
+    Run a Cypher query in an auto-commit transaction and return a list of dict rows.
+    Uses settings.NEO4J_DATABASE if database is not provided. ``name`` labels
+    the call site in metrics and the slow-query log.
     """
     drv = _get_driver()
     db = database or getattr(settings, "NEO4J_DATABASE", None) or None
-    with drv.session(database=db) as s:
+    with query_timer(name, query) as t, metrics.session_in_use(WRITE_ACCESS), \
+            drv.session(database=db) as s:
         # Pass parameters correctly for Neo4j Python driver v5:
         res = s.run(query, parameters=(params or {}))
-        return [r.data() for r in res]
+        rows = [r.data() for r in res]
+        if t is not None:
+            t.add(res.consume())
+    return rows
+
+
+def _execute(mode: str, query: str, params: Optional[Dict[str, Any]],
+             database: Optional[str], timeout: Optional[float], name: str) -> List[Dict[str, Any]]:
+    """
+    Run ``query`` in one managed transaction (``execute_read`` or
+    ``execute_write`` by ``mode``) and return its rows. Replays are counted
+    in ``kg_cypher_retries_total``; server timings sum over attempts.
+    """
+    drv = _get_driver()
+    db = database or getattr(settings, "NEO4J_DATABASE", None) or None
+    attempts = 0
+    with query_timer(name, query) as t:
+        def work(tx) -> List[Dict[str, Any]]:
+            nonlocal attempts
+            attempts += 1
+            res = tx.run(query, params or {})
+            rows = [r.data() for r in res]
+            if t is not None:
+                t.add(res.consume())
+            return rows
+
+        if timeout:
+            work = unit_of_work(timeout=timeout)(work)
+        try:
+            with metrics.session_in_use(mode), \
+                    drv.session(database=db, default_access_mode=mode) as s:
+                return (s.execute_read if mode == READ_ACCESS else s.execute_write)(work)
+        finally:
+            metrics.observe_retries(name, attempts - 1)
+
+
+def run_read(query: str, params: Optional[Dict[str, Any]] = None,
+             database: Optional[str] = None, timeout: Optional[float] = None,
+             name: str = "") -> List[Dict[str, Any]]:
+    """Read in a managed transaction on a reader, retried on transient errors."""
+    return _execute(READ_ACCESS, query, params, database, timeout, name)
+
+
+def run_write(query: str, params: Optional[Dict[str, Any]] = None,
+              database: Optional[str] = None, timeout: Optional[float] = None,
+              name: str = "") -> List[Dict[str, Any]]:
+    """Write in a managed transaction on the leader, retried on transient errors."""
+    return _execute(WRITE_ACCESS, query, params, database, timeout, name)
 
 
 def ping() -> bool:
     """Lightweight connectivity check."""
     try:
-        return bool(run_cypher("RETURN 1 AS ok")[0]["ok"] == 1)
+        return bool(run_read("RETURN 1 AS ok", name="ping")[0]["ok"] == 1)
     except Exception:
         return False
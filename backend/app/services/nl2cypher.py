@@ -1,14 +1,43 @@
 """
 LLM → Cypher translator.
 Exports: generate_cypher(question: str) -> str
+         agenerate_cypher(question: str) -> str  (async, single-flight)
 Also aliased as: nl_to_cypher(question: str) -> str
+
+Translations are cached (see ``nl2cypher_cache``); failed completions, and
+completions that fail the lexical query guard (writes, several statements),
+fall back to a tiny query and are never cached. Reads get a LIMIT.
+
+Names in the question that ``entity_linker`` resolves are listed with their
+ids after the schema, so the model matches them by id instead of guessing
+a ``name``; the list is part of the cache key.
+
+The OpenAI clients are built on first use: importing ``openai`` is a large
+share of the app's import time, and template-only deployments never need it.
 """
 from __future__ import annotations
 
-from openai import OpenAI
+from typing import Any, Dict, List
+
 from ..core.config import settings
+from ..utils.cypher_sanitize import sanitize_cypher
+from ..utils.single_flight import SingleFlight
+from .entity_linker import entity_linker
+from .metrics import openai_timer
+from .nl2cypher_cache import TranslationCache, cache_key
+from .query_guard import QueryRejected, check
+
+_client: Any = None   # sync OpenAI client, created on first use
+_aclient: Any = None  # async OpenAI client, created on first use
 
-_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+_FALLBACK_CYPHER = "MATCH (n) RETURN n LIMIT 5"
+
+_cache = TranslationCache(
+    max_entries=settings.NL2CYPHER_CACHE_SIZE,
+    ttl_seconds=settings.NL2CYPHER_CACHE_TTL,
+    path=settings.NL2CYPHER_CACHE_PATH or None,
+)
+_flights = SingleFlight()
 
 _SCHEMA_PROMPT = """
 You translate user questions into a SINGLE Cypher statement against this schema.
@@ -33,6 +62,23 @@ Rules:
 - Add a reasonable LIMIT unless the question requires all results.
 """
 
+def _sync_client() -> Any:
+    global _client
+    if _client is None:
+        from openai import OpenAI
+
+        _client = OpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL or None)
+    return _client
+
+def async_client() -> Any:
+    """The shared async OpenAI client (also used by the readiness check)."""
+    global _aclient
+    if _aclient is None:
+        from openai import AsyncOpenAI
+
+        _aclient = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL or None)
+    return _aclient
+
 def _strip_fences(s: str) -> str:
     s = s.strip()
     if s.startswith("```"):
@@ -41,23 +87,95 @@ def _strip_fences(s: str) -> str:
             s = s.split("\n", 1)[-1].strip()
     return s
 
+def _hints(question: str) -> str:
+    """Prompt lines naming the graph entities the question mentions, or ""."""
+    if not settings.ENTITY_LINK_ENABLED:
+        return ""
+    links = entity_linker.link(question)
+    if not links:
+        return ""
+    lines = ["", "Entities in the question (match these by id, not by name):"]
+    for link in links:
+        options = "; ".join(f"{c.label} id '{c.id}' (name '{c.name}')" for c in link.candidates)
+        lines.append(f'- "{link.mention}": {options}')
+    return "\n".join(lines) + "\n"
+
+def _messages(question: str, hints: str = "") -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": _SCHEMA_PROMPT + hints},
+        {"role": "user", "content": question},
+    ]
+
+def _guard(txt: str) -> str:
+    """Read-only, LIMIT-bounded single statement, or "" if the output is unusable."""
+    try:
+        return check(sanitize_cypher(_strip_fences(txt)), limit=settings.QUERY_GUARD_LIMIT)
+    except QueryRejected:
+        return ""
+
+def _key(question: str, hints: str = "") -> str:
+    return cache_key(question, _SCHEMA_PROMPT + hints, settings.OPENAI_CHAT_MODEL)
+
 def generate_cypher(question: str) -> str:
     """Convert a natural-language question into a single Cypher statement."""
+    hints = _hints(question)
+    key = _key(question, hints)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
     try:
-        resp = _client.chat.completions.create(
-            model=settings.OPENAI_CHAT_MODEL,
-            messages=[
-                {"role": "system", "content": _SCHEMA_PROMPT},
-                {"role": "user", "content": question},
-            ],
-            temperature=0.1,
-        )
+        with openai_timer("nl2cypher") as t:
+            resp = _sync_client().chat.completions.create(
+                model=settings.OPENAI_CHAT_MODEL,
+                messages=_messages(question, hints),
+                temperature=0.1,
+            )
+            if t is not None:
+                t.usage = resp.usage
         txt = (resp.choices[0].message.content or "").strip()
-        cypher = _strip_fences(txt)
-        return cypher or "MATCH (n) RETURN n LIMIT 5"
+        cypher = _guard(txt)
     except Exception:
         # Keep the server alive even if OpenAI fails
-        return "MATCH (n) RETURN n LIMIT 5"
+        return _FALLBACK_CYPHER
+    if not cypher:
+        return _FALLBACK_CYPHER
+    _cache.put(key, cypher)
+    return cypher
+
+async def agenerate_cypher(question: str) -> str:
+    """
+    Async ``generate_cypher``. Concurrent misses for the same cache key share
+    one upstream completion.
+    """
+    hints = _hints(question)
+    key = _key(question, hints)
+    cached = await _cache.aget(key)
+    if cached is not None:
+        return cached
+
+    async def complete() -> str:
+        try:
+            with openai_timer("nl2cypher") as t:
+                resp = await async_client().chat.completions.create(
+                    model=settings.OPENAI_CHAT_MODEL,
+                    messages=_messages(question, hints),
+                    temperature=0.1,
+                )
+                if t is not None:
+                    t.usage = resp.usage
+            cypher = _guard((resp.choices[0].message.content or "").strip())
+        except Exception:
+            return _FALLBACK_CYPHER
+        if not cypher:
+            return _FALLBACK_CYPHER
+        await _cache.aput(key, cypher)
+        return cypher
+
+    return await _flights.do(key, complete)
+
+def cache_stats() -> Dict[str, Any]:
+    """Counters of the translation cache, plus coalesced single-flight callers."""
+    return {**_cache.stats, "entries": len(_cache), "coalesced": _flights.coalesced}
 
 # Back-compat alias used elsewhere
 nl_to_cypher = generate_cypher
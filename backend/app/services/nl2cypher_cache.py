@@ -0,0 +1,143 @@
+# app/services/nl2cypher_cache.py
+"""
+Two-tier cache for NL -> Cypher translations.
+
+- Memory: LRU with a TTL, bounded by entry count.
+- Disk (optional): SQLite file that survives restarts; hits are promoted
+  back into memory. ``aget``/``aput`` do the SQLite reads and commits in
+  a worker thread so the event loop never waits on the disk.
+
+Keys hash the normalized question together with the schema prompt and model
+name, so editing ``_SCHEMA_PROMPT`` or switching models invalidates old
+entries without a manual flush.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return _WS.sub(" ", question.strip().lower()).rstrip(" ?!.")
+
+
+def cache_key(question: str, schema_prompt: str, model: str) -> str:
+    schema = hashlib.sha256(f"{model}\0{schema_prompt}".encode()).hexdigest()[:16]
+    q = hashlib.sha256(normalize_question(question).encode()).hexdigest()
+    return f"{schema}:{q}"
+
+
+class TranslationCache:
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400,
+                 path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._mem: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()  # the sync generate_cypher may run in threads
+        self._db_lock = threading.Lock()  # held across disk I/O; never with _lock
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations "
+                "(key TEXT PRIMARY KEY, cypher TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+        self.stats: Dict[str, int] = {
+            "hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._mem)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        cypher = self._get_mem(key, now)
+        return cypher if cypher is not None else self._get_disk(key, now)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """``get`` for the event loop: memory hits inline, the SQLite lookup in a thread."""
+        now = time.time()
+        cypher = self._get_mem(key, now)
+        if cypher is not None:
+            return cypher
+        if self._db is None:
+            return self._get_disk(key, now)  # only counts the miss
+        return await asyncio.to_thread(self._get_disk, key, now)
+
+    def put(self, key: str, cypher: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, cypher, now)
+        self._persist(key, cypher, now)
+
+    async def aput(self, key: str, cypher: str) -> None:
+        """``put`` for the event loop: memory now, the SQLite commit in a thread."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, cypher, now)
+        if self._db is not None:
+            await asyncio.to_thread(self._persist, key, cypher, now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM translations")
+                self._db.commit()
+
+    def _get_mem(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is None:
+                return None
+            if now - entry[1] < self.ttl:
+                self._mem.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[0]
+            del self._mem[key]
+            self.stats["expired"] += 1
+            return None
+
+    def _get_disk(self, key: str, now: float) -> Optional[str]:
+        """The SQLite tier (promoting a hit into memory); counts the miss otherwise."""
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT cypher, created FROM translations WHERE key = ?", (key,)
+                ).fetchone()
+            if row is not None and now - row[1] < self.ttl:
+                with self._lock:
+                    self._remember(key, row[0], row[1])
+                    self.stats["disk_hits"] += 1
+                return row[0]
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def _persist(self, key: str, cypher: str, created: float) -> None:
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO translations (key, cypher, created) VALUES (?, ?, ?)",
+                (key, cypher, created),
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, cypher: str, created: float) -> None:
+        self._mem[key] = (cypher, created)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+            self.stats["evictions"] += 1
@@ -1,6 +1,138 @@
 # app/services/qa_orchestrator.py
-from typing import Dict, Any
+"""
+Question answering over the graph.
 
-def answer_question(question: str) -> Dict[str, Any]:
-    # Non-blocking stub; replace with real LLM or Cypher QA later.
-    return {"answer": "OK", "cypher": "", "graph_results": []}
+1. Fast path: ``intents.match`` maps common question shapes to one-hop
+   lookups (``GraphStore.related``; parameterized Cypher templates on
+   Neo4j) — no LLM round trip.
+2. Slow path: everything else goes through ``nl2cypher`` and the generated
+   Cypher must pass ``sanitize_cypher`` and ``query_guard.prepare`` (reads
+   only, LIMIT, optional EXPLAIN cost check) before it is run. Backends
+   without Cypher have no slow path.
+
+Both paths run under the QUERY_TIMEOUT transaction timeout. Database
+failures on either path (a syntax error in the generated Cypher, a timeout,
+an unreachable server) become an apologetic answer on that path instead of
+an error, since the message's facts are already queued by then.
+
+Messages that are not questions ("I live in Karachi") are only acknowledged;
+the chat route already stored their facts.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from neo4j.exceptions import DriverError, Neo4jError
+
+from app.core.config import settings
+from app.graph.store import get_store
+from app.services import intents, query_guard
+from app.services.neo4j_async import arun_read
+from app.services.nl2cypher import agenerate_cypher
+from app.utils.cypher_sanitize import sanitize_cypher
+
+log = logging.getLogger(__name__)
+
+TEMPLATE_LIMIT = 25
+DB_ERRORS = (Neo4jError, DriverError, asyncio.TimeoutError)
+
+_stats: Dict[str, Dict[str, float]] = {
+    path: {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+    for path in ("template", "llm", "none")
+}
+
+
+def _record(path: str, started: float) -> None:
+    ms = (time.perf_counter() - started) * 1000
+    s = _stats[path]
+    s["count"] += 1
+    s["total_ms"] += ms
+    s["max_ms"] = max(s["max_ms"], ms)
+
+
+def qa_stats() -> Dict[str, Any]:
+    """Per-path counts and latency, plus the template fast-path hit ratio."""
+    questions = _stats["template"]["count"] + _stats["llm"]["count"]
+    return {
+        "fast_path_ratio": round(_stats["template"]["count"] / questions, 4) if questions else 0.0,
+        **{
+            path: {
+                "count": int(s["count"]),
+                "avg_ms": round(s["total_ms"] / s["count"], 3) if s["count"] else 0.0,
+                "max_ms": round(s["max_ms"], 3),
+            }
+            for path, s in _stats.items()
+        },
+    }
+
+
+def _render(rows: List[Dict[str, Any]]) -> str:
+    if not rows:
+        return "I found no matches in your graph."
+    values = []
+    for row in rows:
+        if "name" in row or "id" in row:
+            values.append(str(row.get("name") or row.get("id")))
+        else:
+            values.append(", ".join(f"{k}: {v}" for k, v in row.items()))
+    return "; ".join(values)
+
+
+def _failed(path: str, cypher: str, started: float, exc: BaseException) -> Dict[str, Any]:
+    log.warning("qa %s path failed: %r", path, exc)
+    _record(path, started)
+    return {"answer": "I couldn't query your graph just now; please try again.",
+            "cypher": cypher, "graph_results": [], "path": path}
+
+
+async def answer_question(question: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Answer a chat message from the graph. Returns answer, cypher,
+    graph_results and which path served it ("template", "llm" or "none").
+    """
+    started = time.perf_counter()
+
+    if not intents.looks_like_question(question):
+        _record("none", started)
+        return {"answer": "Noted.", "cypher": "", "graph_results": [], "path": "none"}
+
+    store = get_store()
+    m = intents.match(question, user_id)
+    if m is not None:
+        cypher = m.intent.cypher if store.supports_cypher else ""
+        try:
+            rows = await store.related(m.ids, m.intent.rel, m.intent.direction, TEMPLATE_LIMIT)
+        except DB_ERRORS as e:
+            return _failed("template", cypher, started, e)
+        _record("template", started)
+        return {"answer": _render(rows), "cypher": cypher, "graph_results": rows, "path": "template"}
+
+    if not store.supports_cypher:
+        _record("none", started)
+        return {"answer": f"I can only answer simple questions on the {store.name} backend.",
+                "cypher": "", "graph_results": [], "path": "none"}
+
+    if not settings.OPENAI_API_KEY:
+        _record("none", started)
+        return {"answer": "I can't answer that without an LLM configured.",
+                "cypher": "", "graph_results": [], "path": "none"}
+
+    cypher = sanitize_cypher(await agenerate_cypher(question))
+    if not cypher:
+        _record("llm", started)
+        return {"answer": "I can only answer read-only questions.",
+                "cypher": "", "graph_results": [], "path": "llm"}
+    try:
+        cypher = await query_guard.prepare(cypher, limit=settings.QUERY_GUARD_LIMIT)
+        rows = await arun_read(cypher, timeout=query_guard.timeout(), name="qa_llm")
+    except query_guard.QueryRejected as e:
+        _record("llm", started)
+        return {"answer": f"That question would need too expensive a query ({e.reason}).",
+                "cypher": cypher, "graph_results": [], "path": "llm"}
+    except DB_ERRORS as e:  # EXPLAIN of invalid Cypher, timeouts, lost connections
+        return _failed("llm", cypher, started, e)
+    _record("llm", started)
+    return {"answer": _render(rows), "cypher": cypher, "graph_results": rows, "path": "llm"}
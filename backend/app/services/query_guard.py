@@ -0,0 +1,135 @@
+# app/services/query_guard.py
+"""
+Guard rails for Cypher that comes from users or the LLM.
+
+``prepare`` runs before any such statement reaches Neo4j:
+
+1. lexical checks from ``cypher_sanitize`` (write clauses anywhere in the
+   statement, not just as a prefix) when the caller only allows reads;
+2. a ``LIMIT`` appended to, or lowered on, the final RETURN of reads;
+3. optionally (QUERY_GUARD_EXPLAIN) an ``EXPLAIN`` pre-flight that rejects
+   plans whose largest operator estimate exceeds QUERY_GUARD_MAX_EST_ROWS,
+   e.g. the cartesian product in ``MATCH (a),(b) RETURN a,b``.
+
+Plans are cached per normalized statement (params are not part of the key,
+they rarely change the plan shape), so repeats skip the EXPLAIN round trip.
+The per-query transaction timeout (QUERY_TIMEOUT) is passed to the driver
+by the callers through ``timeout()``.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.neo4j_async import aexplain
+from app.utils.cypher_sanitize import ensure_limit, normalize, tokenize, write_clause
+
+
+class QueryRejected(ValueError):
+    """The statement is not allowed to run; ``reason`` is safe to show to users."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+Estimate = Tuple[float, str]  # (largest EstimatedRows in the plan, its operator)
+
+
+def plan_estimate(plan: Dict[str, Any]) -> Estimate:
+    """
+    Largest ``EstimatedRows`` of any operator in an EXPLAIN plan tree; on
+    ties the deepest operator is named, since that is where the rows come from.
+    """
+    best: Estimate = (0.0, "")
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        rows = float((node.get("args") or {}).get("EstimatedRows") or 0)
+        if rows >= best[0]:
+            best = (rows, str(node.get("operatorType", "")).split("@")[0])
+        stack.extend(node.get("children") or ())
+    return best
+
+
+_cache_key = lru_cache(maxsize=4096)(normalize)  # repeats skip re-tokenizing
+
+
+class PlanCache:
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Estimate]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "rejected": 0}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def estimate(self, query: str, params: Optional[Dict[str, Any]] = None) -> Estimate:
+        key = _cache_key(query)
+        hit = self._data.get(key)
+        if hit is not None:
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return hit
+        self.stats["misses"] += 1
+        est = plan_estimate(await aexplain(query, params))
+        self._data[key] = est
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+        return est
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+plan_cache = PlanCache(settings.QUERY_GUARD_PLAN_CACHE_SIZE)
+
+
+def timeout() -> Optional[float]:
+    """Transaction timeout for guarded statements (None = server default)."""
+    return settings.QUERY_TIMEOUT or None
+
+
+def check(query: str, *, read_only: bool = True, limit: Optional[int] = None) -> str:
+    """
+    Lexical part of ``prepare`` (no database round trip): reject writes when
+    ``read_only``, bound reads with ``limit``. Writes are never rewritten.
+    """
+    query = (query or "").strip()
+    tokens = tokenize(query)
+    if not tokens:
+        raise QueryRejected("empty statement")
+    clause = write_clause(query, tokens)
+    if read_only and clause:
+        raise QueryRejected(f"write clause not allowed here: {clause}")
+    if limit and not clause:
+        query = ensure_limit(query, limit, tokens)
+    return query
+
+
+async def prepare(query: str, params: Optional[Dict[str, Any]] = None, *,
+                  read_only: bool = True, limit: Optional[int] = None,
+                  explain: Optional[bool] = None) -> str:
+    """
+    Return the statement to actually run, or raise ``QueryRejected``.
+    ``check`` plus the EXPLAIN pre-flight; ``explain`` overrides
+    QUERY_GUARD_EXPLAIN.
+    """
+    query = check(query, read_only=read_only, limit=limit)
+
+    if settings.QUERY_GUARD_EXPLAIN if explain is None else explain:
+        rows, operator = await plan_cache.estimate(query, params)
+        if rows > settings.QUERY_GUARD_MAX_EST_ROWS:
+            plan_cache.stats["rejected"] += 1
+            raise QueryRejected(
+                f"estimated {rows:,.0f} rows at {operator or 'some operator'} "
+                f"(limit {settings.QUERY_GUARD_MAX_EST_ROWS:,})"
+            )
+    return query
+
+
+def guard_stats() -> Dict[str, Any]:
+    return {**plan_cache.stats, "plans": len(plan_cache),
+            "explain": settings.QUERY_GUARD_EXPLAIN, "timeout_s": settings.QUERY_TIMEOUT}
@@ -0,0 +1,114 @@
+# app/services/result_cache.py
+"""
+Result cache for read-only ``/graph/run`` queries.
+
+Entries are keyed by (query text, canonicalized params, database) and the
+cache is bounded by the approximate JSON size of the cached rows rather than
+by entry count, so one huge result cannot hide behind a small entry limit.
+
+Invalidation uses a process-wide write generation instead of a TTL: every
+write path (the upsert loaders and write queries through ``/graph/run``)
+calls ``bump_write_generation()``, which makes every cached result stale.
+A read records the generation before it runs and its result is only stored
+if no write happened in between, so a slow read can't cache pre-write data.
+The generation is per process; with several workers each one caches
+independently and only sees its own writes.
+"""
+from __future__ import annotations
+
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+Rows = List[Dict[str, Any]]
+Key = Tuple[str, str, str]
+
+_generation = 0
+
+
+def write_generation() -> int:
+    return _generation
+
+
+def bump_write_generation() -> None:
+    """Mark every cached read result as stale."""
+    global _generation
+    _generation += 1
+
+
+def make_key(query: str, params: Optional[Dict[str, Any]], database: Optional[str] = None) -> Key:
+    canon = json.dumps(params or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return (query.strip(), canon, database or "")
+
+
+class ResultCache:
+    def __init__(self, max_bytes: int = 64 << 20, max_entry_fraction: float = 0.1):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = int(max_bytes * max_entry_fraction)
+        self._entries: "OrderedDict[Key, Tuple[Rows, int]]" = OrderedDict()
+        self._bytes = 0
+        self._generation = write_generation()
+        self.stats: Dict[str, int] = {
+            "hits": 0, "misses": 0, "bypass": 0, "stores": 0,
+            "evictions": 0, "invalidations": 0, "too_large": 0,
+        }
+
+    def _sync_generation(self) -> None:
+        # The generation is global, so a bump makes *all* entries stale.
+        if self._generation != write_generation():
+            if self._entries:
+                self.stats["invalidations"] += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._generation = write_generation()
+
+    def get(self, key: Key) -> Optional[Rows]:
+        self._sync_generation()
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[0]
+
+    def put(self, key: Key, rows: Rows, generation: int) -> bool:
+        """Store ``rows`` if no write happened since ``generation`` was read."""
+        self._sync_generation()
+        if generation != self._generation:
+            return False
+        size = len(json.dumps(rows, separators=(",", ":"), default=str))
+        if size > self.max_entry_bytes:
+            self.stats["too_large"] += 1
+            return False
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (rows, size)
+        self._bytes += size
+        self.stats["stores"] += 1
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.stats["evictions"] += 1
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "write_generation": write_generation(),
+        }
+
+
+graph_run_cache = ResultCache(max_bytes=settings.GRAPH_RUN_CACHE_MAX_BYTES)
@@ -0,0 +1,234 @@
+# app/services/result_formats.py
+"""
+Result encoders for ``/graph/run`` built on ``neo4j_async.astream_cypher``.
+
+- ``collect_rows``:    classic list of dict rows (capped at ``max_rows``).
+- ``collect_columns``: column arrays, no per-row keys in the payload.
+                       Both buffer the result, so reads run as managed
+                       ``execute_read`` transactions (``arun_read``) that
+                       the driver retries on transient errors.
+- ``ndjson_chunks``:   one JSON row per line, streamed as rows arrive.
+- ``arrow_chunks``:    Arrow IPC stream, one record batch per ``batch_rows``
+                       (needs the optional ``pyarrow`` package).
+
+The streaming encoders never hold more than one chunk of rows, so memory is
+flat in the size of the result. ``access_mode`` routes the statement (pass
+``READ_ACCESS`` for reads so a cluster serves them from a reader). When ``max_rows`` cuts a stream short the
+last NDJSON line is ``{"_truncated": true, "max_rows": N}``; the Arrow stream
+just ends.
+"""
+from __future__ import annotations
+
+import io
+import json
+import logging
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from neo4j import READ_ACCESS, WRITE_ACCESS
+
+from app.services.neo4j_async import arun_read, astream_cypher
+
+try:  # optional dependency
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - depends on the environment
+    pa = None
+
+log = logging.getLogger(__name__)
+
+Rows = List[Dict[str, Any]]
+
+NDJSON_CHUNK_BYTES = 64 * 1024
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), default=str)
+
+
+async def collect_rows(query: str, params: Dict[str, Any], max_rows: int,
+                       fetch_size: Optional[int] = None,
+                       timeout: Optional[float] = None,
+                       access_mode: str = WRITE_ACCESS) -> Tuple[Rows, bool]:
+    """Return (rows, truncated)."""
+    if access_mode == READ_ACCESS:
+        rows = await arun_read(query, params, timeout=timeout, name="graph_run",
+                               max_rows=max_rows + 1, fetch_size=fetch_size)
+        return rows[:max_rows], len(rows) > max_rows
+    rows = []
+    async with aclosing(astream_cypher(query, params, fetch_size=fetch_size, timeout=timeout,
+                                       name="graph_run", access_mode=access_mode)) as stream:
+        async for row in stream:
+            if len(rows) >= max_rows:
+                return rows, True
+            rows.append(row)
+    return rows, False
+
+
+async def collect_columns(query: str, params: Dict[str, Any], max_rows: int,
+                          fetch_size: Optional[int] = None,
+                          timeout: Optional[float] = None,
+                          access_mode: str = WRITE_ACCESS) -> Dict[str, Any]:
+    columns: List[str] = []
+    data: List[List[Any]] = []
+    count = 0
+    truncated = False
+
+    def add(row: Dict[str, Any]) -> None:
+        nonlocal columns, data, count
+        if not columns:
+            columns = list(row)
+            data = [[] for _ in columns]
+        for col, values in zip(columns, data):
+            values.append(row.get(col))
+        count += 1
+
+    if access_mode == READ_ACCESS:
+        rows, truncated = await collect_rows(query, params, max_rows, fetch_size, timeout,
+                                             access_mode)
+        for row in rows:
+            add(row)
+    else:
+        async with aclosing(astream_cypher(query, params, fetch_size=fetch_size, timeout=timeout,
+                                           name="graph_run", access_mode=access_mode)) as stream:
+            async for row in stream:
+                if count >= max_rows:
+                    truncated = True
+                    break
+                add(row)
+    return {"columns": columns, "data": data, "row_count": count, "truncated": truncated}
+
+
+async def ndjson_chunks(query: str, params: Dict[str, Any], max_rows: int,
+                        fetch_size: Optional[int] = None,
+                        timeout: Optional[float] = None,
+                        access_mode: str = WRITE_ACCESS) -> AsyncIterator[bytes]:
+    buf: List[str] = []
+    size = 0
+    count = 0
+    async with aclosing(astream_cypher(query, params, fetch_size=fetch_size, timeout=timeout,
+                                       name="graph_run", access_mode=access_mode)) as stream:
+        async for row in stream:
+            if count >= max_rows:
+                buf.append(_dumps({"_truncated": True, "max_rows": max_rows}) + "\n")
+                break
+            line = _dumps(row) + "\n"
+            buf.append(line)
+            size += len(line)
+            count += 1
+            if size >= NDJSON_CHUNK_BYTES:
+                yield "".join(buf).encode()
+                buf, size = [], 0
+    if buf:
+        yield "".join(buf).encode()
+
+
+def _arrow_type(values: List[Any]) -> "pa.DataType":
+    """Column type for the stream, from the first batch's values."""
+    kinds = {type(v) for v in values if v is not None}
+    if not kinds or kinds == {str}:
+        return pa.string()  # an all-null column may hold anything later
+    if kinds == {bool}:
+        return pa.bool_()
+    if kinds <= {int}:
+        return pa.int64()
+    if kinds <= {int, float}:
+        return pa.float64()
+    try:
+        return pa.array(values).type  # e.g. dates, bytes
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        return pa.string()
+
+
+def _arrow_column(name: str, values: List[Any], type_: "pa.DataType") -> "pa.Array":
+    """
+    ``values`` as ``type_``. Values that do not convert become text in a
+    string column; in any other column they are sent as null (logged).
+    """
+    integer = pa.types.is_integer(type_)  # pyarrow would truncate 1.5 to 1
+
+    def fractional(v: Any) -> bool:
+        return integer and isinstance(v, float) and not v.is_integer()
+
+    if not any(map(fractional, values)):
+        try:
+            return pa.array(values, type=type_)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            pass
+    if pa.types.is_string(type_):
+        return pa.array([v if v is None or isinstance(v, str) else _dumps(v) for v in values],
+                        type=type_)
+    cells, lost = [], 0
+    for v in values:
+        try:
+            if fractional(v):
+                raise pa.ArrowInvalid(v)
+            pa.array([v], type=type_)
+            cells.append(v)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+            cells.append(None)
+            lost += 1
+    log.warning("arrow stream: %d value(s) of column %r do not fit %s and were sent as null",
+                lost, name, type_)
+    return pa.array(cells, type=type_)
+
+
+async def arrow_chunks(query: str, params: Dict[str, Any], max_rows: int,
+                       batch_rows: int = 10_000,
+                       fetch_size: Optional[int] = None,
+                       timeout: Optional[float] = None,
+                       access_mode: str = WRITE_ACCESS) -> AsyncIterator[bytes]:
+    """
+    Arrow IPC stream. The schema is inferred from the first batch and cannot
+    change afterwards: ints and floats together make float64, and columns
+    that are all null or mixed there are strings. Later values are cast to
+    their column's type (text in string columns; a value a numeric or bool
+    column cannot hold is sent as null, so cast in Cypher, e.g.
+    ``toFloat(x)``, if a column may mix types). Nested values (maps, lists,
+    nodes) are sent as JSON strings.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+
+    sink = io.BytesIO()
+    writer = None
+    schema = None
+    columns: List[str] = []
+    batch: Dict[str, List[Any]] = {}
+    count = 0
+
+    def flush() -> bytes:
+        nonlocal writer, schema
+        if schema is None:
+            schema = pa.schema([(c, _arrow_type(batch[c])) for c in columns])
+            writer = pa.ipc.new_stream(sink, schema)
+        rb = pa.RecordBatch.from_arrays(
+            [_arrow_column(f.name, batch[f.name], f.type) for f in schema], schema=schema)
+        writer.write_batch(rb)
+        for values in batch.values():
+            values.clear()
+        out = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return out
+
+    async with aclosing(astream_cypher(query, params, fetch_size=fetch_size, timeout=timeout,
+                                       name="graph_run", access_mode=access_mode)) as stream:
+        async for row in stream:
+            if count >= max_rows:
+                break
+            if not columns:
+                columns = list(row)
+                batch = {c: [] for c in columns}
+            for col in columns:
+                v = row.get(col)
+                batch[col].append(_dumps(v) if isinstance(v, (dict, list)) else v)
+            count += 1
+            if count % batch_rows == 0:
+                yield flush()
+
+    if columns and batch[columns[0]]:
+        yield flush()
+    if writer is None:  # empty result: still send a valid (empty) stream
+        writer = pa.ipc.new_stream(sink, pa.schema([]))
+    writer.close()
+    yield sink.getvalue()
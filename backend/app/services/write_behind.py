@@ -0,0 +1,216 @@
+# app/services/write_behind.py
+"""
+Write-behind queue for KG deltas produced on the chat path.
+
+``/chat/ask`` should not pay two Neo4j round trips before it can answer, and
+consecutive messages from the same user keep re-sending the same
+``user:<id>`` node. Deltas are queued here and a background task coalesces
+everything that arrives within a short window (or up to a size cap):
+entities are deduplicated by id, triples by (subj, pred, obj) and source
+message, and the result is written with one ``upsert_delta`` transaction.
+
+Overflow behaviour when the queue is full (``WRITE_BEHIND_OVERFLOW``):
+  - ``block``:  the caller waits for room (backpressure),
+  - ``drop``:   the delta is discarded and counted,
+  - ``inline``: the caller writes the delta itself.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.graph import provenance
+from app.graph.store import get_store
+from app.models.graph import Entity, Triple
+
+log = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("block", "drop", "inline")
+
+_Item = Tuple[List[Entity], List[Triple], Optional[asyncio.Future]]
+
+
+def merge_deltas(deltas: Iterable[Tuple[Iterable[Entity], Iterable[Triple]]]
+                 ) -> Tuple[List[Entity], List[Triple]]:
+    """
+    Coalesce deltas the way MERGE would apply them in order: entities by id
+    (last non-empty name wins, props merged), triples by (subj, pred, obj)
+    with props merged. A fact repeated by different messages keeps one row
+    per source, so ``provenance.compact`` writes each Source and every one
+    counts as a mention.
+    """
+    ents: Dict[str, Entity] = {}
+    rels: Dict[Tuple[str, str, str, Optional[str]], Triple] = {}
+    for e_list, t_list in deltas:
+        for e in e_list:
+            prev = ents.get(e.id)
+            ents[e.id] = e if prev is None else e.model_copy(update={
+                "name": e.name or prev.name,
+                "props": {**prev.props, **e.props},
+            })
+        for t in t_list:
+            _, src = provenance.compact_props(t.props)
+            key = (t.subj, t.pred.value, t.obj, src["id"] if src else t.props.get("source"))
+            prev_t = rels.get(key)
+            rels[key] = t if prev_t is None else t.model_copy(
+                update={"props": {**prev_t.props, **t.props}})
+    return list(ents.values()), list(rels.values())
+
+
+class WriteBehindQueue:
+    def __init__(self, window_ms: int = 50, max_batch: int = 500,
+                 maxsize: int = 10_000, overflow: str = "block"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got {overflow!r}")
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.overflow = overflow
+        self._queue: "asyncio.Queue[_Item]" = asyncio.Queue(maxsize=maxsize)
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._pending: List[_Item] = []
+        self.stats: Dict[str, int] = {
+            "submitted": 0, "dropped": 0, "inline": 0, "flushes": 0,
+            "entities_in": 0, "entities_written": 0,
+            "triples_in": 0, "triples_written": 0, "errors": 0,
+        }
+
+    def start(self) -> None:
+        """Start the background flusher (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, entities: Iterable[Entity], triples: Iterable[Triple],
+                     wait: bool = False) -> bool:
+        """
+        Queue a delta and return immediately.
+
+        With ``wait=True`` (read-your-writes) this only returns once the
+        batch holding the delta is committed, and re-raises its write error.
+        Returns False if the delta was dropped by the ``drop`` policy.
+        """
+        ents, rels = list(entities), list(triples)
+        if not ents and not rels:
+            return True
+        self.start()
+        fut = asyncio.get_running_loop().create_future() if wait else None
+        item: _Item = (ents, rels, fut)
+        self.stats["submitted"] += 1
+
+        if self.overflow == "block":
+            await self._queue.put(item)
+        else:
+            try:
+                self._queue.put_nowait(item)
+            except asyncio.QueueFull:
+                if self.overflow == "drop":
+                    self.stats["dropped"] += 1
+                    return False
+                self.stats["inline"] += 1
+                await get_store().upsert_delta(ents, rels)
+                return True
+        if fut is not None:
+            await fut
+        return True
+
+    async def flush(self) -> None:
+        """Write everything queued so far (used on shutdown)."""
+        while not self._queue.empty():
+            await self._write(self._drain([]))
+
+    async def stop(self) -> None:
+        """Stop the background task, then write pending and queued deltas."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight is not None:
+            await self._inflight  # shielded from the cancel above
+            self._inflight = None
+        pending, self._pending = self._pending, []
+        if pending:
+            await self._write(pending)
+        await self.flush()
+
+    @staticmethod
+    def _size(batch: List[_Item]) -> int:
+        return sum(len(e) + len(t) for e, t, _ in batch)
+
+    def _drain(self, batch: List[_Item]) -> List[_Item]:
+        """Move queued items into ``batch`` without waiting, up to max_batch."""
+        size = self._size(batch)
+        while size < self.max_batch and not self._queue.empty():
+            item = self._queue.get_nowait()
+            batch.append(item)
+            size += len(item[0]) + len(item[1])
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Items live in self._pending until handed to a write, so a
+            # cancel during the coalescing window does not lose them.
+            self._pending.append(await self._queue.get())
+            deadline = loop.time() + self.window
+            while True:
+                self._drain(self._pending)
+                remaining = deadline - loop.time()
+                if self._size(self._pending) >= self.max_batch or remaining <= 0:
+                    break
+                try:
+                    self._pending.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            batch, self._pending = self._pending, []
+            self._inflight = loop.create_task(self._write(batch))
+            await asyncio.shield(self._inflight)
+            self._inflight = None
+
+    async def _write(self, batch: List[_Item]) -> None:
+        for e_list, t_list, _ in batch:
+            self.stats["entities_in"] += len(e_list)
+            self.stats["triples_in"] += len(t_list)
+        ents, rels = merge_deltas((e_list, t_list) for e_list, t_list, _ in batch)
+
+        error: Optional[BaseException] = None
+        try:
+            await get_store().upsert_delta(ents, rels)
+            self.stats["flushes"] += 1
+            self.stats["entities_written"] += len(ents)
+            self.stats["triples_written"] += len(rels)
+        except Exception as exc:  # keep the flusher alive
+            error = exc
+            self.stats["errors"] += 1
+            log.warning("write-behind flush of %d deltas failed: %s", len(batch), exc)
+
+        for _, _, fut in batch:
+            if fut is not None and not fut.done():
+                if error is None:
+                    fut.set_result(None)
+                else:
+                    fut.set_exception(error)
+
+
+write_queue = WriteBehindQueue(
+    window_ms=settings.WRITE_BEHIND_WINDOW_MS,
+    max_batch=settings.WRITE_BEHIND_MAX_BATCH,
+    maxsize=settings.WRITE_BEHIND_QUEUE_SIZE,
+    overflow=settings.WRITE_BEHIND_OVERFLOW,
+)
+
+
+async def submit_delta(entities: Iterable[Entity], triples: Iterable[Triple],
+                       wait: bool = False) -> bool:
+    """
+    Hand a delta to the write-behind queue, or write it inline when
+    WRITE_BEHIND_ENABLED is off.
+    """
+    if not settings.WRITE_BEHIND_ENABLED:
+        await get_store().upsert_delta(entities, triples)
+        return True
+    return await write_queue.submit(entities, triples, wait=wait)
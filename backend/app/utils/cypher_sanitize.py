@@ -1,16 +1,197 @@
 # app/utils/cypher_sanitize.py
 import re
+from typing import List, NamedTuple, Optional
 
-WRITE_PREFIXES = re.compile(
-    r"^\s*(CREATE|MERGE|DELETE|DETACH|SET|DROP|LOAD\s+CSV|START|TERMINATE|GRANT|REVOKE|INSERT|REMOVE)\b",
-    re.IGNORECASE,
+# Clauses/keywords that can change data or schema in clause position.
+WRITE_KEYWORDS = frozenset({
+    "CREATE", "MERGE", "DELETE", "DETACH", "SET", "REMOVE", "DROP", "FOREACH", "LOAD",
+    "ALTER", "RENAME", "START", "STOP", "TERMINATE", "GRANT", "DENY", "REVOKE",
+    "INSERT", "ENABLE",
+})
+
+# ``CALL proc`` is a write unless the procedure is known to only read.
+# ``CALL { ... }`` and ``CALL (x) { ... }`` subqueries are checked like any
+# other tokens.
+READ_PROCEDURES = (
+    "db.labels", "db.relationshiptypes", "db.propertykeys", "db.schema.",
+    "db.indexes", "db.constraints", "db.info", "dbms.components",
+    "db.index.fulltext.querynodes", "db.index.fulltext.queryrelationships",
+    "apoc.path.", "apoc.coll.", "apoc.map.", "apoc.text.", "apoc.meta.",
+)
+
+_TOKEN = re.compile(
+    r"""
+    (?P<ws>\s+)
+    |(?P<comment>//[^\n]*|/\*.*?\*/)
+    |(?P<string>'(?:\\.|[^'\\])*'|"(?:\\.|[^"\\])*")
+    |(?P<quoted>`(?:``|[^`])*`)
+    |(?P<param>\$\w+)
+    |(?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+    |(?P<word>[A-Za-z_]\w*)
+    |(?P<punct>.)
+    """,
+    re.VERBOSE | re.DOTALL,
 )
+_OPEN, _CLOSE = "([{", ")]}"
+
+# After these a word is an expression (a variable such as ``start`` or
+# ``load``), never the start of a clause. ``*`` is not one of them: ``WITH *``
+# is followed by a clause.
+_EXPR_PUNCT = frozenset(".:([,=<>+-/%^")
+_EXPR_WORDS = frozenset({
+    "AS", "RETURN", "WITH", "WHERE", "AND", "OR", "XOR", "NOT", "IN", "BY", "DISTINCT",
+    "UNWIND", "SKIP", "LIMIT", "IS", "CASE", "WHEN", "THEN", "ELSE", "YIELD",
+    "CONTAINS", "STARTS", "ENDS",
+})
+# ... and before these it is one (``start.id``, ``load)``, ``{merge: 1}``).
+_EXPR_NEXT = frozenset(".:)],=<>+-*/%^")
+
+
+class Token(NamedTuple):
+    kind: str   # word, number, string, quoted, param, punct
+    text: str
+    start: int
+    end: int
+    depth: int  # nesting of (), [] and {} around the token
+
+
+def tokenize(q: str) -> List[Token]:
+    """
+    Split Cypher into tokens, dropping whitespace and comments. Keywords
+    inside string literals, backticked names and comments never show up
+    as ``word`` tokens.
+    """
+    tokens: List[Token] = []
+    depth = 0
+    for m in _TOKEN.finditer(q or ""):
+        kind = m.lastgroup
+        if kind in ("ws", "comment"):
+            continue
+        text = m.group()
+        if kind == "punct" and text in _CLOSE:
+            depth = max(depth - 1, 0)
+        tokens.append(Token(kind, text, m.start(), m.end(), depth))
+        if kind == "punct" and text in _OPEN:
+            depth += 1
+    return tokens
+
+
+def _procedure(tokens: List[Token], i: int) -> str:
+    """Dotted procedure name that follows the CALL at ``tokens[i]``."""
+    parts = []
+    for tok in tokens[i + 1:]:
+        if tok.kind == "word" or (tok.kind == "punct" and tok.text == "."):
+            parts.append(tok.text)
+        else:
+            break
+    return "".join(parts).lower()
+
+
+def _clause_position(tokens: List[Token], i: int) -> bool:
+    """
+    False if the word at ``tokens[i]`` is a name or an expression (after
+    ``.``/``:``/``AS``/an operator, or followed by one), so it cannot start a
+    clause.
+    """
+    prev = tokens[i - 1] if i else None
+    nxt = tokens[i + 1].text if i + 1 < len(tokens) else ""
+    if prev is not None and (prev.kind == "punct" and prev.text in _EXPR_PUNCT
+                             or prev.kind == "word" and prev.text.upper() in _EXPR_WORDS):
+        return False
+    return nxt not in _EXPR_NEXT
+
+
+def _subquery(tokens: List[Token], i: int) -> bool:
+    """True if the CALL at ``tokens[i]`` opens a ``{ ... }`` or ``(vars) { ... }`` subquery."""
+    j = i + 1
+    if j < len(tokens) and tokens[j].text == "(":
+        depth = tokens[j].depth
+        j += 1
+        while j < len(tokens) and not (tokens[j].text == ")" and tokens[j].depth == depth):
+            j += 1
+        j += 1
+    return j < len(tokens) and tokens[j].text == "{"
+
+
+def write_clause(q: str, tokens: Optional[List[Token]] = None) -> Optional[str]:
+    """
+    Return the first write keyword in clause position, or None.
+    Property keys (``n.set``), labels (``:Create``), map keys (``{merge: 1}``),
+    aliases (``AS load``) and variables used in expressions (``n.start AS
+    start``, ``RETURN load.id``) are not clauses and are ignored. Pass
+    ``tokens`` if ``q`` is already tokenized.
+    """
+    tokens = tokenize(q) if tokens is None else tokens
+    for i, tok in enumerate(tokens):
+        if tok.kind != "word" or not _clause_position(tokens, i):
+            continue
+        word = tok.text.upper()
+        if word in WRITE_KEYWORDS:
+            return word
+        if word == "CALL" and not _subquery(tokens, i):
+            proc = _procedure(tokens, i)
+            if not proc.startswith(READ_PROCEDURES):
+                return f"CALL {proc}".strip()
+    return None
+
+
+def is_read_only(q: str) -> bool:
+    """
+    True if the statement contains no write clause (ignoring literals,
+    comments and keywords used as names). Procedures count as writes unless listed in
+    ``READ_PROCEDURES``.
+    """
+    tokens = tokenize(q)
+    return bool(tokens) and write_clause(q, tokens) is None
+
+
+def first_statement(q: str) -> str:
+    """Text up to the first top-level ``;`` (semicolons in strings don't count)."""
+    for tok in tokenize(q):
+        if tok.kind == "punct" and tok.text == ";" and tok.depth == 0:
+            return q[:tok.start].strip()
+    return (q or "").strip()
+
+
+def normalize(q: str) -> str:
+    """Whitespace/comment-insensitive form of a statement, for cache keys."""
+    return " ".join(t.text for t in tokenize(q))
+
+
+def ensure_limit(q: str, limit: int, tokens: Optional[List[Token]] = None) -> str:
+    """
+    Make sure the final RETURN is bounded by ``limit``:
+    - no LIMIT: append one (UNIONs are wrapped in ``CALL { ... }`` first),
+    - a literal LIMIT above ``limit``: lower it,
+    - anything else (LIMIT $param, no RETURN at all) is left alone.
+    Only keywords in clause position count, so ``RETURN n.limit`` or
+    ``RETURN n AS limit`` still gets a LIMIT.
+    """
+    tokens = [t for t in (tokenize(q) if tokens is None else tokens)
+              if not (t.kind == "punct" and t.text == ";")]
+    top = [(i, t) for i, t in enumerate(tokens)
+           if t.depth == 0 and t.kind == "word" and _clause_position(tokens, i)]
+    returns = [i for i, t in top if t.text.upper() == "RETURN"]
+    if not returns:
+        return q
+    body = q[:tokens[-1].end]
+    if any(t.text.upper() == "UNION" for _, t in top):
+        return f"CALL {{\n{body}\n}}\nRETURN * LIMIT {limit}"
+    limits = [i for i, t in top if i > returns[-1] and t.text.upper() == "LIMIT"]
+    if not limits:
+        return f"{body} LIMIT {limit}"
+    i = limits[-1]
+    value = tokens[i + 1] if i + 1 < len(tokens) else None
+    if value is not None and value.kind == "number" and float(value.text) > limit:
+        return f"{q[:value.start]}{limit}{q[value.end:tokens[-1].end]}"
+    return q
+
 
 def sanitize_cypher(q: str) -> str:
     """
     - strip ```cypher ... ``` or ``` ... ``` fences
     - trim, keep only the first statement
-    - block writes (return "" to mean 'do not run')
+    - block writes anywhere in the statement (return "" to mean 'do not run')
     """
     if not q:
         return ""
@@ -21,13 +202,12 @@ def sanitize_cypher(q: str) -> str:
     q = re.sub(r"\s*```$", "", q)
 
     # keep only first statement for safety
-    parts = [p.strip() for p in q.split(";") if p.strip()]
-    if not parts:
+    q = first_statement(q)
+    if not q:
         return ""
-    q = parts[0]
 
     # disallow write ops in QA
-    if WRITE_PREFIXES.match(q):
+    if not is_read_only(q):
         return ""
 
     return q
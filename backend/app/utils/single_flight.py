@@ -0,0 +1,28 @@
+# app/utils/single_flight.py
+"""
+Coalesce concurrent identical async calls into one.
+
+The first caller for a key starts the work; everyone who asks for the same
+key while it is running awaits the same task. The task is shielded, so a
+cancelled caller does not cancel the work for the others.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0  # callers that piggy-backed on an in-flight task
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
@@ -0,0 +1,111 @@
+"""Shared fixtures: a recording in-process Neo4j driver and isolated module state."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pytest
+
+from app.core.config import settings
+from app.graph import labels
+from app.graph.change_cache import change_cache
+from app.graph.store import Neo4jStore, set_store
+from app.services import neo4j_async
+
+Rows = List[Dict[str, Any]]
+
+
+class FakeRecord:
+    def __init__(self, row: Dict[str, Any]):
+        self._row = row
+
+    def data(self) -> Dict[str, Any]:
+        return dict(self._row)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._row[key]
+
+
+class FakeResult:
+    def __init__(self, rows: Rows, plan: Optional[Dict[str, Any]] = None):
+        self._rows = iter(rows)
+        self._plan = plan
+
+    def __aiter__(self) -> "FakeResult":
+        return self
+
+    async def __anext__(self) -> FakeRecord:
+        try:
+            return FakeRecord(next(self._rows))
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def consume(self) -> SimpleNamespace:
+        for _ in self._rows:
+            pass
+        return SimpleNamespace(plan=self._plan)
+
+
+class FakeSession:
+    """Session and transaction in one; ``handler(query, params)`` answers or raises."""
+
+    def __init__(self, driver: "FakeDriver", mode: str):
+        self._driver = driver
+        self.mode = mode
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+    async def run(self, query: Any, parameters: Optional[Dict[str, Any]] = None,
+                  **kwargs: Any) -> FakeResult:
+        params = dict(parameters or {}, **kwargs)
+        query = getattr(query, "text", query)
+        self._driver.calls.append((self.mode, query, params))
+        if query.startswith("EXPLAIN "):
+            return FakeResult([], plan=self._driver.planner(query[len("EXPLAIN "):], params))
+        return FakeResult(self._driver.handler(query, params))
+
+    async def execute_read(self, work: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return await work(self, *args, **kwargs)
+
+    execute_write = execute_read
+
+
+class FakeDriver:
+    """``handler`` answers queries, ``planner`` answers EXPLAIN with a plan dict."""
+
+    def __init__(self, handler: Optional[Callable[[str, Dict[str, Any]], Rows]] = None):
+        self.handler = handler or (lambda query, params: [])
+        self.planner: Callable[[str, Dict[str, Any]], Dict[str, Any]] = lambda query, params: {}
+        self.calls: List[Tuple[str, str, Dict[str, Any]]] = []
+
+    def session(self, **kwargs: Any) -> FakeSession:
+        return FakeSession(self, kwargs.get("default_access_mode", "WRITE"))
+
+    async def close(self) -> None:
+        return None
+
+
+@pytest.fixture(autouse=True)
+def _isolated(monkeypatch):
+    """No metrics or stats side effects; fresh change cache and label cache per test."""
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    monkeypatch.setattr(settings, "GRAPH_STATS_ENABLED", False)
+    change_cache.clear()
+    labels.clear_cache()
+    yield
+    change_cache.clear()
+    labels.clear_cache()
+
+
+@pytest.fixture
+def driver(monkeypatch) -> FakeDriver:
+    """A FakeDriver behind ``neo4j_async`` and a Neo4jStore as the process store."""
+    drv = FakeDriver()
+    monkeypatch.setattr(neo4j_async, "_driver", drv)
+    set_store(Neo4jStore())
+    yield drv
+    set_store(None)
@@ -0,0 +1,139 @@
+"""ChangeCache: skipping unchanged writes, TTL, eviction, invalidation and warm-up."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.graph.change_cache import ChangeCache, change_cache
+from app.graph.loaders import upsert
+from app.models.graph import Entity, NodeLabel, RelType, Triple
+
+ME = Entity(id="user:me", label=NodeLabel.PERSON, name="Me")
+KARACHI = Entity(id="place:karachi", label=NodeLabel.PLACE, name="Karachi")
+LIVES = Triple(subj="user:me", pred=RelType.LIVES_IN, obj="place:karachi",
+               props={"text": "I live in Karachi", "source_id": "m1"})
+
+
+@pytest.fixture(autouse=True)
+def _enabled(monkeypatch):
+    monkeypatch.setattr(settings, "CHANGE_CACHE_ENABLED", True)
+
+
+def _written(driver, since=0):
+    """The params of the upsert statements run since call number ``since``."""
+    return [params for mode, _, params in driver.calls[since:] if mode == "WRITE"]
+
+
+def _upsert_handler(matched=True):
+    def handler(query, params):
+        if "UNWIND $rels" in query:
+            return [{"n": len(params["rels"]) if matched else 0, "created": []}]
+        return [{"created": []}]
+    return handler
+
+
+def test_resend_is_skipped(driver):
+    driver.handler = _upsert_handler()
+    asyncio.run(upsert.upsert_delta([ME, KARACHI], [LIVES]))
+    seen, before = len(driver.calls), dict(change_cache.stats)
+    assert len(_written(driver)) == 3  # nodes, Source, relationship
+    asyncio.run(upsert.upsert_delta([ME, KARACHI], [LIVES]))
+    assert _written(driver, seen) == []
+    stats = change_cache.stats
+    assert (stats["entities_skipped"] - before["entities_skipped"],
+            stats["triples_skipped"] - before["triples_skipped"]) == (2, 1)
+
+
+def test_changes_are_written(driver):
+    driver.handler = _upsert_handler()
+    asyncio.run(upsert.upsert_delta([ME, KARACHI], [LIVES]))
+    seen = len(driver.calls)
+    renamed = KARACHI.model_copy(update={"props": {"country": "PK"}})
+    restated = LIVES.model_copy(update={"props": {"text": "Still in Karachi", "source_id": "m2"}})
+    asyncio.run(upsert.upsert_delta([ME, renamed], [restated]))
+    ents, sources, rels = _written(driver, seen)
+    assert [e["id"] for e in ents["ents"]] == ["place:karachi"]
+    assert [r["obj"] for r in rels["rels"]] == ["place:karachi"]
+
+
+def test_partial_group_is_not_recorded(driver):
+    driver.handler = _upsert_handler(matched=False)  # an endpoint did not MATCH
+    asyncio.run(upsert.upsert_delta([ME, KARACHI], [LIVES]))
+    seen = len(driver.calls)
+    asyncio.run(upsert.upsert_delta([ME, KARACHI], [LIVES]))
+    # the nodes are known, the relationship and its Source are written again
+    assert ["rels" in params for params in _written(driver, seen)] == [False, True]
+
+
+def test_triples_written_checks_each_group():
+    cache = ChangeCache()
+    a = {"subj": "user:me", "pred": "LIVES_IN", "obj": "place:karachi", "props": {}}
+    b = {"subj": "user:me", "pred": "WORKS_AT", "obj": "org:acme", "props": {}}
+    c = {"subj": "user:you", "pred": "WORKS_AT", "obj": "org:acme", "props": {}}
+    cache.triples_written([("q1", {"rels": [a]}), ("q2", {"rels": [b, c]}), ("q3", {"rels": [c]})],
+                          [[{"n": 1}], [{"n": 1}], []])
+    assert len(cache) == 1
+    fresh = cache.changed_triples([Triple(subj=r["subj"], pred=RelType(r["pred"]), obj=r["obj"])
+                                   for r in (a, b, c)])
+    assert [t.pred for t in fresh] == [RelType.WORKS_AT, RelType.WORKS_AT]
+
+
+def test_ttl_and_eviction():
+    cache = ChangeCache(max_entries=2, ttl=0)
+    cache.entities_written([ME])
+    assert cache.changed_entities([ME]) == [ME] and cache.stats["expired"] == 1
+
+    cache = ChangeCache(max_entries=2, ttl=60)
+    other = ME.model_copy(update={"id": "user:other"})
+    cache.entities_written([ME, KARACHI])
+    assert cache.changed_entities([ME]) == []  # touching ME makes KARACHI the oldest
+    cache.entities_written([other])
+    assert cache.stats["evictions"] == 1
+    assert cache.changed_entities([ME, KARACHI, other]) == [KARACHI]
+
+
+def test_disabled_cache_passes_everything(monkeypatch):
+    cache = ChangeCache()
+    cache.entities_written([ME])
+    monkeypatch.setattr(settings, "CHANGE_CACHE_ENABLED", False)
+    assert cache.changed_entities([ME]) == [ME]
+
+
+def test_graph_run_write_clears_the_cache(driver):
+    import httpx
+    from app.main import app
+
+    driver.handler = _upsert_handler()
+    asyncio.run(upsert.upsert_delta([ME, KARACHI], [LIVES]))
+    assert len(change_cache)
+    invalidations = change_cache.stats["invalidations"]
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as c:
+            return await c.post("/graph/run", json={"query": "MATCH (n {id:'place:karachi'}) SET n.x = 1"})
+    assert asyncio.run(main()).status_code == 200
+    assert len(change_cache) == 0 and change_cache.stats["invalidations"] == invalidations + 1
+
+
+def test_warm_hashes_like_the_upsert(driver):
+    rel_props = {"since": 2020, "sources": ["src:a", "src:b"], "mentions": 2}
+
+    def handler(query, params):
+        if "properties(n)" in query:
+            return [{"id": "place:karachi", "label": "Place", "name": "Karachi",
+                     "props": {"id": "place:karachi", "name": "Karachi", "country": "PK"}}]
+        return [{"subj": "user:me", "pred": "LIVES_IN", "obj": "place:karachi", "props": rel_props}]
+    driver.handler = handler
+
+    cache = ChangeCache()
+    assert asyncio.run(cache.warm()) == 2
+    assert cache.changed_entities([KARACHI.model_copy(update={"props": {"country": "PK"}})]) == []
+
+    def said(**props):
+        return Triple(subj="user:me", pred=RelType.LIVES_IN, obj="place:karachi", props=props)
+    # re-sending the newest listed source changes nothing; a new source adds a mention
+    assert cache.changed_triples([said(since=2020, source="src:b")]) == []
+    assert len(cache.changed_triples([said(since=2020, source="src:c")])) == 1
+    assert len(cache.changed_triples([said(since=2021, source="src:b")])) == 1
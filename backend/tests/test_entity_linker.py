@@ -0,0 +1,63 @@
+"""EntityLinker: Dice ranking of trigram matches, filters, renames and question linking."""
+from __future__ import annotations
+
+import pytest
+
+from app.services.entity_linker import EntityLinker, _grams, _key
+
+
+def dice(a: str, b: str) -> float:
+    qa, qb = _grams(_key(a)), _grams(_key(b))
+    return round(2 * len(qa & qb) / (len(qa) + len(qb)), 3)
+
+
+@pytest.fixture
+def linker() -> EntityLinker:
+    idx = EntityLinker()
+    idx.add("user:aashir", "Person", "Aashir")
+    idx.add("user:aasha", "Person", "Aasha")
+    idx.add("user:bashir", "Person", "Bashir")
+    idx.add("place:karachi", "Place", "Karachi")
+    idx.add("org:acme_corp", "Org")  # no name: indexed under its slug
+    for i in range(3000):  # unrelated names the search must not have to walk
+        idx.add(f"org:filler{i}", "Org", f"Filler Holdings {i}")
+    return idx
+
+
+def test_scores_are_dice_and_best_first(linker):
+    found = linker.search("aashir", k=3, min_score=0.0)
+    # Bashir shares four trigrams with the mention, Aasha only the first three
+    assert [c.id for c in found] == ["user:aashir", "user:bashir", "user:aasha"]
+    assert [c.score for c in found] == [dice("aashir", n) for n in ("Aashir", "Bashir", "Aasha")]
+    assert found[0].score == 1.0 > found[1].score > found[2].score
+
+
+@pytest.mark.parametrize("mention", ["karchi", "karachii", "karach", "KARACHI"])
+def test_misspellings_find_the_name(linker, mention):
+    assert linker.search(mention)[0].id == "place:karachi"
+
+
+def test_exact_name_scores_one(linker):
+    assert linker.search("Karachi")[0] == ("place:karachi", "Place", "Karachi", 1.0)
+    assert linker.search("acme corp")[0].id == "org:acme_corp"
+
+
+def test_min_score_k_and_label(linker):
+    assert [c.id for c in linker.search("aashir", min_score=0.6)] == ["user:aashir", "user:bashir"]
+    assert [c.id for c in linker.search("aashir", k=1, min_score=0.0)] == ["user:aashir"]
+    assert linker.search("karachi", label="Person", min_score=0.0) == []
+    assert linker.search("karachi", label="Spaceship") == []
+
+
+def test_rename_drops_the_old_name(linker):
+    linker.add("user:aashir", "Person", "Aashir Khan")
+    assert [c.name for c in linker.search("aashir khan")][:1] == ["Aashir Khan"]
+    assert "user:aashir" not in [c.id for c in linker.search("aashir", min_score=0.9)]
+    assert len(linker) == 3005 and linker.stats["entries"] == 3006
+
+
+def test_link_finds_leftmost_longest_mentions(linker):
+    links = linker.link("Who lives in Karchi, and who works at Filler Holdings 17?")
+    assert [(l.mention, l.candidates[0].id) for l in links] == [
+        ("karchi", "place:karachi"), ("filler holdings 17", "org:filler17")]
+    assert linker.link("who lives where?") == []
@@ -0,0 +1,132 @@
+"""GraphStats: Space-Saving hub slots, reconcile, save/load and when run() scans."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.graph.stats import GraphStats
+from app.graph.store import MemoryStore
+from app.models.graph import Entity, NodeLabel, RelType, Triple
+
+
+@pytest.fixture(autouse=True)
+def _enabled(monkeypatch):
+    monkeypatch.setattr(settings, "GRAPH_STATS_ENABLED", True)
+
+
+def _lives(person: str, place: str):
+    return (person, RelType.LIVES_IN.value, place)
+
+
+def test_space_saving_takes_over_the_smallest_slot():
+    stats = GraphStats(top_n=1, hub_slots=4)  # at least 4 * top_n slots
+    stats.record(rels=[_lives("user:x", "place:a")] * 3
+                 + [_lives("user:x", p) for p in ("place:b", "place:c", "place:d")])
+    stats.record(rels=[_lives("user:y", "place:e")])
+
+    def degree(node_id):
+        return stats.snapshot(node_id)["node"]["degree"]
+    # place:b had the smallest count (ties by id), so place:e starts from it
+    assert degree("place:b") is None and degree("place:e") == 2
+    assert stats.snapshot()["floor"] == 1
+    assert degree("place:a") == 3  # never taken over, exact
+    assert (degree("user:x"), degree("user:y")) == (6, 1)  # people are always exact
+    assert stats.snapshot()["top_degree"] == [{"id": "user:x", "degree": 6}]
+
+
+def test_top_n_follows_growing_degrees():
+    stats = GraphStats(top_n=2, hub_slots=8)
+    stats.record(rels=[_lives("user:a", "place:k")] + [_lives("user:b", "place:k")] * 2)
+    stats.record(rels=[_lives("user:c", p) for p in ("place:l", "place:m", "place:n", "place:o")])
+    assert [r["id"] for r in stats.snapshot()["top_degree"]] == ["user:c", "place:k"]
+
+
+def _store(places: int = 6) -> MemoryStore:
+    store = MemoryStore(index_names=False)
+    ents = [Entity(id="user:me", label=NodeLabel.PERSON, name="Me"),
+            Entity(id="user:you", label=NodeLabel.PERSON, name="You"),
+            Entity(id="org:acme", label=NodeLabel.ORG, name="Acme")]
+    ents += [Entity(id=f"place:p{i}", label=NodeLabel.PLACE, name=f"P{i}") for i in range(places)]
+    triples = [Triple(subj="user:me", pred=RelType.LIVES_IN, obj=f"place:p{i}") for i in range(places)]
+    triples += [Triple(subj=u, pred=RelType.WORKS_AT, obj="org:acme") for u in ("user:me", "user:you")]
+    triples += [Triple(subj="user:you", pred=RelType.LIVES_IN, obj="place:p0")]
+
+    async def load():
+        await store.upsert_entities(ents)
+        await store.upsert_triples(triples, ents)
+    asyncio.run(load())
+    return store
+
+
+def test_reconcile_recounts_the_store():
+    stats = GraphStats(top_n=1, hub_slots=4)
+    stats.record(rels=[_lives("user:ghost", "place:nowhere")] * 9)
+    stats.mark_stale()
+    snap = asyncio.run(stats.reconcile(_store()))
+    assert snap["stale"] is False
+    assert snap["nodes"]["total"] == 9 and snap["nodes"]["Place"] == 6
+    assert snap["relationships"]["total"] == 9 and snap["relationships"]["LIVES_IN"] == 7
+    assert snap["top_degree"] == [{"id": "user:me", "degree": 7}]
+    # 7 other nodes, 4 slots: 3 of the 5 with degree 1 are dropped
+    assert snap["floor"] == 1
+    assert [stats.snapshot(i)["node"]["degree"] for i in ("org:acme", "place:p0")] == [2, 2]
+    assert stats.snapshot("user:ghost")["node"]["degree"] is None
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "stats.json"
+    stats = GraphStats(top_n=2, hub_slots=8, path=str(path))
+    asyncio.run(stats.reconcile(_store()))
+    assert asyncio.run(stats.save()) and not asyncio.run(stats.save())  # unchanged: skipped
+
+    loaded = GraphStats(top_n=2, hub_slots=8, path=str(path))
+    assert loaded.load() and loaded.stale is False
+    assert loaded.snapshot("org:acme") == stats.snapshot("org:acme")
+
+
+class CountingStore:
+    local = False
+
+    def __init__(self) -> None:
+        self.scans = 0
+
+    async def iter_degrees(self):
+        self.scans += 1
+        yield "user:me", NodeLabel.PERSON.value, 0
+
+    async def rel_counts(self):
+        return {}
+
+
+def _start(stats: GraphStats, store) -> None:
+    async def main():
+        task = asyncio.create_task(stats.run(store))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        task.cancel()
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("interval, scans", [(0, 0), (3600, 1)])
+def test_run_scans_at_startup_only_when_opted_in(monkeypatch, tmp_path, interval, scans):
+    monkeypatch.setattr(settings, "GRAPH_STATS_RECONCILE_INTERVAL", interval)
+    monkeypatch.setattr(settings, "GRAPH_STATS_SAVE_INTERVAL", 3600)
+    store = CountingStore()
+    stats = GraphStats(path=str(tmp_path / "missing.json"))
+    _start(stats, store)
+    assert store.scans == scans and stats.stale is (scans == 0)
+
+
+def test_run_trusts_saved_counters(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "GRAPH_STATS_RECONCILE_INTERVAL", 3600)
+    monkeypatch.setattr(settings, "GRAPH_STATS_SAVE_INTERVAL", 3600)
+    path = tmp_path / "stats.json"
+    saved = GraphStats(path=str(path))
+    saved.record(rels=[_lives("user:me", "place:k")])
+    asyncio.run(saved.save())
+
+    store = CountingStore()
+    _start(GraphStats(path=str(path)), store)
+    assert store.scans == 0
@@ -0,0 +1,81 @@
+"""POST /kg/ingest/stream: line splitting, the line-size cap, batching and the failure report."""
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import AsyncIterator, List
+
+import httpx
+
+from app.routers import kg
+
+
+async def _chunks(parts: List[bytes]) -> AsyncIterator[bytes]:
+    for p in parts:
+        yield p
+
+
+def _lines(parts: List[bytes]):
+    async def main():
+        return [item async for item in kg._ndjson_lines(_chunks(parts))]
+    return asyncio.run(main())
+
+
+def test_lines_split_across_chunks():
+    assert _lines([b'{"a"', b': 1}\n{"b": 2', b"}\n\n", b"tail"]) == [
+        (1, b'{"a": 1}'), (2, b'{"b": 2}'), (3, b""), (4, b"tail"),
+    ]
+
+
+def test_overlong_line_comes_out_as_none_and_the_next_line_survives(monkeypatch):
+    monkeypatch.setattr(kg, "MAX_LINE_BYTES", 16)
+    parts = [b"short\n", b"x" * 10, b"y" * 10, b"z" * 10 + b"\nafter\n", b"w" * 40]
+    assert _lines(parts) == [(1, b"short"), (2, None), (3, b"after"), (4, None)]
+
+
+def test_exactly_max_line_bytes_is_kept(monkeypatch):
+    monkeypatch.setattr(kg, "MAX_LINE_BYTES", 8)
+    assert _lines([b"12345678\n123456789\n"]) == [(1, b"12345678"), (2, None)]
+
+
+def _post(body: bytes, **params) -> httpx.Response:
+    from app.main import app
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                     base_url="http://test") as c:
+            return await c.post("/kg/ingest/stream", content=body, params=params)
+    return asyncio.run(main())
+
+
+def test_stream_batches_and_reports_failures(driver, monkeypatch):
+    monkeypatch.setattr(kg, "MAX_REPORTED_FAILURES", 3)
+    monkeypatch.setattr(kg, "MAX_LINE_BYTES", 200)
+    good = [{"id": f"user:u{i}", "label": "Person", "name": f"U{i}"} for i in range(5)]
+    lines = [json.dumps(e) for e in good]
+    lines += ["not json", '{"id": "x"}', "{}", '{"label": "Nope"}', "q" * 300]
+    lines.append(json.dumps({"subj": "user:u0", "pred": "FRIEND_OF", "obj": "user:u1"}))
+    resp = _post("\n".join(lines).encode(), batch_size=2)
+
+    assert resp.status_code == 200
+    report = resp.json()
+    assert (report["status"], report["lines"], report["entities"], report["triples"]) == \
+        ("ok", 11, 5, 1)
+    assert report["batches"] == 3
+    assert report["failed"] == 5
+    assert [f["line"] for f in report["failures"]] == [6, 7, 8]  # capped at MAX_REPORTED_FAILURES
+
+
+def test_stream_stops_with_502_on_a_database_error(driver):
+    def handler(query, params):
+        if "ents" in params and any(e["id"] == "user:u3" for e in params["ents"]):
+            raise RuntimeError("database went away")
+        return []
+    driver.handler = handler
+    body = "\n".join(json.dumps({"id": f"user:u{i}", "label": "Person"}) for i in range(6))
+    resp = _post(body.encode(), batch_size=2)
+
+    assert resp.status_code == 502
+    report = resp.json()
+    assert report["status"] == "error" and "line 4" in report["error"]
+    assert (report["entities"], report["batches"]) == (2, 1)
@@ -0,0 +1,126 @@
+"""MemoryStore: upserts, neighborhood paging and filters, provenance, snapshot/load."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.graph.store import MemoryStore
+from app.models.graph import Entity, NodeLabel, RelType, Triple
+
+
+def _graph(friends: int = 30) -> MemoryStore:
+    store = MemoryStore(index_names=False)
+    ents = [Entity(id="user:me", label=NodeLabel.PERSON, name="Me"),
+            Entity(id="place:karachi", label=NodeLabel.PLACE, name="Karachi", props={"country": "PK"}),
+            Entity(id="org:acme", label=NodeLabel.ORG, name="Acme")]
+    ents += [Entity(id=f"user:f{i}", label=NodeLabel.PERSON, name=f"F{i}") for i in range(friends)]
+    triples = [Triple(subj="user:me", pred=RelType.LIVES_IN, obj="place:karachi",
+                      props={"text": "I live in Karachi", "source_id": "m1"}),
+               Triple(subj="user:me", pred=RelType.WORKS_AT, obj="org:acme", props={"since": 2020})]
+    triples += [Triple(subj="user:me", pred=RelType.FRIEND_OF, obj=f"user:f{i}") for i in range(friends)]
+    triples += [Triple(subj=f"user:f{i}", pred=RelType.LIVES_IN, obj="place:karachi") for i in range(friends)]
+    triples.append(Triple(subj="user:me", pred=RelType.LIVES_IN, obj="place:karachi",
+                          props={"text": "Still in Karachi", "source_id": "m2"}))
+
+    async def load():
+        await store.upsert_entities(ents)
+        await store.upsert_triples(triples, ents)
+    asyncio.run(load())
+    return store
+
+
+def _pages(store: MemoryStore, node_id: str, limit: int, **kw):
+    pages, cursor = [], None
+    while True:
+        page = asyncio.run(store.neighborhood(node_id, limit=limit, cursor=cursor, **kw))
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def _edges(pages):
+    return [(e["from"], e["label"], e["to"]) for p in pages for e in p["edges"]]
+
+
+def test_upserts_merge_nodes_and_edges():
+    store = _graph()
+    assert (len(store), store.edge_count) == (33, 62)  # the restated LIVES_IN is one edge
+
+
+def test_neighborhood_pages_cover_every_edge_once():
+    store = _graph()
+    everything = _edges([asyncio.run(store.neighborhood("user:me", depth=2, limit=1000))])
+    pages = _pages(store, "user:me", limit=7, depth=2)
+    assert len(pages) == 9 and all(len(p["edges"]) <= 7 for p in pages)
+    assert sorted(_edges(pages)) == sorted(everything)
+    assert len(set(everything)) == 62
+    for p in pages:  # every page ships the endpoints of its own edges
+        ids = {n["id"] for n in p["nodes"]}
+        assert all(e["from"] in ids and e["to"] in ids for e in p["edges"])
+
+
+def test_depth_and_filters():
+    store = _graph()
+    one = _edges(_pages(store, "user:me", limit=1000, depth=1))
+    # depth 1 reaches karachi, acme and the friends; every edge among them is listed
+    assert len(one) == 62
+    friends_only = _edges(_pages(store, "user:me", limit=1000, rel_types=["FRIEND_OF"]))
+    assert len(friends_only) == 30 and {r for _, r, _ in friends_only} == {"FRIEND_OF"}
+    places_only = _edges(_pages(store, "user:me", limit=1000, node_labels=["Place"]))
+    assert places_only == [("user:me", "LIVES_IN", "place:karachi")]
+
+
+def test_neighborhood_starts_from_people_only():
+    store = _graph()
+    for node_id in ("place:karachi", "user:nobody"):
+        page = asyncio.run(store.neighborhood(node_id))
+        assert page == {"nodes": [], "edges": [], "next_cursor": None}
+
+
+def test_expansion_stops_at_max_nodes(monkeypatch):
+    store = _graph()
+    monkeypatch.setattr(settings, "GRAPH_VIEW_MAX_NODES", 5)
+    page = asyncio.run(store.neighborhood("user:me", depth=2, limit=1000))
+    assert len({n for e in page["edges"] for n in (e["from"], e["to"])}) <= 5
+
+
+def test_edge_props_carry_provenance():
+    store = _graph()
+    page = asyncio.run(store.neighborhood("user:me", limit=1000, include_props=True,
+                                          rel_types=["LIVES_IN", "WORKS_AT"], node_labels=["Place", "Org"]))
+    props = {e["label"]: e["props"] for e in page["edges"]}
+    assert props["WORKS_AT"] == {"since": 2020}
+    lives = props["LIVES_IN"]
+    assert lives["mentions"] == 2 and len(lives["sources"]) == 2
+    texts = asyncio.run(store.get_sources(lives["sources"]))
+    assert [texts[s]["text"] for s in lives["sources"]] == ["I live in Karachi", "Still in Karachi"]
+
+
+def test_snapshot_round_trip(tmp_path):
+    store = _graph()
+    path = tmp_path / "graph.kgmem"
+    assert store.snapshot(path) == path.stat().st_size
+    loaded = MemoryStore(index_names=False)
+    loaded.load(path)
+
+    assert (len(loaded), loaded.edge_count) == (len(store), store.edge_count)
+    assert loaded.ids == store.ids and loaded.names == store.names
+    assert asyncio.run(loaded.get_nodes(["place:karachi"])) == asyncio.run(store.get_nodes(["place:karachi"]))
+    kw = dict(depth=2, limit=1000, include_props=True)
+    assert asyncio.run(loaded.neighborhood("user:me", **kw)) == asyncio.run(store.neighborhood("user:me", **kw))
+    assert asyncio.run(loaded.related(["place:karachi"], RelType.LIVES_IN, "in", 100)) == \
+        asyncio.run(store.related(["place:karachi"], RelType.LIVES_IN, "in", 100))
+
+    # the loaded store keeps merging into the same edges
+    asyncio.run(loaded.upsert_triples([Triple(subj="user:me", pred=RelType.WORKS_AT, obj="org:acme")]))
+    assert loaded.edge_count == store.edge_count
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "junk"
+    path.write_bytes(b"not a snapshot")
+    with pytest.raises(ValueError, match="not a graph snapshot"):
+        MemoryStore().load(path)
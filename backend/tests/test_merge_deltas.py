@@ -0,0 +1,55 @@
+"""merge_deltas: one row per (subj, pred, obj, source), entities merged by id."""
+from __future__ import annotations
+
+from app.graph import provenance
+from app.models.graph import Entity, NodeLabel, RelType, Triple
+from app.services.write_behind import merge_deltas
+
+
+def _said(text: str, message_id: str = "m", **props) -> Triple:
+    return Triple(subj="user:me", pred=RelType.LIVES_IN, obj="place:karachi",
+                  props={"text": text, "source_id": message_id, **props})
+
+
+def test_same_message_text_merges_props():
+    ents, triples = merge_deltas([([], [_said("I live in Karachi", since=2019)]),
+                                  ([], [_said("I live in Karachi", "m2", confidence=0.9)])])
+    assert ents == [] and len(triples) == 1
+    # same text is the same Source, so the second message only adds props
+    assert triples[0].props["since"] == 2019 and triples[0].props["confidence"] == 0.9
+
+
+def test_different_sources_keep_a_row_each():
+    _, triples = merge_deltas([([], [_said("I live in Karachi")]),
+                               ([], [_said("Still in Karachi")]),
+                               ([], [_said("I live in Karachi")])])
+    assert len(triples) == 2
+    compacted, sources = provenance.compact(triples)
+    assert [t.props["source"] for t in compacted] == [provenance.source_key("I live in Karachi"),
+                                                      provenance.source_key("Still in Karachi")]
+    assert len(sources) == 2
+
+
+def test_precompacted_and_bare_triples():
+    key = provenance.source_key("I live in Karachi")
+    bare = Triple(subj="user:me", pred=RelType.LIVES_IN, obj="place:karachi", props={"since": 2019})
+    ref = Triple(subj="user:me", pred=RelType.LIVES_IN, obj="place:karachi", props={"source": key})
+    _, triples = merge_deltas([([], [bare]), ([], [ref]), ([], [_said("I live in Karachi")]),
+                               ([], [bare.model_copy(update={"props": {"until": 2024}})])])
+    # the bare facts share the None key; the reference and its text share the Source key
+    assert [sorted(t.props) for t in triples] == [["since", "until"], ["source", "source_id", "text"]]
+
+
+def test_other_predicates_and_objects_stay_apart():
+    t = _said("I live in Karachi")
+    _, triples = merge_deltas([([], [t, t.model_copy(update={"obj": "place:lahore"}),
+                                     t.model_copy(update={"pred": RelType.WORKS_AT, "obj": "org:acme"})])])
+    assert len(triples) == 3
+
+
+def test_entities_merge_by_id():
+    first = Entity(id="user:f", label=NodeLabel.PERSON, name="Farah", props={"age": 30})
+    later = Entity(id="user:f", label=NodeLabel.PERSON, name="", props={"city": "Karachi"})
+    ents, _ = merge_deltas([([first], []), ([later], [])])
+    assert len(ents) == 1
+    assert ents[0].name == "Farah" and ents[0].props == {"age": 30, "city": "Karachi"}
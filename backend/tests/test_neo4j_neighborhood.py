@@ -0,0 +1,66 @@
+"""Neo4jStore.neighborhood: one expansion per neighborhood, keyset pages over it."""
+from __future__ import annotations
+
+import asyncio
+
+from app.graph.store import get_store
+from app.graph.store.neo4j_store import NeighborhoodCache
+from app.services.result_cache import bump_write_generation
+
+RIDS = [f"5:rel:{i:02d}" for i in (7, 3, 11, 0, 5, 9, 1, 8)]  # as the BFS returns them
+
+
+def _handler(query, params):
+    if "subgraphAll" in query:
+        return [{"rels": list(RIDS)}] if params["uid"] == "user:me" else []
+    return [{"nodes": [], "edges": [{"id": rid} for rid in params["rids"]]}]
+
+
+def _expansions(driver):
+    return sum("subgraphAll" in q for _, q, _ in driver.calls)
+
+
+def _page(cursor=None, node_id="user:me", **kw):
+    return asyncio.run(get_store().neighborhood(node_id, limit=3, cursor=cursor, **kw))
+
+
+def _pages(cursor=None, **kw):
+    out = []
+    while True:
+        page = _page(cursor, **kw)
+        out.append([e["id"] for e in page["edges"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return out
+
+
+def test_pages_share_one_expansion(driver):
+    driver.handler = _handler
+    assert _pages() == [sorted(RIDS)[:3], sorted(RIDS)[3:6], sorted(RIDS)[6:]]
+    assert _expansions(driver) == 1
+    _pages(rel_types=["FRIEND_OF"])  # other filters are another neighborhood
+    assert _expansions(driver) == 2
+    page = driver.calls[-1]
+    assert page[2] == {"rids": sorted(RIDS)[6:]}  # a page only seeks its own edges
+
+
+def test_a_write_expands_again(driver):
+    driver.handler = _handler
+    first = _page()
+    bump_write_generation()
+    second = _page(first["next_cursor"])
+    assert _expansions(driver) == 2
+    assert [e["id"] for e in second["edges"]] == sorted(RIDS)[3:6]
+
+
+def test_cursor_survives_a_cold_cache(driver):
+    driver.handler = _handler
+    get_store().expansions = NeighborhoodCache(0)  # nothing kept: every page expands
+    assert _pages() == [sorted(RIDS)[:3], sorted(RIDS)[3:6], sorted(RIDS)[6:]]
+    assert _expansions(driver) == 3
+
+
+def test_unknown_node_is_an_empty_page(driver):
+    driver.handler = _handler
+    assert _page(node_id="place:karachi") == {"nodes": [], "edges": [], "next_cursor": None}
+    assert len(driver.calls) == 1  # no page query
@@ -0,0 +1,135 @@
+"""Translation cache and single-flight, against a stubbed OpenAI client."""
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List
+
+import pytest
+
+from app.core.config import settings
+from app.services import nl2cypher, nl2cypher_cache
+from app.services.nl2cypher_cache import TranslationCache
+from app.utils.single_flight import SingleFlight
+
+
+class StubAsyncOpenAI:
+    """``chat.completions.create`` answers a fixed query after ``latency`` seconds."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: List[List[Dict[str, str]]] = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model: str, messages: List[Dict[str, str]], **kwargs) -> SimpleNamespace:
+        self.calls.append(messages)
+        await asyncio.sleep(self.latency)
+        content = f"MATCH (p:Person {{name: '{messages[-1]['content'][:20]}'}}) RETURN p LIMIT 5"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                               usage=None)
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    c = Clock()
+    monkeypatch.setattr(nl2cypher_cache.time, "time", c)
+    return c
+
+
+@pytest.fixture
+def stub(monkeypatch) -> StubAsyncOpenAI:
+    client = StubAsyncOpenAI()
+    monkeypatch.setattr(settings, "ENTITY_LINK_ENABLED", False)
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    monkeypatch.setattr(nl2cypher, "_aclient", client)
+    monkeypatch.setattr(nl2cypher, "_cache", TranslationCache(max_entries=100, ttl_seconds=3600))
+    monkeypatch.setattr(nl2cypher, "_flights", SingleFlight())
+    return client
+
+
+def test_hit_miss_and_eviction_counters():
+    cache = TranslationCache(max_entries=2)
+    assert cache.get("a") is None
+    cache.put("a", "RETURN 1")
+    cache.put("b", "RETURN 2")
+    assert cache.get("a") == "RETURN 1"  # a is now the most recent
+    cache.put("c", "RETURN 3")           # evicts b
+    assert cache.get("b") is None
+    assert cache.get("c") == "RETURN 3"
+    assert len(cache) == 2
+    assert cache.stats == {"hits": 2, "disk_hits": 0, "misses": 2, "evictions": 1, "expired": 0}
+
+
+def test_ttl_expiry(clock):
+    cache = TranslationCache(ttl_seconds=10)
+    cache.put("a", "RETURN 1")
+    clock.now += 9
+    assert cache.get("a") == "RETURN 1"
+    clock.now += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats["expired"] == 1 and cache.stats["misses"] == 1
+
+
+def test_disk_tier_survives_restart_and_expires(tmp_path, clock):
+    path = str(tmp_path / "nl2cypher.sqlite")
+    asyncio.run(TranslationCache(path=path, ttl_seconds=10).aput("a", "RETURN 1"))
+
+    cache = TranslationCache(path=path, ttl_seconds=10)
+    assert asyncio.run(cache.aget("a")) == "RETURN 1"
+    assert cache.stats["disk_hits"] == 1
+    assert len(cache) == 1  # promoted into memory
+
+    clock.now += 11
+    assert TranslationCache(path=path, ttl_seconds=10).get("a") is None
+
+
+def test_normalized_question_hits(stub):
+    async def main():
+        first = await nl2cypher.agenerate_cypher("Where does Aashir live?")
+        again = await nl2cypher.agenerate_cypher("  where does   aashir live ")
+        return first, again
+
+    first, again = asyncio.run(main())
+    assert first == again
+    assert len(stub.calls) == 1
+    assert nl2cypher.cache_stats()["hits"] == 1
+
+
+def test_schema_or_model_change_invalidates(stub, monkeypatch):
+    q = "Where does Aashir live?"
+    asyncio.run(nl2cypher.agenerate_cypher(q))
+    asyncio.run(nl2cypher.agenerate_cypher(q))
+    assert len(stub.calls) == 1
+
+    monkeypatch.setattr(nl2cypher, "_SCHEMA_PROMPT", nl2cypher._SCHEMA_PROMPT + "- Goal(id, name, due)\n")
+    asyncio.run(nl2cypher.agenerate_cypher(q))
+    assert len(stub.calls) == 2
+
+    monkeypatch.setattr(settings, "OPENAI_CHAT_MODEL", settings.OPENAI_CHAT_MODEL + "-next")
+    asyncio.run(nl2cypher.agenerate_cypher(q))
+    assert len(stub.calls) == 3
+
+
+def test_single_flight_collapses_concurrent_misses(stub):
+    stub.latency = 0.05
+    n = 50
+
+    async def main():
+        return await asyncio.gather(*(nl2cypher.agenerate_cypher("who are my friends?")
+                                      for _ in range(n)))
+
+    results = asyncio.run(main())
+    assert len(stub.calls) == 1
+    assert len(set(results)) == 1
+    stats = nl2cypher.cache_stats()
+    assert stats["coalesced"] == n - 1
+    assert stats["misses"] == n and stats["entries"] == 1
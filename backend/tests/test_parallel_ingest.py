@@ -0,0 +1,117 @@
+"""The parallel writer: batch planning, lock-disjoint batches, retries, and large /kg/ingest payloads."""
+from __future__ import annotations
+
+import asyncio
+from typing import List, Set
+
+import pytest
+from neo4j.exceptions import ServiceUnavailable
+
+from app.core.config import settings
+from app.graph.loaders import parallel, upsert
+from app.models.graph import IngestRequest, RelType, Triple
+from app.routers import kg
+from app.services.entity_linker import entity_linker
+from app.services.gazetteer import gazetteer
+
+
+def test_parallel_ingest_makes_names_linkable(driver, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_WRITERS", 4)
+    monkeypatch.setattr(settings, "ENTITY_LINK_ENABLED", True)
+    n = settings.INGEST_PARALLEL_MIN + 500
+    body = IngestRequest(entities=[
+        {"id": f"org:zorblatt_{i}", "label": "Org", "name": f"Zorblatt Kinetics {i}"} for i in range(n)
+    ])
+
+    async def main():
+        result = await kg.ingest(body)
+        await gazetteer.flush()
+        return result
+
+    assert asyncio.run(main())["entities"] == n
+    writes = [params for mode, _, params in driver.calls if mode == "WRITE" and "ents" in params]
+    assert len(writes) > 1  # split across several transactions
+
+    hits = gazetteer.find(f"I joined zorblatt kinetics {n - 1} last week")
+    assert [entries for *_, entries in hits] == [{"Org": f"org:zorblatt_{n - 1}"}]
+    links = entity_linker.link(f"Who is at Zorblat Kinetics {n - 1}?")
+    assert any(c.id == f"org:zorblatt_{n - 1}" for link in links for c in link.candidates)
+
+
+def _people_in_karachi(n: int) -> List[Triple]:
+    """Every user lives in the one hot place; pairs of users are friends."""
+    rows = [Triple(subj=f"user:u{i}", pred=RelType.LIVES_IN, obj="place:karachi") for i in range(n)]
+    rows += [Triple(subj=f"user:u{i}", pred=RelType.FRIEND_OF, obj=f"user:u{i + 1}")
+             for i in range(0, n - 1, 2)]
+    return rows
+
+
+def test_plan_gives_hot_nodes_their_own_partition():
+    rows = _people_in_karachi(400)
+    batches, hot = parallel.plan_triples(rows, partitions=8, batch_size=50)
+    assert hot == 1  # only place:karachi appears in more than its share
+    assert sorted(t for _, batch in batches for t in map(id, batch)) == sorted(map(id, rows))
+    assert all(len(batch) <= 50 for _, batch in batches)
+    assert [len(b) for _, b in batches] == sorted((len(b) for _, b in batches), reverse=True)
+    for key, batch in batches:
+        lives = [t for t in batch if t.pred == RelType.LIVES_IN]
+        assert (8 in key) == bool(lives)  # partition 8 is karachi's own
+        assert all(parallel._part(t.subj, 8) in key for t in batch)
+
+
+def test_plan_counts_the_source_node():
+    said = [Triple(subj=f"user:u{i}", pred=RelType.LIVES_IN, obj=f"place:p{i}",
+                   props={"text": "We all moved here", "source_id": "m1"}) for i in range(100)]
+    _, hot = parallel.plan_triples(said, partitions=8, batch_size=10)
+    assert hot == 1  # the shared Source is locked by every row
+
+
+def test_running_batches_never_share_a_node(monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_RETRY_BACKOFF", 0)
+    running: List[Set[str]] = []
+    overlaps: List[Set[str]] = []
+
+    async def write(batch, entities=None):
+        nodes = {n for t in batch for n in (t.subj, t.obj)}
+        overlaps.extend(nodes & other for other in running if nodes & other)
+        running.append(nodes)
+        await asyncio.sleep(0.001)
+        running.remove(nodes)
+    monkeypatch.setattr(upsert, "upsert_triples", write)
+
+    rows = _people_in_karachi(600)
+    report = asyncio.run(parallel.upsert_triples(rows, workers=4, batch_size=25))
+    assert overlaps == []
+    assert report.items == len(rows) and report.hot_nodes == 1 and report.max_running > 1
+
+
+def test_retryable_errors_are_retried(monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_RETRY_BACKOFF", 0)
+    monkeypatch.setattr(settings, "INGEST_WRITE_RETRIES", 2)
+    failures = {"left": 2}
+
+    async def flaky(batch, entities=None):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise ServiceUnavailable("leader switched")
+    monkeypatch.setattr(upsert, "upsert_triples", flaky)
+    rows = _people_in_karachi(10)
+    report = asyncio.run(parallel.upsert_triples(rows, workers=1))
+    planned, _ = parallel.plan_triples(rows, parallel.PARTITIONS_PER_WRITER, settings.INGEST_BATCH_SIZE)
+    assert (report.retries, report.batches) == (2, len(planned))
+
+    failures["left"] = 3  # one more than the retries allow
+    with pytest.raises(ServiceUnavailable):
+        asyncio.run(parallel.upsert_triples(_people_in_karachi(10), workers=1))
+
+
+def test_other_errors_stop_the_remaining_batches(monkeypatch):
+    calls = []
+
+    async def broken(batch, entities=None):
+        calls.append(len(batch))
+        raise ValueError("unknown label")
+    monkeypatch.setattr(upsert, "upsert_triples", broken)
+    with pytest.raises(ValueError):
+        asyncio.run(parallel.upsert_triples(_people_in_karachi(400), workers=2, batch_size=10))
+    assert len(calls) <= 2  # one per writer, no retries
@@ -0,0 +1,64 @@
+"""``answer_question`` turns database failures into answers on the path that hit them."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from neo4j.exceptions import CypherSyntaxError, ServiceUnavailable
+
+from app.core.config import settings
+from app.services import qa_orchestrator, query_guard
+
+
+def _fail_with(exc: BaseException):
+    def handler(query, params):
+        raise exc
+    return handler
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test")
+
+    async def generate(question: str) -> str:
+        return "MATCH (p:Person)-[:LIVES_IN]->(c:Place) RETURN c.name AS name"
+
+    monkeypatch.setattr(qa_orchestrator, "agenerate_cypher", generate)
+    query_guard.plan_cache.clear()
+
+
+def _count(path: str) -> int:
+    return qa_orchestrator.qa_stats()[path]["count"]
+
+
+def test_template_path_survives_unreachable_database(driver):
+    driver.handler = _fail_with(ServiceUnavailable("no route"))
+    before = _count("template")
+    ans = asyncio.run(qa_orchestrator.answer_question("Where do I live?", "aashir"))
+    assert ans["path"] == "template"
+    assert ans["graph_results"] == [] and "couldn't query" in ans["answer"]
+    assert ans["cypher"]
+    assert _count("template") == before + 1
+
+
+@pytest.mark.parametrize("explain, exc", [
+    (True, CypherSyntaxError("Invalid input 'RETRUN'")),  # raised by the EXPLAIN pre-flight
+    (False, ServiceUnavailable("connection lost")),
+    (False, asyncio.TimeoutError()),
+])
+def test_llm_path_survives_database_errors(driver, llm, monkeypatch, explain, exc):
+    monkeypatch.setattr(settings, "QUERY_GUARD_EXPLAIN", explain)
+    driver.handler = _fail_with(exc)
+    before = _count("llm")
+    ans = asyncio.run(qa_orchestrator.answer_question("How many people live in city 7?", "aashir"))
+    assert ans["path"] == "llm"
+    assert ans["graph_results"] == [] and "couldn't query" in ans["answer"]
+    assert ans["cypher"].startswith("MATCH (p:Person)")
+    assert _count("llm") == before + 1
+    assert driver.calls[0][1].startswith("EXPLAIN ") == explain
+
+
+def test_llm_path_answers_from_rows(driver, llm):
+    driver.handler = lambda query, params: [{"name": "Karachi"}]
+    ans = asyncio.run(qa_orchestrator.answer_question("How many people live in city 7?", "aashir"))
+    assert (ans["path"], ans["answer"]) == ("llm", "Karachi")
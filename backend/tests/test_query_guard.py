@@ -0,0 +1,140 @@
+"""Write detection, LIMIT injection, the EXPLAIN plan cache and /graph/run read/write routing."""
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services import query_guard
+from app.utils.cypher_sanitize import ensure_limit, is_read_only, sanitize_cypher, write_clause
+
+
+@pytest.mark.parametrize("query, clause", [
+    # reads
+    ("MATCH (n:Person) RETURN n", None),
+    ("MATCH (n) WHERE n.name = 'CREATE (x)' RETURN n", None),          # in a string
+    ('MATCH (n) WHERE n.note = "x\\" DELETE n" RETURN n', None),         # escaped quote
+    ("MATCH (n) // DELETE n\nRETURN n", None),                          # line comment
+    ("MATCH (n) /* SET n.x = 1 */ RETURN n", None),                     # block comment
+    ("MATCH (n) RETURN n.set, n.create AS created", None),              # property keys
+    ("MATCH (n:Create) RETURN n", None),                                # label
+    ("RETURN {merge: 1, delete: 2} AS m", None),                        # map keys
+    ("MATCH (n) RETURN n.start AS start, n AS load", None),             # aliases
+    ("MATCH (`DELETE`) RETURN `DELETE`", None),                         # backticked name
+    ("MATCH (load) RETURN load.id", None),                              # variable
+    ("CALL db.labels() YIELD label RETURN label", None),
+    ("CALL db.index.fulltext.queryNodes('names', 'aashir') YIELD node RETURN node", None),
+    ("CALL { MATCH (n) RETURN n } RETURN n", None),
+    ("MATCH (x) CALL (x) { MATCH (x)--(y) RETURN y } RETURN y", None),
+    ("MATCH (a) RETURN a UNION MATCH (b) RETURN b", None),
+    # writes
+    ("CREATE (n:Person {id: 'x'})", "CREATE"),
+    ("match (n) detach delete n", "DETACH"),
+    ("MATCH (n) SET n.x = 1 RETURN n", "SET"),
+    ("MATCH (n) WITH * DELETE n", "DELETE"),
+    ("MATCH (n) WITH n AS x DELETE x", "DELETE"),
+    ("MATCH (n) RETURN n UNION MATCH (m) DELETE m RETURN m", "DELETE"),
+    ("CALL { MATCH (n) DELETE n }", "DELETE"),
+    ("MATCH (x) CALL (x) { DELETE x }", "DELETE"),
+    ("MATCH (n) FOREACH (x IN [1] | CREATE (:T))", "FOREACH"),
+    ("LOAD CSV FROM 'file:///x' AS row RETURN row", "LOAD"),
+    ("CALL apoc.create.node(['T'], {})", "CALL apoc.create.node"),
+    ("CALL dbms.killQuery('q')", "CALL dbms.killquery"),
+    ("MATCH (n) RETURN n; DROP INDEX i", "DROP"),
+])
+def test_write_clause(query, clause):
+    assert write_clause(query) == clause
+    assert is_read_only(query) == (clause is None)
+
+
+def test_sanitize_keeps_the_first_read_statement_only():
+    assert sanitize_cypher("```cypher\nMATCH (n) RETURN n;\nMATCH (m) DELETE m\n```") == \
+        "MATCH (n) RETURN n"
+    assert sanitize_cypher("MATCH (n) DETACH DELETE n") == ""
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("MATCH (n) RETURN n", "MATCH (n) RETURN n LIMIT 100"),
+    ("MATCH (n) RETURN n;", "MATCH (n) RETURN n LIMIT 100"),
+    ("MATCH (n) RETURN n LIMIT 10", "MATCH (n) RETURN n LIMIT 10"),
+    ("MATCH (n) RETURN n LIMIT 5000", "MATCH (n) RETURN n LIMIT 100"),
+    ("MATCH (n) RETURN n LIMIT $n", "MATCH (n) RETURN n LIMIT $n"),
+    ("MATCH (n) RETURN n SKIP 5 LIMIT 3", "MATCH (n) RETURN n SKIP 5 LIMIT 3"),
+    ("MATCH (n) WITH n LIMIT 5 RETURN n", "MATCH (n) WITH n LIMIT 5 RETURN n LIMIT 100"),
+    ("MATCH (n) RETURN n.limit AS l", "MATCH (n) RETURN n.limit AS l LIMIT 100"),
+    ("MATCH (n) RETURN n AS limit", "MATCH (n) RETURN n AS limit LIMIT 100"),
+    ("MATCH (n) RETURN n.limit AS l LIMIT 7", "MATCH (n) RETURN n.limit AS l LIMIT 7"),
+    ("CALL { MATCH (n) RETURN n LIMIT 1 } RETURN n", "CALL { MATCH (n) RETURN n LIMIT 1 } RETURN n LIMIT 100"),
+    ("MATCH (a) RETURN a UNION MATCH (b) RETURN b",
+     "CALL {\nMATCH (a) RETURN a UNION MATCH (b) RETURN b\n}\nRETURN * LIMIT 100"),
+    ("MATCH (n) SET n.x = 1", "MATCH (n) SET n.x = 1"),                # no RETURN
+])
+def test_ensure_limit(query, expected):
+    assert ensure_limit(query, 100) == expected
+
+
+def test_check_rejects_writes_and_never_rewrites_them():
+    with pytest.raises(query_guard.QueryRejected, match="DELETE"):
+        query_guard.check("MATCH (n) WITH * DELETE n RETURN n", limit=10)
+    assert query_guard.check("MATCH (n) SET n.x = 1 RETURN n", read_only=False, limit=10) == \
+        "MATCH (n) SET n.x = 1 RETURN n"
+    with pytest.raises(query_guard.QueryRejected):
+        query_guard.check("  // nothing\n")
+
+
+def test_explain_plans_are_cached_and_checked(driver, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_GUARD_EXPLAIN", True)
+    monkeypatch.setattr(settings, "QUERY_GUARD_MAX_EST_ROWS", 1000)
+    query_guard.plan_cache.clear()
+    stats = dict(query_guard.plan_cache.stats)
+
+    def planner(query, params):
+        rows = 1e6 if "(a), (b)" in query else 10
+        return {"operatorType": "ProduceResults@neo4j", "args": {"EstimatedRows": 1},
+                "children": [{"operatorType": "CartesianProduct@neo4j",
+                              "args": {"EstimatedRows": rows}}]}
+    driver.planner = planner
+
+    async def main():
+        ok = await query_guard.prepare("MATCH (n) RETURN n", limit=100)
+        again = await query_guard.prepare("MATCH  (n)\nRETURN n", limit=100)  # same normalized key
+        with pytest.raises(query_guard.QueryRejected, match="CartesianProduct"):
+            await query_guard.prepare("MATCH (a), (b) RETURN a, b", limit=100)
+        return ok, again
+
+    ok, again = asyncio.run(main())
+    assert (ok, again) == ("MATCH (n) RETURN n LIMIT 100", "MATCH  (n)\nRETURN n LIMIT 100")
+    explains = [q for _, q, _ in driver.calls if q.startswith("EXPLAIN ")]
+    assert len(explains) == 2
+    s = query_guard.plan_cache.stats
+    assert (s["hits"] - stats["hits"], s["misses"] - stats["misses"],
+            s["rejected"] - stats["rejected"]) == (1, 2, 1)
+
+
+def test_graph_run_routes_reads_and_writes(driver, monkeypatch):
+    from app.main import app
+    from app.services.result_cache import write_generation
+
+    monkeypatch.setattr(settings, "QUERY_GUARD_EXPLAIN", False)
+    driver.handler = lambda query, params: [{"name": "Karachi"}]
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                     base_url="http://test") as c:
+            headers = {"Cache-Control": "no-store"}
+            read = await c.post("/graph/run", headers=headers,
+                                json={"query": "MATCH (n:Place) RETURN n.name AS name"})
+            generation = write_generation()
+            write = await c.post("/graph/run", headers=headers,
+                                 json={"query": "MATCH (n:Place) SET n.seen = true RETURN n.name AS name"})
+            return read, write, generation
+
+    read, write, generation = asyncio.run(main())
+    assert read.status_code == write.status_code == 200
+    assert read.json()["value"] == "Karachi"
+    (read_mode, read_query, _), (write_mode, write_query, _) = driver.calls
+    assert read_mode == "READ" and read_query.endswith(f"LIMIT {settings.GRAPH_RUN_MAX_ROWS + 1}")
+    assert write_mode == "WRITE" and "LIMIT" not in write_query
+    assert write_generation() > generation  # the write invalidated cached reads
@@ -0,0 +1,149 @@
+"""WriteBehindQueue: coalescing, overflow policies, read-your-writes and the flush on stop()."""
+from __future__ import annotations
+
+import asyncio
+from typing import List, Optional, Tuple
+
+import pytest
+
+from app.graph.store import set_store
+from app.models.graph import Entity, NodeLabel, RelType, Triple
+from app.services.write_behind import WriteBehindQueue
+
+
+class RecordingStore:
+    def __init__(self) -> None:
+        self.writes: List[Tuple[List[Entity], List[Triple]]] = []
+        self.error: Optional[Exception] = None
+
+    async def upsert_delta(self, entities, triples) -> None:
+        if self.error is not None:
+            raise self.error
+        self.writes.append((list(entities), list(triples)))
+
+
+@pytest.fixture
+def store():
+    s = RecordingStore()
+    set_store(s)
+    yield s
+    set_store(None)
+
+
+def _delta(user: str, place: str):
+    ents = [Entity(id=f"user:{user}", label=NodeLabel.PERSON, name=user.title()),
+            Entity(id=f"place:{place}", label=NodeLabel.PLACE, name=place.title())]
+    return ents, [Triple(subj=f"user:{user}", pred=RelType.LIVES_IN, obj=f"place:{place}")]
+
+
+def test_deltas_in_one_window_coalesce_into_one_write(store):
+    q = WriteBehindQueue(window_ms=20)
+
+    async def main():
+        await q.submit(*_delta("aashir", "karachi"))
+        await q.submit(*_delta("aashir", "karachi"))
+        await q.submit(*_delta("sara", "karachi"), wait=True)
+        await q.stop()
+
+    asyncio.run(main())
+    assert len(store.writes) == 1
+    ents, rels = store.writes[0]
+    assert sorted(e.id for e in ents) == ["place:karachi", "user:aashir", "user:sara"]
+    assert len(rels) == 2
+    assert q.stats["flushes"] == 1
+    assert (q.stats["entities_in"], q.stats["entities_written"]) == (6, 3)
+    assert (q.stats["triples_in"], q.stats["triples_written"]) == (3, 2)
+
+
+def test_max_batch_splits_writes(store):
+    q = WriteBehindQueue(window_ms=1000, max_batch=6)
+
+    async def main():
+        for i in range(4):
+            await q.submit(*_delta(f"u{i}", f"p{i}"))  # 3 items each
+        await q.stop()
+
+    asyncio.run(main())
+    assert [len(e) + len(t) for e, t in store.writes] == [6, 6]
+
+
+def test_drop_policy_discards_when_full(store):
+    q = WriteBehindQueue(maxsize=1, overflow="drop")
+
+    async def main():
+        first = await q.submit(*_delta("a", "x"))
+        second = await q.submit(*_delta("b", "y"))  # the flusher has not run yet
+        await q.stop()
+        return first, second
+
+    assert asyncio.run(main()) == (True, False)
+    assert q.stats["dropped"] == 1
+    assert [w[0][0].id for w in store.writes] == ["user:a"]
+
+
+def test_inline_policy_writes_itself_when_full(store):
+    q = WriteBehindQueue(maxsize=1, overflow="inline")
+
+    async def main():
+        await q.submit(*_delta("a", "x"))
+        await q.submit(*_delta("b", "y"))
+        inline = list(store.writes)
+        await q.stop()
+        return inline
+
+    inline = asyncio.run(main())
+    assert [w[0][0].id for w in inline] == ["user:b"]  # written by the caller, ahead of the queue
+    assert q.stats["inline"] == 1
+    assert sorted(w[0][0].id for w in store.writes) == ["user:a", "user:b"]
+
+
+def test_block_policy_waits_for_room(store):
+    q = WriteBehindQueue(maxsize=1, overflow="block")
+    q.start = lambda: None  # no flusher: the queue stays full until we make room
+
+    async def main():
+        await q.submit(*_delta("a", "x"))
+        blocked = asyncio.ensure_future(q.submit(*_delta("b", "y")))
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(asyncio.shield(blocked), 0.05)
+        q._queue.get_nowait()
+        assert await asyncio.wait_for(blocked, 1) is True
+
+    asyncio.run(main())
+    assert q.stats["dropped"] == q.stats["inline"] == 0
+
+
+def test_stop_writes_everything_still_queued(store):
+    q = WriteBehindQueue(window_ms=60_000, max_batch=10_000)
+
+    async def main():
+        for i in range(50):
+            await q.submit(*_delta(f"u{i}", "karachi"))
+        await asyncio.sleep(0)  # the flusher is now inside its coalescing window
+        await q.stop()
+
+    asyncio.run(main())
+    written = {e.id for ents, _ in store.writes for e in ents}
+    assert len(written) == 51
+    assert sum(len(t) for _, t in store.writes) == 50
+
+
+def test_wait_reraises_the_write_error(store):
+    q = WriteBehindQueue(window_ms=1)
+    store.error = RuntimeError("deadlock")
+
+    async def main():
+        with pytest.raises(RuntimeError, match="deadlock"):
+            await q.submit(*_delta("a", "x"), wait=True)
+        store.error = None
+        await q.submit(*_delta("b", "y"), wait=True)  # the flusher survived
+        await q.stop()
+
+    asyncio.run(main())
+    assert q.stats["errors"] == 1
+    assert [w[0][0].id for w in store.writes] == ["user:b"]
+
+
+def test_unknown_overflow_policy_is_rejected():
+    with pytest.raises(ValueError, match="overflow"):
+        WriteBehindQueue(overflow="spill")
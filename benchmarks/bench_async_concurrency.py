@@ -0,0 +1,70 @@
+"""
+Requests/sec of ``/graph/run`` at 10, 100 and 1000 concurrent clients.
+
+Compares the async route (``arun_cypher`` on the async driver) against the
+previous shape: a sync ``def`` route calling ``run_cypher``, which Starlette
+runs in its threadpool. Both talk to an in-process fake driver with a fixed
+per-query latency, so the numbers show the serving model, not Neo4j.
+
+Usage:
+    python benchmarks/bench_async_concurrency.py [--latency 0.02] [--per-client 5]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+import httpx
+from fastapi import FastAPI
+
+from app.main import app as async_app
+from app.services import neo4j_async, neo4j_client
+from fakes import FakeAsyncDriver, FakeDriver
+
+
+def _sync_app() -> FastAPI:
+    sync_app = FastAPI()
+
+    @sync_app.post("/graph/run")
+    def run(payload: dict) -> dict:
+        return {"rows": neo4j_client.run_cypher(payload["query"], payload.get("params"))}
+
+    return sync_app
+
+
+async def _drive(app: FastAPI, clients: int, per_client: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one_client() -> None:
+            for _ in range(per_client):
+                r = await client.post("/graph/run", json={"query": "RETURN 1 AS ok"})
+                r.raise_for_status()
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one_client() for _ in range(clients)))
+        elapsed = time.perf_counter() - t0
+    return clients * per_client / elapsed
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--latency", type=float, default=0.02, help="fake Neo4j latency (s)")
+    ap.add_argument("--per-client", type=int, default=5, help="requests per client")
+    args = ap.parse_args()
+
+    neo4j_async._driver = FakeAsyncDriver(latency=args.latency)
+    neo4j_client._driver = FakeDriver(latency=args.latency)
+    sync_app = _sync_app()
+
+    print(f"fake latency {args.latency * 1000:.0f} ms, {args.per_client} requests/client")
+    print(f"{'clients':>8} {'sync req/s':>12} {'async req/s':>12} {'speedup':>8}")
+    for clients in (10, 100, 1000):
+        sync_rps = await _drive(sync_app, clients, args.per_client)
+        async_rps = await _drive(async_app, clients, args.per_client)
+        print(f"{clients:>8} {sync_rps:>12.0f} {async_rps:>12.0f} {async_rps / sync_rps:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
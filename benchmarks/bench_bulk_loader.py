@@ -0,0 +1,145 @@
+"""
+Bulk loader throughput vs the old per-row seeding, plus checkpoint resume.
+
+Generates entities across all four labels (Person/Place as CSV, Org/Goal as
+JSONL) and Person->{Place,Org,Goal} triples, then loads them through a fake
+driver that charges --rtt per round trip (a remote Aura instance) and
+--row-cost per UNWIND row. The legacy path is one auto-commit MERGE per row,
+like the old ``scripts/seed_neo4j.py``; it runs on --legacy-rows rows only.
+The resume phase fails the load after --fail-after write batches, reruns it
+with the same checkpoint and counts the rows that were not written again.
+
+Usage:
+    python benchmarks/bench_bulk_loader.py [--entities 40000] [--rtt 0.02] [--row-cost 0.000005]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+
+from app.graph import labels
+from app.graph.loaders.bulk import BulkLoader, Checkpoint, read_items
+from app.services import neo4j_async
+from fakes import FakeAsyncDriver, ok_handler
+
+PER_LABEL = {"Person": 0.4, "Place": 0.2, "Org": 0.2, "Goal": 0.2}
+RELS = {"Place": "LIVES_IN", "Org": "WORKS_AT", "Goal": "HAS_GOAL"}
+
+
+def _generate(root: Path, entities: int) -> List[Path]:
+    counts = {label: int(entities * share) for label, share in PER_LABEL.items()}
+    ids = {label: [f"{label.lower()}:{i}" for i in range(n)] for label, n in counts.items()}
+
+    csv_path = root / "people_places.csv"
+    with csv_path.open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["id", "label", "name", "since"])
+        for label in ("Person", "Place"):
+            for i, node_id in enumerate(ids[label]):
+                w.writerow([node_id, label, f"{label} {i}", 2000 + i % 25])
+
+    jsonl_path = root / "orgs_goals.jsonl"
+    with jsonl_path.open("w") as f:
+        for label in ("Org", "Goal"):
+            for i, node_id in enumerate(ids[label]):
+                f.write(json.dumps({"id": node_id, "label": label, "name": f"{label} {i}"}) + "\n")
+
+    triples_path = root / "triples.jsonl"
+    with triples_path.open("w") as f:
+        for i, person in enumerate(ids["Person"]):
+            obj_label = ("Place", "Org", "Goal")[i % 3]
+            obj = ids[obj_label][(i * 7919) % counts[obj_label]]
+            f.write(json.dumps({"subj": person, "pred": RELS[obj_label], "obj": obj}) + "\n")
+    return [csv_path, jsonl_path, triples_path]
+
+
+async def _legacy(paths: List[Path], rows: int) -> float:
+    """One auto-commit MERGE per row, statement text built per label."""
+    t0 = time.perf_counter()
+    n = 0
+    for path in paths:
+        for _, raw in read_items(path):
+            item = json.loads(raw) if isinstance(raw, str) else raw
+            if "subj" in item:
+                await neo4j_async.arun_cypher(
+                    f"MATCH (s {{id:$s}}), (o {{id:$o}}) MERGE (s)-[:{item['pred']}]->(o)",
+                    {"s": item["subj"], "o": item["obj"]})
+            else:
+                await neo4j_async.arun_cypher(
+                    f"MERGE (n:{item['label']} {{id:$id}}) SET n.name = $name",
+                    {"id": item["id"], "name": item["name"]})
+            n += 1
+            if n >= rows:
+                return n / (time.perf_counter() - t0)
+    return n / (time.perf_counter() - t0)
+
+
+async def _load(paths: List[Path], batch: int, workers: int, checkpoint: Checkpoint):
+    labels.clear_cache()
+    loader = BulkLoader(batch_size=batch, workers=workers, checkpoint=checkpoint)
+    t0 = time.perf_counter()
+    report = await loader.load(paths)
+    return report, time.perf_counter() - t0
+
+
+class _FailAfter:
+    """Handler that raises on the n-th write statement, like a dropped connection."""
+
+    def __init__(self, n: int):
+        self.left = n
+
+    def __call__(self, query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if "UNWIND" in query:
+            self.left -= 1
+            if self.left < 0:
+                raise ConnectionError("connection reset by peer")
+        return ok_handler(query, params)
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--entities", type=int, default=40_000)
+    ap.add_argument("--rtt", type=float, default=0.02, help="seconds per round trip")
+    ap.add_argument("--row-cost", type=float, default=0.000005, help="server seconds per UNWIND row")
+    ap.add_argument("--legacy-rows", type=int, default=200)
+    ap.add_argument("--fail-after", type=int, default=20, help="write batches before the simulated crash")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        paths = _generate(root, args.entities)
+        driver = FakeAsyncDriver(latency=args.rtt, row_cost=args.row_cost, record=False)
+        neo4j_async._driver = driver
+
+        legacy = await _legacy(paths, args.legacy_rows)
+        print(f"legacy per-row auto-commit: {legacy:,.0f} rows/s "
+              f"(~{(args.entities * 1.4) / legacy / 60:,.0f} min for this data set)")
+
+        print(f"{'batch':>6} {'workers':>8} {'entities/s':>12} {'triples/s':>11} {'total s':>8}")
+        for batch, workers in ((100, 1), (1000, 1), (1000, 4), (5000, 4)):
+            r, wall = await _load(paths, batch, workers, Checkpoint())
+            print(f"{batch:>6} {workers:>8} {r.rate('entities', r.entities):>12,.0f} "
+                  f"{r.rate('triples', r.triples):>11,.0f} {wall:>8.2f}")
+
+        ckpt_path = root / "load.checkpoint.json"
+        driver.handler = _FailAfter(args.fail_after)
+        try:
+            await _load(paths, 1000, 4, Checkpoint(ckpt_path))
+        except ConnectionError as exc:
+            print(f"resume: first run failed ({exc}), checkpoint {json.loads(ckpt_path.read_text())['done']}")
+        driver.handler = ok_handler
+        r, wall = await _load(paths, 1000, 4, Checkpoint(ckpt_path))
+        print(f"resume: second run wrote {r.entities:,} entities + {r.triples:,} triples "
+              f"in {wall:.2f}s, skipped {r.skipped:,} rows already loaded")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+Write transactions and rows the change cache saves on chat traffic.
+
+Replays ``--messages`` /chat/ask calls from ``--users`` users (statements
+like "I live in Karachi." and questions, which re-send the user node every
+time) with write-behind off, so each message does its own upsert, first
+with CHANGE_CACHE_ENABLED off and then on. Reports the write transactions
+and entity/triple rows that reached the (fake) driver, then checks the
+cases where the cache must not skip: a cold cache, entries evicted by a
+tiny cache, and a triple group whose endpoint was missing.
+
+Usage:
+    python benchmarks/bench_change_cache.py [--messages 2000] [--users 50]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+import httpx
+
+from app.core.config import settings
+from app.graph.change_cache import ChangeCache, change_cache
+from app.graph.loaders import upsert
+from app.main import app
+from app.models.graph import Entity, NodeLabel, RelType, Triple
+from app.services.gazetteer import gazetteer
+from fakes import FakeAsyncDriver, install
+from run import graph_handler
+
+CITIES = ["Karachi", "Lahore", "Islamabad", "London", "Dubai"]
+
+
+def _sent(driver: FakeAsyncDriver) -> Dict[str, int]:
+    writes = [(q, p) for q, p in driver.calls if "UNWIND" in q and ("MERGE" in q or "merge" in q)]
+    return {
+        "statements": len(writes),
+        "entity_rows": sum(len(p.get("ents", ())) for _, p in writes),
+        "triple_rows": sum(len(p.get("rels", ())) for _, p in writes),
+    }
+
+
+async def _replay(messages: int, users: int, enabled: bool) -> Dict[str, Any]:
+    settings.CHANGE_CACHE_ENABLED = enabled
+    change_cache.clear()
+    driver = FakeAsyncDriver(latency=0.002, handler=graph_handler)
+    install(driver)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as c:
+        t0 = time.perf_counter()
+        for i in range(messages):
+            user = f"u{i % users}"
+            text = (f"I live in {CITIES[(i // users) % len(CITIES)]}." if i % 3 == 0
+                    else "Where do I live?")
+            (await c.post("/chat/ask", json={"text": text, "user_id": user})).raise_for_status()
+        wall = time.perf_counter() - t0
+    return {**_sent(driver), "wall_s": wall}
+
+
+async def _must_write() -> List[str]:
+    """Cases where an unchanged-looking item still has to reach the driver."""
+    failures = []
+    settings.CHANGE_CACHE_ENABLED = True
+    ents = [Entity(id="person:a", label=NodeLabel.PERSON, name="A"),
+            Entity(id="person:b", label=NodeLabel.PERSON, name="B")]
+    friends = [Triple(subj="person:a", pred=RelType.FRIEND_OF, obj="person:b")]
+
+    driver = FakeAsyncDriver(handler=graph_handler)
+    install(driver)
+    change_cache.clear()
+    await upsert.upsert_delta(ents, friends)
+    if _sent(driver)["entity_rows"] != 2 or _sent(driver)["triple_rows"] != 1:
+        failures.append("cold cache did not write everything")
+    await upsert.upsert_delta(ents, friends)
+    if _sent(driver)["statements"] != 2:
+        failures.append("identical re-send was not skipped")
+    await upsert.upsert_entities([ents[0].model_copy(update={"props": {"age": 3}})])
+    if _sent(driver)["entity_rows"] != 3:
+        failures.append("changed props were skipped")
+
+    tiny = ChangeCache(max_entries=1)
+    driver = FakeAsyncDriver(handler=graph_handler)
+    install(driver)
+    upsert.change_cache, saved = tiny, upsert.change_cache
+    try:
+        await upsert.upsert_entities(ents)
+        await upsert.upsert_entities(ents)  # person:a was evicted by person:b
+        if _sent(driver)["entity_rows"] != 3:
+            failures.append("evicted entry was skipped")
+    finally:
+        upsert.change_cache = saved
+
+    def one_endpoint_missing(query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [{"n": 0}] if "rels" in params else graph_handler(query, params)
+
+    driver = FakeAsyncDriver(handler=one_endpoint_missing)
+    install(driver)
+    change_cache.clear()
+    await upsert.upsert_triples(friends)
+    await upsert.upsert_triples(friends)
+    if _sent(driver)["triple_rows"] != 2:
+        failures.append("triple whose endpoint did not MATCH was cached")
+    return failures
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--messages", type=int, default=2000)
+    ap.add_argument("--users", type=int, default=50)
+    args = ap.parse_args()
+    settings.WRITE_BEHIND_ENABLED = False
+    gazetteer.load_seed(Path(settings.GAZETTEER_SEED_PATH))
+
+    print(f"{args.messages} /chat/ask messages from {args.users} users, write-behind off")
+    print(f"{'cache':<6} {'write tx':>9} {'entity rows':>12} {'triple rows':>12} {'wall s':>7}")
+    for enabled in (False, True):
+        r = await _replay(args.messages, args.users, enabled)
+        print(f"{'on' if enabled else 'off':<6} {r['statements']:>9} {r['entity_rows']:>12} "
+              f"{r['triple_rows']:>12} {r['wall_s']:>7.2f}")
+    print("stats:", {k: v for k, v in change_cache.snapshot().items()
+                     if k.endswith(("skipped", "written", "rate")) or k == "entries"})
+
+    failures = await _must_write()
+    print("correctness:", "ok (cold, changed, evicted, missing endpoint all written)"
+          if not failures else "; ".join(failures))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
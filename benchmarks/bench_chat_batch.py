@@ -0,0 +1,115 @@
+"""
+Chat-log import: 1000 messages through /chat/ask one by one vs /chat/ask_batch.
+
+Replays a synthetic conversation (statements that feed the graph mixed with
+template and free-form questions) against fake Neo4j and OpenAI clients with
+per-call latency. The serial loop is what clients do today: one request per
+message, each running extract -> submit delta -> answer in turn. The batch run sends
+the same messages in ``--batch``-sized /chat/ask_batch calls. Both report
+wall time, messages/s and the Neo4j round trips spent on writes and reads.
+
+Usage:
+    python benchmarks/bench_chat_batch.py [--messages 1000] [--batch 1000] [--db-latency 0.005]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+import httpx
+
+from app.core.config import settings
+from app.main import app
+from app.services import nl2cypher
+from app.services.gazetteer import gazetteer
+from app.services.write_behind import write_queue
+from fakes import FakeAsyncDriver, FakeAsyncOpenAI, install
+from run import graph_handler, llm_responder
+
+CITIES = ["Karachi", "Lahore", "Islamabad", "Quetta", "Multan"]
+
+
+def messages(n: int) -> List[Dict[str, Any]]:
+    out = []
+    for i in range(n):
+        user, city = f"u{i % 40}", CITIES[i % len(CITIES)]
+        kind = i % 4
+        if kind == 0:
+            text = f"I live in {city}."
+        elif kind == 1:
+            text = "Where do I live?"
+        elif kind == 2:
+            text = f"Who lives in {city}?"
+        else:
+            text = f"How many people moved to {city} in year {i}?"  # LLM path, distinct per message
+        out.append({"text": text, "user_id": user})
+    return out
+
+
+def _counts(driver: FakeAsyncDriver) -> Dict[str, int]:
+    writes = sum(1 for q, _ in driver.calls if "UNWIND" in q)
+    return {"writes": writes, "reads": len(driver.calls) - writes}
+
+
+async def _serial(c: httpx.AsyncClient, msgs: List[Dict[str, Any]]) -> int:
+    errors = 0
+    for m in msgs:
+        errors += (await c.post("/chat/ask", json=m)).status_code >= 400
+    return errors
+
+
+async def _batched(c: httpx.AsyncClient, msgs: List[Dict[str, Any]], size: int) -> int:
+    errors = 0
+    for start in range(0, len(msgs), size):
+        r = await c.post("/chat/ask_batch", json={"items": msgs[start:start + size]})
+        r.raise_for_status()
+        errors += sum("error" in item for item in r.json()["results"])
+    return errors
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--messages", type=int, default=1000)
+    ap.add_argument("--batch", type=int, default=1000, help="items per /chat/ask_batch call")
+    ap.add_argument("--db-latency", type=float, default=0.005)
+    ap.add_argument("--llm-latency", type=float, default=0.05)
+    ap.add_argument("--concurrency", type=int, default=settings.CHAT_BATCH_CONCURRENCY)
+    args = ap.parse_args()
+    settings.CHAT_BATCH_CONCURRENCY = args.concurrency
+    settings.CHAT_BATCH_MAX_ITEMS = max(settings.CHAT_BATCH_MAX_ITEMS, args.batch)
+    msgs = messages(args.messages)
+    gazetteer.load_seed(Path(settings.GAZETTEER_SEED_PATH))  # so statements yield LIVES_IN triples
+
+    print(f"{args.messages} messages, db {args.db_latency * 1000:g} ms, llm {args.llm_latency * 1000:g} ms, "
+          f"batch {args.batch}, concurrency {args.concurrency}")
+    print(f"{'mode':<8} {'wall s':>8} {'msg/s':>9} {'errors':>7} {'writes':>7} {'reads':>7} {'llm':>6}")
+    results = {}
+    for mode in ("serial", "batch"):
+        driver = FakeAsyncDriver(latency=args.db_latency, handler=graph_handler)
+        llm = FakeAsyncOpenAI(llm_responder, latency=args.llm_latency)
+        install(driver, llm)
+        nl2cypher._cache.clear()  # the serial run must not pre-translate the batch's questions
+        write_queue.start()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                     timeout=None) as c:
+            t0 = time.perf_counter()
+            if mode == "serial":
+                errors = await _serial(c, msgs)
+            else:
+                errors = await _batched(c, msgs, args.batch)
+            await write_queue.flush()
+            wall = time.perf_counter() - t0
+        await write_queue.stop()
+        counts = _counts(driver)
+        results[mode] = wall
+        print(f"{mode:<8} {wall:>8.2f} {args.messages / wall:>9.1f} {errors:>7} "
+              f"{counts['writes']:>7} {counts['reads']:>7} {len(llm.calls):>6}")
+    print(f"speedup  {results['serial'] / results['batch']:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
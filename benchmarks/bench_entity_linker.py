@@ -0,0 +1,161 @@
+"""
+Entity-linker lookup latency, recall and memory as the number of names grows.
+
+Builds ``EntityLinker`` indexes of synthetic names (one to three words of
+two or three random syllables; drawn evenly from a small alphabet, so
+hardly any trigram is rare, a hard case for the index), then looks up
+``--queries`` mentions of indexed names, half spelled exactly and half with
+one typo (a letter dropped, doubled, swapped or replaced). Reports
+build time, heap size, the cost of an incremental ``add``, search latency
+percentiles, recall (the intended id among the top ``k``) and ``link`` over
+whole questions. At the smallest size searches are compared with a
+brute-force scan scoring every name (the exact top ``k``), which is also
+timed.
+
+Usage:
+    python benchmarks/bench_entity_linker.py [--sizes 10000 100000 1000000] [--queries 5000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from typing import List, Tuple
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+
+from app.models.graph import NodeLabel
+from app.services.entity_linker import EntityLinker, _grams, _key
+
+ONSETS = ["", "b", "ch", "d", "f", "g", "h", "j", "k", "kh", "l", "m", "n", "p", "r", "s", "sh",
+          "t", "v", "w", "y", "z", "br", "st", "tr"]
+VOWELS = ["a", "e", "i", "o", "u", "aa", "ee", "ia", "ou"]
+CODAS = ["", "", "", "n", "r", "l", "m", "s", "d"]
+PREFIX = {NodeLabel.PERSON: "user", NodeLabel.PLACE: "place",
+          NodeLabel.ORG: "org", NodeLabel.GOAL: "goal"}
+QUESTIONS = ["where does {} work?", "who are {}'s friends", "who lives in {}", "who works at {}",
+             "what are {}'s goals", "did {} meet {} last year?"]
+
+Name = Tuple[str, str, str]  # (id, label, name)
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS)
+                   for _ in range(rng.randint(2, 3)))
+
+
+def _names(n: int, rng: random.Random) -> List[Name]:
+    labels = list(NodeLabel)
+    out = []
+    for i in range(n):
+        label = labels[i % len(labels)]
+        name = " ".join(_word(rng) for _ in range(rng.randint(1, 3))).title()
+        out.append((f"{PREFIX[label]}:{i}", label.value, name))
+    return out
+
+
+def _typo(name: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(name) - 1) if len(name) > 2 else 0
+    kind = rng.choice(["drop", "double", "swap", "replace"])
+    if kind == "drop":
+        return name[:i] + name[i + 1:]
+    if kind == "double":
+        return name[:i] + name[i] + name[i:]
+    if kind == "swap" and i + 1 < len(name):
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    return name[:i] + rng.choice("aeioulnrst") + name[i + 1:]
+
+
+def _brute(names: List[Name], mention: str, k: int, t: float) -> List[Tuple[str, float]]:
+    q = _grams(_key(mention))
+    scored = []
+    for node_id, _, name in names:
+        e = _grams(_key(name))
+        score = 2 * len(q & e) / (len(q) + len(e))
+        if score >= t:
+            scored.append((node_id, round(score, 3)))
+    scored.sort(key=lambda r: (-r[1], r[0]))
+    return scored[:k]
+
+
+def _pct(samples: List[float], p: float) -> float:
+    return sorted(samples)[min(len(samples) - 1, int(p * len(samples)))]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--queries", type=int, default=5000)
+    ap.add_argument("--k", type=int, default=3)
+    ap.add_argument("--min-score", type=float, default=0.5)
+    args = ap.parse_args()
+    rng = random.Random(7)
+
+    print(f"{'names':>8} {'build s':>8} {'heap MiB':>9} {'B/name':>7} {'add us':>7} "
+          f"{'p50 us':>7} {'p99 us':>7} {'max us':>7} {'recall':>7} {'typo rec':>8} {'link us':>8}")
+    for n, size in enumerate(args.sizes):
+        names = _names(size, rng)
+
+        def build() -> EntityLinker:
+            linker = EntityLinker()
+            for node_id, label, name in names:
+                linker.add(node_id, label, name)
+            return linker
+
+        tracemalloc.start()
+        traced = build()
+        heap = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del traced
+        t0 = time.perf_counter()
+        linker = build()
+        build_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for i in range(10_000):
+            linker.add(f"org:new_{i}", NodeLabel.ORG.value, f"Fresh Org {i}")
+        add_us = (time.perf_counter() - t0) * 1e6 / 10_000
+
+        targets = rng.sample(names, args.queries)
+        mentions = [name if i % 2 else _typo(name, rng).lower() for i, (_, _, name) in enumerate(targets)]
+        latency, hits, typo_hits = [], 0, 0
+        for i, ((node_id, _, _), mention) in enumerate(zip(targets, mentions)):
+            t0 = time.perf_counter()
+            found = linker.search(mention, k=args.k, min_score=args.min_score)
+            latency.append((time.perf_counter() - t0) * 1e6)
+            hit = any(c.id == node_id for c in found)
+            hits += hit
+            typo_hits += hit and not i % 2
+
+        questions = [rng.choice(QUESTIONS).format(*(m for m in rng.sample(mentions, 2)))
+                     for _ in range(1000)]
+        t0 = time.perf_counter()
+        for q in questions:
+            linker.link(q, k=args.k, min_score=args.min_score)
+        link_us = (time.perf_counter() - t0) * 1e6 / len(questions)
+
+        print(f"{size:>8} {build_s:>8.2f} {heap / 2**20:>9.1f} {heap / size:>7.0f} {add_us:>7.2f} "
+              f"{statistics.median(latency):>7.1f} {_pct(latency, 0.99):>7.1f} {max(latency):>7.0f} "
+              f"{hits / len(targets):>7.1%} {typo_hits / (len(targets) // 2):>8.1%} {link_us:>8.1f}")
+
+        if n == 0:
+            sample = list(zip(targets, mentions))[:200]
+            t0 = time.perf_counter()
+            expected = [_brute(names, m, args.k, args.min_score) for _, m in sample]
+            brute_us = (time.perf_counter() - t0) * 1e6 / len(sample)
+            plain = EntityLinker()
+            for node_id, label, name in names:
+                plain.add(node_id, label, name)
+            got = [[(c.id, c.score) for c in plain.search(m, k=args.k, min_score=args.min_score)]
+                   for _, m in sample]
+            same = sum(g == e for g, e in zip(got, expected))
+            top1 = sum(bool(g) and g[0] == e[0] for g, e in zip(got, expected) if e)
+            print(f"  index == brute force on {same}/{len(sample)} searches, same best match on "
+                  f"{top1}/{sum(map(bool, expected))}; "
+                  f"brute-force scan of {size} names: {brute_us:,.0f} us per search")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Gazetteer extraction throughput (messages/sec) as the number of names grows.
+
+Builds gazetteers of synthetic Person/Place/Org/Goal names, then runs the
+heuristic extractor over a fixed set of chat-sized messages. Also reports
+build time, heap size and the cost of an incremental ``add``. A naive
+"``name in text`` for every name" scan is timed at the smallest size for
+comparison.
+
+Usage:
+    python benchmarks/bench_gazetteer.py [--sizes 1000 10000 100000 500000] [--messages 20000]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import tracemalloc
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+
+from app.models.graph import NodeLabel
+from app.services import gazetteer as gz
+from app.services import kg_extractor
+
+SYLLABLES = ["ka", "ra", "chi", "lo", "ne", "mi", "sa", "to", "ru", "an", "el", "vo", "qi", "ber", "dan"]
+FILLER = ("so yesterday i was thinking that we should probably catch up soon because "
+          "the weather has been great and work keeps me busy these days").split()
+PREFIX = {NodeLabel.PERSON: "person", NodeLabel.PLACE: "place",
+          NodeLabel.ORG: "org", NodeLabel.GOAL: "goal"}
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def _names(n: int, rng: random.Random):
+    labels = list(NodeLabel)
+    for i in range(n):
+        label = labels[i % len(labels)]
+        name = " ".join(_word(rng) for _ in range(rng.randint(1, 3))).title()
+        yield f"{PREFIX[label]}:{i}", label.value, name
+
+
+def _messages(names, count: int, rng: random.Random):
+    out = []
+    for _ in range(count):
+        words = rng.sample(FILLER, 18)
+        for _, _, name in rng.sample(names, 2):
+            words.insert(rng.randrange(len(words)), name)
+        words.insert(0, rng.choice(["my friend", "i met", "i live in", "i work at"]))
+        out.append(" ".join(words))
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 500_000])
+    ap.add_argument("--messages", type=int, default=20_000)
+    args = ap.parse_args()
+    rng = random.Random(7)
+
+    print(f"{'names':>8} {'build s':>8} {'heap MiB':>9} {'add us':>7} {'msgs/s':>9} {'triples/msg':>12}")
+    for size in args.sizes:
+        names = list(_names(size, rng))
+        messages = _messages(names, args.messages, rng)
+
+        def build() -> gz.Gazetteer:
+            g = gz.Gazetteer()
+            for node_id, label, name in names:
+                g.add(node_id, label, name)
+            return g
+
+        tracemalloc.start()
+        traced = build()
+        heap = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del traced
+        t0 = time.perf_counter()
+        g = build()
+        build_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for k in range(10_000):
+            g.add(f"org:new_{size}_{k}", NodeLabel.ORG.value, f"Fresh Org {k}")
+        add_us = (time.perf_counter() - t0) * 1e6 / 10_000
+
+        kg_extractor.gazetteer = g
+        t0 = time.perf_counter()
+        triples = sum(len(kg_extractor._heuristic_extract("demo", m, "bench")["triples"])
+                      for m in messages)
+        elapsed = time.perf_counter() - t0
+        print(f"{size:>8} {build_s:>8.2f} {heap / 2**20:>9.1f} {add_us:>7.2f} "
+              f"{len(messages) / elapsed:>9.0f} {triples / len(messages):>12.2f}")
+
+    size = args.sizes[0]
+    names = [name.lower() for _, _, name in _names(size, rng)]
+    sample = _messages(list(_names(size, rng)), 500, rng)
+    t0 = time.perf_counter()
+    for m in sample:
+        t = m.lower()
+        _ = [n for n in names if n in t]
+    naive = len(sample) / (time.perf_counter() - t0)
+    print(f"naive substring scan over {size} names: {naive:.0f} msgs/s "
+          f"(linear in the number of names)")
+
+
+if __name__ == "__main__":
+    main()
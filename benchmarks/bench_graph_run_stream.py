@@ -0,0 +1,87 @@
+"""
+Peak Python heap of ``/graph/run`` per output format as results grow.
+
+The fake driver generates rows lazily, and the app is driven through raw
+ASGI with a ``send`` that only counts bytes. The client side holds nothing,
+so the numbers are the server's own footprint. ``json`` and ``columnar``
+materialize the result (capped by GRAPH_RUN_MAX_ROWS); ``ndjson`` and
+``arrow`` should stay flat.
+
+Usage:
+    python benchmarks/bench_graph_run_stream.py [--rows 10000 100000 1000000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+
+from app.core.config import settings
+from app.main import app
+from app.services import neo4j_async, result_formats
+from fakes import FakeAsyncDriver
+
+
+def _rows(n: int) -> Iterator[Dict[str, Any]]:
+    for i in range(n):
+        yield {"id": f"user:{i}", "name": f"User {i}", "degree": i % 97, "score": i / 7}
+
+
+async def _call(fmt: str, rows: int) -> int:
+    neo4j_async._driver = FakeAsyncDriver(handler=lambda q, p: _rows(rows), record=False)
+    body = json.dumps({"query": "MATCH (n:Person) RETURN n.id AS id, n.name AS name, "
+                                "n.degree AS degree, n.score AS score"}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/graph/run", "raw_path": b"/graph/run",
+        "query_string": f"format={fmt}".encode(), "root_path": "",
+        "headers": [(b"content-type", b"application/json"),
+                    (b"cache-control", b"no-store")],
+        "client": ("bench", 1), "server": ("bench", 80),
+    }
+    sent = False
+    received = 0
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return received
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = ap.parse_args()
+    settings.GRAPH_RUN_MAX_ROWS = max(args.rows)
+
+    formats = ["json", "columnar", "ndjson"] + (["arrow"] if result_formats.pa else [])
+    print(f"{'format':>9} {'rows':>9} {'peak MiB':>9} {'MiB sent':>9} {'rows/s':>10}")
+    for fmt in formats:
+        for n in args.rows:
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            sent = await _call(fmt, n)
+            elapsed = time.perf_counter() - t0
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{fmt:>9} {n:>9} {peak / 2**20:>9.1f} {sent / 2**20:>9.1f} {n / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+"""
+/kg/stats from maintained counters vs recounting the graph, at growing sizes.
+
+Builds embedded-store graphs of ``--sizes`` people (with places, orgs and
+``--friends`` FRIEND_OF edges each) through the upsert API, which keeps the
+counters as it goes. For each size it reports the write rate with the
+counters on and off, the latency of ``GET /kg/stats?user_id=...`` and of
+``graph_stats.snapshot``, and the time of the full recount (what a
+``COUNT`` scan per dashboard poll costs, and what ``reconcile`` does), and
+checks that the incremental counters equal the recount.
+
+Usage:
+    python benchmarks/bench_graph_stats.py [--sizes 10000 100000 300000] [--friends 4]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+import httpx
+
+from app.core.config import settings
+from app.graph.stats import graph_stats
+from app.graph.store import MemoryStore, set_store
+from app.main import app
+from bench_memory_store import _batched, _entities, _triples
+
+
+async def _build(people: int, friends: int, stats: bool) -> tuple:
+    settings.GRAPH_STATS_ENABLED = stats
+    graph_stats._reset()
+    store = MemoryStore(index_names=False)
+    places, orgs = max(1, people // 100), max(1, people // 50)
+    t0 = time.perf_counter()
+    await _batched(store.upsert_entities, _entities(people, places, orgs))
+    await _batched(store.upsert_triples, _triples(people, places, orgs, friends, random.Random(7)))
+    return store, time.perf_counter() - t0
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    ap.add_argument("--friends", type=int, default=4)
+    ap.add_argument("--queries", type=int, default=500)
+    args = ap.parse_args()
+    settings.METRICS_ENABLED = False
+    graph_stats.path = None
+    rng = random.Random(1)
+
+    print(f"{'people':>8} {'edges':>10} {'write off s':>12} {'write on s':>11} "
+          f"{'snapshot us':>12} {'GET ms':>7} {'recount s':>10} {'exact':>6}")
+    for people in args.sizes:
+        _, off = await _build(people, args.friends, stats=False)
+        store, on = await _build(people, args.friends, stats=True)
+        incremental = graph_stats.snapshot()
+        set_store(store)
+
+        lat = []
+        for _ in range(args.queries):
+            t0 = time.perf_counter()
+            graph_stats.snapshot(f"person:{rng.randrange(people)}")
+            lat.append(time.perf_counter() - t0)
+        http = []
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as c:
+            for _ in range(args.queries):
+                t0 = time.perf_counter()
+                r = await c.get("/kg/stats", params={"node_id": f"person:{rng.randrange(people)}"})
+                http.append(time.perf_counter() - t0)
+                r.raise_for_status()
+
+        t0 = time.perf_counter()
+        recount = await graph_stats.reconcile(store)
+        took = time.perf_counter() - t0
+        degrees = [[d["degree"] for d in snap["top_degree"]] for snap in (incremental, recount)]
+        exact = (incremental["nodes"] == recount["nodes"] and degrees[0] == degrees[1]
+                 and incremental["relationships"] == recount["relationships"])  # ties may differ in id
+        print(f"{people:>8,} {store.edge_count:>10,} {off:>12.2f} {on:>11.2f} "
+              f"{statistics.median(lat) * 1e6:>12.1f} {statistics.median(http) * 1e3:>7.2f} "
+              f"{took:>10.2f} {str(exact):>6}")
+        set_store(None)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+"""
+Peak Python heap of ``POST /kg/ingest/stream`` for growing NDJSON uploads.
+
+The body is generated on the fly and written to a fake driver, so the
+numbers are the endpoint's own footprint; past the size of the bounded
+id -> label cache they should stay flat as the upload grows.
+
+Usage:
+    python benchmarks/bench_ingest_stream.py [--batch-size 500]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import AsyncIterator
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+import httpx
+
+from app.graph import labels
+from app.main import app
+from app.services import neo4j_async
+from fakes import FakeAsyncDriver
+
+
+async def _body(pairs: int) -> AsyncIterator[bytes]:
+    for i in range(pairs):
+        ent = {"id": f"user:{i}", "label": "Person", "name": f"user {i}"}
+        rel = {"subj": f"user:{i}", "pred": "LIVES_IN", "obj": f"place:{i % 100}"}
+        yield (json.dumps(ent) + "\n" + json.dumps(rel) + "\n").encode()
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--batch-size", type=int, default=500)
+    args = ap.parse_args()
+
+    print(f"{'lines':>9} {'peak KiB':>10} {'lines/s':>10}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as c:
+        for pairs in (5_000, 50_000, 250_000):
+            neo4j_async._driver = FakeAsyncDriver(record=False)
+            labels.clear_cache()
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            r = await c.post(f"/kg/ingest/stream?batch_size={args.batch_size}",
+                             content=_body(pairs))
+            elapsed = time.perf_counter() - t0
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            r.raise_for_status()
+            print(f"{r.json()['lines']:>9} {peak / 1024:>10.0f} {2 * pairs / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+"""
+LLM extraction engine against a local fake OpenAI server: batching, timeouts, breaker.
+
+Phases (each with a fresh engine):
+  1. throughput: N concurrent messages, micro-batch size 1 vs --batch;
+  2. hangs: every completion hangs; callers time out, in-flight calls are
+     cancelled and the breaker opens, so the second burst skips the LLM;
+  3. flaky: a share of completions fail with HTTP 500 and fall back.
+A legacy run (one thread per message with a join timeout, like the old
+``extract_kg``) is included to show the thread pile-up.
+
+Usage:
+    python benchmarks/bench_llm_extract.py [--messages 400] [--batch 8] [--workers 4]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import threading
+import time
+from typing import List
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+import httpx
+from fake_openai_server import config as server_config, serve_in_thread, stats as server_stats
+from openai import AsyncOpenAI, OpenAI
+
+from app.core.config import settings
+from app.services import kg_extractor
+from app.services.llm_extraction import CircuitBreaker, ExtractionEngine
+
+TEXTS = ["I moved in Karachi last year", "Started a new job at Ragioneer",
+         "Lunch with friends", "I live in San Francisco and work at Acme"]
+
+
+def _engine(base_url: str, batch: int, workers: int, timeout: float,
+            failures: int = 5, cooldown: float = 30.0) -> ExtractionEngine:
+    return ExtractionEngine(
+        lambda: AsyncOpenAI(api_key="bench", base_url=base_url, max_retries=0),
+        model="fake", workers=workers, max_batch=batch, window_ms=20, timeout=timeout,
+        breaker=CircuitBreaker(failures, cooldown))
+
+
+async def _burst(n: int) -> List[float]:
+    async def one(i: int) -> float:
+        t0 = time.perf_counter()
+        await kg_extractor.aextract_kg(f"u{i % 50}", TEXTS[i % len(TEXTS)], f"msg:{i}")
+        return time.perf_counter() - t0
+    return list(await asyncio.gather(*(one(i) for i in range(n))))
+
+
+def _pct(xs: List[float], q: float) -> float:
+    return sorted(xs)[min(len(xs) - 1, int(q * len(xs)))] * 1000
+
+
+async def _phase(name: str, engine: ExtractionEngine, n: int, rounds: int = 1) -> None:
+    kg_extractor.extraction_engine = engine
+    before = dict(server_stats)
+    t0 = time.perf_counter()
+    lat: List[float] = []
+    for _ in range(rounds):
+        lat += await _burst(n)
+    wall = time.perf_counter() - t0
+    n *= rounds
+    s = engine.snapshot()
+    await engine.stop()
+    print(f"[{name}] {n} msgs in {wall:.2f}s ({n / wall:.0f} msgs/s), "
+          f"p50 {_pct(lat, 0.5):.0f} ms p95 {_pct(lat, 0.95):.0f} ms, "
+          f"{server_stats['requests'] - before['requests']} completions, threads {threading.active_count()}")
+    print(f"    llm results {s['completed']}, timed out {s['timed_out']}, "
+          f"cancelled calls {s['cancelled_calls']}, failed batches {s['failed_batches']}, "
+          f"short-circuited {s['short_circuited']}, rejected {s['rejected']}, "
+          f"breaker {s['breaker']} (opened {s['breaker_opened']}x)")
+
+
+def _legacy(base_url: str, n: int, join_timeout: float) -> None:
+    client = OpenAI(api_key="bench", base_url=base_url, max_retries=0)
+
+    def call() -> None:
+        try:
+            client.chat.completions.create(model="fake", messages=[{"role": "user", "content": "x"}])
+        except Exception:
+            pass
+
+    t0 = time.perf_counter()
+    for _ in range(n):
+        t = threading.Thread(target=call, daemon=True)
+        t.start()
+        t.join(timeout=join_timeout)
+    print(f"[legacy thread-per-message, hanging upstream] {n} msgs in "
+          f"{time.perf_counter() - t0:.2f}s, threads still alive: {threading.active_count()}")
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--messages", type=int, default=400)
+    ap.add_argument("--batch", type=int, default=8)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--port", type=int, default=8011)
+    args = ap.parse_args()
+
+    logging.getLogger("app.services.llm_extraction").setLevel(logging.ERROR)
+    settings.KG_EXTRACTOR_MODE = "llm"
+    settings.OPENAI_API_KEY = settings.OPENAI_API_KEY or "bench"
+    server, url = serve_in_thread(args.port, latency=0.2, jitter=0.05, per_message=0.01)
+    n, w = args.messages, args.workers
+
+    await _phase("batch=1", _engine(url, 1, w, timeout=30), n)
+    await _phase(f"batch={args.batch}", _engine(url, args.batch, w, timeout=30), n)
+
+    server_config.update(hang_rate=1.0, hang=30.0)
+    await _phase("hangs, timeout 0.5s, 2 bursts", _engine(url, args.batch, w, timeout=0.5, failures=3),
+                 n, rounds=2)
+
+    server_config.update(hang_rate=0.0, error_rate=0.3)
+    await _phase("30% HTTP 500", _engine(url, args.batch, w, timeout=5, failures=50), n)
+
+    server_config.update(error_rate=0.0, hang_rate=1.0)
+    _legacy(url, 20, join_timeout=0.25)
+
+    async with httpx.AsyncClient() as c:
+        print("server:", (await c.get(url.rsplit("/v1", 1)[0] + "/_stats")).json())
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
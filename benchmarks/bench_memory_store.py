@@ -0,0 +1,138 @@
+"""
+Memory footprint, upsert rate, neighborhood latency and snapshot cost of the embedded store.
+
+Builds a synthetic graph shaped like the app's (people living in places,
+working at orgs, friends with each other) through the ``GraphStore`` upsert
+API, measures the heap it takes with ``tracemalloc``, times ``neighborhood``
+and ``related``, then snapshots and reloads it. With --messages every
+triple cites the message it was extracted from (one per person, as the
+extractors attach it) and each LIVES_IN is restated by a second message, so
+the heap includes provenance.
+
+Usage:
+    python benchmarks/bench_memory_store.py [--people 100000] [--friends 8] [--messages]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+
+from app.core.config import settings
+from app.graph.store import MemoryStore
+from app.models.graph import Entity, NodeLabel, RelType, Triple
+
+BATCH = 10_000
+
+
+def _entities(people: int, places: int, orgs: int):
+    for i in range(places):
+        yield Entity(id=f"place:{i}", label=NodeLabel.PLACE, name=f"City {i}")
+    for i in range(orgs):
+        yield Entity(id=f"org:{i}", label=NodeLabel.ORG, name=f"Org {i}")
+    for i in range(people):
+        yield Entity(id=f"person:{i}", label=NodeLabel.PERSON, name=f"Person {i}")
+
+
+def _triples(people: int, places: int, orgs: int, friends: int, rng: random.Random,
+             messages: bool = False):
+    for i in range(people):
+        p = f"person:{i}"
+        props = {"text": f"Person {i} told us about home, work and friends.",
+                 "source_id": f"msg:{i}"} if messages else {}
+        home = f"place:{rng.randrange(places)}"
+        yield Triple(subj=p, pred=RelType.LIVES_IN, obj=home, props=props)
+        yield Triple(subj=p, pred=RelType.WORKS_AT, obj=f"org:{rng.randrange(orgs)}", props=props)
+        for _ in range(friends):
+            yield Triple(subj=p, pred=RelType.FRIEND_OF, obj=f"person:{rng.randrange(people)}",
+                         props=props)
+        if messages:
+            yield Triple(subj=p, pred=RelType.LIVES_IN, obj=home,
+                         props={"text": f"Person {i} still lives there.", "source_id": f"msg:{i}b"})
+
+
+async def _batched(fn, items) -> int:
+    n, batch = 0, []
+    for item in items:
+        batch.append(item)
+        if len(batch) == BATCH:
+            await fn(batch)
+            n, batch = n + len(batch), []
+    if batch:
+        await fn(batch)
+        n += len(batch)
+    return n
+
+
+def _pcts(samples):
+    q = statistics.quantiles(samples, n=100)
+    return f"p50 {q[49] * 1e3:7.3f} ms  p99 {q[98] * 1e3:7.3f} ms"
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--people", type=int, default=100_000)
+    ap.add_argument("--friends", type=int, default=8, help="FRIEND_OF edges per person")
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--messages", action="store_true", help="triples cite source messages")
+    args = ap.parse_args()
+    settings.METRICS_ENABLED = False
+    settings.GRAPH_STATS_ENABLED = False  # measure the store alone
+    rng = random.Random(args.seed)
+    places, orgs = max(1, args.people // 100), max(1, args.people // 50)
+
+    tracemalloc.start()
+    store = MemoryStore(index_names=False)
+    t0 = time.perf_counter()
+    nodes = await _batched(store.upsert_entities, _entities(args.people, places, orgs))
+    t1 = time.perf_counter()
+    await _batched(store.upsert_triples, _triples(args.people, places, orgs, args.friends, rng,
+                                                          args.messages))
+    t2 = time.perf_counter()
+    heap, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    edges = store.edge_count
+
+    print(f"graph       {nodes:,} nodes, {edges:,} edges")
+    print(f"upsert      nodes {nodes / (t1 - t0):,.0f}/s, edges {edges / (t2 - t1):,.0f}/s")
+    print(f"heap        {heap / 2**20:,.1f} MiB total, {heap / (nodes + edges):.1f} B per node+edge")
+
+    for depth in (1, 2):
+        lat = []
+        for _ in range(args.queries):
+            uid = f"person:{rng.randrange(args.people)}"
+            q0 = time.perf_counter()
+            await store.neighborhood(uid, depth=depth, limit=200)
+            lat.append(time.perf_counter() - q0)
+        print(f"neighbor d{depth} {_pcts(lat)}")
+    lat = []
+    for _ in range(args.queries):
+        pid = f"place:{rng.randrange(places)}"
+        q0 = time.perf_counter()
+        await store.related([pid], RelType.LIVES_IN, "in", 25)
+        lat.append(time.perf_counter() - q0)
+    print(f"related     {_pcts(lat)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "graph.kgmem")
+        s0 = time.perf_counter()
+        store.snapshot(path)
+        s1 = time.perf_counter()
+        reloaded = MemoryStore(index_names=False)
+        reloaded.load(path)
+        s2 = time.perf_counter()
+        size = os.path.getsize(path)
+    assert (len(reloaded), reloaded.edge_count) == (nodes, edges)
+    print(f"snapshot    {size / 2**20:,.1f} MiB, save {s1 - s0:.2f} s, load {s2 - s1:.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""
+Cost of the metrics instrumentation per Cypher call, stage and completion.
+
+Runs ``arun_cypher`` against a zero-latency fake driver (so only client-side
+work is measured) with METRICS_ENABLED and SLOW_QUERY_MS off, then on, and
+times ``stage()`` / ``openai_timer()`` on their own. Finishes with one
+``/chat/ask`` round through the app and prints the resulting ``/metrics``.
+
+Usage:
+    python benchmarks/bench_metrics_overhead.py [--calls 20000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+import httpx
+
+from app.core.config import settings
+from app.main import app
+from app.services import metrics, neo4j_async
+from app.services.write_behind import write_queue
+from fakes import FakeAsyncDriver, FakeAsyncOpenAI, install
+
+
+async def _per_call_us(calls: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        await neo4j_async.arun_cypher("RETURN 1 AS ok", name="bench")
+    return (time.perf_counter() - t0) / calls * 1e6
+
+
+def _stage_us(calls: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        with metrics.stage("bench"):
+            pass
+        with metrics.openai_timer("bench"):
+            pass
+    return (time.perf_counter() - t0) / calls * 1e6
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--calls", type=int, default=20_000)
+    args = ap.parse_args()
+
+    install(FakeAsyncDriver(record=False),
+            FakeAsyncOpenAI(lambda m: "MATCH (p:Person) RETURN p.name AS name", latency=0.01))
+
+    rows = []
+    for label, enabled, slow_ms in (("disabled", False, 0.0), ("slow log only", False, 1000.0),
+                                    ("metrics + slow log", True, 1000.0)):
+        settings.METRICS_ENABLED, settings.SLOW_QUERY_MS = enabled, slow_ms
+        await _per_call_us(1000)  # warm-up
+        rows.append((label, await _per_call_us(args.calls), _stage_us(args.calls)))
+
+    base = rows[0][1]
+    print(f"{'mode':<20} {'arun_cypher us':>15} {'overhead':>9} {'stage+openai us':>16}")
+    for label, us, stage_us in rows:
+        print(f"{label:<20} {us:>15.2f} {us - base:>+9.2f} {stage_us:>16.3f}")
+
+    write_queue.start()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as c:
+        for text in ("Where do I live?", "How many people live in Karachi?"):
+            await c.post("/chat/ask", json={"text": text, "user_id": "demo"})
+        body = (await c.get("/metrics")).text
+    await write_queue.stop()
+    print("\n/metrics (count series):")
+    for line in body.splitlines():
+        if "_count{" in line or "tokens_total{" in line:
+            print("   ", line)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""
+NL -> Cypher translation cache against a stubbed OpenAI client.
+
+Reports cold vs warm latency, how many upstream calls a burst of concurrent
+identical questions costs (single-flight), LRU evictions, that a schema
+prompt change invalidates old keys, and that the SQLite tier survives a
+"restart" (fresh in-memory tier).
+
+Usage:
+    python benchmarks/bench_nl2cypher_cache.py [--latency 0.3] [--burst 1000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+
+from app.services import nl2cypher
+from app.services.nl2cypher_cache import TranslationCache
+from fakes import FakeAsyncOpenAI, FakeOpenAI
+
+
+def _responder(messages) -> str:
+    return f"MATCH (p:Person {{name: '{messages[-1]['content'][:20]}'}}) RETURN p LIMIT 5"
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--latency", type=float, default=0.3, help="fake completion latency (s)")
+    ap.add_argument("--burst", type=int, default=1000, help="concurrent identical questions")
+    args = ap.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "nl2cypher.sqlite")
+    nl2cypher._cache = TranslationCache(max_entries=100, ttl_seconds=3600, path=db_path)
+    nl2cypher._aclient = FakeAsyncOpenAI(_responder, latency=args.latency)
+    nl2cypher._client = FakeOpenAI(_responder, latency=args.latency)
+
+    t0 = time.perf_counter()
+    await nl2cypher.agenerate_cypher("Where does Aashir live?")
+    cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    await nl2cypher.agenerate_cypher("  where does   aashir live ")
+    warm = time.perf_counter() - t0
+    print(f"cold miss {cold * 1000:.1f} ms, normalized hit {warm * 1e6:.1f} us")
+
+    before = len(nl2cypher._aclient.calls)
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(
+        nl2cypher.agenerate_cypher("who are my friends?") for _ in range(args.burst)
+    ))
+    burst = time.perf_counter() - t0
+    upstream = len(nl2cypher._aclient.calls) - before
+    print(f"{args.burst} concurrent identical misses -> {upstream} upstream call(s), "
+          f"{len(set(results))} distinct answer(s), {burst * 1000:.0f} ms")
+
+    for i in range(150):
+        nl2cypher._cache.put(f"filler:{i}", "RETURN 1")
+    print(f"after 150 extra puts into a 100-entry tier: evictions={nl2cypher._cache.stats['evictions']}")
+
+    original = nl2cypher._SCHEMA_PROMPT
+    nl2cypher._SCHEMA_PROMPT = original + "\n- Goal(id, name, due)\n"
+    before = len(nl2cypher._aclient.calls)
+    await nl2cypher.agenerate_cypher("Where does Aashir live?")
+    print(f"schema change -> upstream calls for a previously cached question: "
+          f"{len(nl2cypher._aclient.calls) - before}")
+    nl2cypher._SCHEMA_PROMPT = original
+
+    nl2cypher._cache = TranslationCache(max_entries=100, ttl_seconds=3600, path=db_path)
+    before = len(nl2cypher._client.calls)
+    nl2cypher.generate_cypher("Where does Aashir live?")
+    print(f"restart with SQLite tier -> upstream calls: {len(nl2cypher._client.calls) - before}, "
+          f"disk_hits={nl2cypher._cache.stats['disk_hits']}")
+    print("stats:", nl2cypher.cache_stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
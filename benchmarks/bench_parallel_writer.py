@@ -0,0 +1,250 @@
+"""
+Parallel partitioned writer throughput vs worker count, against node locks.
+
+Builds a payload of --people Person entities with Place/Org/Goal endpoints
+and LIVES_IN/WORKS_AT/HAS_GOAL/FRIEND_OF triples; --hot of the people live
+in ``place:karachi``, the rest in a few hundred places. The fake driver
+behaves like a server with --cores cores: each statement takes a lock on
+every node its rows write (entities, both triple endpoints, Source nodes)
+in row order, holding them until its transaction ends, and charges
+--row-cost per row on a core. A transaction that would wait on one that is
+waiting for it fails with a retryable DeadlockDetected and its locks are
+released (the managed-transaction replay of the real driver is not
+simulated, so ``loaders.parallel`` retries it).
+
+For each worker count the payload is written twice: "naive" cuts it into
+INGEST_BATCH_SIZE batches in payload order and writes them concurrently
+(same retry and backoff), "partitioned" goes through
+``app.graph.loaders.parallel``. Reports entity and triple throughput, lock
+waits, deadlocks, batch retries and the batches that still failed after
+INGEST_WRITE_RETRIES.
+
+Usage:
+    python benchmarks/bench_parallel_writer.py [--people 20000] [--workers 1 2 4 8] [--cores 8]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+
+from app.core.config import settings
+from app.graph import labels
+from app.graph.change_cache import change_cache
+from app.graph.loaders import parallel, upsert
+from app.models.graph import Entity, NodeLabel, RelType, Triple
+from fakes import FakeAsyncDriver, FakeAsyncResult, install
+from run import graph_handler
+
+
+class DeadlockDetected(Exception):
+    """Stands in for ``neo4j.exceptions.TransientError`` (DeadlockDetected)."""
+
+    def is_retryable(self) -> bool:
+        return True
+
+
+class LockTable:
+    """Exclusive node locks held until commit, with wait-for deadlock detection."""
+
+    def __init__(self) -> None:
+        self.owner: Dict[str, object] = {}
+        self.held: Dict[object, Set[str]] = defaultdict(set)
+        self.waiting: Dict[object, object] = {}  # tx -> tx holding what it waits for
+        self.changed = asyncio.Event()
+        self.waits = 0
+        self.deadlocks = 0
+
+    async def acquire(self, tx: object, node: str) -> None:
+        while True:
+            holder = self.owner.get(node)
+            if holder is None:
+                self.owner[node] = tx
+                self.held[tx].add(node)
+                return
+            if holder is tx:
+                return
+            t: Optional[object] = holder
+            while t is not None:
+                if t is tx:
+                    self.deadlocks += 1
+                    raise DeadlockDetected(f"waiting for {node} would deadlock")
+                t = self.waiting.get(t)
+            self.waits += 1
+            self.waiting[tx] = holder
+            try:
+                await self.changed.wait()
+            finally:
+                del self.waiting[tx]
+
+    def release(self, tx: object) -> None:
+        for node in self.held.pop(tx, ()):
+            del self.owner[node]
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+def _locked(params: Dict[str, Any]) -> List[List[str]]:
+    """Per row, the nodes writing it locks."""
+    if "ents" in params:
+        return [[e["id"]] for e in params["ents"]]
+    if "sources" in params:
+        return [[s["id"]] for s in params["sources"]]
+    if "rels" in params:
+        return [[r["subj"], r["obj"]] + ([r["props"]["source"]] if r["props"].get("source") else [])
+                for r in params["rels"]]
+    return []
+
+
+class LockingTransaction:
+    def __init__(self, driver: "LockingDriver"):
+        self._driver = driver
+
+    async def run(self, query: Any, parameters: Optional[Dict[str, Any]] = None,
+                  **kwargs: Any) -> FakeAsyncResult:
+        params = dict(parameters or {}, **kwargs)
+        query = getattr(query, "text", query)
+        d = self._driver
+        await asyncio.sleep(d.latency)
+        rows = _locked(params)
+        for i in range(0, len(rows), d.chunk):
+            chunk = rows[i:i + d.chunk]
+            for nodes in chunk:
+                for node in nodes:
+                    await d.locks.acquire(self, node)
+            async with d.cores:
+                await asyncio.sleep(d.row_cost * len(chunk))
+        return FakeAsyncResult(graph_handler(query, params))
+
+
+class LockingSession(LockingTransaction):
+    async def __aenter__(self) -> "LockingSession":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+    async def execute_write(self, work: Any, *args: Any, **kwargs: Any) -> Any:
+        tx = LockingTransaction(self._driver)
+        try:
+            return await work(tx, *args, **kwargs)
+        finally:
+            self._driver.locks.release(tx)  # commit or rollback
+
+    execute_read = execute_write
+
+
+class LockingDriver(FakeAsyncDriver):
+    def __init__(self, cores: int, row_cost: float, latency: float, chunk: int = 25):
+        super().__init__(latency=latency, handler=graph_handler, record=False, row_cost=row_cost)
+        self.cores = asyncio.Semaphore(cores)
+        self.chunk = chunk
+        self.locks = LockTable()
+
+    def session(self, **kwargs: Any) -> LockingSession:
+        return LockingSession(self)
+
+
+def _payload(people: int, hot: float, rng: random.Random) -> Tuple[List[Entity], List[Triple]]:
+    places = ["place:karachi"] + [f"place:p{i}" for i in range(300)]
+    orgs = [f"org:o{i}" for i in range(1000)]
+    ents = [Entity(id=p, label=NodeLabel.PLACE, name=p.split(":")[1]) for p in places]
+    ents += [Entity(id=o, label=NodeLabel.ORG, name=o.split(":")[1]) for o in orgs]
+    triples: List[Triple] = []
+    for i in range(people):
+        me = f"user:u{i}"
+        ents.append(Entity(id=me, label=NodeLabel.PERSON, name=f"U{i}"))
+        ents.append(Entity(id=f"goal:g{i}", label=NodeLabel.GOAL, name=f"G{i}"))
+        place = places[0] if rng.random() < hot else rng.choice(places[1:])
+        triples.append(Triple(subj=me, pred=RelType.LIVES_IN, obj=place))
+        triples.append(Triple(subj=me, pred=RelType.WORKS_AT, obj=rng.choice(orgs)))
+        triples.append(Triple(subj=me, pred=RelType.HAS_GOAL, obj=f"goal:g{i}"))
+        if i:
+            triples.append(Triple(subj=me, pred=RelType.FRIEND_OF, obj=f"user:u{rng.randrange(i)}"))
+    rng.shuffle(triples)
+    return ents, triples
+
+
+async def _naive(ents: List[Entity], triples: List[Triple], workers: int) -> Tuple[int, int, float]:
+    """Batches in payload order, ``workers`` at a time; returns (retries, failed batches, triple s)."""
+    size = settings.INGEST_BATCH_SIZE
+    gate = asyncio.Semaphore(workers)
+    report = parallel.WriteReport()
+
+    async def write(job) -> None:
+        async with gate:
+            await parallel._with_retry(job, report)
+
+    failed = 0
+    for r in await asyncio.gather(*(write(lambda b=b: upsert.upsert_entities(b))
+                                    for b in parallel._chunks(ents, size)), return_exceptions=True):
+        failed += isinstance(r, DeadlockDetected)
+    t = time.perf_counter()
+    for r in await asyncio.gather(*(write(lambda b=b: upsert.upsert_triples(b, ents))
+                                    for b in parallel._chunks(triples, size)), return_exceptions=True):
+        failed += isinstance(r, DeadlockDetected)
+    return report.retries, failed, time.perf_counter() - t
+
+
+async def _partitioned(ents: List[Entity], triples: List[Triple],
+                       workers: int) -> Tuple[int, float, parallel.WriteReport]:
+    e = await parallel.upsert_entities(ents, workers=workers)
+    t = time.perf_counter()
+    r = await parallel.upsert_triples(triples, ents, workers=workers)
+    return e.retries + r.retries, time.perf_counter() - t, r
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--people", type=int, default=20_000)
+    ap.add_argument("--hot", type=float, default=0.3, help="share of people living in place:karachi")
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--cores", type=int, default=8)
+    ap.add_argument("--row-cost", type=float, default=0.00005)
+    ap.add_argument("--rtt", type=float, default=0.001)
+    ap.add_argument("--backoff", type=float, default=0.02)
+    args = ap.parse_args()
+
+    settings.CHANGE_CACHE_ENABLED = False  # every run writes everything
+    settings.GRAPH_STATS_ENABLED = False
+    settings.ENTITY_LINK_ENABLED = False
+    settings.INGEST_RETRY_BACKOFF = args.backoff
+    ents, triples = _payload(args.people, args.hot, random.Random(7))
+    print(f"{len(ents)} entities, {len(triples)} triples ({args.hot:.0%} of people in place:karachi), "
+          f"batches of {settings.INGEST_BATCH_SIZE}, {args.cores} cores, "
+          f"{args.row_cost * 1e6:.0f} us/row")
+    print(f"{'writers':>7} {'mode':>12} {'ents/s':>9} {'triples/s':>10} {'speedup':>8} "
+          f"{'lock waits':>10} {'deadlocks':>9} {'retries':>7} {'failed':>6}")
+    base: Dict[str, float] = {}
+    for workers in args.workers:
+        for mode in ("naive", "partitioned"):
+            driver = LockingDriver(args.cores, args.row_cost, args.rtt)
+            install(driver)
+            labels.clear_cache()
+            change_cache.clear()
+            t0 = time.perf_counter()
+            failed = 0
+            if mode == "naive":
+                retries, failed, triple_s = await _naive(ents, triples, workers)
+            else:
+                retries, triple_s, _ = await _partitioned(ents, triples, workers)
+            ent_s = time.perf_counter() - t0 - triple_s
+            rate = len(triples) / triple_s
+            base.setdefault(mode, rate)
+            print(f"{workers:>7} {mode:>12} {len(ents) / ent_s:>9,.0f} {rate:>10,.0f} "
+                  f"{rate / base[mode]:>7.2f}x {driver.locks.waits:>10} "
+                  f"{driver.locks.deadlocks:>9} {retries:>7} {failed:>6}")
+
+    _, _, report = await _partitioned(ents, triples, max(args.workers))
+    print(f"partitioned plan at {max(args.workers)} writers: {report.batches} batches over "
+          f"{report.partitions} partitions ({report.hot_nodes} hot nodes), "
+          f"at most {report.max_running} at once")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,159 @@
+"""
+Store and payload size of message provenance: text on every edge vs Source nodes.
+
+Replays ``--messages`` chat messages (each long enough to mention a place
+and a couple of orgs, so the heuristic extractor emits several triples per
+message; ``--repeat`` of them restate an earlier message verbatim) three
+ways:
+
+- legacy: the pre-provenance writes, message ``text``/``source_id`` copied
+  onto every relationship;
+- migrated: the legacy graph after ``MemoryStore.compact_provenance`` (what
+  scripts/migrate_provenance.py runs);
+- new: the same messages written through today's upserts (every edge
+  keeps its last PROVENANCE_MAX_SOURCES sources, so more history than the
+  single overwritten ``text`` of legacy), then after ``prune_sources``.
+
+For each it reports the message texts stored and their size, the
+memory-store snapshot size, the bytes of
+``/kg/graph_view?include_props=true`` over all users (and with
+``expand_sources``), and the Cypher parameter bytes the Neo4j upserts send
+through a fake driver.
+
+Usage:
+    python benchmarks/bench_provenance.py [--messages 5000] [--users 200] [--repeat 0.3]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+import httpx
+
+from app.core.config import settings
+from app.graph import provenance
+from app.graph.change_cache import change_cache
+from app.graph.loaders import upsert
+from app.graph.store import MemoryStore, set_store
+from app.main import app
+from app.models.graph import Entity, Triple
+from app.services.gazetteer import gazetteer
+from app.services.kg_extractor import _heuristic_extract
+from fakes import FakeAsyncDriver, install
+from run import graph_handler
+
+PLACES = ["Karachi", "Lahore", "Islamabad", "London", "Dubai", "Toronto"]
+ORGS = ["Acme", "Ragioneer"]
+TEMPLATE = ("Quick update since we last talked: I finally moved to {place} at the end of "
+            "the summer. Work is good, I split my week between {org} and a side project "
+            "with friends at {org2}, and the commute is much shorter than it used to be. "
+            "Message {n}.")
+
+Delta = Tuple[List[Entity], List[Triple]]
+
+
+def deltas(messages: int, users: int, repeat: float, seed: int = 7) -> List[Delta]:
+    rng = random.Random(seed)
+    last: Dict[str, str] = {}
+    out = []
+    for n in range(messages):
+        user = f"u{rng.randrange(users)}"
+        if user in last and rng.random() < repeat:
+            text = last[user]
+        else:
+            org, org2 = rng.sample(ORGS, 2)
+            text = TEMPLATE.format(place=rng.choice(PLACES), org=org, org2=org2, n=n)
+        last[user] = text
+        d = _heuristic_extract(user, text, f"msg:{n}")
+        out.append(([Entity.model_validate(e) for e in d["entities"]],
+                    [Triple.model_validate(t) for t in d["triples"]]))
+    return out
+
+
+def _legacy(triples):
+    return list(triples), {}
+
+
+async def _cypher_bytes(ds: List[Delta]) -> Dict[str, int]:
+    driver = FakeAsyncDriver(handler=graph_handler)
+    install(driver)
+    change_cache.clear()
+    for ents, triples in ds:
+        await upsert.upsert_delta(ents, triples)
+    writes = [p for q, p in driver.calls if "UNWIND" in q]
+    return {"write_tx": driver.access_modes.count("WRITE"),
+            "param_bytes": sum(len(json.dumps(p, default=str)) for p in writes)}
+
+
+async def _store(ds: List[Delta]) -> MemoryStore:
+    store = MemoryStore(index_names=False)
+    for ents, triples in ds:
+        await store.upsert_delta(ents, triples)
+    return store
+
+
+async def _measure(store: MemoryStore, users: List[str], tmp: Path) -> Dict[str, int]:
+    set_store(store)
+    texts = [p["text"] for p in store.edge_props.values() if "text" in p]
+    texts += [s["text"] for s in store.sources.values()]
+    sizes = {"snapshot": store.snapshot(tmp / "graph.kgmem"), "props": 0, "expanded": 0,
+             "texts": len(texts), "text_bytes": sum(len(t.encode()) for t in texts)}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as c:
+        for user in users:
+            for key, flag in (("props", "include_props"), ("expanded", "expand_sources")):
+                r = await c.get("/kg/graph_view", params={"user_id": user, flag: "true",
+                                                          "limit": 5000})
+                r.raise_for_status()
+                sizes[key] += len(r.content)
+    set_store(None)
+    return sizes
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--messages", type=int, default=5000)
+    ap.add_argument("--users", type=int, default=200)
+    ap.add_argument("--repeat", type=float, default=0.3, help="share of messages restating an earlier one")
+    args = ap.parse_args()
+    gazetteer.load_seed(Path(settings.GAZETTEER_SEED_PATH))
+    ds = deltas(args.messages, args.users, args.repeat)
+    users = sorted({ents[0].name for ents, _ in ds})
+    print(f"{args.messages} messages from {len(users)} users, "
+          f"{sum(len(t) for _, t in ds)} triples, {args.repeat:.0%} restated")
+
+    rows: Dict[str, Dict[str, int]] = {}
+    compact = provenance.compact
+    with tempfile.TemporaryDirectory() as tmp:
+        provenance.compact = _legacy
+        try:
+            rows["legacy"] = await _cypher_bytes(ds)
+            legacy = await _store(ds)
+        finally:
+            provenance.compact = compact
+        rows["legacy"].update(await _measure(legacy, users, Path(tmp)))
+        migrated = legacy.compact_provenance()
+        rows["migrated"] = {"write_tx": 0, "param_bytes": 0, **await _measure(legacy, users, Path(tmp))}
+        rows["new"] = await _cypher_bytes(ds)
+        new = await _store(ds)
+        rows["new"].update(await _measure(new, users, Path(tmp)))
+        pruned = new.prune_sources()
+        rows["new+prune"] = {"write_tx": 0, "param_bytes": 0, **await _measure(new, users, Path(tmp))}
+
+    print(f"migration rewrote {migrated} relationships into {len(legacy.sources)} Source entries; "
+          f"--prune dropped {pruned} sources the new writes no longer cite")
+    print(f"{'':<10} {'texts':>6} {'text KiB':>9} {'snapshot KiB':>13} {'view KiB':>9} "
+          f"{'expanded KiB':>13} {'cypher KiB':>11} {'write tx':>9}")
+    for name, r in rows.items():
+        print(f"{name:<10} {r['texts']:>6} {r['text_bytes'] / 1024:>9.1f} "
+              f"{r['snapshot'] / 1024:>13.1f} {r['props'] / 1024:>9.1f} "
+              f"{r['expanded'] / 1024:>13.1f} {r['param_bytes'] / 1024:>11.1f} {r['write_tx']:>9}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
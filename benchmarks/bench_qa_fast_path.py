@@ -0,0 +1,92 @@
+"""
+Template fast path vs LLM path in ``qa_orchestrator.answer_question``.
+
+Runs a corpus of sample questions twice against a fake Neo4j driver and a
+fake OpenAI client: once with the intent matcher enabled and once with
+every question forced through nl2cypher. Reports the fast-path hit ratio
+and per-path latency.
+
+Usage:
+    python benchmarks/bench_qa_fast_path.py [--llm-latency 0.4] [--db-latency 0.005]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+
+from app.core.config import settings
+from app.services import intents, neo4j_async, nl2cypher, qa_orchestrator
+from app.services.nl2cypher_cache import TranslationCache
+from fakes import FakeAsyncDriver, FakeAsyncOpenAI
+
+CORPUS = [
+    "Where do I live?", "where do i live", "Where does Sara work?", "Where do I work?",
+    "Who lives in Karachi?", "Who lives in San Francisco?", "Who works at Acme?",
+    "who works for Ragioneer?", "Who are my friends?", "Who are Sara's friends?",
+    "Who is Ali friends with?", "Who are my siblings?", "Who did I meet with?",
+    "Who have I met?", "What are my goals?", "What is Sara's goal?",
+    "Which company does Ali work for?", "Where is Aashir based?", "Who met with Sara?",
+    "Who do I work for?",
+    # shapes the matcher does not know -> LLM
+    "How many people live in Karachi?", "Which of my friends work at Acme?",
+    "Who lives in the same city as Sara?", "What did I do last week?",
+    "Do any of my siblings work at Ragioneer?", "What is the most common city among my friends?",
+]
+
+
+def _responder(messages) -> str:
+    return "MATCH (p:Person)-[:LIVES_IN]->(c:Place) RETURN c.name AS name LIMIT 5"
+
+
+async def _run() -> float:
+    t0 = time.perf_counter()
+    for q in CORPUS:
+        await qa_orchestrator.answer_question(q, user_id="aashir")
+    return time.perf_counter() - t0
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--llm-latency", type=float, default=0.4, help="fake completion latency (s)")
+    ap.add_argument("--db-latency", type=float, default=0.005, help="fake Neo4j latency (s)")
+    args = ap.parse_args()
+
+    settings.OPENAI_API_KEY = settings.OPENAI_API_KEY or "bench"
+    neo4j_async._driver = FakeAsyncDriver(
+        latency=args.db_latency, handler=lambda q, p: [{"id": "place:karachi", "name": "Karachi"}])
+
+    def fresh_llm() -> None:
+        # No translation cache carry-over between runs: each distinct question costs a call.
+        nl2cypher._cache = TranslationCache(max_entries=1024)
+        nl2cypher._aclient = FakeAsyncOpenAI(_responder, latency=args.llm_latency)
+        for s in qa_orchestrator._stats.values():
+            s.update(count=0, total_ms=0.0, max_ms=0.0)
+
+    fresh_llm()
+    with_fast = await _run()
+    stats = qa_orchestrator.qa_stats()
+    llm_calls = len(nl2cypher._aclient.calls)
+
+    fresh_llm()
+    original_match = intents.match
+    intents.match = lambda question, user_id=None: None
+    try:
+        llm_only = await _run()
+    finally:
+        intents.match = original_match
+
+    print(f"{len(CORPUS)} questions, fake LLM {args.llm_latency * 1000:.0f} ms, "
+          f"fake DB {args.db_latency * 1000:.0f} ms")
+    print(f"fast-path hit ratio: {stats['fast_path_ratio']:.0%} "
+          f"({stats['template']['count']} template / {stats['llm']['count']} llm)")
+    print(f"template path avg {stats['template']['avg_ms']:.2f} ms, "
+          f"llm path avg {stats['llm']['avg_ms']:.2f} ms")
+    print(f"corpus wall time: {with_fast:.2f} s with fast path ({llm_calls} LLM calls) "
+          f"vs {llm_only:.2f} s LLM-only ({len(nl2cypher._aclient.calls)} LLM calls)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
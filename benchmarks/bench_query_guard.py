@@ -0,0 +1,102 @@
+"""
+Cost of the query guard: lexical checks, EXPLAIN pre-flight and its plan cache.
+
+A fake planner answers EXPLAIN like Neo4j would for a graph of --nodes
+nodes: each extra comma-separated pattern in MATCH multiplies the estimate
+(CartesianProduct). Reports the per-statement cost of ``check`` (tokenize,
+write detection, LIMIT injection), of ``prepare`` with a cold vs warm plan
+cache, and what ``/graph/run`` answers for a cartesian scan.
+
+Usage:
+    python benchmarks/bench_query_guard.py [--nodes 1000000] [--db-latency 0.002] [--repeat 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+import time
+from typing import Any, Dict
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+import httpx
+
+from app.core.config import settings
+from app.main import app
+from app.services import neo4j_async, query_guard
+from fakes import FakeAsyncDriver
+
+QUERIES = [
+    "MATCH (p:Person {id:$id})-[:LIVES_IN]->(c:Place) RETURN c.name AS city",
+    "MATCH (p:Person)-[:WORKS_AT]->(o:Org) WHERE o.name = 'Acme' RETURN p.name",
+    "MATCH (a:Person),(b:Place) RETURN a.name, b.name",
+    "MATCH (p:Person) RETURN p.name AS name ORDER BY name",
+    "MATCH (a)-[r]->(b) RETURN type(r) AS t, count(*) AS n ORDER BY n DESC",
+    "// who is friends with whom\nMATCH (a:Person)-[:FRIEND_OF]-(b:Person) RETURN a.id, b.id LIMIT 50000",
+]
+
+
+def _planner(nodes: int):
+    def plan(query: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        match = re.search(r"MATCH\s+(.*?)\s+(?:WHERE|RETURN|WITH)\b", query, re.S | re.I)
+        patterns = match.group(1).count("),(") + 1 if match else 1
+        rows = float(nodes) ** patterns
+        op = "CartesianProduct@neo4j" if patterns > 1 else "NodeByLabelScan@neo4j"
+        return {"operatorType": "ProduceResults@neo4j", "args": {"EstimatedRows": rows},
+                "children": [{"operatorType": op, "args": {"EstimatedRows": rows}, "children": []}]}
+    return plan
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--nodes", type=int, default=1_000_000)
+    ap.add_argument("--db-latency", type=float, default=0.002, help="fake EXPLAIN round trip (s)")
+    ap.add_argument("--repeat", type=int, default=2000)
+    args = ap.parse_args()
+
+    driver = FakeAsyncDriver(latency=args.db_latency, planner=_planner(args.nodes), record=False)
+    neo4j_async._driver = driver
+    settings.QUERY_GUARD_MAX_EST_ROWS = args.nodes * 10
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        for q in QUERIES:
+            query_guard.check(q, read_only=False, limit=1000)
+    check_us = (time.perf_counter() - t0) / (args.repeat * len(QUERIES)) * 1e6
+
+    async def preflight(q: str) -> None:
+        try:
+            await query_guard.prepare(q, read_only=False, limit=1000, explain=True)
+        except query_guard.QueryRejected:
+            pass
+
+    query_guard.plan_cache.clear()
+    t0 = time.perf_counter()
+    for q in QUERIES:
+        await preflight(q)
+    cold_ms = (time.perf_counter() - t0) / len(QUERIES) * 1000
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        for q in QUERIES:
+            await preflight(q)
+    warm_us = (time.perf_counter() - t0) / (args.repeat * len(QUERIES)) * 1e6
+
+    print(f"check (tokenize + write scan + LIMIT): {check_us:.1f} us/statement")
+    print(f"prepare with EXPLAIN: cold {cold_ms:.2f} ms/statement, "
+          f"cached {warm_us:.1f} us/statement")
+    print("plan cache:", query_guard.guard_stats())
+
+    settings.QUERY_GUARD_EXPLAIN = True
+    driver.latency, driver.record = 0.0, True
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as c:
+        for q in (QUERIES[2], QUERIES[0]):
+            r = await c.post("/graph/run", json={"query": q, "params": {"id": "user:demo"}},
+                             headers={"Cache-Control": "no-store"})
+            sent = driver.calls[-1][0] if driver.calls else ""
+            print(f"/graph/run {q[:40]!r}... -> {r.status_code} {r.json().get('detail', '')}")
+            if r.status_code == 200:
+                print(f"    ran: {sent!r} with timeout {driver.timeouts[-1]}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
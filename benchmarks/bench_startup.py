@@ -0,0 +1,124 @@
+"""
+Import time of ``app.main`` and time to first request after a cold start.
+
+Each measurement runs in a fresh interpreter. Import time is the median of
+``--runs`` imports of ``app.main``, next to a bare ``python -c pass``; the
+heaviest top-level packages come from ``-X importtime``. Time to first
+request starts the app (startup handlers included) against a fake Neo4j
+whose first connection takes ``--connect`` seconds, then records when
+``/healthz``, the first ``/kg/graph_view`` and a passing ``/readyz`` answer;
+the "blocking" row repeats that with the pool warm-up awaited inside
+startup, the way boot used to wait on ``verify_connectivity``.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--connect 2.0]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+BACKEND = HERE.parent / "backend"
+
+
+def _python(code: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args, "-c", code], cwd=BACKEND,
+                          capture_output=True, text=True, check=True)
+
+
+def _wall_ms(code: str) -> float:
+    t0 = time.perf_counter()
+    _python(code)
+    return (time.perf_counter() - t0) * 1000
+
+
+def _top_imports(n: int = 6):
+    err = _python("import app.main", "-X", "importtime").stderr
+    rows = []
+    for line in err.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:  # direct imports of app.main and of the app package
+            rows.append((int(parts[1]) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+async def _child(connect: float, blocking: bool) -> None:
+    t0 = time.perf_counter()
+    import fakes  # noqa: F401  (puts backend/ on sys.path)
+    import httpx
+
+    from app.graph.store import get_store
+    from app.main import app
+
+    t_import = time.perf_counter()
+
+    def handler(query, params):
+        if "subgraphAll" in query:
+            return [{"nodes": [], "edges": [], "next_cursor": None}]
+        return [{"ok": 1}]
+
+    fakes.install(fakes.FakeAsyncDriver(latency=0.002, handler=handler, record=False,
+                                        connect_latency=connect))
+    await app.router.startup()
+    if blocking:
+        await get_store().warm_up()
+    t_started = time.perf_counter()
+    marks = {"import": t_import - t0, "startup": t_started - t_import}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as c:
+        assert (await c.get("/healthz")).status_code == 200
+        marks["healthz"] = time.perf_counter() - t0
+        assert (await c.get("/kg/graph_view", params={"user_id": "demo"})).status_code == 200
+        marks["first_query"] = time.perf_counter() - t0
+        while (await c.get("/readyz")).status_code != 200:
+            pass
+        marks["ready"] = time.perf_counter() - t0
+    await app.router.shutdown()
+    print(json.dumps({k: round(v * 1000, 1) for k, v in marks.items()}))
+
+
+def _first_request(connect: float, blocking: bool) -> dict:
+    code = ("import asyncio, sys; sys.path.insert(0, %r); import bench_startup; "
+            "asyncio.run(bench_startup._child(%r, %r))" % (str(HERE), connect, blocking))
+    t0 = time.perf_counter()
+    out = _python(code).stdout
+    marks = json.loads(out.strip().splitlines()[-1])
+    marks["process"] = round((time.perf_counter() - t0) * 1000, 1)
+    return marks
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--connect", type=float, default=2.0, help="seconds the first Neo4j connection takes")
+    args = ap.parse_args()
+
+    bare = statistics.median(_wall_ms("pass") for _ in range(args.runs))
+    imp = statistics.median(_wall_ms("import app.main") for _ in range(args.runs))
+    loaded = _python("import sys, app.main; print(' '.join(m for m in ('openai', 'neo4j', 'dotenv') "
+                     "if m in sys.modules))").stdout.strip()
+    print(f"interpreter       {bare:7.0f} ms")
+    print(f"import app.main   {imp:7.0f} ms  (+{imp - bare:.0f} ms; loaded: {loaded or '-'})")
+    for ms, name in _top_imports():
+        print(f"  {name:<24} {ms:7.0f} ms")
+
+    print(f"\nfirst request, first Neo4j connection takes {args.connect:g} s "
+          "(ms since the child process started importing the app):")
+    print(f"{'startup':<12} {'import':>8} {'startup':>8} {'healthz':>8} {'query':>8} {'ready':>8} {'process':>8}")
+    for label, blocking in (("background", False), ("blocking", True)):
+        m = _first_request(args.connect, blocking)
+        print(f"{label:<12} {m['import']:>8} {m['startup']:>8} {m['healthz']:>8} "
+              f"{m['first_query']:>8} {m['ready']:>8} {m['process']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Per-triple cost of ``upsert_triples`` as the graph grows from 10k to 1M nodes.
+
+The fake store executes the two query shapes the way Neo4j plans them:
+
+* the legacy ``MATCH (s {id:r.subj})`` has no label, so every endpoint is an
+  all-nodes scan;
+* the label-scoped ``MATCH (s:`Person` {id:r.subj})`` is a seek on the
+  per-label ``id`` uniqueness index (a dict lookup here).
+
+Usage:
+    python benchmarks/bench_triple_upsert.py [--triples 2000] [--legacy-triples 20]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+import time
+from typing import Any, Dict, List
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+
+from app.graph import labels
+from app.graph.loaders.upsert import upsert_triples
+from app.models.graph import RelType, Triple
+from app.services import neo4j_async
+from fakes import FakeAsyncDriver
+
+LEGACY_QUERY = """
+UNWIND $rels AS r
+MATCH (s {id:r.subj})
+MATCH (o {id:r.obj})
+CALL apoc.merge.relationship(s, r.pred, {}, r.props, o) YIELD rel
+SET rel += r.props
+RETURN 1 AS ok
+"""
+
+_SCOPED = re.compile(r"MATCH \(s:`(\w+)` \{id:r\.subj\}\)\s+MATCH \(o:`(\w+)` \{id:r\.obj\}\)")
+
+
+class FakeStore:
+    """Nodes indexed per label, plus the flat node list a label-less scan walks."""
+
+    def __init__(self, n_nodes: int):
+        per = n_nodes // 3
+        self.by_label: Dict[str, Dict[str, dict]] = {
+            "Person": {f"user:{i}": {} for i in range(per)},
+            "Place": {f"place:{i}": {} for i in range(per)},
+            "Org": {f"org:{i}": {} for i in range(n_nodes - 2 * per)},
+        }
+        self.all_ids: List[str] = [i for ids in self.by_label.values() for i in ids]
+        self.edges: set = set()
+
+    def _scan(self, node_id: str) -> bool:
+        for nid in self.all_ids:
+            if nid == node_id:
+                return True
+        return False
+
+    def handler(self, query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if "UNWIND $ids" in query:  # label lookup for unresolved ids
+            return [
+                {"id": i, "labels": [label]}
+                for i in params["ids"]
+                for label, ids in self.by_label.items() if i in ids
+            ]
+        n = 0
+        scoped = _SCOPED.search(query)
+        for r in params.get("rels", []):
+            if scoped:
+                s_ok = r["subj"] in self.by_label[scoped.group(1)]
+                o_ok = r["obj"] in self.by_label[scoped.group(2)]
+            else:
+                s_ok = self._scan(r["subj"])
+                o_ok = self._scan(r["obj"])
+            if s_ok and o_ok:
+                self.edges.add((r["subj"], r["pred"], r["obj"]))
+                n += 1
+        return [{"n": n}]
+
+
+def _triples(store: FakeStore, count: int) -> List[Triple]:
+    people = len(store.by_label["Person"])
+    places = len(store.by_label["Place"])
+    return [
+        Triple(subj=f"user:{(i * 7919) % people}", pred=RelType.LIVES_IN,
+               obj=f"place:{(i * 104729) % places}")
+        for i in range(count)
+    ]
+
+
+async def _per_triple_us(coro_factory, count: int) -> float:
+    t0 = time.perf_counter()
+    await coro_factory()
+    return (time.perf_counter() - t0) / count * 1e6
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--triples", type=int, default=2000, help="triples per label-scoped run")
+    ap.add_argument("--legacy-triples", type=int, default=20, help="triples per legacy run")
+    args = ap.parse_args()
+
+    print(f"{'nodes':>10} {'legacy us/triple':>18} {'scoped us/triple':>18}")
+    for n_nodes in (10_000, 100_000, 1_000_000):
+        store = FakeStore(n_nodes)
+        neo4j_async._driver = FakeAsyncDriver(handler=store.handler)
+        labels.clear_cache()
+
+        legacy = _triples(store, args.legacy_triples)
+        legacy_rows = [{"subj": t.subj, "pred": t.pred.value, "obj": t.obj, "props": t.props}
+                       for t in legacy]
+        legacy_us = await _per_triple_us(
+            lambda: neo4j_async.arun_cypher(LEGACY_QUERY, {"rels": legacy_rows}), len(legacy))
+
+        scoped = _triples(store, args.triples)
+        scoped_us = await _per_triple_us(lambda: upsert_triples(scoped), len(scoped))
+        print(f"{n_nodes:>10} {legacy_us:>18.1f} {scoped_us:>18.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""
+Local OpenAI-compatible ``/v1/chat/completions`` server with latency and fault injection.
+
+Extraction batches (a user message of the form ``{"messages": [...]}``) get
+a JSON ``results`` answer built from two toy rules: "in <Capitalized>" is a
+place the speaker lives in, "at <Capitalized>" an org they work at. Any
+other prompt gets a fixed Cypher statement.
+
+Faults are drawn per request and can be changed at runtime through
+``POST /_control`` (same keys as the CLI flags); ``GET /_stats`` returns
+request counters.
+
+Usage:
+    python benchmarks/fake_openai_server.py [--port 8011] [--latency 0.2] [--jitter 0.05]
+        [--per-message 0.01] [--error-rate 0] [--hang-rate 0] [--hang 30]
+Then point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8011/v1
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+_PLACE = re.compile(r"\bin ([A-Z][\w]+(?: [A-Z][\w]+)*)")
+_ORG = re.compile(r"\bat ([A-Z][\w]+(?: [A-Z][\w]+)*)")
+
+config: Dict[str, float] = {
+    "latency": 0.2, "jitter": 0.05, "per_message": 0.01,
+    "error_rate": 0.0, "hang_rate": 0.0, "hang": 30.0,
+}
+stats: Dict[str, int] = {"requests": 0, "messages": 0, "errors": 0, "hangs": 0,
+                         "completed": 0, "disconnected": 0}
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"\W+", "_", name.lower()).strip("_")
+
+
+def _extract(msg: Dict[str, Any]) -> Dict[str, Any]:
+    me = f"user:{msg.get('user_id')}"
+    ents = [{"id": me, "label": "Person", "name": msg.get("user_id")}]
+    triples = []
+    text = msg.get("text", "")
+    for pattern, prefix, label, pred in ((_PLACE, "place", "Place", "LIVES_IN"),
+                                         (_ORG, "org", "Org", "WORKS_AT")):
+        for name in pattern.findall(text):
+            node_id = f"{prefix}:{_slug(name)}"
+            ents.append({"id": node_id, "label": label, "name": name})
+            triples.append({"subj": me, "pred": pred, "obj": node_id})
+    return {"index": msg.get("index"), "entities": ents, "triples": triples}
+
+
+def _answer(body: Dict[str, Any]) -> Tuple[str, int]:
+    user = next((m["content"] for m in reversed(body.get("messages", []))
+                 if m.get("role") == "user"), "")
+    try:
+        batch = json.loads(user)["messages"]
+    except (ValueError, TypeError, KeyError):
+        return "MATCH (n) RETURN n LIMIT 5", 1
+    return json.dumps({"results": [_extract(m) for m in batch]}), len(batch)
+
+
+async def completions(request: Request) -> JSONResponse:
+    body = await request.json()
+    content, n = _answer(body)
+    stats["requests"] += 1
+    stats["messages"] += n
+    delay = config["latency"] + random.uniform(0, config["jitter"]) + config["per_message"] * n
+    if random.random() < config["hang_rate"]:
+        stats["hangs"] += 1
+        delay = config["hang"]
+    try:
+        await asyncio.sleep(delay)
+    except asyncio.CancelledError:  # client went away
+        stats["disconnected"] += 1
+        raise
+    if random.random() < config["error_rate"]:
+        stats["errors"] += 1
+        return JSONResponse({"error": {"message": "injected failure", "type": "server_error"}},
+                            status_code=500)
+    stats["completed"] += 1
+    words = sum(len(m.get("content", "").split()) for m in body.get("messages", []))
+    return JSONResponse({
+        "id": f"chatcmpl-fake-{stats['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": words, "completion_tokens": len(content.split()),
+                  "total_tokens": words + len(content.split())},
+    })
+
+
+async def control(request: Request) -> JSONResponse:
+    config.update({k: float(v) for k, v in (await request.json()).items() if k in config})
+    return JSONResponse(config)
+
+
+async def get_stats(request: Request) -> JSONResponse:
+    return JSONResponse(stats)
+
+
+app = Starlette(routes=[
+    Route("/v1/chat/completions", completions, methods=["POST"]),
+    Route("/_control", control, methods=["POST"]),
+    Route("/_stats", get_stats),
+])
+
+
+def serve_in_thread(port: int = 8011, **overrides: float) -> Tuple[uvicorn.Server, str]:
+    """Start the server on a daemon thread and return (server, base_url)."""
+    config.update(overrides)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}/v1"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--port", type=int, default=8011)
+    for key, value in config.items():
+        ap.add_argument(f"--{key.replace('_', '-')}", type=float, default=value)
+    args = ap.parse_args()
+    config.update({k: getattr(args, k) for k in config})
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+In-process stand-ins for the Neo4j driver and the OpenAI client used by the
+benchmarks.
+
+The driver fakes mimic just enough of the neo4j 5.x surface (``session()``,
+``run()``, iterating records, ``record.data()``) for ``app.services`` to talk
+to them. Every call is recorded and an optional per-call latency simulates
+the network round trip. A ``handler(query, params) -> rows`` callable decides
+what each query returns; an optional ``planner(query, params) -> plan``
+answers ``EXPLAIN`` with a plan dict shaped like the Bolt metadata.
+``neo4j.Query`` objects are unwrapped and their timeouts kept in ``timeouts``
+(``unit_of_work`` timeouts of managed transactions too); each session's
+``default_access_mode`` lands in ``access_modes``.
+
+The OpenAI fakes expose ``client.chat.completions.create(...)`` and answer
+through a ``responder(messages) -> str`` callable; ``install`` wires both
+fakes into the app's module-level clients.
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from types import SimpleNamespace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT / "backend") not in sys.path:
+    sys.path.insert(0, str(ROOT / "backend"))
+
+Rows = List[Dict[str, Any]]
+Handler = Callable[[str, Dict[str, Any]], Rows]
+Planner = Callable[[str, Dict[str, Any]], Dict[str, Any]]
+
+
+def ok_handler(query: str, params: Dict[str, Any]) -> Rows:
+    """Default handler: every query returns a single ``{"ok": 1}`` row."""
+    return [{"ok": 1}]
+
+
+class FakeRecord:
+    def __init__(self, row: Dict[str, Any]):
+        self._row = row
+
+    def data(self) -> Dict[str, Any]:
+        return dict(self._row)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._row[key]
+
+
+class FakeAsyncResult:
+    def __init__(self, rows: Rows, plan: Optional[Dict[str, Any]] = None):
+        self._rows = iter(rows)
+        self._plan = plan
+
+    def __aiter__(self) -> "FakeAsyncResult":
+        return self
+
+    async def __anext__(self) -> FakeRecord:
+        try:
+            return FakeRecord(next(self._rows))
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def consume(self) -> SimpleNamespace:
+        for _ in self._rows:
+            pass
+        return SimpleNamespace(plan=self._plan)
+
+
+class FakeAsyncTransaction:
+    def __init__(self, driver: "FakeAsyncDriver", timeout: Optional[float] = None):
+        self._driver = driver
+        self._timeout = timeout  # from ``unit_of_work`` in managed transactions
+
+    async def run(self, query: Any, parameters: Optional[Dict[str, Any]] = None,
+                  **kwargs: Any) -> FakeAsyncResult:
+        params = dict(parameters or {}, **kwargs)
+        timeout = getattr(query, "timeout", self._timeout)
+        query = getattr(query, "text", query)
+        await self._driver._connect()
+        if self._driver.record:
+            self._driver.calls.append((query, params))
+            self._driver.timeouts.append(timeout)
+        delay = self._driver.latency
+        if self._driver.row_cost:
+            delay += self._driver.row_cost * max(
+                (len(v) for v in params.values() if isinstance(v, list)), default=1)
+        if delay:
+            await asyncio.sleep(delay)
+        if query.startswith("EXPLAIN ") and self._driver.planner is not None:
+            return FakeAsyncResult([], plan=self._driver.planner(query[len("EXPLAIN "):], params))
+        return FakeAsyncResult(self._driver.handler(query, params))
+
+
+class FakeAsyncSession(FakeAsyncTransaction):
+    async def __aenter__(self) -> "FakeAsyncSession":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+    async def execute_read(self, work: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        tx = FakeAsyncTransaction(self._driver, getattr(work, "timeout", None))
+        return await work(tx, *args, **kwargs)
+
+    async def execute_write(self, work: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        tx = FakeAsyncTransaction(self._driver, getattr(work, "timeout", None))
+        return await work(tx, *args, **kwargs)
+
+
+class FakeAsyncDriver:
+    """
+    Async driver stand-in; ``latency`` is seconds added to every ``run`` and
+    ``row_cost`` seconds per row of its largest list parameter (the UNWIND
+    payload). Pass ``record=False`` to skip the call log in memory-sensitive runs.
+    ``connect_latency`` is paid once, by whichever of ``verify_connectivity``
+    or the first ``run`` comes first (a cold pool meeting a slow server).
+    """
+
+    def __init__(self, latency: float = 0.0, handler: Handler = ok_handler,
+                 record: bool = True, planner: Optional[Planner] = None,
+                 row_cost: float = 0.0, connect_latency: float = 0.0):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self._connected = not connect_latency
+        self._connect_lock = asyncio.Lock()
+        self.row_cost = row_cost
+        self.handler = handler
+        self.record = record
+        self.planner = planner
+        self.calls: List[Tuple[str, Dict[str, Any]]] = []
+        self.timeouts: List[Optional[float]] = []
+        self.access_modes: List[str] = []
+
+    def session(self, **kwargs: Any) -> FakeAsyncSession:
+        if self.record:
+            self.access_modes.append(kwargs.get("default_access_mode", "WRITE"))
+        return FakeAsyncSession(self)
+
+    async def _connect(self) -> None:
+        if self._connected:
+            return
+        async with self._connect_lock:
+            if not self._connected:
+                await asyncio.sleep(self.connect_latency)
+                self._connected = True
+
+    async def verify_connectivity(self) -> None:
+        await self._connect()
+
+    async def close(self) -> None:
+        return None
+
+
+class FakeResult:
+    def __init__(self, rows: Rows):
+        self._rows = rows
+
+    def __iter__(self):
+        return (FakeRecord(r) for r in self._rows)
+
+    def single(self) -> Optional[FakeRecord]:
+        return FakeRecord(self._rows[0]) if self._rows else None
+
+    def consume(self) -> SimpleNamespace:
+        return SimpleNamespace(plan=None)
+
+
+class FakeTransaction:
+    def __init__(self, driver: "FakeDriver"):
+        self._driver = driver
+
+    def run(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+            **kwargs: Any) -> FakeResult:
+        params = dict(parameters or {}, **kwargs)
+        if self._driver.record:
+            self._driver.calls.append((query, params))
+        if self._driver.latency:
+            time.sleep(self._driver.latency)
+        return FakeResult(self._driver.handler(query, params))
+
+
+class FakeSession(FakeTransaction):
+    def __enter__(self) -> "FakeSession":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def execute_read(self, work: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return work(FakeTransaction(self._driver), *args, **kwargs)
+
+    def execute_write(self, work: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return work(FakeTransaction(self._driver), *args, **kwargs)
+
+
+class FakeDriver:
+    """Sync driver stand-in mirroring :class:`FakeAsyncDriver`."""
+
+    def __init__(self, latency: float = 0.0, handler: Handler = ok_handler,
+                 record: bool = True):
+        self.latency = latency
+        self.handler = handler
+        self.record = record
+        self.calls: List[Tuple[str, Dict[str, Any]]] = []
+
+    def session(self, **kwargs: Any) -> FakeSession:
+        return FakeSession(self)
+
+    def verify_connectivity(self) -> None:
+        return None
+
+    def close(self) -> None:
+        return None
+
+
+Responder = Callable[[List[Dict[str, str]]], str]
+
+
+def _completion(content: str, messages: List[Dict[str, str]]) -> SimpleNamespace:
+    prompt_tokens = sum(len(m["content"].split()) for m in messages)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens,
+                              completion_tokens=len(content.split()),
+                              total_tokens=prompt_tokens + len(content.split())),
+    )
+
+
+class _FakeCompletions:
+    def __init__(self, owner: "FakeOpenAI"):
+        self._owner = owner
+
+    def create(self, *, messages: List[Dict[str, str]], **kwargs: Any) -> SimpleNamespace:
+        self._owner.calls.append(messages)
+        if self._owner.latency:
+            time.sleep(self._owner.latency)
+        return _completion(self._owner.responder(messages), messages)
+
+
+class _FakeAsyncCompletions(_FakeCompletions):
+    async def create(self, *, messages: List[Dict[str, str]], **kwargs: Any) -> SimpleNamespace:
+        self._owner.calls.append(messages)
+        if self._owner.latency:
+            await asyncio.sleep(self._owner.latency)
+        return _completion(self._owner.responder(messages), messages)
+
+
+class FakeOpenAI:
+    """Sync OpenAI client stand-in; ``calls`` holds every message list sent."""
+
+    _completions = _FakeCompletions
+
+    def __init__(self, responder: Responder, latency: float = 0.0):
+        self.responder = responder
+        self.latency = latency
+        self.calls: List[List[Dict[str, str]]] = []
+        self.chat = SimpleNamespace(completions=self._completions(self))
+
+
+class FakeAsyncOpenAI(FakeOpenAI):
+    """Async OpenAI client stand-in."""
+
+    _completions = _FakeAsyncCompletions
+
+
+
+def install(driver: Optional[FakeAsyncDriver] = None,
+            openai: Optional[FakeAsyncOpenAI] = None) -> None:
+    """
+    Point the app's module-level clients at the fakes: the async Neo4j
+    driver and the nl2cypher OpenAI clients (sync and async share ``openai``'s
+    responder and latency). Call before driving the app through ASGI.
+    """
+    from app.core.config import settings
+    from app.services import neo4j_async, nl2cypher
+
+    if driver is not None:
+        neo4j_async._driver = driver
+    if openai is not None:
+        settings.OPENAI_API_KEY = settings.OPENAI_API_KEY or "bench"
+        nl2cypher._aclient = openai
+        nl2cypher._client = FakeOpenAI(openai.responder, latency=openai.latency)
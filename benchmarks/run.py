@@ -0,0 +1,225 @@
+"""
+Benchmark suite: API throughput and latency percentiles against in-process fakes.
+
+Drives the FastAPI app through ``httpx.ASGITransport`` with the Neo4j driver
+and the OpenAI client replaced by the stand-ins in ``fakes.py`` (fixed
+latency per round trip), so runs are offline and repeatable. Scenarios:
+
+  ingest_b{N}     POST /kg/ingest with N entities + N triples per request
+  graph_view      GET /kg/graph_view (one neighborhood page)
+  graph_run       POST /graph/run, result cache bypassed
+  graph_run_hit   POST /graph/run, served from the result cache
+  chat_template   POST /chat/ask answered by the template fast path
+  chat_llm        POST /chat/ask that needs an NL->Cypher completion
+
+Each reports req/s, p50/p95/p99 latency and Neo4j/LLM round trips per
+request. ``--out`` writes the results as JSON; ``--baseline`` compares with
+a previous file and exits 1 if any scenario's p95 or req/s is worse by more
+than ``--threshold`` (a fraction).
+
+Usage:
+    python benchmarks/run.py [--requests 200] [--concurrency 20] [--out results.json]
+    python benchmarks/run.py --baseline results.json --threshold 0.15
+    python benchmarks/run.py --only ingest graph_run
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import fakes  # noqa: F401  (puts backend/ on sys.path)
+import httpx
+
+from app.main import app
+from app.services.write_behind import write_queue
+from fakes import FakeAsyncDriver, FakeAsyncOpenAI, install
+
+INGEST_BATCHES = (1, 10, 100, 1000)
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+def graph_handler(query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Rows shaped like what each endpoint's Cypher returns."""
+    if "apoc.path.subgraphAll" in query:
+        n = min(params.get("limit", 200), 50)
+        return [{
+            "nodes": [{"id": f"place:{i}", "label": "Place", "title": f"Place {i}"} for i in range(n)],
+            "edges": [{"from": params["uid"], "to": f"place:{i}", "label": "LIVES_IN"} for i in range(n)],
+            "next_cursor": None,
+        }]
+    if "UNWIND" in query:
+        return [{"n": len(next((v for v in params.values() if isinstance(v, list)), []))}]
+    return [{"id": "place:karachi", "name": "Karachi"}]
+
+
+def llm_responder(messages: List[Dict[str, str]]) -> str:
+    return "MATCH (p:Person)-[:LIVES_IN]->(c:Place) RETURN c.name AS name LIMIT 5"
+
+
+def _ingest(batch: int) -> Request:
+    async def send(c: httpx.AsyncClient, i: int) -> httpx.Response:
+        base = i * batch
+        ents = [{"id": f"user:b{base + k}", "label": "Person", "name": f"P{base + k}"} for k in range(batch)]
+        trips = [{"subj": f"user:b{base + k}", "pred": "LIVES_IN", "obj": "place:karachi"}
+                 for k in range(batch)]
+        ents.append({"id": "place:karachi", "label": "Place", "name": "Karachi"})
+        return await c.post("/kg/ingest", json={"entities": ents, "triples": trips})
+    return send
+
+
+async def _graph_view(c: httpx.AsyncClient, i: int) -> httpx.Response:
+    return await c.get("/kg/graph_view", params={"user_id": f"u{i % 100}", "depth": 2})
+
+
+async def _graph_run(c: httpx.AsyncClient, i: int) -> httpx.Response:
+    return await c.post("/graph/run", headers={"Cache-Control": "no-store"},
+                        json={"query": "MATCH (p:Person {id:$id}) RETURN p.name AS name",
+                              "params": {"id": f"user:{i}"}})
+
+
+async def _graph_run_hit(c: httpx.AsyncClient, i: int) -> httpx.Response:
+    return await c.post("/graph/run", json={"query": "MATCH (p:Place) RETURN p.name AS name"})
+
+
+async def _chat_template(c: httpx.AsyncClient, i: int) -> httpx.Response:
+    return await c.post("/chat/ask", json={"text": "Where do I live?", "user_id": f"u{i % 50}"})
+
+
+async def _chat_llm(c: httpx.AsyncClient, i: int) -> httpx.Response:
+    # distinct questions, so the translation cache does not hide the completion
+    return await c.post("/chat/ask", json={"text": f"How many people live in city {i}?",
+                                           "user_id": f"u{i % 50}"})
+
+
+def scenarios() -> Dict[str, Request]:
+    out: Dict[str, Request] = {f"ingest_b{b}": _ingest(b) for b in INGEST_BATCHES}
+    out.update(graph_view=_graph_view, graph_run=_graph_run, graph_run_hit=_graph_run_hit,
+               chat_template=_chat_template, chat_llm=_chat_llm)
+    return out
+
+
+def percentile(xs: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``xs`` (q in 0..100)."""
+    s = sorted(xs)
+    return s[max(0, math.ceil(q / 100 * len(s)) - 1)] if s else 0.0
+
+
+async def measure(client: httpx.AsyncClient, send: Request, requests: int, concurrency: int,
+                  driver: FakeAsyncDriver, llm: FakeAsyncOpenAI) -> Dict[str, Any]:
+    lat: List[float] = []
+    errors = 0
+    next_i = iter(range(requests))
+    db0, llm0 = len(driver.calls), len(llm.calls)
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in next_i:
+            t0 = time.perf_counter()
+            r = await send(client, i)
+            lat.append(time.perf_counter() - t0)
+            errors += r.status_code >= 400
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+    ms = [x * 1000 for x in lat]
+    return {
+        "requests": requests, "concurrency": concurrency, "errors": errors,
+        "wall_s": round(wall, 4), "rps": round(requests / wall, 2),
+        "p50_ms": round(percentile(ms, 50), 3), "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3), "max_ms": round(max(ms), 3),
+        "db_calls_per_req": round((len(driver.calls) - db0) / requests, 2),
+        "llm_calls_per_req": round((len(llm.calls) - llm0) / requests, 2),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Regressions of p95 (up) or req/s (down) beyond ``threshold``, as messages."""
+    out = []
+    for name, cur in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        if base["p95_ms"] and cur["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            out.append(f"{name}: p95 {base['p95_ms']:.2f} -> {cur['p95_ms']:.2f} ms")
+        if base["rps"] and cur["rps"] < base["rps"] * (1 - threshold):
+            out.append(f"{name}: req/s {base['rps']:.1f} -> {cur['rps']:.1f}")
+    return out
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    driver = FakeAsyncDriver(latency=args.db_latency, handler=graph_handler)
+    llm = FakeAsyncOpenAI(llm_responder, latency=args.llm_latency)
+    install(driver, llm)
+    selected = {name: send for name, send in scenarios().items()
+                if not args.only or any(name.startswith(p) for p in args.only)}
+
+    results: Dict[str, Any] = {}
+    write_queue.start()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                     base_url="http://bench", timeout=60) as client:
+            for name, send in selected.items():
+                await measure(client, send, min(args.warmup, args.requests), args.concurrency,
+                              driver, llm)
+                driver.calls.clear()
+                llm.calls.clear()
+                results[name] = await measure(client, send, args.requests, args.concurrency,
+                                              driver, llm)
+                r = results[name]
+                print(f"{name:<15} {r['rps']:>9.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+                      f"{r['p99_ms']:>9.2f} {r['db_calls_per_req']:>7.2f} {r['llm_calls_per_req']:>7.2f}"
+                      f"{'  errors %d' % r['errors'] if r['errors'] else ''}", flush=True)
+    finally:
+        await write_queue.stop()
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "requests": args.requests, "concurrency": args.concurrency,
+            "db_latency_s": args.db_latency, "llm_latency_s": args.llm_latency,
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    ap.add_argument("--warmup", type=int, default=20, help="unmeasured requests per scenario")
+    ap.add_argument("--concurrency", type=int, default=20)
+    ap.add_argument("--db-latency", type=float, default=0.005, help="fake Neo4j round trip (s)")
+    ap.add_argument("--llm-latency", type=float, default=0.2, help="fake completion latency (s)")
+    ap.add_argument("--only", nargs="*", help="scenario name prefixes to run")
+    ap.add_argument("--out", help="write results JSON here")
+    ap.add_argument("--baseline", help="results JSON of an earlier run to compare with")
+    ap.add_argument("--threshold", type=float, default=0.2, help="allowed regression (fraction)")
+    args = ap.parse_args()
+
+    print(f"{'scenario':<15} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'db/req':>7} {'llm/req':>7}")
+    results = asyncio.run(run(args))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"wrote {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for msg in regressions:
+            print(f"REGRESSION {msg}")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,10 @@
-CREATE CONSTRAINT person_id IF NOT EXISTS FOR (p:Person) REQUIRE p.id IS UNIQUE;
-CREATE CONSTRAINT org_id    IF NOT EXISTS FOR (o:Org)    REQUIRE o.id IS UNIQUE;
-CREATE CONSTRAINT inv_id    IF NOT EXISTS FOR (i:Investor) REQUIRE i.id IS UNIQUE;
-CREATE CONSTRAINT place_id  IF NOT EXISTS FOR (p:Place)  REQUIRE p.id IS UNIQUE;
-CREATE CONSTRAINT event_id  IF NOT EXISTS FOR (e:Event)  REQUIRE e.id IS UNIQUE;
-CREATE CONSTRAINT goal_id   IF NOT EXISTS FOR (g:Goal)   REQUIRE g.id IS UNIQUE;
-CREATE CONSTRAINT thing_id  IF NOT EXISTS FOR (t:Thing)  REQUIRE t.id IS UNIQUE;
+// Generated by scripts/reconcile_schema.py --print from app.models.graph; do not edit.
+CREATE CONSTRAINT person_id IF NOT EXISTS FOR (n:`Person`) REQUIRE n.`id` IS UNIQUE;
+CREATE INDEX person_name IF NOT EXISTS FOR (x:`Person`) ON (x.`name`);
+CREATE CONSTRAINT place_id IF NOT EXISTS FOR (n:`Place`) REQUIRE n.`id` IS UNIQUE;
+CREATE INDEX place_name IF NOT EXISTS FOR (x:`Place`) ON (x.`name`);
+CREATE CONSTRAINT org_id IF NOT EXISTS FOR (n:`Org`) REQUIRE n.`id` IS UNIQUE;
+CREATE INDEX org_name IF NOT EXISTS FOR (x:`Org`) ON (x.`name`);
+CREATE CONSTRAINT goal_id IF NOT EXISTS FOR (n:`Goal`) REQUIRE n.`id` IS UNIQUE;
+CREATE INDEX goal_name IF NOT EXISTS FOR (x:`Goal`) ON (x.`name`);
+CREATE CONSTRAINT source_id IF NOT EXISTS FOR (n:`Source`) REQUIRE n.`id` IS UNIQUE;
@@ -0,0 +1,97 @@
+# scripts/load_graph.py
+"""
+Bulk-load the graph from .cypher, .csv and .jsonl/.ndjson files.
+
+Cypher files run first (schema statements on their own, the rest grouped
+into transactions), then entities in UNWIND batches with one writer per
+label, then triples once all their endpoints exist. Progress is saved to
+--checkpoint after every batch; rerunning the same command resumes, and
+the checkpoint is removed once the load succeeds.
+
+Usage:
+    python scripts/load_graph.py data/seeds/constraints.cypher people.csv triples.jsonl
+    python scripts/load_graph.py --batch-size 2000 --workers 4 data/*.jsonl
+    python scripts/load_graph.py --restart data/*.jsonl   # ignore an old checkpoint
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from app.graph.loaders.bulk import BulkLoader, Checkpoint, LoadReport  # noqa: E402
+from app.services.neo4j_async import close_async_driver, warm_up_async_driver  # noqa: E402
+
+
+def _progress(every: float):
+    last = [0.0]
+    t0 = time.perf_counter()
+
+    def show(phase: str, r: LoadReport) -> None:
+        now = time.perf_counter()
+        if now - last[0] < every:
+            return
+        last[0] = now
+        rows = r.statements + r.entities + r.triples
+        print(f"   {phase:<8} statements {r.statements:,}  entities {r.entities:,}  "
+              f"triples {r.triples:,}  ({rows / (now - t0):,.0f} rows/s)", flush=True)
+    return show
+
+
+def _summary(r: LoadReport) -> None:
+    for phase, rows in (("cypher", r.statements), ("entities", r.entities), ("triples", r.triples)):
+        secs = r.seconds.get(phase, 0.0)
+        print(f"   {phase:<8} {rows:>10,} in {secs:7.2f}s  ({r.rate(phase, rows):,.0f} rows/s)")
+    print(f"   batches {r.batches:,}, skipped (checkpoint) {r.skipped:,}, failed {r.failed:,}")
+    for f in r.failures:
+        print(f"   ! {f['file']}:{f['line']}: {f['error']}")
+    if r.failed > len(r.failures):
+        print(f"   ! ... and {r.failed - len(r.failures):,} more")
+
+
+async def load(paths, batch_size: int = 1000, workers: int = 4, cypher_batch: int = 50,
+               checkpoint: str = "", restart: bool = False, progress_every: float = 2.0) -> LoadReport:
+    ckpt = Checkpoint(checkpoint or None)
+    if restart:
+        ckpt.clear()
+    loader = BulkLoader(batch_size=batch_size, workers=workers, cypher_batch=cypher_batch,
+                        checkpoint=ckpt, progress=_progress(progress_every))
+    await warm_up_async_driver(workers)  # fail fast if unreachable; one connection per writer
+    try:
+        report = await loader.load(paths)
+    finally:
+        await close_async_driver()
+    ckpt.clear()
+    return report
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("paths", nargs="+", help=".cypher, .csv, .jsonl or .ndjson files, applied in that order")
+    ap.add_argument("--batch-size", type=int, default=1000, help="rows per UNWIND batch")
+    ap.add_argument("--workers", type=int, default=4, help="labels written concurrently")
+    ap.add_argument("--cypher-batch", type=int, default=50, help="statements per transaction")
+    ap.add_argument("--checkpoint", default=".load_graph.checkpoint.json",
+                    help="progress file for resuming ('' to disable)")
+    ap.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = ap.parse_args()
+
+    for p in args.paths:
+        print(f"→ {p}")
+    try:
+        report = asyncio.run(load(args.paths, args.batch_size, args.workers, args.cypher_batch,
+                                  args.checkpoint, args.restart))
+    except KeyboardInterrupt:
+        print(f"Interrupted; rerun the same command to resume from {args.checkpoint}.")
+        return 130
+    _summary(report)
+    print("Done." if not report.failed else "Done, with rejected rows.")
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# scripts/migrate_provenance.py
+"""
+Move message text off relationships onto content-addressed Source nodes.
+
+Graphs written before ``app.graph.provenance`` keep the whole message in
+``text`` (plus ``source_id``) on every relationship extracted from it. This
+rewrites each such relationship the way the upserts now write it: one
+``(:Source {id, text, message_id})`` per distinct text, and ``sources`` /
+``mentions`` on the relationship. It is idempotent, prints the
+text stored before and after, and with --dry-run only measures.
+Apply data/seeds/constraints.cypher first so Source ids are indexed.
+
+Sources are never deleted by the upserts; --prune also removes those that
+no relationship lists in ``sources`` any more (it reads every cited id into
+memory, then deletes in batches). It can be rerun on its own any time.
+
+Usage:
+    python scripts/migrate_provenance.py [--batch-size 1000] [--dry-run] [--prune]
+    python scripts/migrate_provenance.py --snapshot graph.kgmem   # GRAPH_BACKEND=memory
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from app.core.config import settings  # noqa: E402
+from app.graph import provenance  # noqa: E402
+from app.graph.loaders.upsert import source_statements  # noqa: E402
+from app.graph.store.memory_store import MemoryStore  # noqa: E402
+from app.services.neo4j_async import (  # noqa: E402
+    READ_ACCESS, arun_read, arun_write_tx, astream_cypher, close_async_driver,
+    warm_up_async_driver,
+)
+
+_MEASURE_EDGES = """
+MATCH ()-[r]->()
+RETURN count(r) AS edges, count(r.text) AS edges_with_text,
+       sum(size(coalesce(r.text, ''))) AS edge_text_chars
+"""
+_MEASURE_SOURCES = f"""
+MATCH (s:`{provenance.SOURCE_LABEL}`)
+RETURN count(s) AS sources, sum(size(s.text)) AS source_text_chars
+"""
+_LEGACY = """
+MATCH ()-[r]->() WHERE r.text IS NOT NULL
+RETURN elementId(r) AS rid, r.text AS text, r.source_id AS source_id
+"""
+_REWRITE = """
+UNWIND $rows AS row
+MATCH ()-[r]->() WHERE elementId(r) = row.rid
+WITH r, row, coalesce(r.sources, []) AS seen
+SET r.mentions = coalesce(r.mentions, 0) + CASE WHEN row.source IN seen THEN 0 ELSE 1 END,
+    r.sources = CASE WHEN row.source IN seen THEN seen
+                     ELSE (seen + row.source)[-$max_sources..] END
+REMOVE r.text, r.source_id
+RETURN count(r) AS n
+"""
+_CITED = "MATCH ()-[r]->() WHERE r.sources IS NOT NULL UNWIND r.sources AS id RETURN DISTINCT id"
+_ALL_SOURCES = f"MATCH (s:`{provenance.SOURCE_LABEL}`) RETURN s.id AS id"
+_DELETE_SOURCES = f"""
+UNWIND $ids AS id
+MATCH (s:`{provenance.SOURCE_LABEL}` {{id:id}})
+DELETE s
+RETURN count(*) AS n
+"""
+
+
+def _show(when: str, m: Dict[str, Any]) -> None:
+    print(f"   {when:<7} " + "  ".join(f"{k} {v or 0:,}" for k, v in m.items()))
+
+
+async def _measure() -> Dict[str, Any]:
+    edges = (await arun_read(_MEASURE_EDGES, name="provenance_measure"))[0]
+    sources = (await arun_read(_MEASURE_SOURCES, name="provenance_measure"))[0]
+    return {**edges, **sources}
+
+
+async def prune_neo4j(batch_size: int) -> int:
+    cited = {row["id"] async for row in astream_cypher(_CITED, name="provenance_cited",
+                                                       access_mode=READ_ACCESS)}
+    stale = [row["id"] async for row in astream_cypher(_ALL_SOURCES, name="provenance_sources",
+                                                       access_mode=READ_ACCESS)
+             if row["id"] not in cited]
+    for start in range(0, len(stale), batch_size):
+        await arun_write_tx([(_DELETE_SOURCES, {"ids": stale[start:start + batch_size]})],
+                            name="provenance_prune")
+    print(f"   pruned {len(stale):,} uncited sources")
+    return len(stale)
+
+
+async def migrate_neo4j(batch_size: int, dry_run: bool, prune: bool) -> int:
+    await warm_up_async_driver(2)  # fail fast if unreachable; one reader, one writer
+    try:
+        _show("before", await _measure())
+        if dry_run:
+            return 0
+        done = 0
+        batch: List[Dict[str, Any]] = []
+
+        async def flush() -> None:
+            nonlocal done
+            sources = {}
+            for row in batch:
+                sources.setdefault(row["source"], provenance.source_row(row.pop("text"),
+                                                                        row.pop("source_id")))
+            await arun_write_tx(source_statements(sources.values()) + [
+                (_REWRITE, {"rows": batch, "max_sources": settings.PROVENANCE_MAX_SOURCES})
+            ], name="provenance_migrate")
+            done += len(batch)
+            print(f"   migrated {done:,} relationships", flush=True)
+            batch.clear()
+
+        async for row in astream_cypher(_LEGACY, name="provenance_scan", access_mode=READ_ACCESS):
+            if not isinstance(row["text"], str) or not row["text"]:
+                continue
+            batch.append({"rid": row["rid"], "source": provenance.source_key(row["text"]),
+                          "text": row["text"], "source_id": row["source_id"]})
+            if len(batch) >= batch_size:
+                await flush()
+        if batch:
+            await flush()
+        if prune:
+            await prune_neo4j(batch_size)
+        _show("after", await _measure())
+        return done
+    finally:
+        await close_async_driver()
+
+
+def migrate_snapshot(path: Path, dry_run: bool, prune: bool) -> int:
+    store = MemoryStore()
+    store.load(path)
+    before = path.stat().st_size
+    print(f"   before  {before:,} bytes, {store.edge_count:,} edges, {len(store.sources):,} sources")
+    if dry_run:
+        return 0
+    done = store.compact_provenance()
+    if prune:
+        print(f"   pruned {store.prune_sources():,} uncited sources")
+    after = store.snapshot(path)
+    print(f"   after   {after:,} bytes, {len(store.sources):,} sources "
+          f"({100 * (1 - after / before):.1f}% smaller)")
+    return done
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--batch-size", type=int, default=1000, help="relationships per write transaction")
+    ap.add_argument("--snapshot", type=Path, help="migrate a memory-store snapshot instead of Neo4j")
+    ap.add_argument("--dry-run", action="store_true", help="only report the sizes")
+    ap.add_argument("--prune", action="store_true", help="also delete sources no relationship cites")
+    args = ap.parse_args()
+
+    if args.snapshot:
+        done = migrate_snapshot(args.snapshot, args.dry_run, args.prune)
+    else:
+        done = asyncio.run(migrate_neo4j(args.batch_size, args.dry_run, args.prune))
+    print(f"Done: {done:,} relationships rewritten.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
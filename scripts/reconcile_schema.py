@@ -0,0 +1,66 @@
+# scripts/reconcile_schema.py
+"""
+Create the Neo4j constraints and indexes the model enums call for.
+
+Runs ``app.graph.schema_reconciler.reconcile`` once: compares what
+``NodeLabel``/``RelType`` (and SCHEMA_FULLTEXT_NAMES / SCHEMA_REL_INDEXES)
+need with the database, creates what is missing and waits for the new
+indexes to come online. Nothing is ever dropped; constraints and indexes on
+labels the model lacks are listed as extra. The app does the same at
+startup with SCHEMA_RECONCILE=apply (the default, check, only logs).
+
+--print writes the statements without connecting (that is how
+data/seeds/constraints.cypher is generated).
+
+Usage:
+    python scripts/reconcile_schema.py [--dry-run] [--no-wait] [--timeout 300]
+    python scripts/reconcile_schema.py --print > data/seeds/constraints.cypher
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+from app.graph import schema_reconciler  # noqa: E402
+from app.services.neo4j_async import close_async_driver, warm_up_async_driver  # noqa: E402
+
+
+async def run(apply: bool, wait: bool, timeout, items) -> int:
+    await warm_up_async_driver(2)  # fail fast if unreachable
+    try:
+        report = await schema_reconciler.reconcile(apply=apply, wait=wait, timeout=timeout, items=items)
+    finally:
+        await close_async_driver()
+    print(json.dumps(report.as_dict(), indent=2))
+    if report.failed or (not apply and report.missing):
+        return 1
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--dry-run", action="store_true", help="only report what is missing (exit 1 if any)")
+    ap.add_argument("--no-wait", action="store_true", help="do not wait for new indexes to be ONLINE")
+    ap.add_argument("--timeout", type=float, help="seconds to wait (default SCHEMA_WAIT_TIMEOUT)")
+    ap.add_argument("--fulltext", action="store_true", default=None,
+                    help="include the fulltext name index (default SCHEMA_FULLTEXT_NAMES)")
+    ap.add_argument("--rel-indexes", help="TYPE.prop,... (default SCHEMA_REL_INDEXES)")
+    ap.add_argument("--print", action="store_true", help="print the Cypher and exit")
+    args = ap.parse_args()
+
+    items = schema_reconciler.required(fulltext=args.fulltext, rel_indexes=args.rel_indexes)
+    if args.print:
+        print("// Generated by scripts/reconcile_schema.py --print from app.models.graph; do not edit.")
+        for item in items:
+            print(item.cypher() + ";")
+        return 0
+    return asyncio.run(run(not args.dry_run, not args.no_wait, args.timeout, items))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
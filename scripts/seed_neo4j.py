@@ -1,52 +1,23 @@
 # scripts/seed_neo4j.py
-import os
-from dotenv import load_dotenv
-from neo4j import GraphDatabase
+"""Apply the bundled seed files; a thin wrapper around scripts/load_graph.py."""
+import asyncio
+import sys
+from pathlib import Path
 
-load_dotenv(override=True)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
 
-uri = os.getenv("NEO4J_URI", "")
-user = os.getenv("NEO4J_USER", "neo4j")
-pwd  = os.getenv("NEO4J_PASSWORD", "")
+from load_graph import _summary, load  # noqa: E402
 
-print("Using URI:", uri)
-print("User:", user)
-
-driver = GraphDatabase.driver(uri, auth=(user, pwd))
-
-def cypher_statements_from_file(path: str):
-    """
-    Yield individual Cypher statements.
-    - Joins multi-line statements.
-    - Splits on trailing ';' (Browser style).
-    - Skips empty lines and comments starting with // or #.
-    """
-    buf = []
-    with open(path, "r", encoding="utf-8") as f:
-        for raw in f:
-            line = raw.strip()
-            if not line or line.startswith("//") or line.startswith("#"):
-                continue
-            buf.append(line)
-            if line.endswith(";"):
-                stmt = " ".join(buf).rstrip(";").strip()
-                if stmt:
-                    yield stmt
-                buf = []
-    # last statement (no semicolon at EOF)
-    if buf:
-        stmt = " ".join(buf).rstrip(";").strip()
-        if stmt:
-            yield stmt
+from app.core.config import settings  # noqa: E402
 
 files = ["data/seeds/constraints.cypher", "data/seeds/seed_core.cypher"]
+root = Path(__file__).resolve().parents[1]
 
-with driver.session() as s:
-    for path in files:
-        print(f"→ Reading {path}")
-        for stmt in cypher_statements_from_file(path):
-            print("   - RUN:", stmt[:100] + ("..." if len(stmt) > 100 else ""))
-            s.run(stmt)
+print("Using URI:", settings.NEO4J_URI)
+print("User:", settings.NEO4J_USER)
+for path in files:
+    print(f"→ Reading {path}")
 
-driver.close()
+report = asyncio.run(load([root / f for f in files], checkpoint=""))
+_summary(report)
 print("Done.")